@@ -24,17 +24,43 @@ logger = logging.getLogger(__name__)
 
 import httpx as _httpx
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 
 from dashboard import settings
-from dashboard.orchestration_db import get_job_counts, get_outbox_stats
+from dashboard.llamacpp_sweep import LlamacppSweep, OpsControllerClient, SweepBenchmark, SweepRunner, build_matrix
+from dashboard.load_benchmark import (
+    GatewaySender,
+    LoadBenchmarkRunner,
+    LoadBenchmarkSpec,
+    RequestResult,
+    post_chat_completion,
+    stream_chat_completion,
+)
+from dashboard.metrics import HTTP_REQUEST_SECONDS, observe_model_sample
+from dashboard.metrics import render as render_metrics
+from dashboard.orchestration_db import (
+    close_connections,
+    connection_stats,
+    get_job_counts,
+    get_job_phase_stats,
+    get_outbox_stats,
+)
+from dashboard.outbox_delivery import read_outbox_metrics
 from dashboard.routes_hub import router as hub_router
+from dashboard.routes_orchestration import (
+    invalidate_readiness,
+    start_readiness_monitor,
+    stop_readiness_monitor,
+)
 from dashboard.routes_orchestration import router as orchestration_router
 from dashboard.services_catalog import OPS_SERVICE_MAP
 from dashboard.settings import AUTH_REQUIRED as _AUTH_REQUIRED
 from dashboard.settings import DASHBOARD_AUTH_TOKEN
+from dashboard.throughput_flusher import ThroughputFlusher
+from dashboard.throughput_history import HISTORY_FILE_NAME, ThroughputHistory, ThroughputSample
+from dashboard.throughput_store import ThroughputStore
 
 
 async def _read_json_async(path: Path) -> dict:
@@ -76,11 +102,19 @@ async def _lifespan(_app: FastAPI):
         timeout=30.0,
         limits=_httpx.Limits(max_connections=100, max_keepalive_connections=20),
     )
+    start_readiness_monitor()
+    _throughput_flusher.start()
     try:
         yield
     finally:
+        await _load_benchmark_runner.stop()
+        await _sweep_runner.stop()
+        await _throughput_flusher.stop()
+        await stop_readiness_monitor()
         await _http_client.aclose()
         _http_client = None
+        close_connections()
+        _throughput_history.close()
 
 
 app = FastAPI(title="Ordo AI Stack Dashboard", version="1.0.0", lifespan=_lifespan)
@@ -163,9 +197,10 @@ async def security_headers_middleware(request: Request, call_next):
 
 @app.middleware("http")
 async def auth_middleware(request: Request, call_next):
-    """Require auth for /api/* except health/hub read-only endpoints."""
+    """Require auth for /api/* (except health/hub read-only endpoints) and /metrics."""
     path = request.url.path
-    if not path.startswith("/api/"):
+    # /metrics takes the same Bearer token as /api/*, as the ops-controller's does.
+    if not path.startswith("/api/") and path != "/metrics":
         return await call_next(request)
     if path in (
         "/api/health",
@@ -178,22 +213,47 @@ async def auth_middleware(request: Request, call_next):
         "/api/orchestration/readiness",
     ):
         return await call_next(request)
-    # /api/throughput/record: requires THROUGHPUT_RECORD_TOKEN when set (model-gateway internal; PRD §3.E)
-    if path == "/api/throughput/record":
+    # /api/throughput/record[/batch]: requires THROUGHPUT_RECORD_TOKEN when set (model-gateway internal; PRD §3.E)
+    if path in ("/api/throughput/record", "/api/throughput/record/batch"):
         token = os.environ.get("THROUGHPUT_RECORD_TOKEN", "").strip()
         if token and not hmac.compare_digest(request.headers.get("X-Throughput-Token", ""), token):
             return JSONResponse(status_code=401, content={"detail": "Invalid or missing X-Throughput-Token"})
         return await call_next(request)
-    if _AUTH_REQUIRED and not _verify_auth(request):
+    caller = _verify_auth(request)
+    if _AUTH_REQUIRED and not caller:
         logger.warning(
             "AUTH_FAIL path=%s method=%s src=%s",
             path, request.method,
             request.client.host if request.client else "unknown",
         )
         return JSONResponse(status_code=401, content={"detail": "Bearer token required"})
+    # Proxy-authenticated identity (email), e.g. the fair-share key for queued jobs
+    request.state.caller = caller if isinstance(caller, str) else None
     return await call_next(request)
 
 
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    """Time every request into ``http_request_duration_seconds`` (labelled by route template, not raw path)."""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        template = getattr(route, "path", None) or "unmatched"
+        HTTP_REQUEST_SECONDS.labels(request.method, template, str(status)).observe(time.perf_counter() - started)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint. Bearer token required when auth is (``authorization`` in the scrape config)."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 MODEL_GATEWAY_URL = os.environ.get("MODEL_GATEWAY_URL", "http://model-gateway:11435").rstrip("/")
 MODEL_GATEWAY_API_KEY = os.environ.get("MODEL_GATEWAY_API_KEY", os.environ.get("LITELLM_MASTER_KEY", "local")).strip()
 COMFYUI_URL = os.environ.get("COMFYUI_URL", "http://comfyui:8188").rstrip("/")
@@ -1303,6 +1363,7 @@ async def mcp_add(req: McpAddRequest):
     servers.append(server)
     _write_mcp_servers(servers)
     logger.info("MCP_SERVER_ADDED server=%s", server)
+    invalidate_readiness()
     return {"status": "added", "servers": servers}
 
 
@@ -1320,19 +1381,25 @@ async def mcp_remove(req: McpRemoveRequest):
         raise HTTPException(status_code=400, detail="Cannot remove last server. Add another first.")
     _write_mcp_servers(servers)
     logger.info("MCP_SERVER_REMOVED server=%s", server)
+    invalidate_readiness()
     return {"status": "removed", "servers": servers}
 
 
 # --- Token Throughput ---
 
-# In-memory store: model -> list of output_tokens_per_sec (rolling, max 500)
-_throughput_samples: dict[str, list[float]] = {}
-_ttft_samples: dict[str, list[float]] = {}
-_MAX_SAMPLES_PER_MODEL = 500
-_MAX_TRACKED_MODELS = 50
+# In-memory store: model -> bounded window of output_tokens_per_sec / TTFT samples with sketched percentiles
+_MAX_SAMPLES_PER_MODEL = int(os.environ.get("THROUGHPUT_MAX_SAMPLES_PER_MODEL", "4096"))
+_MAX_TRACKED_MODELS = int(os.environ.get("THROUGHPUT_MAX_TRACKED_MODELS", "256"))
+_throughput = ThroughputStore(max_samples=_MAX_SAMPLES_PER_MODEL, max_models=_MAX_TRACKED_MODELS)
 
 # Last benchmark result (persists across page refresh until dashboard restart)
 _last_benchmark: dict | None = None
+# Completed load-benchmark sweeps (newest last), persisted with _last_benchmark for comparison
+_load_benchmarks: list[dict] = []
+_MAX_LOAD_BENCHMARKS = 10
+# llama.cpp config sweep reports (newest last)
+_sweep_reports: list[dict] = []
+_MAX_SWEEP_REPORTS = 5
 
 # Service usage: list of { model, service, tps, ts } for "which service uses which model"
 _service_usage: list[dict] = []
@@ -1341,67 +1408,74 @@ _MAX_SERVICE_USAGE = 500
 DASHBOARD_DATA_PATH = Path(os.environ.get("DASHBOARD_DATA_PATH", "./data/dashboard")).resolve()
 DASHBOARD_DATA_PATH.mkdir(parents=True, exist_ok=True)
 _THROUGHPUT_FILE = DASHBOARD_DATA_PATH / "throughput.json"
+# Long-term history: raw samples plus 1m / 1h rollups (GET /api/throughput/history)
+_throughput_history = ThroughputHistory(
+    DASHBOARD_DATA_PATH / HISTORY_FILE_NAME,
+    raw_retention_sec=float(os.environ.get("THROUGHPUT_HISTORY_RAW_DAYS", "2")) * 86400,
+    minute_retention_sec=float(os.environ.get("THROUGHPUT_HISTORY_1M_DAYS", "14")) * 86400,
+    hour_retention_sec=float(os.environ.get("THROUGHPUT_HISTORY_1H_DAYS", "400")) * 86400,
+)
 
 
 def _load_throughput_state() -> None:
-    """Load throughput samples and last benchmark from disk (R4)."""
-    global _throughput_samples, _ttft_samples, _last_benchmark, _service_usage
+    """Rebuild the sample windows from history and load benchmarks from disk (R4)."""
+    global _last_benchmark, _load_benchmarks, _service_usage, _sweep_reports
+    try:
+        _throughput.load_samples(_throughput_history.recent_samples(_MAX_SAMPLES_PER_MODEL, _MAX_TRACKED_MODELS))
+    except Exception as e:
+        logger.warning("Throughput window rebuild from history failed: %s", e)
     if not _THROUGHPUT_FILE.exists():
         return
     try:
         data = json.loads(_THROUGHPUT_FILE.read_text(encoding="utf-8"))
-        _throughput_samples = {k: v for k, v in (data.get("samples") or {}).items() if isinstance(v, list)}
-        _ttft_samples = {k: v for k, v in (data.get("ttft_samples") or {}).items() if isinstance(v, list)}
+        if not len(_throughput) and data.get("samples"):
+            # Files written before the windows were rebuilt from history still carry them.
+            _throughput.load_json(data["samples"], data.get("ttft_samples") or {})
         _last_benchmark = data.get("last_benchmark") if isinstance(data.get("last_benchmark"), dict) else None
+        _load_benchmarks = [b for b in (data.get("load_benchmarks") or []) if isinstance(b, dict)][-_MAX_LOAD_BENCHMARKS:]
+        _sweep_reports = [r for r in (data.get("sweep_reports") or []) if isinstance(r, dict)][-_MAX_SWEEP_REPORTS:]
         _service_usage = [u for u in (data.get("service_usage") or []) if isinstance(u, dict)][-_MAX_SERVICE_USAGE:]
     except Exception as e:
         logger.warning("Throughput state load failed: %s", e)
 
 
-def _save_throughput_state() -> None:
-    """Persist throughput state to disk via atomic write-then-rename."""
-    try:
-        _THROUGHPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
-        tmp = _THROUGHPUT_FILE.with_suffix(".json.tmp")
-        tmp.write_text(json.dumps({
-            "samples": _throughput_samples,
-            "ttft_samples": _ttft_samples,
-            "last_benchmark": _last_benchmark,
-            "service_usage": _service_usage[-_MAX_SERVICE_USAGE:],
-        }), encoding="utf-8")
-        tmp.replace(_THROUGHPUT_FILE)
-    except Exception as e:
-        logger.warning("Throughput state save failed: %s", e)
-
-
-_throughput_last_save: float = 0.0
-_THROUGHPUT_SAVE_INTERVAL: float = 5.0
+def _throughput_snapshot() -> dict:
+    """Copy of the persisted throughput state; taken under _state_lock, serialized off the loop.
 
+    Sample windows are not included: history has every sample and rebuilds them at startup.
+    """
+    with _state_lock:
+        return {
+            "last_benchmark": dict(_last_benchmark) if _last_benchmark else None,
+            "load_benchmarks": list(_load_benchmarks),
+            "sweep_reports": list(_sweep_reports),
+            "service_usage": list(_service_usage[-_MAX_SERVICE_USAGE:]),
+        }
 
-def _maybe_save_throughput() -> None:
-    """Debounced save: write at most every _THROUGHPUT_SAVE_INTERVAL seconds."""
-    global _throughput_last_save
-    now = time.monotonic()
-    if now - _throughput_last_save >= _THROUGHPUT_SAVE_INTERVAL:
-        _save_throughput_state()
-        _throughput_last_save = now
 
+def _write_throughput_state(snapshot: dict) -> None:
+    """Persist throughput state to disk via atomic write-then-rename."""
+    _THROUGHPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _THROUGHPUT_FILE.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(snapshot), encoding="utf-8")
+    tmp.replace(_THROUGHPUT_FILE)
+
+
+# Disk writes (throughput.json and history rows) happen on a background task, never in handlers.
+_throughput_flusher = ThroughputFlusher(
+    _throughput_snapshot,
+    _write_throughput_state,
+    _throughput_history,
+    state_interval=float(os.environ.get("THROUGHPUT_SAVE_INTERVAL_SEC", "5")),
+)
 
 _load_throughput_state()
 
 
-def _percentile(sorted_arr: list[float], p: float) -> float:
-    """Compute percentile (0–100). Returns 0 if empty."""
-    if not sorted_arr:
-        return 0.0
-    k = (len(sorted_arr) - 1) * (p / 100)
-    f = int(k)
-    c = f + 1 if f + 1 < len(sorted_arr) else f
-    return sorted_arr[f] + (k - f) * (sorted_arr[c] - sorted_arr[f]) if c > f else sorted_arr[f]
-
-
 class ThroughputBenchmarkRequest(BaseModel):
     model: str = ""
+    stream: bool = True  # time TTFT and inter-token gaps from SSE chunks
+    max_tokens: int = Field(default=128, ge=2, le=4096)
 
 
 class ThroughputRecordRequest(BaseModel):
@@ -1411,41 +1485,88 @@ class ThroughputRecordRequest(BaseModel):
     ttft_ms: float = Field(default=0.0, ge=0, le=1e6)
 
 
-@app.post("/api/throughput/record")
-async def throughput_record(req: ThroughputRecordRequest):
-    """Record a throughput sample from real-world usage (e.g. model gateway). Fire-and-forget."""
-    model = req.model.strip()
-    if not model or req.output_tokens_per_sec <= 0:
-        return {"ok": True}
+class ThroughputBatchItem(ThroughputRecordRequest):
+    ts: float | None = None  # epoch seconds the call finished (client-side buffering); default: arrival
+
+
+_throughput_batch_adapter = TypeAdapter(list[ThroughputBatchItem])
+_MAX_THROUGHPUT_BATCH = 5000
+# Buffered timestamps older than this (or in the future) are clamped to arrival time.
+_MAX_THROUGHPUT_SAMPLE_AGE_SEC = 3600.0
+
+
+def _ingest_throughput(items: list[ThroughputRecordRequest], now: float) -> int:
+    """Add samples to the live windows, service usage, and history with one lock acquisition."""
+    accepted: list[ThroughputSample] = []
+    tracked_any = False
     with _state_lock:
-        if model not in _throughput_samples:
-            if len(_throughput_samples) >= _MAX_TRACKED_MODELS:
-                return {"ok": True}
-            _throughput_samples[model] = []
-        _throughput_samples[model].append(req.output_tokens_per_sec)
-        if len(_throughput_samples[model]) > _MAX_SAMPLES_PER_MODEL:
-            _throughput_samples[model] = _throughput_samples[model][-_MAX_SAMPLES_PER_MODEL:]
-        if req.ttft_ms > 0 and (model in _ttft_samples or len(_ttft_samples) < _MAX_TRACKED_MODELS):
-            if model not in _ttft_samples:
-                _ttft_samples[model] = []
-            _ttft_samples[model].append(req.ttft_ms)
-            if len(_ttft_samples[model]) > _MAX_SAMPLES_PER_MODEL:
-                _ttft_samples[model] = _ttft_samples[model][-_MAX_SAMPLES_PER_MODEL:]
-        # Service usage (which service is taxing which model)
-        service = (req.service or "unknown").strip()[:64]
-        _service_usage.append({
-            "model": model,
-            "service": service,
-            "tps": round(req.output_tokens_per_sec, 1),
-            "ttft_ms": round(req.ttft_ms, 1) if req.ttft_ms > 0 else 0.0,
-            "ts": time.time(),
-        })
+        for req in items:
+            model = req.model.strip()
+            if not model or req.output_tokens_per_sec <= 0:
+                continue
+            service = (req.service or "unknown").strip()[:64]
+            ts = getattr(req, "ts", None)
+            if ts is None or not (now - _MAX_THROUGHPUT_SAMPLE_AGE_SEC <= ts <= now):
+                ts = now
+            accepted.append(ThroughputSample(ts, model, service, req.output_tokens_per_sec, req.ttft_ms))
+            if not _throughput.record(model, req.output_tokens_per_sec, req.ttft_ms):
+                continue
+            tracked_any = True
+            observe_model_sample(model, req.output_tokens_per_sec, req.ttft_ms)
+            # Service usage (which service is taxing which model)
+            _service_usage.append({
+                "model": model,
+                "service": service,
+                "tps": round(req.output_tokens_per_sec, 1),
+                "ttft_ms": round(req.ttft_ms, 1) if req.ttft_ms > 0 else 0.0,
+                "ts": ts,
+            })
         if len(_service_usage) > _MAX_SERVICE_USAGE:
             _service_usage[:] = _service_usage[-_MAX_SERVICE_USAGE:]
-        _maybe_save_throughput()
+    if tracked_any:
+        _throughput_flusher.mark_dirty()
+    # History is on disk, so it is not bound by the in-memory model cap.
+    _throughput_flusher.add_samples(accepted)
+    return len(accepted)
+
+
+@app.post("/api/throughput/record")
+async def throughput_record(req: ThroughputRecordRequest):
+    """Record a throughput sample from real-world usage (e.g. model gateway). Fire-and-forget."""
+    _ingest_throughput([req], time.time())
     return {"ok": True}
 
 
+@app.post("/api/throughput/record/batch")
+async def throughput_record_batch(request: Request):
+    """Record many samples at once: a JSON array of record bodies, or NDJSON (one per line).
+
+    Items may carry ``ts`` (epoch seconds) so client-side buffering keeps call times.
+    Returns how many samples were accepted (empty model / zero tps are skipped).
+    """
+    body = await request.body()
+    ctype = request.headers.get("content-type", "")
+    try:
+        if "ndjson" in ctype or "jsonlines" in ctype:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body or b"[]")
+            if isinstance(items, dict):
+                items = items.get("samples", [])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON body")
+    if len(items) > _MAX_THROUGHPUT_BATCH:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {_MAX_THROUGHPUT_BATCH} samples")
+    try:
+        parsed = _throughput_batch_adapter.validate_python(items)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False))
+    accepted = _ingest_throughput(parsed, time.time())
+    return {"ok": True, "accepted": accepted, "received": len(parsed)}
+
+
 @app.get("/api/throughput/service-usage")
 async def throughput_service_usage():
     """Return recent service usage: which service used which model (from model gateway traffic)."""
@@ -1490,60 +1611,66 @@ async def throughput_service_usage():
 @app.get("/api/throughput/stats")
 async def throughput_stats():
     """Return per-model throughput stats: peak, p50, p95, p99, latest, sample_count. Includes last_benchmark if available."""
-    result: dict[str, dict] = {}
     with _state_lock:
-        snapshot = {m: list(s) for m, s in _throughput_samples.items()}
-        ttft_snapshot = {m: list(s) for m, s in _ttft_samples.items()}
+        stats = _throughput.stats()
         benchmark = dict(_last_benchmark) if _last_benchmark else None
-    for model, samples in snapshot.items():
-        if not samples:
-            continue
-        sorted_s = sorted(samples)
-        ttfts = ttft_snapshot.get(model, [])
-        sorted_ttfts = sorted(ttfts)
-        result[model] = {
-            "latest": round(samples[-1], 1),
-            "peak": round(max(samples), 1),
-            "p50": round(_percentile(sorted_s, 50), 1),
-            "p95": round(_percentile(sorted_s, 95), 1),
-            "p99": round(_percentile(sorted_s, 99), 1),
-            "ttft_p50_ms": round(_percentile(sorted_ttfts, 50), 1) if sorted_ttfts else 0.0,
-            "ttft_p95_ms": round(_percentile(sorted_ttfts, 95), 1) if sorted_ttfts else 0.0,
-            "sample_count": len(samples),
-        }
+    result = {
+        model: {k: s[k] for k in ("latest", "peak", "p50", "p95", "p99", "ttft_p50_ms", "ttft_p95_ms", "sample_count")}
+        for model, s in stats.items()
+    }
     out: dict = {"models": result, "ok": True}
     if benchmark:
         out["last_benchmark"] = benchmark
     return out
 
 
+@app.get("/api/throughput/history")
+async def throughput_history(
+    model: str | None = None,
+    service: str | None = None,
+    start: float | None = None,
+    end: float | None = None,
+    resolution: str = "auto",
+):
+    """Tokens/sec and TTFT over time per model. ``start`` / ``end`` are epoch seconds (default: last 24h).
+
+    ``resolution`` is raw, 1m, 1h, or auto (raw ≤ 1h span, 1m ≤ 2 days, else 1h).
+    """
+    end = time.time() if end is None else end
+    start = end - 86400 if start is None else start
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    await _throughput_flusher.flush_history()
+    try:
+        data = await asyncio.to_thread(
+            _throughput_history.query, start=start, end=end, model=model, service=service, resolution=resolution
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"ok": True, **data}
+
+
 @app.get("/api/performance/summary")
 async def performance_summary():
     """Compact performance summary for dashboards, automation, and audits."""
     with _state_lock:
-        snapshot = {m: list(s) for m, s in _throughput_samples.items()}
-        ttft_snapshot = {m: list(s) for m, s in _ttft_samples.items()}
+        stats = _throughput.stats()
         benchmark = dict(_last_benchmark) if _last_benchmark else None
+        load_benchmark = _load_benchmarks[-1] if _load_benchmarks else None
         recent_usage = list(_service_usage)
     now = time.time()
     recent_usage = [u for u in recent_usage if (now - u["ts"]) < 86400]
-    top_models = []
-    for model, samples in snapshot.items():
-        if not samples:
-            continue
-        sorted_s = sorted(samples)
-        ttfts = ttft_snapshot.get(model, [])
-        sorted_ttfts = sorted(ttfts)
-        top_models.append(
-            {
-                "model": model,
-                "latest_tps": round(samples[-1], 1),
-                "p95_tps": round(_percentile(sorted_s, 95), 1),
-                "latest_ttft_ms": round(ttfts[-1], 1) if ttfts else 0.0,
-                "p95_ttft_ms": round(_percentile(sorted_ttfts, 95), 1) if sorted_ttfts else 0.0,
-                "sample_count": len(samples),
-            }
-        )
+    top_models = [
+        {
+            "model": model,
+            "latest_tps": s["latest"],
+            "p95_tps": s["p95"],
+            "latest_ttft_ms": s["latest_ttft_ms"],
+            "p95_ttft_ms": s["ttft_p95_ms"],
+            "sample_count": s["sample_count"],
+        }
+        for model, s in stats.items()
+    ]
     top_models.sort(key=lambda item: item["sample_count"], reverse=True)
     try:
         rag = await asyncio.wait_for(rag_status(), timeout=2.0)
@@ -1557,11 +1684,15 @@ async def performance_summary():
             "tracked_models": len(top_models),
             "top_models": top_models[:10],
             "last_benchmark": benchmark,
+            "last_load_benchmark": load_benchmark,
             "service_events_24h": len(recent_usage),
         },
         "orchestration": {
             "jobs": get_job_counts(DASHBOARD_DATA_PATH),
+            "job_phases": get_job_phase_stats(DASHBOARD_DATA_PATH),
             "outbox": get_outbox_stats(DASHBOARD_DATA_PATH),
+            "outbox_delivery": read_outbox_metrics(DASHBOARD_DATA_PATH),
+            "db_connections": connection_stats(),
         },
         "rag": rag,
     }
@@ -1593,91 +1724,283 @@ def _is_embedding_model(name: str) -> bool:
     return any(p in n for p in _EMBED_MODEL_PATTERNS)
 
 
+_BENCHMARK_PROMPT = "Count from 1 to 200, separated by spaces. Output only the numbers."
+
+
 @app.post("/api/throughput/benchmark")
 async def throughput_benchmark(req: ThroughputBenchmarkRequest):
-    """Run a quick benchmark via model-gateway /v1/chat/completions."""
+    """Run a quick benchmark via model-gateway /v1/chat/completions.
+
+    Streams by default: TTFT is the time to the first content chunk, inter-token latency
+    is the gap between chunks, and prefill and decode tokens/sec are reported separately
+    (llama.cpp ``timings`` when the gateway passes them through). ``stream: false`` sends
+    one non-streaming request; TTFT is then only known from server ``timings``.
+    """
     model = req.model.strip() or "llama3.2"
     if _is_embedding_model(model):
         raise HTTPException(
             status_code=400,
             detail=f"Model '{model}' is an embedding model and does not support text generation. Choose an LLM (e.g. llama3.2, deepseek-r1:7b).",
         )
-    prompt = "Say 'ok' and nothing else."
     url = f"{MODEL_GATEWAY_URL.rstrip('/')}/v1/chat/completions"
-    try:
-        started = time.perf_counter()
-        r = await _get_http_client().post(
-            url,
-            headers=_model_gateway_headers(),
-            json={
-                "model": model,
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 16,
-                "stream": False,
-            },
-            timeout=60.0,
-        )
-        elapsed_ms = (time.perf_counter() - started) * 1000
-        if r.status_code == 400:
-            try:
-                err = r.json()
-                error_obj = err.get("error", err)
-                if isinstance(error_obj, dict):
-                    msg = error_obj.get("message") or error_obj.get("error") or r.text or "Bad request"
-                else:
-                    msg = str(error_obj) or r.text or "Bad request"
-            except (ValueError, UnicodeDecodeError, KeyError):
-                msg = r.text or "Bad request"
-            raise HTTPException(status_code=400, detail=f"Model gateway: {msg}")
-        r.raise_for_status()
-        data = r.json()
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Model gateway request failed: {e}")
-
-    usage = data.get("usage", {}) if isinstance(data, dict) else {}
-    eval_count = int(usage.get("completion_tokens") or 0)
-    prompt_eval_count = int(usage.get("prompt_tokens") or 0)
-    elapsed_sec = max(elapsed_ms / 1000, 0.001)
+    body = {
+        "model": model,
+        "messages": [{"role": "user", "content": _BENCHMARK_PROMPT}],
+        "max_tokens": req.max_tokens,
+        "temperature": 0,
+    }
+    call = stream_chat_completion if req.stream else post_chat_completion
+    res = await call(_get_http_client(), url, _model_gateway_headers(), body, timeout=60.0)
+    if not res.ok:
+        status = 400 if res.error.startswith("HTTP 400") else 502
+        raise HTTPException(status_code=status, detail=f"Model gateway: {res.error}")
+
+    payload = _benchmark_payload(model, res, stream=req.stream)
+    ttft_ms = payload["ttft_ms"]
+    output_tokens_per_sec = payload["output_tokens_per_sec"]
+    # Store sample for stats (peak, percentiles); False at the model cap — payload is still returned
+    global _last_benchmark
+    with _state_lock:
+        if _throughput.record(model, output_tokens_per_sec, ttft_ms):
+            observe_model_sample(model, output_tokens_per_sec, ttft_ms)
+        _last_benchmark = payload
+    _throughput_flusher.mark_dirty()
+    _throughput_flusher.add_sample(ThroughputSample(time.time(), model, "benchmark", output_tokens_per_sec, ttft_ms))
+    return payload
 
-    # Prefer server-reported eval speed when available (avoids network overhead inflation)
-    timings = data.get("timings", {}) if isinstance(data, dict) else {}
-    if isinstance(timings, dict) and timings.get("predicted_per_second"):
-        output_tokens_per_sec = float(timings["predicted_per_second"])
-    else:
-        output_tokens_per_sec = eval_count / elapsed_sec if eval_count > 0 else 0
-    input_tokens_per_sec = prompt_eval_count / elapsed_sec if prompt_eval_count > 0 else 0
 
-    # Store sample for stats (peak, percentiles)
-    with _state_lock:
-        if model not in _throughput_samples:
-            if len(_throughput_samples) >= _MAX_TRACKED_MODELS:
-                pass  # cap reached — skip storage but still return payload
-            else:
-                _throughput_samples[model] = []
-        if model in _throughput_samples:
-            _throughput_samples[model].append(output_tokens_per_sec)
-            if len(_throughput_samples[model]) > _MAX_SAMPLES_PER_MODEL:
-                _throughput_samples[model] = _throughput_samples[model][-_MAX_SAMPLES_PER_MODEL:]
-        _maybe_save_throughput()
-
-    payload = {
+def _benchmark_payload(model: str, res: RequestResult, *, stream: bool) -> dict:
+    elapsed_sec = max(res.duration_s, 0.001)
+    # Decode rate excludes prefill; wall clock is the fallback when neither timings nor chunk times exist
+    output_tokens_per_sec = res.decode_tps or (res.output_tokens / elapsed_sec if res.output_tokens else 0.0)
+    input_tokens_per_sec = res.prefill_tps or (res.prompt_tokens / elapsed_sec if res.prompt_tokens else 0.0)
+    gaps = sorted(g * 1000 for g in res.itl_s)
+    return {
         "ok": True,
         "model": model,
-        "prompt_tokens": prompt_eval_count,
-        "output_tokens": eval_count,
+        "stream": stream,
+        "prompt_tokens": res.prompt_tokens,
+        "output_tokens": res.output_tokens,
         "output_tokens_per_sec": round(output_tokens_per_sec, 1),
         "input_tokens_per_sec": round(input_tokens_per_sec, 1),
-        "eval_duration_ms": round(elapsed_ms, 1),
+        "prefill_tokens_per_sec": round(res.prefill_tps, 1),
+        "decode_tokens_per_sec": round(res.decode_tps, 1),
+        "ttft_ms": round(res.ttft_s * 1000, 1) if res.ttft_s is not None else 0.0,
+        "itl_ms_p50": round(gaps[len(gaps) // 2], 2) if gaps else 0.0,
+        "itl_ms_p95": round(gaps[min(int(len(gaps) * 0.95), len(gaps) - 1)], 2) if gaps else 0.0,
+        "itl_ms_max": round(gaps[-1], 2) if gaps else 0.0,
+        "eval_duration_ms": round(elapsed_sec * 1000, 1),
         "load_duration_ms": 0.0,
-        "total_duration_ms": round(elapsed_ms, 1),
+        "total_duration_ms": round(elapsed_sec * 1000, 1),
     }
-    global _last_benchmark
+
+
+class LoadBenchmarkRequest(BaseModel):
+    model: str = Field(default="", max_length=256)
+    concurrency: list[int] = Field(default=[1, 2, 4], min_length=1, max_length=16)
+    prompt_tokens: list[int] = Field(default=[128, 2048], min_length=1, max_length=16)
+    output_tokens: list[int] = Field(default=[128], min_length=1, max_length=8)
+    requests_per_level: int = Field(default=0, ge=0, le=1000)  # 0: 2 × concurrency (min 4)
+    stream: bool = True
+    near_ctx: bool = False  # add a prompt length at 90% of the per-slot context
+    ignore_eos: bool = False  # llama.cpp: always generate the full output budget
+    timeout_sec: float = Field(default=600.0, gt=0, le=3600)
+
+
+# One sweep at a time: concurrent sweeps against the same llama.cpp slots would measure each other.
+_load_benchmark_runner = LoadBenchmarkRunner(
+    on_complete=lambda summary: _save_load_benchmark(summary),
+    on_sample=lambda model, res: _record_load_sample(model, res),
+)
+
+
+def _save_load_benchmark(summary: dict) -> None:
     with _state_lock:
-        _last_benchmark = payload
-        _save_throughput_state()
-    return payload
+        _load_benchmarks.append(summary)
+        del _load_benchmarks[:-_MAX_LOAD_BENCHMARKS]
+    _throughput_flusher.mark_dirty()
+
+
+def _record_load_sample(model: str, res: RequestResult) -> None:
+    """Feed a load-test request's decode rate and TTFT into the live stats and history."""
+    if res.decode_tps <= 0:
+        return
+    ttft_ms = res.ttft_s * 1000 if res.ttft_s is not None else 0.0
+    sample = ThroughputRecordRequest(
+        model=model,
+        output_tokens_per_sec=min(res.decode_tps, 1e6),
+        service="load-benchmark",
+        ttft_ms=min(ttft_ms, 1e6),
+    )
+    _ingest_throughput([sample], time.time())
+
+
+def _load_benchmark_spec(req: LoadBenchmarkRequest) -> LoadBenchmarkSpec:
+    model = req.model.strip() or "local-chat"
+    if _is_embedding_model(model):
+        raise HTTPException(status_code=400, detail=f"Model '{model}' is an embedding model and cannot be benchmarked.")
+    if any(not 1 <= c <= 256 for c in req.concurrency):
+        raise HTTPException(status_code=400, detail="concurrency levels must be between 1 and 256")
+    if any(not 1 <= n <= 1_048_576 for n in req.prompt_tokens):
+        raise HTTPException(status_code=400, detail="prompt_tokens must be between 1 and 1048576")
+    if any(not 1 <= n <= 32768 for n in req.output_tokens):
+        raise HTTPException(status_code=400, detail="output_tokens must be between 1 and 32768")
+    return LoadBenchmarkSpec(
+        model=model,
+        concurrency=req.concurrency,
+        prompt_tokens=req.prompt_tokens,
+        output_tokens=req.output_tokens,
+        requests_per_level=req.requests_per_level or max(2 * max(req.concurrency), 4),
+        stream=req.stream,
+        near_ctx=req.near_ctx,
+        ignore_eos=req.ignore_eos,
+        timeout_sec=req.timeout_sec,
+        ctx_size=int(os.environ.get("LLAMACPP_CTX_SIZE", "262144") or 262144),
+        parallel=int(os.environ.get("LLAMACPP_PARALLEL", "1") or 1),
+    )
+
+
+def _load_benchmark_sender(spec: LoadBenchmarkSpec) -> GatewaySender:
+    return GatewaySender(MODEL_GATEWAY_URL, _model_gateway_headers(), spec)
+
+
+@app.post("/api/throughput/benchmark/load", status_code=202)
+async def throughput_load_benchmark_start(req: LoadBenchmarkRequest):
+    """Start a load-test sweep (concurrency × prompt length × output length) in the background.
+
+    Poll ``GET /api/throughput/benchmark/load/{run_id}`` for progress and per-level TTFT,
+    inter-token latency, aggregate tokens/sec, and error rate.
+    """
+    spec = _load_benchmark_spec(req)
+    if _sweep_runner.running() is not None:
+        raise HTTPException(status_code=409, detail="A llama.cpp config sweep is running")
+    try:
+        run = _load_benchmark_runner.start(spec, _load_benchmark_sender)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"ok": True, "run_id": run["id"], "status": run["status"], "progress": run["progress"]}
+
+
+@app.get("/api/throughput/benchmark/load")
+async def throughput_load_benchmark_list():
+    """Recent load-test runs plus the saved sweeps and quick benchmark, for comparison."""
+    running = _load_benchmark_runner.running()
+    with _state_lock:
+        saved = list(_load_benchmarks)
+        last = dict(_last_benchmark) if _last_benchmark else None
+    runs = [{k: r[k] for k in ("id", "status", "model", "created_at", "finished_at", "progress")}
+            for r in _load_benchmark_runner.list()]
+    return {
+        "ok": True,
+        "running": running["id"] if running else None,
+        "runs": runs,
+        "saved": saved,
+        "last_benchmark": last,
+    }
+
+
+@app.get("/api/throughput/benchmark/load/{run_id}")
+async def throughput_load_benchmark_get(run_id: str):
+    run = _load_benchmark_runner.get(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Benchmark run not found")
+    return {"ok": True, **run}
+
+
+@app.post("/api/throughput/benchmark/load/{run_id}/cancel")
+async def throughput_load_benchmark_cancel(run_id: str):
+    if _load_benchmark_runner.get(run_id) is None:
+        raise HTTPException(status_code=404, detail="Benchmark run not found")
+    return {"ok": True, "cancelled": _load_benchmark_runner.cancel(run_id)}
+
+
+# --- llama.cpp config sweep (KV cache type × flash attention × parallel × mmap) ---
+
+LLAMACPP_URL = os.environ.get("LLAMACPP_URL", "http://llamacpp:8080")
+
+
+class LlamacppSweepRequest(BaseModel):
+    flash_attn: list[str] = Field(default=["on", "off"], min_length=1, max_length=3)
+    kv_cache_types: list[str] = Field(default=["f16", "q8_0", "q4_0"], min_length=1, max_length=16)
+    parallel: list[int] = Field(default=[1], min_length=1, max_length=4)
+    no_mmap: list[bool] = Field(default=[True], min_length=1, max_length=2)
+    prompt_tokens: int = Field(default=512, ge=1, le=131072)
+    output_tokens: int = Field(default=128, ge=1, le=4096)
+    requests_per_level: int = Field(default=8, ge=1, le=256)
+    ready_timeout_sec: float = Field(default=900.0, gt=0, le=3600)
+    apply_best: bool = False  # leave llamacpp on the recommended config instead of restoring .env
+    confirm: bool = False
+
+
+def _save_sweep_report(report: dict) -> None:
+    with _state_lock:
+        _sweep_reports.append(report)
+        del _sweep_reports[:-_MAX_SWEEP_REPORTS]
+    _throughput_flusher.mark_dirty()
+
+
+_sweep_runner = SweepRunner(on_complete=lambda report: _save_sweep_report(report))
+
+
+@app.post("/api/throughput/sweep", status_code=202)
+async def llamacpp_sweep_start(req: LlamacppSweepRequest):
+    """Benchmark llamacpp under each config combination (recreated via ops-controller) and recommend one.
+
+    Restarts llamacpp once per config, so it requires ``confirm: true``. The original
+    ``.env`` values are restored afterwards unless ``apply_best`` is set.
+    """
+    if not req.confirm:
+        raise HTTPException(status_code=400, detail="Sweep restarts llamacpp once per config. Set {\"confirm\": true} to proceed.")
+    if not OPS_CONTROLLER_TOKEN:
+        raise HTTPException(status_code=503, detail="OPS_CONTROLLER_TOKEN not configured")
+    try:
+        configs = build_matrix(req.flash_attn, req.kv_cache_types, req.parallel, req.no_mmap)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if _load_benchmark_runner.running() is not None:
+        raise HTTPException(status_code=409, detail="A load benchmark is running")
+    sweep = LlamacppSweep(
+        ops=OpsControllerClient(_ops_request),
+        llamacpp_url=LLAMACPP_URL,
+        configs=configs,
+        benchmark=SweepBenchmark(req.prompt_tokens, req.output_tokens, req.requests_per_level),
+        ready_timeout=req.ready_timeout_sec,
+        apply_best=req.apply_best,
+    )
+    try:
+        report = _sweep_runner.start(sweep)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"ok": True, "sweep_id": report["id"], "configs": report["configs"], "progress": report["progress"]}
+
+
+@app.get("/api/throughput/sweep")
+async def llamacpp_sweep_list():
+    """In-memory sweeps (with progress) and the saved reports."""
+    running = _sweep_runner.running()
+    with _state_lock:
+        saved = list(_sweep_reports)
+    runs = [{k: r[k] for k in ("id", "status", "created_at", "finished_at", "progress", "recommendation")}
+            for r in _sweep_runner.list()]
+    return {"ok": True, "running": running["id"] if running else None, "runs": runs, "saved": saved}
+
+
+@app.get("/api/throughput/sweep/{sweep_id}")
+async def llamacpp_sweep_get(sweep_id: str):
+    report = _sweep_runner.get(sweep_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+    return {"ok": True, **report}
+
+
+@app.post("/api/throughput/sweep/{sweep_id}/cancel")
+async def llamacpp_sweep_cancel(sweep_id: str):
+    """Stop after the current step; llamacpp is still restored to the original config."""
+    if _sweep_runner.get(sweep_id) is None:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+    return {"ok": True, "cancelled": _sweep_runner.cancel(sweep_id)}
 
 
 # --- Ops Controller proxy ---
@@ -1724,6 +2047,7 @@ async def ops_start(service_id: str, request: Request):
     )
     if code >= 400:
         raise HTTPException(status_code=code, detail=data.get("detail", data))
+    invalidate_readiness()
     return data
 
 
@@ -1736,6 +2060,7 @@ async def ops_stop(service_id: str, request: Request):
     )
     if code >= 400:
         raise HTTPException(status_code=code, detail=data.get("detail", data))
+    invalidate_readiness()
     return data
 
 
@@ -1748,6 +2073,7 @@ async def ops_restart(service_id: str, request: Request):
     )
     if code >= 400:
         raise HTTPException(status_code=code, detail=data.get("detail", data))
+    invalidate_readiness()
     return data
 
 
@@ -52,3 +52,43 @@ async def wait_for_outputs(
                 return entry
         await asyncio.sleep(poll_interval_sec)
     raise TimeoutError(f"ComfyUI history for {prompt_id} did not produce outputs within {max_wait_sec}s")
+
+
+class AsyncComfyUIClient:
+    """Long-lived async client for callers that keep many prompts in flight (the async worker).
+
+    The module-level helpers above open a fresh connection per call; this keeps one
+    pooled ``httpx.AsyncClient`` so hundreds of concurrent submits/lookups share
+    keep-alive connections.
+    """
+
+    def __init__(self, base_url: str, *, timeout: float = 30.0, max_connections: int = 100) -> None:
+        self.base_url = base_url.rstrip("/")
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def queue_prompt(self, workflow: dict[str, Any], client_id: str) -> str:
+        r = await self._client.post("/prompt", json={"prompt": workflow, "client_id": client_id})
+        r.raise_for_status()
+        data = r.json()
+        pid = data.get("prompt_id")
+        if not pid:
+            raise RuntimeError(f"ComfyUI /prompt missing prompt_id: {data!r}")
+        return str(pid)
+
+    async def history_entry(self, prompt_id: str) -> dict[str, Any] | None:
+        """One /history/{prompt_id} lookup; the entry once it has outputs, else None."""
+        r = await self._client.get(f"/history/{prompt_id}", timeout=15.0)
+        if r.status_code == 404:
+            return None
+        r.raise_for_status()
+        entry = r.json().get(prompt_id)
+        if isinstance(entry, dict) and entry.get("outputs"):
+            return entry
+        return None
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,284 @@
+"""Shared ComfyUI websocket listener: one /ws connection multiplexes every in-flight prompt.
+
+ComfyUI only sends prompt events (progress, executed, execution_success, …) to
+the websocket whose ``clientId`` matches the ``client_id`` the prompt was queued
+with, so every prompt submitted through one stream must use ``stream.client_id``.
+Uses the optional ``websockets`` package; without it ``start()`` returns False
+and callers keep polling /history. ``AsyncComfyUIEventStream`` is the same
+listener running as a task on an asyncio loop instead of a reader thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+_TERMINAL_ERRORS = {
+    "execution_error": "exception_message",
+    "execution_interrupted": None,
+}
+
+
+def execution_started_at(entry: dict[str, Any]) -> float | None:
+    """Epoch seconds of the ``execution_start`` message in a /history entry, if ComfyUI recorded one."""
+    status = entry.get("status")
+    messages = status.get("messages") if isinstance(status, dict) else None
+    for message in messages if isinstance(messages, list) else ():
+        if isinstance(message, list) and len(message) == 2 and message[0] == "execution_start":
+            ts = message[1].get("timestamp") if isinstance(message[1], dict) else None
+            if isinstance(ts, (int, float)):
+                return ts / 1000.0
+    return None
+
+
+class PromptWaiter:
+    """Completion state for one prompt, filled in by the stream's reader thread."""
+
+    def __init__(self, prompt_id: str) -> None:
+        self.prompt_id = prompt_id
+        self.outputs: dict[str, Any] = {}
+        self.error: str | None = None
+        self.progress: tuple[int, int] | None = None
+        self.first_progress_at: float | None = None
+        self._done = threading.Event()
+        self._done_async: asyncio.Event | None = None
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: float | None) -> bool:
+        """Block until the prompt finishes (successfully or not); True if it did."""
+        return self._done.wait(timeout)
+
+    async def wait_async(self, timeout: float | None) -> bool:
+        """Like ``wait`` but for a waiter fed by ``AsyncComfyUIEventStream`` on the same loop."""
+        if self._done.is_set():
+            return True
+        if self._done_async is None:
+            self._done_async = asyncio.Event()
+        try:
+            await asyncio.wait_for(self._done_async.wait(), timeout)
+        except TimeoutError:
+            return self._done.is_set()
+        return True
+
+    def _finish(self) -> None:
+        self._done.set()
+        if self._done_async is not None:
+            self._done_async.set()
+
+    def history_entry(self) -> dict[str, Any]:
+        """Outputs in the same shape as a /history/{prompt_id} entry (``execution_start`` included)."""
+        status: dict[str, Any] = {"status_str": "success", "completed": True}
+        if self.first_progress_at is not None:
+            start = {"prompt_id": self.prompt_id, "timestamp": int(self.first_progress_at * 1000)}
+            status["messages"] = [["execution_start", start]]
+        return {"outputs": dict(self.outputs), "status": status}
+
+
+class ComfyUIEventStream:
+    def __init__(self, base_url: str, client_id: str | None = None, *, max_untracked: int = 256) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.client_id = client_id or str(uuid.uuid4())
+        self._max_untracked = max_untracked
+        self._lock = threading.Lock()
+        self._waiters: OrderedDict[str, PromptWaiter] = OrderedDict()
+        self._tracked: set[str] = set()
+        self._connected = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._ws: Any = None
+
+    @property
+    def ws_url(self) -> str:
+        u = urlparse(self.base_url)
+        scheme = "wss" if u.scheme == "https" else "ws"
+        return f"{scheme}://{u.netloc}{u.path}/ws?clientId={self.client_id}"
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def start(self) -> bool:
+        try:
+            from websockets.sync.client import connect  # noqa: F401
+        except ImportError:
+            logger.warning("websockets not installed — ComfyUI completion tracking falls back to /history polling")
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="comfyui-events", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def wait_connected(self, timeout: float) -> bool:
+        return self._connected.wait(timeout)
+
+    # ── Prompt tracking ───────────────────────────────────────────────────────
+
+    def track(self, prompt_id: str) -> PromptWaiter:
+        """Register interest in a prompt. Events that arrived before this call are kept."""
+        with self._lock:
+            waiter = self._waiters.get(prompt_id)
+            if waiter is None:
+                waiter = self._waiters[prompt_id] = PromptWaiter(prompt_id)
+            self._tracked.add(prompt_id)
+            return waiter
+
+    def untrack(self, prompt_id: str) -> None:
+        with self._lock:
+            self._tracked.discard(prompt_id)
+            self._waiters.pop(prompt_id, None)
+
+    def _waiter_for_event(self, prompt_id: str) -> PromptWaiter:
+        with self._lock:
+            waiter = self._waiters.get(prompt_id)
+            if waiter is None:
+                # Event for a prompt whose submitter has not called track() yet.
+                waiter = self._waiters[prompt_id] = PromptWaiter(prompt_id)
+                untracked = [pid for pid in self._waiters if pid not in self._tracked]
+                for pid in untracked[: max(0, len(untracked) - self._max_untracked)]:
+                    del self._waiters[pid]
+            return waiter
+
+    # ── Reader thread ─────────────────────────────────────────────────────────
+
+    def handle_message(self, raw: str | bytes) -> None:
+        if isinstance(raw, bytes):
+            return  # binary preview frames
+        try:
+            msg = json.loads(raw)
+        except json.JSONDecodeError:
+            return
+        if not isinstance(msg, dict):
+            return
+        kind = msg.get("type")
+        data = msg.get("data")
+        if not isinstance(data, dict) or not data.get("prompt_id"):
+            return
+        waiter = self._waiter_for_event(str(data["prompt_id"]))
+        started = kind in ("execution_start", "progress") or (kind == "executing" and data.get("node") is not None)
+        if started and waiter.first_progress_at is None:
+            waiter.first_progress_at = time.time()  # left ComfyUI's queue
+        if kind == "progress":
+            try:
+                waiter.progress = (int(data.get("value", 0)), int(data.get("max", 0)))
+            except (TypeError, ValueError):
+                pass
+        elif kind == "executed":
+            node = data.get("node")
+            if node is not None and isinstance(data.get("output"), dict):
+                waiter.outputs[str(node)] = data["output"]
+        elif kind == "execution_success" or (kind == "executing" and data.get("node") is None):
+            # Older ComfyUI builds signal completion with executing{node: null}.
+            waiter._finish()
+        elif kind in _TERMINAL_ERRORS:
+            field = _TERMINAL_ERRORS[kind]
+            waiter.error = str(data.get(field) or kind) if field else kind
+            waiter._finish()
+
+    def _run(self) -> None:
+        from websockets.sync.client import connect
+
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                with connect(self.ws_url, open_timeout=10, max_size=None) as ws:
+                    self._ws = ws
+                    self._connected.set()
+                    backoff = 1.0
+                    logger.info("ComfyUI event stream connected (%s)", self.ws_url)
+                    for raw in ws:
+                        self.handle_message(raw)
+            except Exception as exc:
+                if not self._stop.is_set():
+                    logger.debug("ComfyUI event stream disconnected: %s", exc)
+            finally:
+                self._ws = None
+                self._connected.clear()
+            if self._stop.wait(backoff):
+                return
+            backoff = min(backoff * 2, 30.0)
+
+
+class AsyncComfyUIEventStream(ComfyUIEventStream):
+    """Event stream read by a task on the running loop; waiters use ``wait_async``."""
+
+    def __init__(self, base_url: str, client_id: str | None = None, *, max_untracked: int = 256) -> None:
+        super().__init__(base_url, client_id, max_untracked=max_untracked)
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> bool:
+        """Must be called from inside the event loop."""
+        try:
+            from websockets.asyncio.client import connect  # noqa: F401
+        except ImportError:
+            logger.warning("websockets not installed — ComfyUI completion tracking falls back to /history polling")
+            return False
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._run_async(), name="comfyui-events")
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def stop_async(self) -> None:
+        self.stop()
+        if self._task is not None:
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def wait_connected_async(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not self._connected.is_set():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    async def _run_async(self) -> None:
+        from websockets.asyncio.client import connect
+
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                async with connect(self.ws_url, open_timeout=10, max_size=None) as ws:
+                    self._connected.set()
+                    backoff = 1.0
+                    logger.info("ComfyUI event stream connected (%s)", self.ws_url)
+                    async for raw in ws:
+                        self.handle_message(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                if not self._stop.is_set():
+                    logger.debug("ComfyUI event stream disconnected: %s", exc)
+            finally:
+                self._connected.clear()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
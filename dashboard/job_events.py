@@ -0,0 +1,137 @@
+"""Job state-change fan-out for the /api/orchestration/jobs/events SSE stream.
+
+State transitions are appended to the ``job_events`` table by SQLite triggers,
+whichever process makes them (dashboard or worker). One ``JobEventBroker`` per
+dashboard process tails that table on a short interval and pushes matching
+events to every subscriber's queue, so N open streams cost one indexed query per
+tick instead of N clients polling ``GET /jobs/{id}``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any
+
+from dashboard.orchestration_db import get_job_events, latest_job_event_seq
+
+logger = logging.getLogger(__name__)
+
+
+class JobEventSubscription:
+    def __init__(
+        self,
+        job_ids: set[str] | None,
+        states: set[str] | None,
+        last_seq: int,
+        maxsize: int = 1000,
+    ) -> None:
+        self.job_ids = job_ids
+        self.states = states
+        self.last_seq = last_seq
+        self.overflowed = False
+        self._queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue(maxsize)
+
+    def matches(self, event: dict[str, Any]) -> bool:
+        if self.job_ids is not None and event["job_id"] not in self.job_ids:
+            return False
+        return self.states is None or event["state"] in self.states
+
+    def offer(self, event: dict[str, Any]) -> None:
+        if event["seq"] <= self.last_seq:
+            return
+        self.last_seq = event["seq"]
+        if not self.matches(event):
+            return
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow consumer: stop queueing; the stream tells the client to resync.
+            self.overflowed = True
+
+    def get_nowait(self) -> dict[str, Any] | None:
+        try:
+            return self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+
+    async def get(self, timeout: float) -> dict[str, Any] | None:
+        """Next matching event, or None after ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+
+class JobEventBroker:
+    def __init__(self, data_dir: Path, poll_interval: float = 0.25, batch_size: int = 1000) -> None:
+        self.data_dir = data_dir
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self._subs: set[JobEventSubscription] = set()
+        self._cursor: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _bind_loop(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._lock is None:
+            # First use, or a new event loop (tests run one per TestClient).
+            self._loop = loop
+            self._lock = asyncio.Lock()
+            self._task = None
+        return self._lock
+
+    async def subscribe(
+        self,
+        job_ids: set[str] | None = None,
+        states: set[str] | None = None,
+        after_seq: int | None = None,
+    ) -> JobEventSubscription:
+        """Register a subscriber. With ``after_seq``, events after it are replayed first."""
+        lock = self._bind_loop()
+        async with lock:
+            if self._cursor is None or not self._subs or self._task is None or self._task.done():
+                # Nobody was listening, so nothing advanced the cursor: live subscribers
+                # start from now, not from wherever the last one left off.
+                self._cursor = await asyncio.to_thread(latest_job_event_seq, self.data_dir)
+            start = self._cursor if after_seq is None else min(after_seq, self._cursor)
+            sub = JobEventSubscription(job_ids, states, last_seq=start)
+            while sub.last_seq < self._cursor:
+                backlog = await asyncio.to_thread(get_job_events, self.data_dir, sub.last_seq, self.batch_size)
+                backlog = [e for e in backlog if e["seq"] <= self._cursor]
+                if not backlog:
+                    break
+                for event in backlog:
+                    sub.offer(event)
+            self._subs.add(sub)
+            if self._task is None or self._task.done():
+                self._task = asyncio.get_running_loop().create_task(self._poll(), name="job-events")
+        return sub
+
+    def unsubscribe(self, sub: JobEventSubscription) -> None:
+        self._subs.discard(sub)
+
+    async def _poll(self) -> None:
+        lock = self._bind_loop()
+        while self._subs:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                async with lock:
+                    await self._poll_once()
+            except Exception as exc:
+                logger.warning("Job event poll failed: %s", exc)
+        self._task = None
+
+    async def _poll_once(self) -> None:
+        assert self._cursor is not None
+        while True:
+            events = await asyncio.to_thread(get_job_events, self.data_dir, self._cursor, self.batch_size)
+            for event in events:
+                for sub in list(self._subs):
+                    sub.offer(event)
+                self._cursor = event["seq"]
+            if len(events) < self.batch_size:
+                return
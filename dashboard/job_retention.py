@@ -0,0 +1,158 @@
+"""Retention for finished orchestration jobs and delivered outbox rows (run by the worker).
+
+Jobs that have sat in a terminal state longer than the policy allows for that
+state, and outbox rows delivered more than ``outbox_days`` ago, are appended to
+monthly gzip JSONL segments under the archive directory
+(``jobs-2026-01.jsonl.gz``, ``outbox-2026-01.jsonl.gz``; month of job creation /
+delivery) and then deleted from the live database. Work is done in small
+batches, each its own short transaction followed by ``PRAGMA incremental_vacuum``,
+so the worker never holds the write lock for long and the file shrinks as it goes.
+
+Each batch is written and fsynced before its rows are deleted: a crash in
+between means the rows are archived again on the next run, never lost. Readers
+of the archive (``iter_archive``) should treat ``job_id`` / ``id`` as the key.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+from collections import defaultdict
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from dashboard.orchestration_db import (
+    TERMINAL_STATES,
+    delete_jobs,
+    delete_outbox_rows,
+    gc_job_blobs,
+    incremental_vacuum,
+    outbox_rows_for_jobs,
+    select_delivered_outbox,
+    select_expired_jobs,
+)
+
+# Days a job is kept per terminal state before it is archived.
+DEFAULT_JOB_DAYS: dict[str, float] = {"published": 30, "artifact_ready": 30, "cancelled": 14, "failed": 90}
+
+
+def parse_job_days(spec: str) -> dict[str, float]:
+    """``"published=30,failed=90"`` → ``{"published": 30.0, "failed": 90.0}``; ``off`` → no job retention."""
+    spec = spec.strip()
+    if spec.lower() in ("", "off", "0", "none"):
+        return {}
+    terminal = {s.value for s in TERMINAL_STATES}
+    days: dict[str, float] = {}
+    for part in spec.split(","):
+        state, sep, value = part.strip().partition("=")
+        if not sep or state.strip() not in terminal:
+            raise ValueError(f"Invalid retention entry {part!r}: expected <state>=<days> with state in {sorted(terminal)}")
+        days[state.strip()] = float(value)
+    return days
+
+
+@dataclass
+class RetentionPolicy:
+    job_days: dict[str, float] = field(default_factory=lambda: dict(DEFAULT_JOB_DAYS))
+    outbox_days: float | None = 7.0
+    batch_size: int = 200
+    max_batches: int = 50  # per run and table; the rest waits for the next run
+    vacuum_pages: int = 1024  # pages released after each batch
+
+    @classmethod
+    def from_env(cls) -> RetentionPolicy:
+        job_spec = os.environ.get("WORKER_JOB_RETENTION_DAYS")
+        outbox = os.environ.get("WORKER_OUTBOX_RETENTION_DAYS", "7").strip()
+        return cls(
+            job_days=parse_job_days(job_spec) if job_spec is not None else dict(DEFAULT_JOB_DAYS),
+            outbox_days=float(outbox) if outbox and float(outbox) > 0 else None,
+            batch_size=max(1, int(os.environ.get("WORKER_RETENTION_BATCH", "200"))),
+        )
+
+
+def _month(ts: str | None) -> str:
+    return ts[:7] if ts and len(ts) >= 7 and ts[4] == "-" else "unknown"
+
+
+class ArchiveWriter:
+    """Appends records to ``<kind>-<YYYY-MM>.jsonl.gz`` segments, one gzip member per batch."""
+
+    def __init__(self, archive_dir: Path) -> None:
+        self.archive_dir = archive_dir
+
+    def append(self, kind: str, records: list[tuple[str, dict[str, Any]]]) -> None:
+        """Write ``(month, record)`` pairs and fsync before returning."""
+        by_month: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        for month, record in records:
+            by_month[month].append(record)
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        for month, rows in sorted(by_month.items()):
+            body = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in rows).encode()
+            with open(self.archive_dir / f"{kind}-{month}.jsonl.gz", "ab") as f:
+                f.write(gzip.compress(body))
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def iter_archive(path: Path) -> Iterator[dict[str, Any]]:
+    """Records from one archive segment (all gzip members)."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _iso_days_ago(now: datetime, days: float) -> str:
+    # Same shape as orchestration_db timestamps so string comparison orders correctly.
+    return (now - timedelta(days=days)).astimezone(UTC).isoformat().replace("+00:00", "Z")
+
+
+def run_retention(
+    data_dir: Path,
+    policy: RetentionPolicy,
+    archive_dir: Path | None = None,
+    *,
+    now: datetime | None = None,
+) -> dict[str, int]:
+    """Archive and delete what the policy has expired; returns counts for this run."""
+    now = now or datetime.now(UTC)
+    writer = ArchiveWriter(archive_dir or data_dir / "archive")
+    stats = {"jobs": 0, "outbox": 0, "blobs": 0, "pages_freed": 0}
+
+    for state, days in sorted(policy.job_days.items()):
+        cutoff = _iso_days_ago(now, days)
+        for _ in range(policy.max_batches):
+            jobs = select_expired_jobs(data_dir, state, cutoff, policy.batch_size)
+            if not jobs:
+                break
+            outbox_by_job: dict[str, list[dict[str, Any]]] = defaultdict(list)
+            for row in outbox_rows_for_jobs(data_dir, [j.job_id for j in jobs]):
+                outbox_by_job[row["job_id"]].append(row)
+            writer.append("jobs", [
+                (_month(j.created_at), {**j.to_dict(), "outbox": outbox_by_job.get(j.job_id, [])}) for j in jobs
+            ])
+            stats["jobs"] += delete_jobs(data_dir, [j.job_id for j in jobs], state)
+            stats["pages_freed"] += incremental_vacuum(data_dir, policy.vacuum_pages)
+            if len(jobs) < policy.batch_size:
+                break
+
+    if policy.outbox_days is not None:
+        cutoff = _iso_days_ago(now, policy.outbox_days)
+        for _ in range(policy.max_batches):
+            rows = select_delivered_outbox(data_dir, cutoff, policy.batch_size)
+            if not rows:
+                break
+            writer.append("outbox", [(_month(r["delivered_at"]), r) for r in rows])
+            stats["outbox"] += delete_outbox_rows(data_dir, [r["id"] for r in rows])
+            stats["pages_freed"] += incremental_vacuum(data_dir, policy.vacuum_pages)
+            if len(rows) < policy.batch_size:
+                break
+
+    if stats["jobs"]:
+        stats["blobs"] = gc_job_blobs(data_dir)
+        stats["pages_freed"] += incremental_vacuum(data_dir, policy.vacuum_pages)
+    return stats
@@ -0,0 +1,360 @@
+"""llama.cpp server-config sweep: recreate llamacpp per config, benchmark, recommend.
+
+Each ``SweepConfig`` is one combination of flash attention, KV-cache type
+(``f16`` = quantization off; otherwise K and V share the type, TurboQuant
+``tbq*`` included), ``--parallel`` slots and mmap. For each config the sweep
+writes the ``LLAMACPP_*`` keys through the ops-controller (``/env/set``),
+recreates the llamacpp container, waits for ``/health``, then runs the same
+fixed streaming benchmark (``load_benchmark.run_level``) straight against
+llama-server at concurrency 1 and at the config's slot count. VRAM comes from
+the ops-controller's ``/stats/services``.
+
+``recommend()`` picks the fastest error-free config that leaves VRAM headroom;
+configs within ``_TPS_TOLERANCE`` of the fastest are tie-broken by lower VRAM.
+The original ``.env`` values are restored at the end (or the recommendation
+applied, if asked).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import logging
+import re
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import httpx
+
+from dashboard.load_benchmark import GatewaySender, LoadBenchmarkSpec, LoadLevel, Sender, run_level
+
+logger = logging.getLogger(__name__)
+
+SWEEP_ENV_KEYS = (
+    "LLAMACPP_FLASH_ATTN",
+    "LLAMACPP_ENABLE_KV_CACHE_QUANTIZATION",
+    "LLAMACPP_KV_CACHE_TYPE_K",
+    "LLAMACPP_KV_CACHE_TYPE_V",
+    "LLAMACPP_PARALLEL",
+    "LLAMACPP_NO_MMAP",
+)
+FLASH_ATTN_VALUES = ("on", "off", "auto")
+# Mainline types plus the TurboQuant build's tbq*/tbqp* (and _1/_2/_3 head-dim variants); f16 = quantization off
+_KV_CACHE_TYPE = re.compile(r"f16|q8_0|q[45]_[01]|iq4_nl|tbqp?[34]_[0-3]|turbo[234]")
+MAX_CONFIGS = 32
+# Leave this much VRAM free (other services, context growth, fragmentation)
+_VRAM_LIMIT_PCT = 95.0
+# Configs this close to the fastest count as a tie; the lower-VRAM one wins
+_TPS_TOLERANCE = 0.03
+
+OpsRequest = Callable[..., Awaitable[tuple[int, dict]]]
+
+
+class SweepError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class SweepConfig:
+    flash_attn: str = "auto"
+    kv_cache_type: str = "f16"
+    parallel: int = 1
+    no_mmap: bool = True
+
+    @property
+    def label(self) -> str:
+        mmap = "no-mmap" if self.no_mmap else "mmap"
+        return f"fa={self.flash_attn} kv={self.kv_cache_type} parallel={self.parallel} {mmap}"
+
+    def env(self) -> dict[str, str]:
+        out = {
+            "LLAMACPP_FLASH_ATTN": self.flash_attn,
+            "LLAMACPP_PARALLEL": str(self.parallel),
+            "LLAMACPP_NO_MMAP": "1" if self.no_mmap else "0",
+            "LLAMACPP_ENABLE_KV_CACHE_QUANTIZATION": "0" if self.kv_cache_type == "f16" else "1",
+        }
+        if self.kv_cache_type != "f16":
+            out["LLAMACPP_KV_CACHE_TYPE_K"] = self.kv_cache_type
+            out["LLAMACPP_KV_CACHE_TYPE_V"] = self.kv_cache_type
+        return out
+
+
+def _needs_flash_attn(kv_cache_type: str) -> bool:
+    # run-llama-server.sh forces --flash-attn on for these; other values would be duplicates
+    return "tbq" in kv_cache_type
+
+
+def build_matrix(
+    flash_attn: list[str],
+    kv_cache_types: list[str],
+    parallel: list[int],
+    no_mmap: list[bool],
+) -> list[SweepConfig]:
+    """Cartesian product in input order, minus TurboQuant configs with flash attention not on."""
+    for value in flash_attn:
+        if value not in FLASH_ATTN_VALUES:
+            raise ValueError(f"flash_attn must be one of {FLASH_ATTN_VALUES}, got {value!r}")
+    for value in kv_cache_types:
+        if not _KV_CACHE_TYPE.fullmatch(value):
+            raise ValueError(f"Unknown KV cache type {value!r}")
+    if any(not 1 <= p <= 64 for p in parallel):
+        raise ValueError("parallel must be between 1 and 64")
+    configs: list[SweepConfig] = []
+    for fa, kv, par, nm in itertools.product(
+        dict.fromkeys(flash_attn), dict.fromkeys(kv_cache_types), dict.fromkeys(parallel), dict.fromkeys(no_mmap)
+    ):
+        if _needs_flash_attn(kv) and fa != "on":
+            continue
+        configs.append(SweepConfig(fa, kv, par, nm))
+    if not configs:
+        raise ValueError("No valid configs (TurboQuant KV types require flash_attn 'on')")
+    if len(configs) > MAX_CONFIGS:
+        raise ValueError(f"{len(configs)} configs exceeds the limit of {MAX_CONFIGS}")
+    return configs
+
+
+class OpsControllerClient:
+    """The ops-controller calls a sweep needs, over the dashboard's ``_ops_request``."""
+
+    def __init__(self, request: OpsRequest, *, recreate_timeout: float = 180.0) -> None:
+        self._request = request
+        self.recreate_timeout = recreate_timeout
+
+    async def _call(self, method: str, path: str, **kwargs: Any) -> dict:
+        code, data = await self._request(method, path, **kwargs)
+        if code >= 400:
+            raise SweepError(f"ops-controller {method} {path}: {code} {data.get('detail', data)}")
+        return data
+
+    async def get_env(self, key: str) -> str:
+        return str((await self._call("GET", f"/env/{key}")).get("value") or "")
+
+    async def set_env(self, key: str, value: str) -> None:
+        await self._call("POST", "/env/set", json={"key": key, "value": value, "confirm": True})
+
+    async def recreate(self, service: str) -> None:
+        await self._call("POST", f"/services/{service}/recreate", json={"confirm": True},
+                         timeout=self.recreate_timeout)
+
+    async def service_stats(self) -> dict:
+        return await self._call("GET", "/stats/services", timeout=30.0)
+
+
+@dataclass
+class SweepBenchmark:
+    """The fixed workload run against every config."""
+
+    prompt_tokens: int = 512
+    output_tokens: int = 128
+    requests_per_level: int = 8
+    timeout_sec: float = 300.0
+
+    def levels(self, config: SweepConfig) -> list[LoadLevel]:
+        return [LoadLevel(c, self.prompt_tokens, self.output_tokens) for c in sorted({1, config.parallel})]
+
+
+@dataclass
+class LlamacppSweep:
+    ops: Any  # OpsControllerClient-compatible
+    llamacpp_url: str
+    configs: list[SweepConfig]
+    benchmark: SweepBenchmark = field(default_factory=SweepBenchmark)
+    service: str = "llamacpp"
+    ready_timeout: float = 900.0
+    poll_interval: float = 2.0
+    apply_best: bool = False
+
+    def _sender(self, config: SweepConfig) -> Sender:
+        spec = LoadBenchmarkSpec(
+            model="sweep",
+            concurrency=[c.concurrency for c in self.benchmark.levels(config)],
+            stream=True,
+            ignore_eos=True,  # same output length for every config
+            timeout_sec=self.benchmark.timeout_sec,
+        )
+        return GatewaySender(self.llamacpp_url, {}, spec)
+
+    async def wait_ready(self) -> float:
+        """Poll llama-server ``/health`` (503 while loading) until 200; returns seconds waited."""
+        started = time.monotonic()
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            while True:
+                with contextlib.suppress(httpx.HTTPError):
+                    r = await client.get(f"{self.llamacpp_url.rstrip('/')}/health")
+                    if r.status_code == 200:
+                        return time.monotonic() - started
+                if time.monotonic() - started > self.ready_timeout:
+                    raise SweepError(f"llamacpp not ready after {self.ready_timeout:.0f}s")
+                await asyncio.sleep(self.poll_interval)
+
+    async def apply(self, env: dict[str, str]) -> None:
+        for key, value in env.items():
+            await self.ops.set_env(key, value)
+        await self.ops.recreate(self.service)
+
+    async def measure(self, config: SweepConfig) -> dict[str, Any]:
+        row: dict[str, Any] = {"config": asdict(config), "label": config.label, "env": config.env()}
+        try:
+            await self.apply(config.env())
+            row["startup_sec"] = round(await self.wait_ready(), 1)
+        except SweepError as e:
+            return {**row, "status": "failed", "error": str(e)}
+        sender = self._sender(config)
+        try:
+            # Warm-up: first request after a restart pays one-off allocation costs
+            await sender.send(LoadLevel(1, 32, 8), f"warmup-{uuid.uuid4().hex[:6]}")
+            levels = [
+                await run_level(level, max(self.benchmark.requests_per_level, level.concurrency), sender,
+                                run_id=uuid.uuid4().hex[:6])
+                for level in self.benchmark.levels(config)
+            ]
+        finally:
+            await sender.aclose()
+        single = levels[0]
+        row.update({
+            "status": "ok" if any(lv["requests"] > lv["errors"] for lv in levels) else "failed",
+            "levels": levels,
+            "errors": sum(lv["errors"] for lv in levels),
+            "decode_tps": single["decode_tps_p50"],
+            "prefill_tps": single["prefill_tps_p50"],
+            "ttft_ms": single["ttft_ms_p50"],
+            "itl_ms_p95": single["itl_ms_p95"],
+            "aggregate_tps": max(lv["aggregate_output_tps"] for lv in levels),
+        })
+        try:
+            stats = await self.ops.service_stats()
+        except SweepError as e:
+            logger.warning("Sweep VRAM read failed: %s", e)
+            stats = {}
+        svc = (stats.get("services") or {}).get(self.service) or {}
+        row["vram_gb"] = svc.get("vram_gb")
+        row["vram_pct"] = svc.get("vram_pct")
+        row["gpu"] = stats.get("gpu")
+        return row
+
+    async def run(self, report: dict[str, Any]) -> dict[str, Any]:
+        """Measure every config into ``report["results"]``; restores (or applies the best) at the end."""
+        original = {key: await self.ops.get_env(key) for key in SWEEP_ENV_KEYS}
+        report["original_env"] = original
+        try:
+            for config in self.configs:
+                report["progress"]["current"] = config.label
+                report["results"].append(await self.measure(config))
+                report["progress"]["done"] += 1
+        finally:
+            report["progress"]["current"] = None
+            report["recommendation"] = recommend(report["results"])
+            best = report["recommendation"]
+            target = best["env"] if self.apply_best and best else original
+            # Shield: a cancelled sweep must still put llamacpp back on a known config
+            try:
+                await asyncio.shield(self.apply(target))
+                report["final_env"] = target
+            except Exception as e:
+                report["final_env"] = None
+                report["restore_error"] = str(e)
+                logger.warning("Sweep could not restore llamacpp config: %s", e)
+        return report
+
+
+def recommend(rows: list[dict[str, Any]]) -> dict[str, Any] | None:
+    """Best error-free config by aggregate tok/s that stays under the VRAM limit."""
+    ok = [r for r in rows if r.get("status") == "ok" and not r.get("errors")]
+    fits = [r for r in ok if not r.get("vram_pct") or r["vram_pct"] <= _VRAM_LIMIT_PCT]
+    pool = fits or ok
+    if not pool:
+        return None
+    top = max(r["aggregate_tps"] for r in pool)
+    close = [r for r in pool if r["aggregate_tps"] >= top * (1 - _TPS_TOLERANCE)]
+    best = min(close, key=lambda r: (r.get("vram_gb") or 0.0, r.get("ttft_ms") or 0.0, -r["aggregate_tps"]))
+    gpu = next((r["gpu"] for r in rows if r.get("gpu")), None)
+    hardware = f" on {gpu.get('name') or 'GPU'} ({gpu.get('total_gb')} GB)" if isinstance(gpu, dict) else ""
+    reason = f"{best['aggregate_tps']} tok/s aggregate, TTFT {best['ttft_ms']} ms"
+    if best.get("vram_gb") is not None:
+        reason += f", {best['vram_gb']} GB VRAM"
+    if len(close) > 1:
+        reason += f"; lowest VRAM of {len(close)} configs within {int(_TPS_TOLERANCE * 100)}% of the fastest"
+    if not fits:
+        reason += f"; every config exceeded {_VRAM_LIMIT_PCT:.0f}% VRAM"
+    return {"label": best["label"], "config": best["config"], "env": best["env"], "reason": reason + hardware}
+
+
+class SweepRunner:
+    """Runs one sweep at a time as a background task; keeps recent reports."""
+
+    def __init__(self, *, max_reports: int = 10, on_complete: Callable[[dict[str, Any]], None] | None = None) -> None:
+        self.max_reports = max_reports
+        self.on_complete = on_complete
+        self._reports: dict[str, dict[str, Any]] = {}
+        self._task: asyncio.Task[None] | None = None
+
+    def running(self) -> dict[str, Any] | None:
+        if self._task is None or self._task.done():
+            return None
+        return next((r for r in self._reports.values() if r["status"] == "running"), None)
+
+    def get(self, sweep_id: str) -> dict[str, Any] | None:
+        return self._reports.get(sweep_id)
+
+    def list(self) -> list[dict[str, Any]]:
+        return sorted(self._reports.values(), key=lambda r: r["created_at"], reverse=True)
+
+    def start(self, sweep: LlamacppSweep) -> dict[str, Any]:
+        if self.running() is not None:
+            raise RuntimeError("A llama.cpp sweep is already running")
+        sweep_id = uuid.uuid4().hex[:12]
+        report: dict[str, Any] = {
+            "id": sweep_id,
+            "status": "running",
+            "created_at": time.time(),
+            "finished_at": None,
+            "configs": [c.label for c in sweep.configs],
+            "benchmark": asdict(sweep.benchmark),
+            "progress": {"done": 0, "total": len(sweep.configs), "current": None},
+            "results": [],
+            "recommendation": None,
+            "error": None,
+        }
+        self._reports[sweep_id] = report
+        for old in self.list()[self.max_reports:]:
+            self._reports.pop(old["id"], None)
+        self._task = asyncio.get_running_loop().create_task(self._execute(sweep, report), name=f"sweep-{sweep_id}")
+        return report
+
+    def cancel(self, sweep_id: str) -> bool:
+        if self._task is None or self._task.done() or self.running() is not self._reports.get(sweep_id):
+            return False
+        self._task.cancel()
+        return True
+
+    async def wait(self) -> None:
+        if self._task is not None:
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        await self.wait()
+
+    async def _execute(self, sweep: LlamacppSweep, report: dict[str, Any]) -> None:
+        try:
+            await sweep.run(report)
+            report["status"] = "completed"
+        except asyncio.CancelledError:
+            report["status"] = "cancelled"
+        except Exception as e:
+            logger.exception("llama.cpp sweep %s failed", report["id"])
+            report["status"] = "failed"
+            report["error"] = str(e)[:500]
+        finally:
+            report["finished_at"] = time.time()
+        if self.on_complete is not None and report["results"]:
+            try:
+                self.on_complete({k: v for k, v in report.items() if k != "progress"})
+            except Exception as e:
+                logger.warning("Sweep %s report not saved: %s", report["id"], e)
@@ -0,0 +1,503 @@
+"""Load-testing benchmark for the model gateway, run as a background job.
+
+A run sweeps every combination of concurrency level, prompt length and output
+length in ``LoadBenchmarkSpec``. Each level sends ``requests_per_level``
+chat completions with at most ``concurrency`` in flight, and reports:
+
+- TTFT (time to first streamed content chunk; ``timings.prompt_ms`` when not streaming)
+- inter-token latency (gap between streamed chunks; llama.cpp streams one token per chunk)
+- aggregate output tokens/sec (all output tokens / level wall time)
+- per-request prefill and decode rates, measured separately
+- error rate
+
+Prompts are filler text of roughly the requested token count with a unique
+prefix per request, so llama.cpp's prompt cache cannot skip prefill. Prompt
+lengths are clamped to the per-slot context (``LLAMACPP_CTX_SIZE /
+LLAMACPP_PARALLEL``) minus the output budget; ``near_ctx`` adds a level at 90%
+of that slot.
+
+``LoadBenchmarkRunner`` runs one sweep at a time on an asyncio task and keeps
+the recent runs (state, progress, per-level results) in memory; the caller's
+``on_sample`` receives each successful request and ``on_complete`` persists
+finished summaries.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from typing import Any, Protocol
+
+import httpx
+
+from dashboard.throughput_store import DDSketch
+
+logger = logging.getLogger(__name__)
+
+MAX_LEVELS = 64
+# Tokens kept free in a slot beyond prompt + output (chat template, BOS, salt)
+_CTX_MARGIN = 64
+_NEAR_CTX_FRACTION = 0.9
+_FILLER = (
+    "the quick brown fox jumps over a lazy dog while small birds sing in the old green tree near "
+    "one quiet river and every day people walk by to see what new things happen there "
+).split()
+
+
+@dataclass(frozen=True)
+class LoadLevel:
+    concurrency: int
+    prompt_tokens: int
+    max_tokens: int
+    clamped: bool = False
+
+
+@dataclass
+class RequestResult:
+    ok: bool
+    duration_s: float
+    ttft_s: float | None = None
+    itl_s: list[float] = field(default_factory=list)
+    output_tokens: int = 0
+    prompt_tokens: int = 0
+    prefill_tps: float = 0.0
+    decode_tps: float = 0.0
+    error: str = ""
+
+
+@dataclass
+class LoadBenchmarkSpec:
+    model: str
+    concurrency: list[int] = field(default_factory=lambda: [1])
+    prompt_tokens: list[int] = field(default_factory=lambda: [128])
+    output_tokens: list[int] = field(default_factory=lambda: [128])
+    requests_per_level: int = 8
+    stream: bool = True
+    near_ctx: bool = False
+    ignore_eos: bool = False
+    timeout_sec: float = 600.0
+    ctx_size: int = 262144
+    parallel: int = 1
+
+    @property
+    def slot_ctx(self) -> int:
+        return max(self.ctx_size // max(self.parallel, 1), 1)
+
+    def levels(self) -> list[LoadLevel]:
+        """Concurrency-major sweep; prompt lengths clamped to fit the slot with the output budget."""
+        out: list[LoadLevel] = []
+        for conc, max_tokens in itertools.product(sorted(set(self.concurrency)), sorted(set(self.output_tokens))):
+            room = max(self.slot_ctx - max_tokens - _CTX_MARGIN, 1)
+            lengths = sorted(set(self.prompt_tokens))
+            if self.near_ctx:
+                lengths.append(int(self.slot_ctx * _NEAR_CTX_FRACTION) - max_tokens)
+            seen: set[int] = set()
+            for n in lengths:
+                fitted = min(max(n, 1), room)
+                if fitted in seen:
+                    continue
+                seen.add(fitted)
+                out.append(LoadLevel(conc, fitted, max_tokens, clamped=fitted != n))
+        out.sort(key=lambda lv: (lv.concurrency, lv.prompt_tokens, lv.max_tokens))
+        return out
+
+
+def build_prompt(n_tokens: int, salt: str) -> str:
+    """Filler text of about ``n_tokens`` tokens (one common word ≈ one token), unique per ``salt``."""
+    body = " ".join(itertools.islice(itertools.cycle(_FILLER), max(n_tokens - 24, 0)))
+    return f"[{salt}] Continue this text at length without stopping: {body}"
+
+
+class Sender(Protocol):
+    async def send(self, level: LoadLevel, salt: str) -> RequestResult: ...
+
+    async def aclose(self) -> None: ...
+
+
+class GatewaySender:
+    """Sends benchmark requests to an OpenAI-compatible ``/v1/chat/completions``."""
+
+    def __init__(
+        self,
+        base_url: str,
+        headers: dict[str, str],
+        spec: LoadBenchmarkSpec,
+        *,
+        client: httpx.AsyncClient | None = None,
+    ) -> None:
+        self.url = f"{base_url.rstrip('/')}/v1/chat/completions"
+        self.headers = headers
+        self.spec = spec
+        max_conc = max(spec.concurrency or [1])
+        self._client = client or httpx.AsyncClient(
+            timeout=spec.timeout_sec,
+            limits=httpx.Limits(max_connections=max_conc, max_keepalive_connections=max_conc),
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    def _body(self, level: LoadLevel, salt: str) -> dict[str, Any]:
+        body: dict[str, Any] = {
+            "model": self.spec.model,
+            "messages": [{"role": "user", "content": build_prompt(level.prompt_tokens, salt)}],
+            "max_tokens": level.max_tokens,
+            "temperature": 0,
+        }
+        if self.spec.ignore_eos:
+            body["ignore_eos"] = True  # llama.cpp: always generate max_tokens
+        return body
+
+    async def send(self, level: LoadLevel, salt: str) -> RequestResult:
+        call = stream_chat_completion if self.spec.stream else post_chat_completion
+        return await call(self._client, self.url, self.headers, self._body(level, salt))
+
+
+def _rates(
+    prompt_tokens: int, output_tokens: int, prefill_s: float | None, decode_s: float, timings: dict[str, Any]
+) -> tuple[float, float]:
+    """(prefill, decode) tokens/sec: llama.cpp ``timings`` when present (no network/proxy time), else derived."""
+    prefill = float(timings.get("prompt_per_second") or 0.0)
+    decode = float(timings.get("predicted_per_second") or 0.0)
+    if not prefill and prefill_s and prompt_tokens:
+        prefill = prompt_tokens / prefill_s
+    if not decode and decode_s > 0 and output_tokens > 1:
+        decode = (output_tokens - 1) / decode_s  # the first token is part of TTFT
+    return prefill, decode
+
+
+async def post_chat_completion(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: dict[str, str],
+    body: dict[str, Any],
+    *,
+    timeout: float | None = None,
+) -> RequestResult:
+    """Non-streaming completion. TTFT is only known from server ``timings.prompt_ms``."""
+    started = time.perf_counter()
+    try:
+        kwargs: dict[str, Any] = {"timeout": timeout} if timeout is not None else {}
+        r = await client.post(url, headers=headers, json={**body, "stream": False}, **kwargs)
+        r.raise_for_status()
+        data = r.json()
+    except Exception as e:
+        return RequestResult(ok=False, duration_s=time.perf_counter() - started, error=_error_text(e))
+    duration = time.perf_counter() - started
+    usage = data.get("usage") or {}
+    timings = data.get("timings") or {}
+    output = int(usage.get("completion_tokens") or 0)
+    prompt = int(usage.get("prompt_tokens") or 0)
+    prompt_ms = timings.get("prompt_ms")
+    prefill, decode = _rates(prompt, output, None, 0.0, timings)
+    return RequestResult(
+        ok=True,
+        duration_s=duration,
+        ttft_s=float(prompt_ms) / 1000 if prompt_ms else None,
+        output_tokens=output,
+        prompt_tokens=prompt,
+        prefill_tps=prefill,
+        decode_tps=decode or (output / duration if output and duration else 0.0),
+    )
+
+
+async def stream_chat_completion(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: dict[str, str],
+    body: dict[str, Any],
+    *,
+    timeout: float | None = None,
+) -> RequestResult:
+    """Streaming completion timed chunk by chunk: true TTFT and per-token gaps.
+
+    TTFT is request start to the first chunk carrying content (or reasoning). Each
+    later content chunk adds one inter-token gap. Usage and llama.cpp ``timings``
+    come from the final chunks (``stream_options.include_usage``). Errors are
+    returned as ``ok=False`` results rather than raised.
+    """
+    started = time.perf_counter()
+    first: float | None = None
+    last = 0.0
+    itl: list[float] = []
+    chunks = 0
+    usage: dict[str, Any] = {}
+    timings: dict[str, Any] = {}
+    body = {**body, "stream": True, "stream_options": {"include_usage": True}}
+    kwargs: dict[str, Any] = {"timeout": timeout} if timeout is not None else {}
+    try:
+        async with client.stream("POST", url, headers=headers, json=body, **kwargs) as r:
+            if r.status_code >= 400:
+                await r.aread()
+                r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(payload)
+                except ValueError:
+                    continue
+                if chunk.get("usage"):
+                    usage = chunk["usage"]
+                if isinstance(chunk.get("timings"), dict):
+                    timings = chunk["timings"]
+                delta = (chunk.get("choices") or [{}])[0].get("delta") or {}
+                if not (delta.get("content") or delta.get("reasoning_content")):
+                    continue
+                now = time.perf_counter()
+                if first is None:
+                    first = now
+                else:
+                    itl.append(now - last)
+                last = now
+                chunks += 1
+    except Exception as e:
+        return RequestResult(ok=False, duration_s=time.perf_counter() - started, error=_error_text(e))
+    duration = time.perf_counter() - started
+    output = int(usage.get("completion_tokens") or chunks)
+    prompt = int(usage.get("prompt_tokens") or 0)
+    ttft = first - started if first is not None else None
+    prefill, decode = _rates(prompt, output, ttft, last - first if first is not None else 0.0, timings)
+    return RequestResult(
+        ok=True,
+        duration_s=duration,
+        ttft_s=ttft,
+        itl_s=itl,
+        output_tokens=output,
+        prompt_tokens=prompt,
+        prefill_tps=prefill,
+        decode_tps=decode,
+    )
+
+
+def _error_text(exc: Exception) -> str:
+    if isinstance(exc, httpx.HTTPStatusError):
+        detail = ""
+        with contextlib.suppress(Exception):
+            detail = exc.response.text.strip()[:160]
+        return f"HTTP {exc.response.status_code}" + (f": {detail}" if detail else "")
+    return f"{type(exc).__name__}: {exc}"[:200]
+
+
+def _pct(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def summarize_level(level: LoadLevel, results: list[RequestResult], wall_s: float) -> dict[str, Any]:
+    ok = [r for r in results if r.ok]
+    ttft = sorted(r.ttft_s * 1000 for r in ok if r.ttft_s is not None)
+    itl = DDSketch()
+    for r in ok:
+        for gap in r.itl_s:
+            itl.add(gap * 1000)
+    decode = sorted(r.decode_tps for r in ok if r.decode_tps > 0)
+    prefill = sorted(r.prefill_tps for r in ok if r.prefill_tps > 0)
+    output_tokens = sum(r.output_tokens for r in ok)
+    errors: dict[str, int] = {}
+    for r in results:
+        if not r.ok:
+            errors[r.error] = errors.get(r.error, 0) + 1
+    return {
+        **asdict(level),
+        "requests": len(results),
+        "errors": len(results) - len(ok),
+        "error_rate": round((len(results) - len(ok)) / len(results), 4) if results else 0.0,
+        "error_samples": dict(sorted(errors.items(), key=lambda kv: -kv[1])[:5]),
+        "wall_sec": round(wall_s, 3),
+        "output_tokens": output_tokens,
+        "prompt_tokens_avg": round(sum(r.prompt_tokens for r in ok) / len(ok), 1) if ok else 0.0,
+        "aggregate_output_tps": round(output_tokens / wall_s, 2) if wall_s > 0 else 0.0,
+        "requests_per_sec": round(len(ok) / wall_s, 3) if wall_s > 0 else 0.0,
+        "prefill_tps_p50": round(_pct(prefill, 0.5), 2),
+        "decode_tps_p50": round(_pct(decode, 0.5), 2),
+        "ttft_ms_p50": round(_pct(ttft, 0.5), 1),
+        "ttft_ms_p95": round(_pct(ttft, 0.95), 1),
+        "ttft_ms_p99": round(_pct(ttft, 0.99), 1),
+        "itl_ms_p50": round(itl.quantile(0.5), 2) if itl.count else 0.0,
+        "itl_ms_p95": round(itl.quantile(0.95), 2) if itl.count else 0.0,
+        "itl_ms_p99": round(itl.quantile(0.99), 2) if itl.count else 0.0,
+    }
+
+
+async def run_level(
+    level: LoadLevel,
+    n_requests: int,
+    sender: Sender,
+    *,
+    run_id: str = "",
+    on_result: Callable[[RequestResult], None] | None = None,
+) -> dict[str, Any]:
+    """Send ``n_requests`` with at most ``level.concurrency`` in flight; returns the level summary."""
+    sem = asyncio.Semaphore(level.concurrency)
+    results: list[RequestResult] = []
+
+    async def one(i: int) -> None:
+        async with sem:
+            try:
+                res = await sender.send(level, f"{run_id}-{level.concurrency}-{level.prompt_tokens}-{i}")
+            except Exception as e:  # a sender bug must not abort the level
+                res = RequestResult(ok=False, duration_s=0.0, error=_error_text(e))
+        results.append(res)
+        if on_result is not None:
+            on_result(res)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    return summarize_level(level, results, time.perf_counter() - started)
+
+
+def summarize_run(run: dict[str, Any]) -> dict[str, Any]:
+    """Run without progress bookkeeping; what is persisted for comparison."""
+    keep = ("id", "status", "model", "stream", "started_at", "finished_at", "config", "levels", "error")
+    return {k: run.get(k) for k in keep}
+
+
+class LoadBenchmarkRunner:
+    def __init__(
+        self,
+        *,
+        max_runs: int = 20,
+        on_complete: Callable[[dict[str, Any]], None] | None = None,
+        on_sample: Callable[[str, RequestResult], None] | None = None,
+    ) -> None:
+        self.max_runs = max_runs
+        self.on_complete = on_complete
+        self.on_sample = on_sample
+        self._runs: dict[str, dict[str, Any]] = {}
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+
+    def running(self) -> dict[str, Any] | None:
+        for run in self._runs.values():
+            if run["status"] in ("queued", "running"):
+                task = self._tasks.get(run["id"])
+                if task is not None and not task.done():
+                    return run
+        return None
+
+    def get(self, run_id: str) -> dict[str, Any] | None:
+        return self._runs.get(run_id)
+
+    def list(self) -> list[dict[str, Any]]:
+        return sorted(self._runs.values(), key=lambda r: r["created_at"], reverse=True)
+
+    def start(self, spec: LoadBenchmarkSpec, make_sender: Callable[[LoadBenchmarkSpec], Sender]) -> dict[str, Any]:
+        """Queue a sweep on the running loop.
+
+        Raises ValueError for an empty or oversized sweep and RuntimeError if one is
+        already in progress; ``make_sender`` is only called once the run is accepted.
+        """
+        if self.running() is not None:
+            raise RuntimeError("A load benchmark is already running")
+        levels = spec.levels()
+        if not levels:
+            raise ValueError("No benchmark levels")
+        if len(levels) > MAX_LEVELS:
+            raise ValueError(f"{len(levels)} levels exceeds the limit of {MAX_LEVELS}")
+        sender = make_sender(spec)
+        run_id = uuid.uuid4().hex[:12]
+        run: dict[str, Any] = {
+            "id": run_id,
+            "status": "queued",
+            "model": spec.model,
+            "stream": spec.stream,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "config": asdict(spec),
+            "progress": {
+                "levels_done": 0,
+                "levels_total": len(levels),
+                "requests_done": 0,
+                "requests_total": len(levels) * spec.requests_per_level,
+                "current_level": None,
+            },
+            "levels": [],
+            "error": None,
+        }
+        self._runs[run_id] = run
+        self._trim()
+        self._tasks[run_id] = asyncio.get_running_loop().create_task(
+            self._execute(run, spec, levels, sender), name=f"load-benchmark-{run_id}"
+        )
+        return run
+
+    def cancel(self, run_id: str) -> bool:
+        task = self._tasks.get(run_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def stop(self) -> None:
+        """Cancel any in-flight sweep (shutdown); partial results are still reported."""
+        tasks = [t for t in self._tasks.values() if not t.done()]
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError, RuntimeError):
+                await task
+
+    async def wait(self, run_id: str) -> dict[str, Any] | None:
+        task = self._tasks.get(run_id)
+        if task is not None:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        return self._runs.get(run_id)
+
+    def _trim(self) -> None:
+        finished = [r for r in self.list() if r["status"] not in ("queued", "running")]
+        for run in finished[max(self.max_runs - 1, 0):]:
+            self._runs.pop(run["id"], None)
+            self._tasks.pop(run["id"], None)
+
+    async def _execute(
+        self, run: dict[str, Any], spec: LoadBenchmarkSpec, levels: list[LoadLevel], sender: Sender
+    ) -> None:
+        run["status"] = "running"
+        run["started_at"] = time.time()
+        progress = run["progress"]
+
+        def on_result(res: RequestResult) -> None:
+            progress["requests_done"] += 1
+            if res.ok and self.on_sample is not None:
+                try:
+                    self.on_sample(spec.model, res)
+                except Exception as e:
+                    logger.debug("Load benchmark sample not recorded: %s", e)
+
+        try:
+            for level in levels:
+                progress["current_level"] = asdict(level)
+                summary = await run_level(level, spec.requests_per_level, sender, run_id=run["id"],
+                                          on_result=on_result)
+                run["levels"].append(summary)
+                progress["levels_done"] += 1
+            run["status"] = "completed"
+        except asyncio.CancelledError:
+            run["status"] = "cancelled"
+        except Exception as e:
+            logger.exception("Load benchmark %s failed", run["id"])
+            run["status"] = "failed"
+            run["error"] = _error_text(e)
+        finally:
+            progress["current_level"] = None
+            run["finished_at"] = time.time()
+            with contextlib.suppress(Exception):
+                await sender.aclose()
+        if self.on_complete is not None and run["levels"]:
+            try:
+                self.on_complete(summarize_run(run))
+            except Exception as e:
+                logger.warning("Load benchmark %s result not saved: %s", run["id"], e)
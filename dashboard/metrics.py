@@ -0,0 +1,159 @@
+"""Prometheus histograms for the dashboard and the worker (each process exposes its own registry).
+
+The dashboard serves them at ``GET /metrics``; the worker starts a small HTTP
+listener on ``WORKER_METRICS_PORT``. Label sets are kept bounded: HTTP latency
+is labelled by route template (never the raw path), model metrics only cover
+models the throughput store tracks (``THROUGHPUT_MAX_TRACKED_MODELS``), and
+SQLite timings by database and statement verb.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import sqlite3
+import time
+from collections.abc import Iterator
+from datetime import datetime
+from typing import Any
+
+from prometheus_client import CONTENT_TYPE_LATEST, Histogram, generate_latest, start_http_server
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+)
+JOB_QUEUE_WAIT_SECONDS = Histogram(
+    "orchestration_job_queue_wait_seconds",
+    "Time from job creation to a worker claiming it",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+JOB_EXECUTION_SECONDS = Histogram(
+    "orchestration_job_execution_seconds",
+    "Time from a worker starting a claimed job to it finishing, by outcome",
+    ["outcome"],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600),
+)
+OUTBOX_DELIVERY_SECONDS = Histogram(
+    "orchestration_outbox_delivery_seconds",
+    "Webhook POST latency per outbox delivery attempt",
+    ["outcome"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+COMFYUI_PROMPT_SECONDS = Histogram(
+    "comfyui_prompt_duration_seconds",
+    "Time from queueing a ComfyUI prompt to its outputs (or failure)",
+    ["outcome"],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200),
+)
+MODEL_OUTPUT_TPS = Histogram(
+    "model_output_tokens_per_second",
+    "Per-request decode throughput reported to the dashboard",
+    ["model"],
+    buckets=(1, 2.5, 5, 10, 20, 30, 50, 75, 100, 150, 200, 300, 500, 1000),
+)
+MODEL_TTFT_SECONDS = Histogram(
+    "model_time_to_first_token_seconds",
+    "Per-request time to first token reported to the dashboard",
+    ["model"],
+    buckets=(0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+SQLITE_QUERY_SECONDS = Histogram(
+    "sqlite_query_duration_seconds",
+    "SQLite statement execution time (execute only; row fetching is not included)",
+    ["db", "statement"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5),
+)
+
+_STATEMENTS = frozenset({"SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH", "PRAGMA", "CREATE", "BEGIN"})
+
+
+def render() -> tuple[bytes, str]:
+    """Current metrics in the Prometheus text format, with its content type."""
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+def start_metrics_server(port: int, addr: str = "0.0.0.0") -> bool:
+    """Serve ``/metrics`` from a daemon thread (worker); False when disabled (port 0)."""
+    if port <= 0:
+        return False
+    start_http_server(port, addr=addr)
+    return True
+
+
+def observe_model_sample(model: str, tokens_per_sec: float, ttft_ms: float) -> None:
+    if tokens_per_sec > 0:
+        MODEL_OUTPUT_TPS.labels(model).observe(tokens_per_sec)
+    if ttft_ms > 0:
+        MODEL_TTFT_SECONDS.labels(model).observe(ttft_ms / 1000.0)
+
+
+@contextlib.contextmanager
+def timed_outcome(histogram: Histogram) -> Iterator[None]:
+    """Observe the block's duration under ``outcome="completed"``, or ``"failed"`` if it raises."""
+    started = time.perf_counter()
+    outcome = "failed"
+    try:
+        yield
+        outcome = "completed"
+    finally:
+        histogram.labels(outcome).observe(time.perf_counter() - started)
+
+
+def seconds_since_iso(ts: str | None, now: float | None = None) -> float | None:
+    """Seconds elapsed since an ISO-8601 timestamp (job ``created_at``); None if unparseable."""
+    if not ts:
+        return None
+    try:
+        then = datetime.fromisoformat(ts).timestamp()
+    except ValueError:
+        return None
+    return max(0.0, (time.time() if now is None else now) - then)
+
+
+def _statement(sql: str) -> str:
+    verb = sql.lstrip()[:8].split(None, 1)
+    word = verb[0].upper() if verb else ""
+    return word if word in _STATEMENTS else "OTHER"
+
+
+class TimedConnection(sqlite3.Connection):
+    """``sqlite3.connect(..., factory=timed_connection("name"))`` records each statement's execute time."""
+
+    db_name = "sqlite"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._observers: dict[str, Any] = {}
+
+    def _observe(self, sql: str, started: float) -> None:
+        stmt = _statement(sql)
+        observer = self._observers.get(stmt)
+        if observer is None:
+            observer = self._observers[stmt] = SQLITE_QUERY_SECONDS.labels(self.db_name, stmt)
+        observer.observe(time.perf_counter() - started)
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._observe(sql, started)
+
+    def executemany(self, sql: str, parameters: Any, /) -> sqlite3.Cursor:
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            self._observe(sql, started)
+
+
+_factories: dict[str, type[TimedConnection]] = {}
+
+
+def timed_connection(db_name: str) -> type[TimedConnection]:
+    """Connection factory whose statements are labelled ``db=db_name``."""
+    factory = _factories.get(db_name)
+    if factory is None:
+        factory = _factories[db_name] = type(f"TimedConnection_{db_name}", (TimedConnection,), {"db_name": db_name})
+    return factory
@@ -6,15 +6,25 @@ WAL mode allows concurrent dashboard readers + single worker writer safely.
 
 from __future__ import annotations
 
+import base64
 import hashlib
 import json
+import os
 import sqlite3
+import threading
 import uuid
+import weakref
+from collections.abc import Iterable
 from dataclasses import asdict, dataclass, field
+from dataclasses import fields as dataclass_fields
 from datetime import UTC, datetime
 from enum import StrEnum
 from pathlib import Path
 from typing import Any
+from urllib.parse import urlsplit
+
+from dashboard.metrics import timed_connection
+from dashboard.orchestration_wakeup import notify_worker
 
 
 class JobState(StrEnum):
@@ -29,6 +39,16 @@ class JobState(StrEnum):
     cancelled = "cancelled"
 
 
+# States where a run is finished from the caller's point of view (await_run stops here).
+TERMINAL_STATES = frozenset({JobState.artifact_ready, JobState.published, JobState.failed, JobState.cancelled})
+
+# Claim priority class (higher first). Bulk work (batches, schedules) that has waited
+# long enough is promoted into the interactive class, so it is delayed but never
+# starved; see claim_jobs.
+PRIORITY_BULK = 0
+PRIORITY_INTERACTIVE = 10
+
+
 @dataclass
 class OrchestrationJob:
     job_id: str
@@ -46,33 +66,193 @@ class OrchestrationJob:
     compiled_workflow: str | None = None
     retry_count: int = 0
     scheduled_at: str | None = None
+    batch_id: str | None = None
     extra: dict[str, Any] = field(default_factory=dict)
+    # Lifecycle timestamps (queued = created_at); see JOB_PHASES
+    claimed_at: str | None = None
+    compiled_at: str | None = None
+    submitted_at: str | None = None
+    first_progress_at: str | None = None
+    outputs_at: str | None = None
+    published_at: str | None = None
+    # Scheduling: claim priority and the fair-share key (caller, schedule or template)
+    priority: int = PRIORITY_INTERACTIVE
+    source: str | None = None
 
     def to_dict(self) -> dict[str, Any]:
         d = asdict(self)
         d["state"] = self.state.value
         return d
 
+    def phase_durations(self) -> dict[str, float | None]:
+        """Seconds spent in each of ``JOB_PHASES``; None while a boundary is not recorded yet."""
+        return {name: _seconds_between(getattr(self, start), getattr(self, end)) for name, start, end in JOB_PHASES}
+
+
+# (phase, start column, end column). comfyui_queue/execution need a progress event
+# (websocket) or ComfyUI's execution_start history message; "comfyui" always spans both.
+JOB_PHASES: tuple[tuple[str, str, str], ...] = (
+    ("queue_wait", "created_at", "claimed_at"),
+    ("compile", "claimed_at", "compiled_at"),
+    ("submit", "compiled_at", "submitted_at"),
+    ("comfyui_queue", "submitted_at", "first_progress_at"),
+    ("execution", "first_progress_at", "outputs_at"),
+    ("comfyui", "submitted_at", "outputs_at"),
+    ("publish", "outputs_at", "published_at"),
+    ("total", "created_at", "outputs_at"),
+)
+_PHASE_COLUMNS = ("claimed_at", "compiled_at", "submitted_at", "first_progress_at", "outputs_at", "published_at")
+
+
+def _parse_iso(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+def _seconds_between(start: str | None, end: str | None) -> float | None:
+    a, b = _parse_iso(start), _parse_iso(end)
+    if a is None or b is None:
+        return None
+    return round(max(0.0, b - a), 3)
+
 
 def _now_iso() -> str:
     return datetime.now(UTC).isoformat().replace("+00:00", "Z")
 
 
+def _iso_from_epoch(ts: float) -> str:
+    return datetime.fromtimestamp(ts, UTC).isoformat().replace("+00:00", "Z")
+
+
+def _normalize_iso(value: str | datetime) -> str:
+    """``2026-01-01T00:00:00.000000Z`` form of an ISO-8601 time (naive = UTC); compares correctly as a string."""
+    dt = datetime.fromisoformat(value) if isinstance(value, str) else value
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return dt.astimezone(UTC).isoformat(timespec="microseconds").replace("+00:00", "Z")
+
+
 def _db_path(data_dir: Path) -> Path:
     d = data_dir / "orchestration"
     d.mkdir(parents=True, exist_ok=True)
     return d / "orchestration.db"
 
 
-def _connect(data_dir: Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(str(_db_path(data_dir)), timeout=30, check_same_thread=False)
+# ── Connection pool ───────────────────────────────────────────────────────────
+#
+# One long-lived connection per (thread, database file). The worker polls the
+# queue several times a second while the dashboard serves job lists, so opening
+# a connection (and re-running the PRAGMAs) per call dominated the hot paths.
+# sqlite3 caches prepared statements per connection, so keeping connections
+# alive also reuses compiled statements across calls.
+
+_STATEMENT_CACHE_SIZE = 256
+
+_pool_local = threading.local()
+_pool_lock = threading.Lock()
+_pool_generation = 0
+# (thread ident, db path) -> (owning thread, connection); lets close_connections()
+# reach connections owned by other threads and prune those of exited threads.
+_pool_registry: dict[tuple[int, str], tuple[weakref.ref[threading.Thread], sqlite3.Connection]] = {}
+_pool_stats = {"opened": 0, "reused": 0, "closed": 0}
+
+
+def webhook_host(url: str) -> str:
+    """Lowercased host[:port] of a webhook URL — the unit outbox delivery is capped by."""
+    return urlsplit(url).netloc.lower() or url
+
+
+def _open_connection(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        str(path), timeout=30, check_same_thread=False, cached_statements=_STATEMENT_CACHE_SIZE,
+        factory=timed_connection("orchestration"),
+    )
     conn.row_factory = sqlite3.Row
+    conn.create_function("webhook_host", 1, webhook_host, deterministic=True)
+    # Must precede journal_mode (which writes the header) to apply to a new file;
+    # existing databases are converted once by vacuum_db.
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
     conn.execute("PRAGMA journal_mode=WAL")
     conn.execute("PRAGMA synchronous=NORMAL")
     conn.execute("PRAGMA foreign_keys=ON")
     return conn
 
 
+def _prune_dead_threads_locked() -> None:
+    for key, (thread_ref, conn) in list(_pool_registry.items()):
+        thread = thread_ref()
+        if thread is None or not thread.is_alive():
+            del _pool_registry[key]
+            conn.close()
+            _pool_stats["closed"] += 1
+
+
+def _connect(data_dir: Path) -> sqlite3.Connection:
+    """Return this thread's pooled connection for data_dir, opening it on first use.
+
+    Use as ``with _connect(data_dir) as conn:`` — the block commits (or rolls
+    back on error) but leaves the connection open for the next call. A cached
+    connection is replaced if the database file was removed or recreated.
+    """
+    path = data_dir / "orchestration" / "orchestration.db"
+    key = str(path)
+    conns: dict[str, tuple[int, int, sqlite3.Connection]] | None = getattr(_pool_local, "conns", None)
+    if conns is None:
+        conns = _pool_local.conns = {}
+    cached = conns.get(key)
+    if cached is not None:
+        generation, inode, conn = cached
+        try:
+            current_inode = os.stat(key).st_ino
+        except OSError:
+            current_inode = None
+        if generation == _pool_generation and inode == current_inode:
+            with _pool_lock:
+                _pool_stats["reused"] += 1
+            return conn
+        with _pool_lock:
+            if _pool_registry.pop((threading.get_ident(), key), None) is not None:
+                conn.close()
+                _pool_stats["closed"] += 1
+        del conns[key]
+
+    conn = _open_connection(_db_path(data_dir))
+    with _pool_lock:
+        _prune_dead_threads_locked()
+        _pool_registry[(threading.get_ident(), key)] = (weakref.ref(threading.current_thread()), conn)
+        _pool_stats["opened"] += 1
+        generation = _pool_generation
+    conns[key] = (generation, os.stat(key).st_ino, conn)
+    return conn
+
+
+def close_connections() -> int:
+    """Close every pooled connection across all threads; returns how many were closed.
+
+    Call on process shutdown (dashboard lifespan, worker exit). Threads that
+    touch the database afterwards transparently open a fresh connection.
+    """
+    global _pool_generation  # noqa: PLW0603
+    with _pool_lock:
+        _pool_generation += 1
+        entries = list(_pool_registry.values())
+        _pool_registry.clear()
+        for _, conn in entries:
+            conn.close()
+        _pool_stats["closed"] += len(entries)
+    return len(entries)
+
+
+def connection_stats() -> dict[str, int]:
+    """Pool counters for this process: connections opened vs. reused, closed, currently open."""
+    with _pool_lock:
+        return {**_pool_stats, "open": len(_pool_registry)}
+
+
 _SCHEMA = """
 CREATE TABLE IF NOT EXISTS jobs (
     job_id TEXT PRIMARY KEY,
@@ -90,7 +270,28 @@ CREATE TABLE IF NOT EXISTS jobs (
     compiled_workflow TEXT,
     retry_count INTEGER DEFAULT 0,
     scheduled_at TEXT,
-    extra_json TEXT DEFAULT '{}'
+    extra_json TEXT DEFAULT '{}',
+    batch_id TEXT,
+    claimed_at TEXT,
+    compiled_at TEXT,
+    submitted_at TEXT,
+    first_progress_at TEXT,
+    outputs_at TEXT,
+    published_at TEXT,
+    params_hash TEXT,
+    outputs_hash TEXT,
+    workflow_hash TEXT,
+    priority INTEGER NOT NULL DEFAULT 10,
+    source TEXT
+);
+
+-- Content-addressed job payloads (params, outputs, compiled workflows), shared between jobs.
+-- kind 'raw' holds JSON text; kind 'graph' holds a {node_id: node blob hash} manifest, so
+-- compiled graphs that differ only in a seed node share every other node. See _put_workflow.
+CREATE TABLE IF NOT EXISTS job_blobs (
+    hash TEXT PRIMARY KEY,
+    kind TEXT NOT NULL DEFAULT 'raw',
+    data TEXT NOT NULL
 );
 
 CREATE TABLE IF NOT EXISTS publish_outbox (
@@ -131,8 +332,82 @@ CREATE TABLE IF NOT EXISTS schedules (
     created_at TEXT NOT NULL
 );
 
--- Performance indexes for hot polling paths (worker + dashboard)
-CREATE INDEX IF NOT EXISTS idx_jobs_state_created ON jobs(state, created_at);
+-- Append-only state-change feed for /jobs/events (SSE). Filled by triggers so every
+-- writer (dashboard, worker, claim/cancel/recover bulk updates) is covered.
+CREATE TABLE IF NOT EXISTS job_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    state TEXT NOT NULL,
+    at TEXT NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_job_events_insert AFTER INSERT ON jobs
+BEGIN
+    INSERT INTO job_events (job_id, state, at) VALUES (NEW.job_id, NEW.state, NEW.updated_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_job_events_state AFTER UPDATE OF state ON jobs
+WHEN NEW.state IS NOT OLD.state
+BEGIN
+    INSERT INTO job_events (job_id, state, at) VALUES (NEW.job_id, NEW.state, NEW.updated_at);
+END;
+
+-- Materialised counts for /api/performance/summary ('jobs:<state>', 'outbox:pending',
+-- 'outbox:delivered'), kept by triggers so every writer is covered; see _init_counters.
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_job_insert AFTER INSERT ON jobs
+BEGIN
+    INSERT INTO counters (name, value) VALUES ('jobs:' || NEW.state, 1)
+        ON CONFLICT(name) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_job_state AFTER UPDATE OF state ON jobs
+WHEN NEW.state IS NOT OLD.state
+BEGIN
+    UPDATE counters SET value = value - 1 WHERE name = 'jobs:' || OLD.state;
+    INSERT INTO counters (name, value) VALUES ('jobs:' || NEW.state, 1)
+        ON CONFLICT(name) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_job_delete AFTER DELETE ON jobs
+BEGIN
+    UPDATE counters SET value = value - 1 WHERE name = 'jobs:' || OLD.state;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_outbox_insert AFTER INSERT ON publish_outbox
+BEGIN
+    INSERT INTO counters (name, value)
+        VALUES (CASE WHEN NEW.delivered_at IS NULL THEN 'outbox:pending' ELSE 'outbox:delivered' END, 1)
+        ON CONFLICT(name) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_outbox_delivered AFTER UPDATE OF delivered_at ON publish_outbox
+WHEN (OLD.delivered_at IS NULL) != (NEW.delivered_at IS NULL)
+BEGIN
+    UPDATE counters SET value = value - 1
+        WHERE name = CASE WHEN OLD.delivered_at IS NULL THEN 'outbox:pending' ELSE 'outbox:delivered' END;
+    INSERT INTO counters (name, value)
+        VALUES (CASE WHEN NEW.delivered_at IS NULL THEN 'outbox:pending' ELSE 'outbox:delivered' END, 1)
+        ON CONFLICT(name) DO UPDATE SET value = value + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_counters_outbox_delete AFTER DELETE ON publish_outbox
+BEGIN
+    UPDATE counters SET value = value - 1
+        WHERE name = CASE WHEN OLD.delivered_at IS NULL THEN 'outbox:pending' ELSE 'outbox:delivered' END;
+END;
+
+-- Performance indexes for hot polling paths (worker + dashboard). The job indexes end in
+-- job_id so claim order and list_jobs keyset pages (created_at, job_id) need no sort step.
+DROP INDEX IF EXISTS idx_jobs_state_created;
+CREATE INDEX IF NOT EXISTS idx_jobs_state_created_id ON jobs(state, created_at, job_id);
+CREATE INDEX IF NOT EXISTS idx_jobs_created_id ON jobs(created_at, job_id);
+-- select_expired_jobs: finished jobs by time in their terminal state.
+CREATE INDEX IF NOT EXISTS idx_jobs_state_updated ON jobs(state, updated_at, job_id);
 CREATE INDEX IF NOT EXISTS idx_outbox_pending ON publish_outbox(delivered_at, attempts, next_retry_at);
 CREATE INDEX IF NOT EXISTS idx_outbox_job_id ON publish_outbox(job_id);
 CREATE INDEX IF NOT EXISTS idx_schedules_due ON schedules(enabled, next_run_at);
@@ -141,14 +416,79 @@ CREATE INDEX IF NOT EXISTS idx_wf_versions_promoted ON workflow_versions(workflo
 """
 
 
+# Columns added after the first release: (table, column, DDL type). CREATE TABLE IF NOT
+# EXISTS leaves older databases alone, so init_db adds whichever are missing.
+_ADDED_COLUMNS: list[tuple[str, str, str]] = [
+    ("jobs", "batch_id", "TEXT"),
+    *(("jobs", column, "TEXT") for column in _PHASE_COLUMNS),
+    ("jobs", "params_hash", "TEXT"),
+    ("jobs", "outputs_hash", "TEXT"),
+    ("jobs", "workflow_hash", "TEXT"),
+    ("jobs", "priority", f"INTEGER NOT NULL DEFAULT {PRIORITY_INTERACTIVE}"),
+    ("jobs", "source", "TEXT"),
+]
+
+# Indexes on added columns; created after the columns exist.
+_POST_MIGRATION_SCHEMA = """
+CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs(batch_id) WHERE batch_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_jobs_claimed ON jobs(claimed_at) WHERE claimed_at IS NOT NULL;
+-- claim_jobs: queued jobs in per-source order for the fair-share ROW_NUMBER(), covering.
+DROP INDEX IF EXISTS idx_jobs_state_source;
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs(state, source, created_at, job_id, priority, scheduled_at);
+-- next_due_job_at: earliest not-yet-due delayed job.
+CREATE INDEX IF NOT EXISTS idx_jobs_state_scheduled ON jobs(state, scheduled_at) WHERE scheduled_at IS NOT NULL;
+"""
+
+
+def _add_missing_columns(conn: sqlite3.Connection) -> None:
+    for table, column, ddl in _ADDED_COLUMNS:
+        existing = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+def _init_counters(conn: sqlite3.Connection, *, force: bool = False) -> None:
+    """Backfill ``counters`` from a full scan once (the triggers keep it current afterwards).
+
+    Runs under the write lock, after the triggers exist, so rows written by another
+    process meanwhile are counted exactly once. The ``_initialized`` row marks it done.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if force or conn.execute("SELECT 1 FROM counters WHERE name='_initialized'").fetchone() is None:
+            conn.execute("DELETE FROM counters")
+            conn.execute("INSERT INTO counters (name, value) SELECT 'jobs:' || state, COUNT(*) FROM jobs GROUP BY state")
+            conn.execute(
+                "INSERT INTO counters (name, value) "
+                "SELECT CASE WHEN delivered_at IS NULL THEN 'outbox:pending' ELSE 'outbox:delivered' END, COUNT(*) "
+                "FROM publish_outbox GROUP BY delivered_at IS NULL"
+            )
+            conn.execute("INSERT INTO counters (name, value) VALUES ('_initialized', 1)")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
 def init_db(data_dir: Path) -> None:
     """Create tables and migrate legacy JSON store if present."""
     with _connect(data_dir) as conn:
         conn.executescript(_SCHEMA)
+        _add_missing_columns(conn)
+        conn.executescript(_POST_MIGRATION_SCHEMA)
         conn.commit()
+        _init_counters(conn)
+        _move_inline_blobs(conn)
     _migrate_json_store(data_dir)
 
 
+def rebuild_counters(data_dir: Path) -> dict[str, int]:
+    """Recount ``counters`` from the tables (repair after manual edits); returns the new values."""
+    with _connect(data_dir) as conn:
+        _init_counters(conn, force=True)
+    return _read_counters(data_dir)
+
+
 def _migrate_json_store(data_dir: Path) -> None:
     legacy = data_dir / "orchestration" / "orchestration_jobs.json"
     if not legacy.is_file():
@@ -188,19 +528,171 @@ def _migrate_json_store(data_dir: Path) -> None:
         conn.commit()
 
 
-def _row_to_job(row: sqlite3.Row) -> OrchestrationJob:
+# ── Job payload blobs ─────────────────────────────────────────────────────────
+
+# Legacy inline payload column -> content hash column on jobs.
+_BLOB_COLUMNS: dict[str, str] = {
+    "params_json": "params_hash",
+    "outputs_json": "outputs_hash",
+    "compiled_workflow": "workflow_hash",
+}
+_BLOB_BATCH = 500  # hashes per IN (...) lookup, well under SQLITE_MAX_VARIABLE_NUMBER
+
+# Blobs no job references (directly, or as a node of a referenced graph). Rows written
+# in an open transaction are invisible to other connections, so a concurrent writer's
+# fresh blob is never collected before its job row commits.
+_GC_BLOBS_SQL = """
+DELETE FROM job_blobs WHERE hash NOT IN (
+    SELECT params_hash FROM jobs WHERE params_hash IS NOT NULL
+    UNION SELECT outputs_hash FROM jobs WHERE outputs_hash IS NOT NULL
+    UNION SELECT workflow_hash FROM jobs WHERE workflow_hash IS NOT NULL
+    UNION SELECT node.value FROM job_blobs AS g, json_each(g.data) AS node
+        WHERE g.kind = 'graph' AND g.hash IN (SELECT workflow_hash FROM jobs WHERE workflow_hash IS NOT NULL)
+)
+"""
+
+
+def _blob_hash(kind: str, data: str) -> str:
+    return hashlib.sha256(f"{kind}\0{data}".encode()).hexdigest()
+
+
+def _put_blob(conn: sqlite3.Connection, data: str, kind: str = "raw") -> str:
+    digest = _blob_hash(kind, data)
+    conn.execute("INSERT OR IGNORE INTO job_blobs (hash, kind, data) VALUES (?,?,?)", (digest, kind, data))
+    return digest
+
+
+def _put_workflow(conn: sqlite3.Connection, workflow: str | dict[str, Any]) -> str:
+    """Store a compiled API graph node by node; anything that is not a graph is stored whole."""
+    graph: Any = workflow
+    if isinstance(workflow, str):
+        try:
+            graph = json.loads(workflow)
+        except json.JSONDecodeError:
+            return _put_blob(conn, workflow)
+    if not isinstance(graph, dict) or not graph or not all(isinstance(n, dict) for n in graph.values()):
+        return _put_blob(conn, workflow if isinstance(workflow, str) else json.dumps(workflow))
+    nodes = {str(nid): json.dumps(node, separators=(",", ":")) for nid, node in graph.items()}
+    digests = {nid: _blob_hash("raw", data) for nid, data in nodes.items()}
+    conn.executemany(
+        "INSERT OR IGNORE INTO job_blobs (hash, kind, data) VALUES (?, 'raw', ?)",
+        [(digests[nid], data) for nid, data in nodes.items()],
+    )
+    return _put_blob(conn, json.dumps(digests, separators=(",", ":")), kind="graph")
+
+
+def _load_blobs(conn: sqlite3.Connection, hashes: set[str]) -> dict[str, str]:
+    """Blob text by hash; graph manifests come back reassembled into compact workflow JSON."""
+    found: dict[str, str] = {}
+    manifests: dict[str, dict[str, str]] = {}
+    ordered = sorted(hashes)
+    for i in range(0, len(ordered), _BLOB_BATCH):
+        chunk = ordered[i:i + _BLOB_BATCH]
+        placeholders = ", ".join("?" for _ in chunk)
+        for row in conn.execute(f"SELECT hash, kind, data FROM job_blobs WHERE hash IN ({placeholders})", chunk):
+            if row["kind"] == "graph":
+                manifests[row["hash"]] = json.loads(row["data"])
+            else:
+                found[row["hash"]] = row["data"]
+    if manifests:
+        nodes = _load_blobs(conn, {h for manifest in manifests.values() for h in manifest.values()})
+        for digest, manifest in manifests.items():
+            found[digest] = "{" + ",".join(
+                f"{json.dumps(nid)}:{nodes.get(node_hash, 'null')}" for nid, node_hash in manifest.items()
+            ) + "}"
+    return found
+
+
+def _jobs_from_rows(conn: sqlite3.Connection, rows: list[sqlite3.Row]) -> list[OrchestrationJob]:
+    """``_row_to_job`` for many rows with one blob lookup for the whole set."""
+    hashes = {
+        row[hash_col] for row in rows for hash_col in _BLOB_COLUMNS.values()
+        if hash_col in row.keys() and row[hash_col]
+    }
+    blobs = _load_blobs(conn, hashes) if hashes else {}
+    return [_row_to_job(row, blobs) for row in rows]
+
+
+def _fetch_job(conn: sqlite3.Connection, job_id: str) -> OrchestrationJob | None:
+    rows = conn.execute("SELECT * FROM jobs WHERE job_id=?", (job_id,)).fetchall()
+    return _jobs_from_rows(conn, rows)[0] if rows else None
+
+
+def _move_inline_blobs(conn: sqlite3.Connection, batch: int = 500) -> int:
+    """One-time move of payloads stored inline in ``jobs`` (older databases) to ``job_blobs``."""
+    moved = 0
+    while True:
+        rows = conn.execute(
+            "SELECT job_id, params_json, outputs_json, compiled_workflow FROM jobs "
+            "WHERE params_json IS NOT NULL OR outputs_json IS NOT NULL OR compiled_workflow IS NOT NULL LIMIT ?",
+            (batch,),
+        ).fetchall()
+        if not rows:
+            return moved
+        for row in rows:
+            conn.execute(
+                "UPDATE jobs SET params_hash=COALESCE(?, params_hash), outputs_hash=COALESCE(?, outputs_hash), "
+                "workflow_hash=COALESCE(?, workflow_hash), params_json=NULL, outputs_json=NULL, "
+                "compiled_workflow=NULL WHERE job_id=?",
+                (
+                    _put_blob(conn, row["params_json"]) if row["params_json"] else None,
+                    _put_blob(conn, row["outputs_json"]) if row["outputs_json"] else None,
+                    _put_workflow(conn, row["compiled_workflow"]) if row["compiled_workflow"] else None,
+                    row["job_id"],
+                ),
+            )
+        conn.commit()
+        moved += len(rows)
+
+
+def gc_job_blobs(data_dir: Path) -> int:
+    """Delete payload blobs no job references any more; returns how many."""
+    with _connect(data_dir) as conn:
+        removed = conn.execute(_GC_BLOBS_SQL).rowcount
+        conn.commit()
+    return removed
+
+
+# OrchestrationJob field -> jobs columns, for list_jobs projections.
+JOB_FIELDS: tuple[str, ...] = tuple(f.name for f in dataclass_fields(OrchestrationJob))
+_FIELD_COLUMNS: dict[str, tuple[str, ...]] = {
+    **{name: (name,) for name in JOB_FIELDS},
+    "outputs": ("outputs_json", "outputs_hash"),
+    "extra": ("extra_json",),
+    "params_json": ("params_json", "params_hash"),
+    "compiled_workflow": ("compiled_workflow", "workflow_hash"),
+}
+# Left out of job listings unless asked for: a compiled ComfyUI graph can be tens of KB per row.
+JOB_LARGE_FIELDS: tuple[str, ...] = ("params_json", "compiled_workflow")
+JOB_LIST_DEFAULT_FIELDS: tuple[str, ...] = tuple(name for name in JOB_FIELDS if name not in JOB_LARGE_FIELDS)
+
+
+def _row_to_job(row: sqlite3.Row, blobs: dict[str, str] | None = None) -> OrchestrationJob:
+    """Build a job from a full or projected row; columns not selected keep their defaults.
+
+    Payload columns resolve through ``blobs`` (see ``_jobs_from_rows``) when the row carries
+    their hash, and fall back to the legacy inline column otherwise.
+    """
+    cols = set(row.keys())
+
+    def col(name: str) -> Any:
+        hash_col = _BLOB_COLUMNS.get(name)
+        if hash_col in cols and row[hash_col]:
+            return (blobs or {}).get(row[hash_col])
+        return row[name] if name in cols else None
+
     try:
-        state = JobState(row["state"])
+        state = JobState(col("state"))
     except ValueError:
         state = JobState.queued
     outputs = None
-    if row["outputs_json"]:
+    if outputs_json := col("outputs_json"):
         try:
-            outputs = json.loads(row["outputs_json"])
+            outputs = json.loads(outputs_json)
         except (json.JSONDecodeError, TypeError):
             pass
     extra: dict = {}
-    if row["extra_json"]:
+    if col("extra_json"):
         try:
             extra = json.loads(row["extra_json"])
         except (json.JSONDecodeError, TypeError):
@@ -208,25 +700,33 @@ def _row_to_job(row: sqlite3.Row) -> OrchestrationJob:
     return OrchestrationJob(
         job_id=row["job_id"],
         state=state,
-        created_at=row["created_at"],
-        updated_at=row["updated_at"],
-        template_id=row["template_id"],
-        workflow_id=row["workflow_id"],
-        prompt_id=row["prompt_id"],
-        error=row["error"],
+        created_at=col("created_at"),
+        updated_at=col("updated_at"),
+        template_id=col("template_id"),
+        workflow_id=col("workflow_id"),
+        prompt_id=col("prompt_id"),
+        error=col("error"),
         outputs=outputs,
-        publish_webhook=row["publish_webhook"],
-        publish_status=row["publish_status"],
-        params_json=row["params_json"],
-        compiled_workflow=row["compiled_workflow"],
-        retry_count=row["retry_count"] or 0,
-        scheduled_at=row["scheduled_at"],
+        publish_webhook=col("publish_webhook"),
+        publish_status=col("publish_status"),
+        params_json=col("params_json"),
+        compiled_workflow=col("compiled_workflow"),
+        retry_count=col("retry_count") or 0,
+        scheduled_at=col("scheduled_at"),
+        batch_id=col("batch_id"),
         extra=extra,
+        **{column: col(column) for column in _PHASE_COLUMNS},
+        priority=PRIORITY_INTERACTIVE if col("priority") is None else int(row["priority"]),
+        source=col("source"),
     )
 
 
 # ── Jobs ──────────────────────────────────────────────────────────────────────
 
+def _default_source(template_id: str | None, workflow_id: str | None) -> str:
+    return f"template:{template_id}" if template_id else f"workflow:{workflow_id or ''}"
+
+
 def create_job(
     data_dir: Path,
     *,
@@ -234,50 +734,159 @@ def create_job(
     workflow_id: str | None = None,
     params: dict[str, Any] | None = None,
     compiled_workflow: dict[str, Any] | None = None,
-    scheduled_at: str | None = None,
+    scheduled_at: str | datetime | None = None,
     extra: dict[str, Any] | None = None,
+    priority: int = PRIORITY_INTERACTIVE,
+    source: str | None = None,
+    batch_id: str | None = None,
 ) -> OrchestrationJob:
+    """Queue one job. ``source`` is its fair-share key; it defaults to the template/workflow.
+
+    ``scheduled_at`` is a not-before time: the job stays queued, unclaimed, until then.
+    Raises ValueError if it is not an ISO-8601 time. ``batch_id`` adds the job to an
+    existing batch (the worker's retries of batch jobs use it).
+    """
     jid = str(uuid.uuid4())
     t = _now_iso()
     with _connect(data_dir) as conn:
         conn.execute(
             """INSERT INTO jobs
                (job_id, state, created_at, updated_at, template_id, workflow_id,
-                params_json, compiled_workflow, scheduled_at, extra_json)
-               VALUES (?,?,?,?,?,?,?,?,?,?)""",
+                params_hash, workflow_hash, scheduled_at, extra_json, priority, source, batch_id)
+               VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)""",
             (
                 jid, JobState.queued.value, t, t,
                 template_id, workflow_id,
-                json.dumps(params) if params else None,
-                json.dumps(compiled_workflow) if compiled_workflow else None,
-                scheduled_at,
+                _put_blob(conn, json.dumps(params)) if params else None,
+                _put_workflow(conn, compiled_workflow) if compiled_workflow else None,
+                _normalize_iso(scheduled_at) if scheduled_at else None,
                 json.dumps(extra or {}),
+                priority,
+                source or _default_source(template_id, workflow_id),
+                batch_id,
             ),
         )
         conn.commit()
-        row = conn.execute("SELECT * FROM jobs WHERE job_id=?", (jid,)).fetchone()
-    return _row_to_job(row)
+        job = _fetch_job(conn, jid)
+    notify_worker(data_dir)
+    return job
+
+
+def create_job_batch(
+    data_dir: Path,
+    params_list: list[dict[str, Any]],
+    *,
+    template_id: str | None = None,
+    workflow_id: str | None = None,
+    extra: dict[str, Any] | None = None,
+    priority: int = PRIORITY_BULK,
+    source: str | None = None,
+    scheduled_at: str | datetime | None = None,
+) -> tuple[str, list[str]]:
+    """Queue one job per params dict in a single transaction; returns (batch_id, job_ids).
+
+    The worker is woken once for the whole batch. Batches are bulk work by default
+    and, unless ``source`` is given, their own fair-share source (``batch:<id>``);
+    ``scheduled_at`` holds the whole batch back until then (see create_job).
+    """
+    batch_id = str(uuid.uuid4())
+    t = _now_iso()
+    not_before = _normalize_iso(scheduled_at) if scheduled_at else None
+    extra_json = json.dumps(extra or {})
+    job_source = source or f"batch:{batch_id}"
+    job_ids = [str(uuid.uuid4()) for _ in params_list]
+    with _connect(data_dir) as conn:
+        conn.executemany(
+            """INSERT INTO jobs
+               (job_id, state, created_at, updated_at, template_id, workflow_id,
+                params_hash, extra_json, batch_id, priority, source, scheduled_at)
+               VALUES (?,?,?,?,?,?,?,?,?,?,?,?)""",
+            [
+                (jid, JobState.queued.value, t, t, template_id, workflow_id,
+                 _put_blob(conn, json.dumps(params)) if params else None, extra_json, batch_id,
+                 priority, job_source, not_before)
+                for jid, params in zip(job_ids, params_list, strict=True)
+            ],
+        )
+        conn.commit()
+    notify_worker(data_dir)
+    return batch_id, job_ids
 
 
 def get_job(data_dir: Path, job_id: str) -> OrchestrationJob | None:
     with _connect(data_dir) as conn:
-        row = conn.execute("SELECT * FROM jobs WHERE job_id=?", (job_id,)).fetchone()
-    return _row_to_job(row) if row else None
+        return _fetch_job(conn, job_id)
 
 
-def list_jobs(data_dir: Path, state: str | None = None, limit: int = 100) -> list[OrchestrationJob]:
+def encode_job_cursor(job: OrchestrationJob) -> str:
+    """Opaque keyset cursor for the page after ``job`` in ``list_jobs`` order."""
+    return base64.urlsafe_b64encode(f"{job.created_at}|{job.job_id}".encode()).decode().rstrip("=")
+
+
+def decode_job_cursor(cursor: str) -> tuple[str, str]:
+    """``(created_at, job_id)`` from ``encode_job_cursor``; ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+    created_at, sep, job_id = raw.partition("|")
+    if not sep or not created_at or not job_id:
+        raise ValueError("Invalid cursor")
+    return created_at, job_id
+
+
+def list_jobs_page(
+    data_dir: Path,
+    state: str | None = None,
+    limit: int = 100,
+    *,
+    cursor: str | None = None,
+    fields: Iterable[str] | None = None,
+) -> tuple[list[OrchestrationJob], str | None]:
+    """Newest jobs first, keyset-paginated on ``(created_at, job_id)``; returns (jobs, next_cursor).
+
+    ``fields`` limits the columns read (``job_id``, ``created_at`` and ``state`` are always
+    included); fields not selected keep their dataclass defaults. Unknown names raise ValueError.
+    """
     limit = max(1, min(limit, 1000))
+    if fields is None:
+        columns = ["*"]
+    else:
+        wanted = set(fields) | {"job_id", "created_at", "state"}
+        unknown = wanted - set(JOB_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+        columns = [column for name in JOB_FIELDS if name in wanted for column in _FIELD_COLUMNS[name]]
+    where: list[str] = []
+    args: list[Any] = []
+    if state:
+        where.append("state=?")
+        args.append(state)
+    if cursor:
+        where.append("(created_at, job_id) < (?, ?)")
+        args.extend(decode_job_cursor(cursor))
+    sql = f"SELECT {', '.join(columns)} FROM jobs"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at DESC, job_id DESC LIMIT ?"
     with _connect(data_dir) as conn:
-        if state:
-            rows = conn.execute(
-                "SELECT * FROM jobs WHERE state=? ORDER BY created_at DESC LIMIT ?",
-                (state, limit),
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                "SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
-            ).fetchall()
-    return [_row_to_job(r) for r in rows]
+        rows = conn.execute(sql, (*args, limit + 1)).fetchall()
+        jobs = _jobs_from_rows(conn, rows[:limit])
+    next_cursor = encode_job_cursor(jobs[-1]) if len(rows) > limit else None
+    return jobs, next_cursor
+
+
+def list_jobs(data_dir: Path, state: str | None = None, limit: int = 100) -> list[OrchestrationJob]:
+    return list_jobs_page(data_dir, state, limit)[0]
+
+
+def get_compiled_workflow(data_dir: Path, job_id: str) -> str | None:
+    """A job's compiled workflow JSON; None if the job is unknown or not compiled yet."""
+    with _connect(data_dir) as conn:
+        rows = conn.execute(
+            "SELECT job_id, compiled_workflow, workflow_hash FROM jobs WHERE job_id=?", (job_id,)
+        ).fetchall()
+        return _jobs_from_rows(conn, rows)[0].compiled_workflow if rows else None
 
 
 _VALID_TRANSITIONS: dict[JobState, set[JobState]] = {
@@ -293,33 +902,46 @@ _VALID_TRANSITIONS: dict[JobState, set[JobState]] = {
 }
 
 
-def update_job(data_dir: Path, job_id: str, **fields: Any) -> OrchestrationJob | None:
+def update_job(data_dir: Path, job_id: str, *, returning: bool = True, **fields: Any) -> OrchestrationJob | None:
+    """Update job fields (state changes are validated); returns the job unless ``returning=False``.
+
+    Payloads (``outputs``, ``params_json``, ``compiled_workflow``) go to ``job_blobs``.
+    Callers that ignore the result should pass ``returning=False`` to skip re-reading it.
+    """
     if not fields:
-        return get_job(data_dir, job_id)
+        return get_job(data_dir, job_id) if returning else None
     allowed = {
         "state", "prompt_id", "error", "outputs", "publish_webhook",
         "publish_status", "retry_count", "compiled_workflow", "params_json",
+        *_PHASE_COLUMNS,
     }
     # Validate state transitions atomically via conditional UPDATE
     new_state = None
     if "state" in fields:
         new_state = JobState(fields["state"]) if isinstance(fields["state"], str) else fields["state"]
-    col_map = {"outputs": "outputs_json", "state": "state"}
-    sets = ["updated_at=?"]
-    vals: list[Any] = [_now_iso()]
-    for k, v in fields.items():
-        if k not in allowed:
-            continue
-        col = col_map.get(k, k)
-        if k == "outputs":
-            v = json.dumps(v) if v is not None else None
-        elif k == "state" and isinstance(v, JobState):
-            v = v.value
-        sets.append(f"{col}=?")
-        vals.append(v)
-    if len(sets) == 1:
-        return get_job(data_dir, job_id)
     with _connect(data_dir) as conn:
+        sets = ["updated_at=?"]
+        vals: list[Any] = [_now_iso()]
+        for k, v in fields.items():
+            if k not in allowed:
+                continue
+            if k == "outputs":
+                v = json.dumps(v) if v is not None else None
+            if k in ("outputs", "params_json", "compiled_workflow"):
+                inline = "outputs_json" if k == "outputs" else k
+                if v is not None:
+                    v = _put_workflow(conn, v) if k == "compiled_workflow" else _put_blob(conn, v)
+                sets.append(f"{_BLOB_COLUMNS[inline]}=?, {inline}=NULL")
+                vals.append(v)
+                continue
+            if k == "state" and isinstance(v, JobState):
+                v = v.value
+            elif k in _PHASE_COLUMNS and isinstance(v, (int, float)):
+                v = _iso_from_epoch(v)  # phase timestamps may be passed as epoch seconds
+            sets.append(f"{k}=?")
+            vals.append(v)
+        if len(sets) == 1:
+            return _fetch_job(conn, job_id) if returning else None
         if new_state is not None:
             # Build reverse lookup: which source states can transition to new_state?
             valid_from = {s.value for s, targets in _VALID_TRANSITIONS.items() if new_state in targets}
@@ -345,30 +967,87 @@ def update_job(data_dir: Path, job_id: str, **fields: Any) -> OrchestrationJob |
             vals.append(job_id)
             conn.execute(f"UPDATE jobs SET {', '.join(sets)} WHERE job_id=?", vals)
         conn.commit()
-        row = conn.execute("SELECT * FROM jobs WHERE job_id=?", (job_id,)).fetchone()
-    return _row_to_job(row) if row else None
+        return _fetch_job(conn, job_id) if returning else None
+
+
+# Claim order: priority class, then round-robin across sources within the class
+# (each source's oldest job, then each source's second-oldest, ...), then the higher
+# base priority (so promoted bulk never beats interactive work on the same turn), then age.
+_CLAIM_ORDER_SQL = """
+SELECT job_id FROM (
+ SELECT job_id, created_at, priority, class,
+  ROW_NUMBER() OVER (PARTITION BY class, source ORDER BY created_at, job_id) AS turn
+ FROM (
+  SELECT job_id, source, created_at, priority,
+   CASE WHEN priority + CAST((julianday(:now) - julianday(COALESCE(scheduled_at, created_at))) * 86400 * :rate
+                             AS INTEGER) >= :top
+        THEN MAX(priority, :top) ELSE priority END AS class
+  FROM jobs WHERE state=:queued AND (scheduled_at IS NULL OR scheduled_at<=:now)
+ )
+) ORDER BY class DESC, turn, priority DESC, created_at, job_id LIMIT :n
+"""
 
 
-def claim_next_job(data_dir: Path) -> OrchestrationJob | None:
-    """Atomically claim one queued job → validated. Returns None if queue empty."""
+def claim_jobs(data_dir: Path, n: int, *, aging_sec: float = 60.0) -> list[OrchestrationJob]:
+    """Atomically claim up to n queued jobs → validated, by priority class with per-source fair share.
+
+    Within a priority class, jobs are taken round-robin across ``source``, so one
+    schedule or batch of 500 jobs gets one slot per round instead of the whole
+    queue, and a new source is served on the next round however old the others are.
+    A job waiting ``aging_sec`` per priority step below PRIORITY_INTERACTIVE (10
+    minutes for bulk work by default; 0 disables aging) is promoted into the
+    interactive class, where its source takes turns with the interactive sources,
+    so sustained interactive load delays bulk work but cannot starve it.
+
+    Jobs whose ``scheduled_at`` is still in the future are skipped (see
+    next_due_job_at); once due, they age from ``scheduled_at``, not creation.
+
+    The candidates are picked and claimed under one ``BEGIN IMMEDIATE`` write lock,
+    so concurrent workers never claim the same job and a caller never comes back
+    empty-handed because it lost a race. Jobs are returned in claim order.
+    """
+    if n <= 0:
+        return []
+    with _connect(data_dir) as conn:
+        now = _normalize_iso(datetime.now(UTC))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            order = [r[0] for r in conn.execute(_CLAIM_ORDER_SQL, {
+                "now": now, "rate": 1.0 / aging_sec if aging_sec > 0 else 0.0, "top": PRIORITY_INTERACTIVE,
+                "queued": JobState.queued.value, "n": n,
+            })]
+            rows = conn.execute(
+                f"UPDATE jobs SET state=?, updated_at=?, claimed_at=? "
+                f"WHERE job_id IN ({','.join('?' * len(order))}) RETURNING *",
+                (JobState.validated.value, now, now, *order),
+            ).fetchall() if order else []
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        jobs = _jobs_from_rows(conn, rows)
+    # RETURNING order is unspecified; hand jobs back in the order they were picked.
+    rank = {job_id: i for i, job_id in enumerate(order)}
+    return sorted(jobs, key=lambda j: rank[j.job_id])
+
+
+def next_due_job_at(data_dir: Path) -> float | None:
+    """Epoch seconds when the earliest delayed queued job becomes due; None if there is none.
+
+    The worker sleeps until then (or a wakeup) instead of polling for delayed jobs.
+    """
     with _connect(data_dir) as conn:
         row = conn.execute(
-            "SELECT job_id FROM jobs WHERE state=? ORDER BY created_at ASC LIMIT 1",
-            (JobState.queued.value,),
+            "SELECT MIN(scheduled_at) FROM jobs WHERE state=? AND scheduled_at>?",
+            (JobState.queued.value, _normalize_iso(datetime.now(UTC))),
         ).fetchone()
-        if not row:
-            return None
-        jid = row["job_id"]
-        now = _now_iso()
-        updated = conn.execute(
-            "UPDATE jobs SET state=?, updated_at=? WHERE job_id=? AND state=?",
-            (JobState.validated.value, now, jid, JobState.queued.value),
-        ).rowcount
-        conn.commit()
-        if updated == 0:
-            return None  # lost the race
-        row = conn.execute("SELECT * FROM jobs WHERE job_id=?", (jid,)).fetchone()
-    return _row_to_job(row) if row else None
+    return _parse_iso(row[0])
+
+
+def claim_next_job(data_dir: Path) -> OrchestrationJob | None:
+    """Atomically claim one queued job → validated. Returns None if queue empty."""
+    jobs = claim_jobs(data_dir, 1)
+    return jobs[0] if jobs else None
 
 
 def cancel_job(data_dir: Path, job_id: str) -> OrchestrationJob | None:
@@ -380,8 +1059,40 @@ def cancel_job(data_dir: Path, job_id: str) -> OrchestrationJob | None:
              JobState.queued.value, JobState.validated.value, JobState.running.value),
         )
         conn.commit()
-        row = conn.execute("SELECT * FROM jobs WHERE job_id=?", (job_id,)).fetchone()
-    return _row_to_job(row) if row else None
+        return _fetch_job(conn, job_id)
+
+
+def get_batch(data_dir: Path, batch_id: str) -> dict[str, Any] | None:
+    """Per-state counts and job states for a batch, or None if no job carries ``batch_id``."""
+    with _connect(data_dir) as conn:
+        rows = conn.execute(
+            "SELECT job_id, state, updated_at FROM jobs WHERE batch_id=? ORDER BY created_at, rowid",
+            (batch_id,),
+        ).fetchall()
+    if not rows:
+        return None
+    counts: dict[str, int] = {}
+    for r in rows:
+        counts[r["state"]] = counts.get(r["state"], 0) + 1
+    return {
+        "batch_id": batch_id,
+        "total": len(rows),
+        "counts": counts,
+        "done": all(r["state"] in TERMINAL_STATES for r in rows),
+        "jobs": [{"job_id": r["job_id"], "state": r["state"], "updated_at": r["updated_at"]} for r in rows],
+    }
+
+
+def cancel_batch(data_dir: Path, batch_id: str) -> int:
+    """Request cancellation for every queued, validated, or running job in a batch; returns how many."""
+    with _connect(data_dir) as conn:
+        result = conn.execute(
+            "UPDATE jobs SET state=?, updated_at=? WHERE batch_id=? AND state IN (?,?,?)",
+            (JobState.cancelling.value, _now_iso(), batch_id,
+             JobState.queued.value, JobState.validated.value, JobState.running.value),
+        )
+        conn.commit()
+        return result.rowcount
 
 
 def recover_stale_running_jobs(data_dir: Path) -> int:
@@ -397,26 +1108,76 @@ def recover_stale_running_jobs(data_dir: Path) -> int:
         return result.rowcount
 
 
-def get_job_counts(data_dir: Path) -> dict[str, int]:
+def _read_counters(data_dir: Path) -> dict[str, int]:
     with _connect(data_dir) as conn:
-        rows = conn.execute(
-            "SELECT state, COUNT(*) AS count FROM jobs GROUP BY state"
-        ).fetchall()
+        return {row["name"]: int(row["value"]) for row in conn.execute("SELECT name, value FROM counters")}
+
+
+def get_job_counts(data_dir: Path) -> dict[str, int]:
+    """Jobs per state, read from the trigger-maintained ``counters`` table (no scan of ``jobs``)."""
     counts = {state.value: 0 for state in JobState}
-    for row in rows:
-        counts[str(row["state"])] = int(row["count"])
+    for name, value in _read_counters(data_dir).items():
+        if name.startswith("jobs:"):
+            counts[name[5:]] = value
     return counts
 
 
 def get_outbox_stats(data_dir: Path) -> dict[str, int]:
+    counters = _read_counters(data_dir)
+    return {"pending": counters.get("outbox:pending", 0), "delivered": counters.get("outbox:delivered", 0)}
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def get_job_phase_stats(data_dir: Path, limit: int = 1000) -> dict[str, Any]:
+    """p50/p95/max seconds per ``JOB_PHASES`` entry over the most recently claimed jobs."""
+    cols = ", ".join(("created_at", *_PHASE_COLUMNS))
     with _connect(data_dir) as conn:
-        row = conn.execute(
-            "SELECT "
-            "SUM(CASE WHEN delivered_at IS NULL THEN 1 ELSE 0 END) AS pending, "
-            "SUM(CASE WHEN delivered_at IS NOT NULL THEN 1 ELSE 0 END) AS delivered "
-            "FROM publish_outbox"
-        ).fetchone()
-    return {"pending": int(row["pending"] or 0), "delivered": int(row["delivered"] or 0)}
+        rows = conn.execute(
+            f"SELECT {cols} FROM jobs WHERE claimed_at IS NOT NULL ORDER BY claimed_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+    phases: dict[str, Any] = {}
+    for name, start, end in JOB_PHASES:
+        values = sorted(v for r in rows if (v := _seconds_between(r[start], r[end])) is not None)
+        phases[name] = {
+            "count": len(values),
+            "p50": round(_percentile(values, 50), 3) if values else None,
+            "p95": round(_percentile(values, 95), 3) if values else None,
+            "max": values[-1] if values else None,
+        }
+    return {"jobs": len(rows), "phases": phases}
+
+
+def get_job_events(data_dir: Path, after_seq: int = 0, limit: int = 500) -> list[dict[str, Any]]:
+    """State transitions recorded after ``after_seq``, oldest first."""
+    with _connect(data_dir) as conn:
+        rows = conn.execute(
+            "SELECT seq, job_id, state, at FROM job_events WHERE seq > ? ORDER BY seq ASC LIMIT ?",
+            (after_seq, limit),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def latest_job_event_seq(data_dir: Path) -> int:
+    with _connect(data_dir) as conn:
+        row = conn.execute("SELECT MAX(seq) FROM job_events").fetchone()
+    return int(row[0] or 0)
+
+
+def prune_job_events(data_dir: Path, keep: int = 50_000) -> int:
+    """Drop all but the newest ``keep`` job events; returns rows deleted."""
+    with _connect(data_dir) as conn:
+        cur = conn.execute(
+            "DELETE FROM job_events WHERE seq <= (SELECT MAX(seq) FROM job_events) - ?",
+            (keep,),
+        )
+        conn.commit()
+    return cur.rowcount
 
 
 def checkpoint_wal(data_dir: Path) -> dict[str, Any]:
@@ -432,18 +1193,30 @@ def checkpoint_wal(data_dir: Path) -> dict[str, Any]:
     }
 
 
-def vacuum_db(data_dir: Path) -> None:
-    """Run VACUUM with a short timeout to avoid blocking readers/writers.
+_AUTO_VACUUM_INCREMENTAL = 2  # PRAGMA auto_vacuum value
 
-    VACUUM requires an exclusive lock on the entire database.  Using a short
-    busy_timeout means it will fail fast (OperationalError) rather than block
-    the dashboard or other worker threads for the duration of the rewrite.
+
+def vacuum_db(data_dir: Path) -> None:
+    """Drop unreferenced payload blobs and give free pages back to the filesystem.
+
+    Databases in ``auto_vacuum=INCREMENTAL`` mode (new ones, and older ones after
+    their first pass here) only need ``PRAGMA incremental_vacuum``, an ordinary
+    write transaction. Older databases get a one-time ``VACUUM`` to switch modes.
+    VACUUM requires an exclusive lock on the entire database, so a short
+    busy_timeout makes it fail fast (OperationalError) rather than block the
+    dashboard or other worker threads for the duration of the rewrite.
     """
     import logging as _logging
 
     conn = sqlite3.connect(str(_db_path(data_dir)), timeout=5, check_same_thread=False)
     try:
-        conn.execute("VACUUM")
+        conn.execute(_GC_BLOBS_SQL)  # unreferenced payloads go first so their pages are reclaimed
+        conn.commit()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == _AUTO_VACUUM_INCREMENTAL:
+            conn.executescript("PRAGMA incremental_vacuum")
+        else:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
         conn.commit()
     except sqlite3.OperationalError as exc:
         _logging.getLogger("orchestration_db").debug("VACUUM skipped (DB busy): %s", exc)
@@ -451,6 +1224,90 @@ def vacuum_db(data_dir: Path) -> None:
         conn.close()
 
 
+def incremental_vacuum(data_dir: Path, pages: int = 0) -> int:
+    """Release up to ``pages`` free pages (0 = all) to the filesystem; returns how many.
+
+    A no-op until the database is in ``auto_vacuum=INCREMENTAL`` mode (see vacuum_db).
+    """
+    with _connect(data_dir) as conn:
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # executescript steps the pragma to completion; execute() would free a single page.
+        conn.executescript(f"PRAGMA incremental_vacuum({max(0, int(pages))})")
+        after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return max(0, before - after)
+
+
+# ── Retention (see dashboard/job_retention.py) ────────────────────────────────
+
+def select_expired_jobs(data_dir: Path, state: str, updated_before: str, limit: int) -> list[OrchestrationJob]:
+    """Jobs that reached ``state`` before ``updated_before``, longest-finished first, payloads included.
+
+    Terminal jobs are not updated again, so ``updated_at`` is when they entered ``state``.
+
+    Jobs with an undelivered outbox row are skipped: their delivery is still pending.
+    """
+    with _connect(data_dir) as conn:
+        rows = conn.execute(
+            "SELECT * FROM jobs WHERE state=? AND updated_at < ? AND NOT EXISTS ("
+            "SELECT 1 FROM publish_outbox o WHERE o.job_id = jobs.job_id AND o.delivered_at IS NULL) "
+            "ORDER BY updated_at, job_id LIMIT ?",
+            (state, updated_before, limit),
+        ).fetchall()
+        return _jobs_from_rows(conn, rows)
+
+
+def outbox_rows_for_jobs(data_dir: Path, job_ids: list[str]) -> list[dict[str, Any]]:
+    if not job_ids:
+        return []
+    placeholders = ", ".join("?" for _ in job_ids)
+    with _connect(data_dir) as conn:
+        rows = conn.execute(
+            f"SELECT * FROM publish_outbox WHERE job_id IN ({placeholders}) ORDER BY id", job_ids
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def delete_jobs(data_dir: Path, job_ids: list[str], state: str) -> int:
+    """Delete jobs (and their outbox rows) that are still in ``state``; returns jobs deleted."""
+    if not job_ids:
+        return 0
+    placeholders = ", ".join("?" for _ in job_ids)
+    with _connect(data_dir) as conn:
+        conn.execute(
+            f"DELETE FROM publish_outbox WHERE job_id IN "
+            f"(SELECT job_id FROM jobs WHERE job_id IN ({placeholders}) AND state=?)",
+            (*job_ids, state),
+        )
+        deleted = conn.execute(
+            f"DELETE FROM jobs WHERE job_id IN ({placeholders}) AND state=?", (*job_ids, state)
+        ).rowcount
+        conn.commit()
+    return deleted
+
+
+def select_delivered_outbox(data_dir: Path, delivered_before: str, limit: int) -> list[dict[str, Any]]:
+    with _connect(data_dir) as conn:
+        rows = conn.execute(
+            "SELECT * FROM publish_outbox WHERE delivered_at IS NOT NULL AND delivered_at < ? "
+            "ORDER BY delivered_at, id LIMIT ?",
+            (delivered_before, limit),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def delete_outbox_rows(data_dir: Path, row_ids: list[int]) -> int:
+    """Delete delivered outbox rows by id; returns rows deleted."""
+    if not row_ids:
+        return 0
+    placeholders = ", ".join("?" for _ in row_ids)
+    with _connect(data_dir) as conn:
+        deleted = conn.execute(
+            f"DELETE FROM publish_outbox WHERE id IN ({placeholders}) AND delivered_at IS NOT NULL", row_ids
+        ).rowcount
+        conn.commit()
+    return deleted
+
+
 # ── Publish outbox ─────────────────────────────────────────────────────────────
 
 def _outbox_key(job_id: str, webhook_url: str) -> str:
@@ -475,16 +1332,44 @@ def create_outbox_entry(
     return key
 
 
-def get_pending_outbox(data_dir: Path, max_attempts: int = 5) -> list[dict[str, Any]]:
+def get_pending_outbox(
+    data_dir: Path,
+    max_attempts: int = 5,
+    limit: int = 20,
+    *,
+    per_host: int | None = None,
+    host_caps: dict[str, int] | None = None,
+    skip_ids: Iterable[int] = (),
+) -> list[dict[str, Any]]:
+    """Due, undelivered outbox rows, oldest first.
+
+    At most ``per_host`` rows are returned per webhook host (``host_caps``
+    overrides that for individual hosts, 0 skipping a host entirely), and
+    ``skip_ids`` — rows already being delivered — are left out, so a backed-up
+    host cannot fill the batch ahead of the others.
+    """
     now = _now_iso()
     with _connect(data_dir) as conn:
         rows = conn.execute(
-            """SELECT * FROM publish_outbox
-               WHERE delivered_at IS NULL
-               AND attempts < ?
-               AND (next_retry_at IS NULL OR next_retry_at <= ?)
-               ORDER BY id ASC LIMIT 20""",
-            (max_attempts, now),
+            """SELECT o.* FROM publish_outbox o JOIN (
+                SELECT id, webhook_host(webhook_url) AS host,
+                       ROW_NUMBER() OVER (PARTITION BY webhook_host(webhook_url) ORDER BY id) AS turn
+                FROM publish_outbox
+                WHERE delivered_at IS NULL
+                AND attempts < :max_attempts
+                AND (next_retry_at IS NULL OR next_retry_at <= :now)
+                AND id NOT IN (SELECT value FROM json_each(:skip_ids))
+               ) p ON p.id = o.id
+               WHERE p.turn <= COALESCE((SELECT value FROM json_each(:host_caps) WHERE key = p.host), :per_host)
+               ORDER BY o.id LIMIT :limit""",
+            {
+                "max_attempts": max_attempts,
+                "now": now,
+                "skip_ids": json.dumps(list(skip_ids)),
+                "host_caps": json.dumps(host_caps or {}),
+                "per_host": limit if per_host is None else per_host,
+                "limit": limit,
+            },
         ).fetchall()
     return [dict(r) for r in rows]
 
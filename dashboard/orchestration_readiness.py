@@ -20,11 +20,14 @@ ORCHESTRATION_MEDIA_REQUIRED = os.environ.get("ORCHESTRATION_MEDIA_REQUIRED", "0
     "yes",
 )
 
+# Shared by every probe (the readiness monitor calls them every few seconds);
+# timeouts are passed per request.
+_client = httpx.Client(follow_redirects=True)
+
 
 def _probe_get(url: str, timeout: float = 3.0) -> tuple[bool, str | None]:
     try:
-        with httpx.Client(timeout=timeout, follow_redirects=True) as client:
-            r = client.get(url)
+        r = _client.get(url, timeout=timeout)
         ok = r.status_code < 500
         if r.status_code == 400 and "/mcp" in url:
             ok = True
@@ -55,57 +58,58 @@ def _probe_mcp_tools(url: str, timeout: float = 5.0) -> tuple[bool, int, str | N
     }
     session_id: str | None = None
     try:
-        with httpx.Client(timeout=timeout, follow_redirects=True) as client:
-            # Step 1: initialize session
-            init_r = client.post(url, json=init_body, headers=headers)
-            if init_r.status_code >= 400:
-                return False, 0, f"initialize HTTP {init_r.status_code}"
-            session_id = init_r.headers.get("mcp-session-id")
-            sess_headers = {**headers}
-            if session_id:
-                sess_headers["Mcp-Session-Id"] = session_id
-
-            # Step 2: send initialized notification
-            client.post(
-                url,
-                json={"jsonrpc": "2.0", "method": "notifications/initialized"},
-                headers=sess_headers,
-            )
-
-            # Step 3: tools/list
-            tools_r = client.post(
-                url,
-                json={"jsonrpc": "2.0", "method": "tools/list", "id": 2},
-                headers=sess_headers,
-            )
-            if tools_r.status_code >= 400:
-                return False, 0, f"tools/list HTTP {tools_r.status_code}"
-
-            # Parse SSE if the response is event-stream
-            body_text = tools_r.text
-            if body_text.startswith("event:") or body_text.startswith("data:"):
-                data_parts = []
-                for line in body_text.splitlines():
-                    if line.startswith("data: "):
-                        data_parts.append(line[6:])
-                if data_parts:
-                    body_text = "\n".join(data_parts)
-
-            import json as _json
-            data = _json.loads(body_text)
-            tools = data.get("result", {}).get("tools", [])
-            count = len(tools)
-
-            # Step 4: terminate session (best-effort)
-            if session_id:
-                try:
-                    client.request("DELETE", url, headers={"Mcp-Session-Id": session_id})
-                except (httpx.RequestError, httpx.HTTPStatusError):
-                    pass
-
-            if count == 0:
-                return False, 0, "tools/list returned 0 tools"
-            return True, count, None
+        # Step 1: initialize session
+        init_r = _client.post(url, json=init_body, headers=headers, timeout=timeout)
+        if init_r.status_code >= 400:
+            return False, 0, f"initialize HTTP {init_r.status_code}"
+        session_id = init_r.headers.get("mcp-session-id")
+        sess_headers = {**headers}
+        if session_id:
+            sess_headers["Mcp-Session-Id"] = session_id
+
+        # Step 2: send initialized notification
+        _client.post(
+            url,
+            json={"jsonrpc": "2.0", "method": "notifications/initialized"},
+            headers=sess_headers,
+            timeout=timeout,
+        )
+
+        # Step 3: tools/list
+        tools_r = _client.post(
+            url,
+            json={"jsonrpc": "2.0", "method": "tools/list", "id": 2},
+            headers=sess_headers,
+            timeout=timeout,
+        )
+        if tools_r.status_code >= 400:
+            return False, 0, f"tools/list HTTP {tools_r.status_code}"
+
+        # Parse SSE if the response is event-stream
+        body_text = tools_r.text
+        if body_text.startswith("event:") or body_text.startswith("data:"):
+            data_parts = []
+            for line in body_text.splitlines():
+                if line.startswith("data: "):
+                    data_parts.append(line[6:])
+            if data_parts:
+                body_text = "\n".join(data_parts)
+
+        import json as _json
+        data = _json.loads(body_text)
+        tools = data.get("result", {}).get("tools", [])
+        count = len(tools)
+
+        # Step 4: terminate session (best-effort)
+        if session_id:
+            try:
+                _client.request("DELETE", url, headers={"Mcp-Session-Id": session_id}, timeout=timeout)
+            except (httpx.RequestError, httpx.HTTPStatusError):
+                pass
+
+        if count == 0:
+            return False, 0, "tools/list returned 0 tools"
+        return True, count, None
     except Exception as e:
         return False, 0, str(e)
 
@@ -0,0 +1,129 @@
+"""Queue wakeup channel between job producers (dashboard, schedules) and the workers.
+
+Each worker binds its own Unix datagram socket in ``orchestration/wake/`` on the
+shared /data/dashboard volume and blocks on it; ``notify_worker`` sends a
+one-byte datagram to every socket there after a job is committed, so replicas
+never steal each other's socket. Delivery is best-effort: if no worker is
+listening (not started, Windows host, socket path too long) the send is silently
+dropped and the workers fall back to their timers.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import os
+import select
+import socket
+import uuid
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+WAKE_DIR_NAME = "wake"
+
+
+def wake_dir(data_dir: Path) -> Path:
+    return data_dir / "orchestration" / WAKE_DIR_NAME
+
+
+def _send(path: Path) -> bool:
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.setblocking(False)
+            sock.sendto(b"!", str(path))
+        return True
+    except BlockingIOError:
+        return True  # receive buffer full — a wakeup is already pending
+    except ConnectionRefusedError:
+        # Left behind by a worker that died without close(); nobody can bind it again.
+        with contextlib.suppress(OSError):
+            path.unlink()
+        return False
+    except OSError:
+        return False  # gone since the listing, or path too long
+
+
+def notify_worker(data_dir: Path) -> bool:
+    """Nudge every listening worker to check the queue now. Returns True if any received it."""
+    if not hasattr(socket, "AF_UNIX"):
+        return False
+    try:
+        paths = list(wake_dir(data_dir).glob("*.sock"))
+    except OSError:
+        return False
+    woke = False
+    for path in paths:
+        woke = _send(path) or woke
+    return woke
+
+
+class WakeupListener:
+    """Worker side of the channel: ``wait(timeout)`` returns early when notified."""
+
+    def __init__(self, data_dir: Path) -> None:
+        # Random rather than pid-based: every replica container runs its worker as pid 1.
+        # Kept short since AF_UNIX paths are limited to ~100 bytes.
+        self.path = wake_dir(data_dir) / f"{uuid.uuid4().hex[:8]}.sock"
+        self._sock: socket.socket | None = None
+
+    @property
+    def active(self) -> bool:
+        return self._sock is not None
+
+    def open(self) -> bool:
+        """Bind the socket; returns False (and the worker keeps polling) if that is not possible."""
+        if not hasattr(socket, "AF_UNIX"):
+            return False
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            sock.bind(str(self.path))
+        except OSError as exc:
+            sock.close()
+            logger.warning("Queue wakeup socket unavailable (%s): %s — falling back to polling", self.path, exc)
+            return False
+        sock.setblocking(False)
+        self._sock = sock
+        return True
+
+    def wait(self, timeout: float | None) -> bool:
+        """Block until notified or timeout (None = indefinitely). Returns True if woken."""
+        if self._sock is None:
+            raise RuntimeError("WakeupListener.wait() called before open()")
+        ready, _, _ = select.select([self._sock], [], [], timeout)
+        if not ready:
+            return False
+        self.drain()
+        return True
+
+    def fileno(self) -> int:
+        """Socket fd, for event loops that watch it directly (``loop.add_reader``)."""
+        if self._sock is None:
+            raise RuntimeError("WakeupListener.fileno() called before open()")
+        return self._sock.fileno()
+
+    def wake(self) -> None:
+        """Wake a wait() in progress from another thread or a signal handler."""
+        if self._sock is not None:
+            _send(self.path)
+
+    def drain(self) -> None:
+        """Discard pending wakeups (they coalesce into one queue check)."""
+        if self._sock is None:
+            return
+        while True:
+            try:
+                self._sock.recv(64)
+            except OSError:  # BlockingIOError once the queue of wakeups is empty
+                return
+
+    def close(self) -> None:
+        if self._sock is None:
+            return
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
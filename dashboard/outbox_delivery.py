@@ -0,0 +1,369 @@
+"""Concurrent publish-outbox delivery with per-host caps and circuit breakers (run by the worker).
+
+Pending ``publish_outbox`` rows are POSTed concurrently, bounded globally and per
+webhook host, so one slow n8n endpoint only ties up its own slots. Each pass
+fetches only as many rows per host as that host has free slots (none for an open
+breaker), so a backed-up host never crowds the others out of the batch. Each host has
+a circuit breaker: after ``failure_threshold`` consecutive failures its entries
+are left pending (no attempt recorded) until ``reset_after`` seconds pass, when a
+single trial delivery decides whether to close the breaker again.
+
+Delivery runs apart from job dispatch — as its own thread (``start``) for the
+thread engine or as a task (``serve``) on the async engine's loop. A metrics
+snapshot (deliveries/sec, latency percentiles, breaker states) is written to
+``orchestration/outbox-metrics.json`` on the shared volume after every pass;
+``read_outbox_metrics`` is how the dashboard reports it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from dashboard.metrics import OUTBOX_DELIVERY_SECONDS
+from dashboard.orchestration_db import (
+    JobState,
+    get_job,
+    get_pending_outbox,
+    mark_outbox_delivered,
+    mark_outbox_delivered_by_id,
+    record_outbox_attempt,
+    update_job,
+    webhook_host,
+)
+
+logger = logging.getLogger(__name__)
+
+METRICS_FILE_NAME = "outbox-metrics.json"
+_METRICS_WINDOW_SEC = 300.0
+
+
+def outbox_metrics_path(data_dir: Path) -> Path:
+    return data_dir / "orchestration" / METRICS_FILE_NAME
+
+
+def read_outbox_metrics(data_dir: Path) -> dict[str, Any] | None:
+    """Latest snapshot written by the worker's dispatcher, or None if there is none yet."""
+    try:
+        return json.loads(outbox_metrics_path(data_dir).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker: closed → open → half_open (one trial) → closed/open."""
+
+    def __init__(self, failure_threshold: int = 5, reset_after: float = 60.0) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """True if a delivery may be attempted now (claims the half-open trial slot)."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def slots(self, limit: int) -> int:
+        """How many deliveries may start now: none while open or a trial is out, one trial when half-open."""
+        state = self.state
+        if state == "closed":
+            return limit
+        if state == "half_open" and not self._trial_in_flight:
+            return min(limit, 1)
+        return 0
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+
+class DeliveryMetrics:
+    """Totals plus a sliding window of recent attempts for rate and latency figures."""
+
+    def __init__(self, window_sec: float = _METRICS_WINDOW_SEC) -> None:
+        self.window_sec = window_sec
+        self.delivered = 0
+        self.failed = 0
+        self.deferred = 0
+        self._recent: deque[tuple[float, float, bool]] = deque()
+
+    def record(self, latency_ms: float, ok: bool) -> None:
+        if ok:
+            self.delivered += 1
+        else:
+            self.failed += 1
+        OUTBOX_DELIVERY_SECONDS.labels("delivered" if ok else "failed").observe(latency_ms / 1000.0)
+        now = time.time()
+        self._recent.append((now, latency_ms, ok))
+        self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        while self._recent and now - self._recent[0][0] > self.window_sec:
+            self._recent.popleft()
+
+    def snapshot(self) -> dict[str, Any]:
+        now = time.time()
+        self._trim(now)
+        ok_latencies = sorted(lat for _, lat, ok in self._recent if ok)
+        ok_count = len(ok_latencies)
+        span = min(self.window_sec, now - self._recent[0][0]) if self._recent else 0.0
+        return {
+            "delivered": self.delivered,
+            "failed": self.failed,
+            "deferred": self.deferred,
+            "window_sec": self.window_sec,
+            "deliveries_per_sec": round(ok_count / span, 3) if span > 0 else float(ok_count),
+            "latency_ms": {
+                "p50": round(_percentile(ok_latencies, 50), 1),
+                "p95": round(_percentile(ok_latencies, 95), 1),
+                "max": round(ok_latencies[-1], 1) if ok_latencies else 0.0,
+            },
+        }
+
+
+class OutboxDispatcher:
+    def __init__(
+        self,
+        data_dir: Path,
+        *,
+        max_attempts: int = 5,
+        interval: float = 5.0,
+        max_concurrency: int = 32,
+        per_host_limit: int = 4,
+        failure_threshold: int = 5,
+        reset_after: float = 60.0,
+        timeout: float = 30.0,
+        batch_size: int = 200,
+    ) -> None:
+        self.data_dir = data_dir
+        self.max_attempts = max_attempts
+        self.interval = interval
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host_limit = max(1, per_host_limit)
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self.metrics = DeliveryMetrics()
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self._inflight: dict[int, asyncio.Task[None]] = {}
+        self._host_inflight: Counter[str] = Counter()
+        self._slot_freed: asyncio.Event | None = None
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._stop: asyncio.Event | None = None
+
+    # ── Running ───────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Run ``serve`` on a dedicated thread with its own event loop."""
+        ready = threading.Event()
+
+        async def _main() -> None:
+            self._loop = asyncio.get_running_loop()
+            self._stop = asyncio.Event()
+            ready.set()
+            await self.serve(self._stop)
+
+        self._thread = threading.Thread(target=asyncio.run, args=(_main(),), name="outbox-delivery", daemon=True)
+        self._thread.start()
+        ready.wait(5)
+
+    def stop(self, timeout: float = 35.0) -> None:
+        if self._loop is not None and self._stop is not None:
+            with contextlib.suppress(RuntimeError):  # loop already closed
+                self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    async def serve(self, stop: asyncio.Event) -> None:
+        """Dispatch pending entries every ``interval`` (or as soon as a slot frees) until ``stop`` is set, then drain."""
+        self._slot_freed = asyncio.Event()
+        async with httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_concurrency),
+        ) as client:
+            while not stop.is_set():
+                try:
+                    await self.dispatch_pending(client)
+                except Exception as exc:
+                    logger.error("Outbox processing error: %s", exc)
+                await self._wait_for_slot(stop)
+            await self.drain(self.timeout + 5)
+
+    async def _wait_for_slot(self, stop: asyncio.Event) -> None:
+        assert self._slot_freed is not None
+        waiters = {asyncio.ensure_future(stop.wait()), asyncio.ensure_future(self._slot_freed.wait())}
+        try:
+            await asyncio.wait(waiters, timeout=self.interval, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        self._slot_freed.clear()
+
+    async def drain(self, timeout: float | None = None) -> None:
+        """Wait for deliveries already started, then write a final metrics snapshot."""
+        if self._inflight:
+            _, pending = await asyncio.wait(set(self._inflight.values()), timeout=timeout)
+            for task in pending:
+                task.cancel()
+        self._write_metrics()
+
+    # ── Dispatch ──────────────────────────────────────────────────────────────
+
+    def breaker_for(self, host: str) -> CircuitBreaker:
+        breaker = self.breakers.get(host)
+        if breaker is None:
+            breaker = self.breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_after)
+        return breaker
+
+    async def dispatch_pending(self, client: httpx.AsyncClient) -> int:
+        """Start a delivery task for each due entry that has a free slot; returns how many started."""
+        free = self.max_concurrency - len(self._inflight)
+        if free <= 0:
+            self._write_metrics()
+            return 0
+        host_caps = {
+            host: self.breaker_for(host).slots(max(self.per_host_limit - self._host_inflight[host], 0))
+            for host in set(self.breakers) | set(self._host_inflight)
+        }
+        entries = await asyncio.to_thread(
+            get_pending_outbox,
+            self.data_dir,
+            max_attempts=self.max_attempts,
+            limit=min(self.batch_size, free),
+            per_host=self.per_host_limit,
+            host_caps=host_caps,
+            skip_ids=list(self._inflight),
+        )
+        started = 0
+        for entry in entries:
+            row_id = entry["id"]
+            host = webhook_host(entry["webhook_url"])
+            if not self.breaker_for(host).allow():
+                self.metrics.deferred += 1
+                continue
+            task = asyncio.get_running_loop().create_task(self._deliver(client, entry, host))
+            self._inflight[row_id] = task
+            self._host_inflight[host] += 1
+            task.add_done_callback(lambda _t, rid=row_id, h=host: self._task_done(rid, h))
+            started += 1
+        self._write_metrics()
+        return started
+
+    def _task_done(self, row_id: int, host: str) -> None:
+        self._inflight.pop(row_id, None)
+        self._host_inflight[host] -= 1
+        if self._host_inflight[host] <= 0:
+            del self._host_inflight[host]
+        if self._slot_freed is not None:
+            self._slot_freed.set()
+
+    async def _deliver(self, client: httpx.AsyncClient, entry: dict[str, Any], host: str) -> None:
+        key = entry.get("idempotency_key")
+        row_id = entry["id"]
+        breaker = self.breaker_for(host)
+        if breaker.state == "open":
+            # Tripped by another delivery started in the same pass — leave it pending.
+            self.metrics.deferred += 1
+            return
+        started = time.perf_counter()
+        try:
+            r = await client.post(
+                entry["webhook_url"],
+                json=json.loads(entry["payload_json"]),
+                headers={"X-Idempotency-Key": key or ""},
+            )
+            r.raise_for_status()
+        except Exception as exc:
+            self.metrics.record((time.perf_counter() - started) * 1000, ok=False)
+            breaker.record_failure()
+            await asyncio.to_thread(record_outbox_attempt, self.data_dir, row_id, error=str(exc))
+            logger.warning("Outbox entry %d delivery failed: %s", row_id, exc)
+            if breaker.state == "open":
+                logger.warning("Outbox circuit open for %s after %d failures", host, breaker.failures)
+            return
+        self.metrics.record((time.perf_counter() - started) * 1000, ok=True)
+        breaker.record_success()
+        try:
+            await asyncio.to_thread(self._record_delivered, entry)
+        except Exception as exc:
+            logger.error("Outbox entry %d delivered but not recorded: %s", row_id, exc)
+
+    def _record_delivered(self, entry: dict[str, Any]) -> None:
+        key = entry.get("idempotency_key")
+        if key:
+            mark_outbox_delivered(self.data_dir, key)
+        else:
+            # No idempotency_key — mark by row_id directly
+            mark_outbox_delivered_by_id(self.data_dir, entry["id"])
+        # Transition job to published
+        job = get_job(self.data_dir, entry["job_id"])
+        if job and job.state == JobState.publish_enqueued:
+            update_job(self.data_dir, entry["job_id"], returning=False, state=JobState.published, publish_status="published",
+                       published_at=time.time())
+        logger.info("Outbox entry %d delivered for job %s", entry["id"], entry["job_id"])
+
+    # ── Metrics ───────────────────────────────────────────────────────────────
+
+    def snapshot(self) -> dict[str, Any]:
+        out = self.metrics.snapshot()
+        out["in_flight"] = len(self._inflight)
+        out["breakers"] = {
+            host: {"state": b.state, "failures": b.failures}
+            for host, b in self.breakers.items()
+            if b.state != "closed" or b.failures
+        }
+        out["updated_at"] = time.time()
+        return out
+
+    def _write_metrics(self) -> None:
+        path = outbox_metrics_path(self.data_dir)
+        tmp = path.with_suffix(".tmp")
+        try:
+            tmp.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.debug("Could not write outbox metrics: %s", exc)
@@ -2,11 +2,10 @@
 
 from __future__ import annotations
 
-import copy
 import os
 import random
 import re
-from typing import Any
+from typing import Any, NamedTuple
 
 PLACEHOLDER_PREFIX = "PARAM_"
 PLACEHOLDER_TYPE_HINTS = {
@@ -104,33 +103,67 @@ def get_optional_param_default(param_name: str, annotation: type) -> Any:
     return None
 
 
-def apply_param_placeholders(workflow: dict[str, Any], params: dict[str, Any]) -> dict[str, Any]:
-    """Deep-copy workflow and replace PARAM_* string placeholders using params."""
-    out = copy.deepcopy(workflow)
-    required_missing: list[str] = []
+class PlaceholderBinding(NamedTuple):
+    """One ``PARAM_*`` input: where it sits in the graph and how to fill it."""
+
+    node_id: str
+    input_name: str
+    param_name: str
+    annotation: type
 
-    for node_id, node in list(out.items()):
+
+def find_placeholder_bindings(workflow: dict[str, Any]) -> list[PlaceholderBinding]:
+    """Scan a workflow once for PARAM_* inputs; the result can be reused for every job."""
+    bindings: list[PlaceholderBinding] = []
+    for node_id, node in workflow.items():
         if not isinstance(node, dict) or str(node_id).startswith("__"):
             continue
         inputs = node.get("inputs")
         if not isinstance(inputs, dict):
             continue
-        for input_name, val in list(inputs.items()):
+        for input_name, val in inputs.items():
             parsed = _parse_placeholder(val)
-            if not parsed:
-                continue
-            pname, ann, _ = parsed
-            raw = params.get(pname)
-            if raw is None:
-                if pname in _OPTIONAL_PARAMS:
-                    raw = get_optional_param_default(pname, ann)
-                    if raw is None:
-                        continue
-                else:
-                    required_missing.append(pname)
+            if parsed:
+                pname, ann, _ = parsed
+                bindings.append(PlaceholderBinding(node_id, input_name, pname, ann))
+    return bindings
+
+
+def copy_json(value: Any) -> Any:
+    """Deep copy of a JSON-shaped value (dicts, lists, scalars) — several times faster than copy.deepcopy."""
+    if isinstance(value, dict):
+        return {k: copy_json(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [copy_json(v) for v in value]
+    return value
+
+
+def apply_placeholder_bindings(
+    workflow: dict[str, Any],
+    bindings: list[PlaceholderBinding],
+    params: dict[str, Any],
+) -> dict[str, Any]:
+    """Copy workflow and write params into the precomputed binding slots."""
+    out = copy_json(workflow)
+    required_missing: list[str] = []
+
+    for b in bindings:
+        raw = params.get(b.param_name)
+        if raw is None:
+            if b.param_name in _OPTIONAL_PARAMS:
+                raw = get_optional_param_default(b.param_name, b.annotation)
+                if raw is None:
                     continue
-            inputs[input_name] = _coerce_value(raw, ann)
+            else:
+                required_missing.append(b.param_name)
+                continue
+        out[b.node_id]["inputs"][b.input_name] = _coerce_value(raw, b.annotation)
 
     if required_missing:
         raise ValueError(f"Missing required parameters: {sorted(set(required_missing))}")
     return out
+
+
+def apply_param_placeholders(workflow: dict[str, Any], params: dict[str, Any]) -> dict[str, Any]:
+    """Deep-copy workflow and replace PARAM_* string placeholders using params."""
+    return apply_placeholder_bindings(workflow, find_placeholder_bindings(workflow), params)
@@ -0,0 +1,154 @@
+"""Cached orchestration readiness: one background prober instead of a probe per request.
+
+``compute_readiness`` opens an MCP session and probes model-gateway (and ComfyUI)
+synchronously — seconds of work that ``/run`` used to repeat on every submission.
+``ReadinessMonitor`` keeps the latest result as a snapshot: ``get()`` returns it
+in O(1) while it is younger than ``ttl`` (an unhealthy result is re-checked after
+``unhealthy_ttl`` so recovery is noticed quickly, doubling per consecutive
+failure up to ``ttl`` so a service that stays down is not hammered), refreshes in the background
+when it is older, and only makes the caller wait when there is no snapshot yet
+or it is older than ``max_stale``. Concurrent refreshes are coalesced into one
+probe. ``invalidate()`` is called after changes that can flip readiness (MCP
+server list, service restarts) to trigger an immediate re-probe.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class ReadinessMonitor:
+    def __init__(
+        self,
+        probe: Callable[[], dict[str, Any]],
+        *,
+        ttl: float = 5.0,
+        unhealthy_ttl: float = 1.0,
+        max_stale: float = 30.0,
+    ) -> None:
+        self._probe = probe
+        self.ttl = ttl
+        self.unhealthy_ttl = min(unhealthy_ttl, ttl)
+        self.max_stale = max(max_stale, ttl)
+        self._result: dict[str, Any] | None = None
+        self._checked_mono = 0.0
+        self._checked_wall = 0.0
+        self._dirty = False
+        self._failures = 0  # consecutive not-ok probes; drives the unhealthy backoff
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._inflight: asyncio.Task[dict[str, Any]] | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._wake: asyncio.Event | None = None
+        self.probe_count = 0
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Tasks and events belong to one loop (tests run one per TestClient request).
+            self._loop = loop
+            self._inflight = None
+            self._task = None
+            self._wake = None
+
+    # ── Snapshot ──────────────────────────────────────────────────────────────
+
+    def age(self) -> float | None:
+        return None if self._result is None else time.monotonic() - self._checked_mono
+
+    def _fresh_for(self) -> float:
+        if self._result and self._result.get("ok"):
+            return self.ttl
+        return min(self.unhealthy_ttl * 2 ** max(self._failures - 1, 0), self.ttl)
+
+    def snapshot(self) -> dict[str, Any] | None:
+        """Latest result plus ``checked_at`` / ``age_sec`` / ``stale``; None before the first probe."""
+        if self._result is None:
+            return None
+        age = time.monotonic() - self._checked_mono
+        return {
+            **self._result,
+            "checked_at": datetime.fromtimestamp(self._checked_wall, UTC).isoformat().replace("+00:00", "Z"),
+            "age_sec": round(age, 3),
+            "ttl_sec": self.ttl,
+            "stale": self._dirty or age > self._fresh_for(),
+        }
+
+    async def get(self) -> dict[str, Any]:
+        """Snapshot for a request: cached when fresh, waits only when missing or too old."""
+        self._bind_loop()
+        age = self.age()
+        if age is None or age > self.max_stale:
+            await self.refresh()
+        elif self._dirty or age > self._fresh_for():
+            self._refresh_in_background()
+        snap = self.snapshot()
+        assert snap is not None
+        return snap
+
+    # ── Refreshing ────────────────────────────────────────────────────────────
+
+    async def refresh(self) -> dict[str, Any]:
+        """Probe now (joining a probe already in flight) and return the raw result."""
+        self._bind_loop()
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.get_running_loop().create_task(self._run_probe(), name="readiness-probe")
+        return await asyncio.shield(self._inflight)
+
+    def _refresh_in_background(self) -> None:
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.get_running_loop().create_task(self._run_probe(), name="readiness-probe")
+
+    async def _run_probe(self) -> dict[str, Any]:
+        self._dirty = False
+        try:
+            result = await asyncio.to_thread(self._probe)
+        except Exception as exc:
+            logger.warning("Readiness probe failed: %s", exc)
+            result = {"ok": False, "checks": [{"id": "orchestration_probe", "ok": False, "error": str(exc)}]}
+        self.probe_count += 1
+        self._failures = 0 if result.get("ok") else self._failures + 1
+        previous = self._result
+        self._result = result
+        self._checked_mono = time.monotonic()
+        self._checked_wall = time.time()
+        if previous is not None and bool(previous.get("ok")) != bool(result.get("ok")):
+            logger.info("Orchestration readiness changed: ok=%s", bool(result.get("ok")))
+        return result
+
+    def invalidate(self) -> None:
+        """Mark the snapshot stale and re-probe as soon as possible."""
+        self._dirty = True
+        if self._wake is not None:
+            self._wake.set()
+
+    # ── Background loop ───────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        """Keep the snapshot fresh from a task on the running loop (called from app lifespan)."""
+        self._bind_loop()
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run(), name="readiness-monitor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        while True:
+            self._wake.clear()
+            await self.refresh()
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(self._wake.wait(), self._fresh_for())
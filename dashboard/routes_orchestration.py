@@ -9,24 +9,37 @@ import json
 import logging
 import os
 import socket
+import time
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Literal
 from urllib.parse import urlparse
 
 import httpx
 from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
 
+from dashboard.job_events import JobEventBroker
 from dashboard.orchestration_db import (
+    JOB_FIELDS,
+    JOB_LIST_DEFAULT_FIELDS,
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    TERMINAL_STATES,
     JobState,
+    cancel_batch,
     cancel_job,
     create_job,
+    create_job_batch,
     create_outbox_entry,
     create_schedule,
     delete_schedule,
+    get_batch,
+    get_compiled_workflow,
     get_job,
     get_workflow_version,
-    list_jobs,
+    list_jobs_page,
     list_schedules,
     list_workflow_versions,
     load_store,
@@ -38,6 +51,7 @@ from dashboard.orchestration_db import (
     update_schedule,
 )
 from dashboard.orchestration_readiness import compute_readiness
+from dashboard.readiness_monitor import ReadinessMonitor
 from dashboard.text_sanitizers import sanitize_workflow_id
 from dashboard.workflow_boundary import assert_api_workflow
 from dashboard.workflow_templates import compile_template, list_template_ids, load_template
@@ -88,14 +102,41 @@ def _ops_headers(request: Request | None) -> dict[str, str]:
 
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 load_store(DATA_DIR)
+_job_events = JobEventBroker(DATA_DIR)
+SSE_KEEPALIVE_SEC = 15.0
+# Looked up at probe time so tests can patch routes_orchestration.compute_readiness.
+_readiness = ReadinessMonitor(
+    lambda: compute_readiness(),
+    ttl=float(os.environ.get("ORCHESTRATION_READINESS_TTL_SEC", "5")),
+    max_stale=float(os.environ.get("ORCHESTRATION_READINESS_MAX_STALE_SEC", "30")),
+)
+
+
+def start_readiness_monitor() -> None:
+    _readiness.start()
+
+
+async def stop_readiness_monitor() -> None:
+    await _readiness.stop()
+
+
+def invalidate_readiness() -> None:
+    """Re-probe readiness soon; call after changes that can flip it (MCP servers, service restarts)."""
+    _readiness.invalidate()
 
 
 # ── Readiness ──────────────────────────────────────────────────────────────────
 
 @router.get("/readiness")
-async def readiness():
-    """Returns 200 when upstream services (model-gateway, MCP, ComfyUI) are healthy, 503 otherwise."""
-    r = await asyncio.to_thread(compute_readiness)
+async def readiness(refresh: bool = False):
+    """Returns 200 when upstream services (model-gateway, MCP, ComfyUI) are healthy, 503 otherwise.
+
+    Served from the readiness monitor's snapshot; ``age_sec`` / ``stale`` say how old it
+    is. ``refresh=true`` waits for a fresh probe.
+    """
+    if refresh:
+        await _readiness.refresh()
+    r = await _readiness.get()
     if not r.get("ok"):
         from fastapi.responses import JSONResponse
         return JSONResponse(status_code=503, content=r)
@@ -230,17 +271,34 @@ async def rollback_workflow_endpoint(workflow_id: str, to_version: int = Query(.
 
 # ── Job execution ─────────────────────────────────────────────────────────────
 
+def _job_source(request: Request, label: str | None) -> str | None:
+    """Fair-share key for queued jobs: the authenticated caller, else the client's label.
+
+    None lets orchestration_db fall back to the template/workflow id.
+    """
+    caller = getattr(request.state, "caller", None)
+    if caller:
+        return f"caller:{caller}"
+    return f"client:{label}" if label else None
+
+
 class RunBody(BaseModel):
     template_id: str | None = None
     workflow_id: str | None = None
     params: dict[str, Any] = Field(default_factory=dict)
     await_completion: bool = False  # kept for API compatibility; worker handles execution
+    priority: int = Field(PRIORITY_INTERACTIVE, ge=PRIORITY_BULK, le=PRIORITY_INTERACTIVE)
+    source: str | None = Field(None, max_length=128)  # fair-share label, e.g. "hermes"
+    scheduled_at: datetime | None = None  # not before this time (ISO-8601; naive = UTC)
 
 
 @router.post("/run")
-async def run_workflow(body: RunBody):
-    """Queue a job for the worker. Returns job_id immediately."""
-    r = await asyncio.to_thread(compute_readiness)
+async def run_workflow(body: RunBody, request: Request):
+    """Queue a job for the worker. Returns job_id immediately.
+
+    With ``scheduled_at`` the job waits in the queue until that time.
+    """
+    r = await _readiness.get()
     if not r.get("ok"):
         raise HTTPException(status_code=503, detail={"readiness": r})
     workflow_id = sanitize_workflow_id(body.workflow_id)
@@ -251,21 +309,204 @@ async def run_workflow(body: RunBody):
         template_id=body.template_id,
         workflow_id=workflow_id,
         params=body.params,
+        priority=body.priority,
+        source=_job_source(request, body.source),
+        scheduled_at=body.scheduled_at,
     )
-    return {"job_id": job.job_id, "state": JobState.queued.value}
+    return {"job_id": job.job_id, "state": JobState.queued.value, "scheduled_at": job.scheduled_at}
+
+
+MAX_BATCH_JOBS = int(os.environ.get("ORCHESTRATION_MAX_BATCH_JOBS", "1000"))
+
+
+class RunBatchBody(BaseModel):
+    template_id: str | None = None
+    workflow_id: str | None = None
+    params: dict[str, Any] = Field(default_factory=dict)  # shared by every job
+    params_list: list[dict[str, Any]] = Field(default_factory=list)  # one job each, merged over params
+    priority: int = Field(PRIORITY_BULK, ge=PRIORITY_BULK, le=PRIORITY_INTERACTIVE)
+    source: str | None = Field(None, max_length=128)
+    scheduled_at: datetime | None = None  # e.g. an off-peak window for the whole batch
+
+
+@router.post("/run/batch")
+async def run_workflow_batch(body: RunBatchBody, request: Request):
+    """Queue one job per ``params_list`` entry in a single transaction.
+
+    Returns the ``batch_id`` (for ``/batches/{batch_id}``) and the job ids in
+    ``params_list`` order.
+    """
+    if not body.params_list:
+        raise HTTPException(status_code=400, detail="params_list must not be empty")
+    if len(body.params_list) > MAX_BATCH_JOBS:
+        raise HTTPException(status_code=400, detail=f"params_list exceeds {MAX_BATCH_JOBS} entries")
+    r = await _readiness.get()
+    if not r.get("ok"):
+        raise HTTPException(status_code=503, detail={"readiness": r})
+    workflow_id = sanitize_workflow_id(body.workflow_id)
+    if not body.template_id and not workflow_id:
+        raise HTTPException(status_code=400, detail="template_id or workflow_id required")
+    batch_id, job_ids = await asyncio.to_thread(
+        create_job_batch,
+        DATA_DIR,
+        [{**body.params, **p} for p in body.params_list],
+        template_id=body.template_id,
+        workflow_id=workflow_id,
+        priority=body.priority,
+        source=_job_source(request, body.source),
+        scheduled_at=body.scheduled_at,
+    )
+    return {"batch_id": batch_id, "job_ids": job_ids, "count": len(job_ids), "state": JobState.queued.value}
+
+
+@router.get("/batches/{batch_id}")
+async def batch_status(batch_id: str):
+    """Per-state counts and job states for a batch; ``done`` once every job is terminal."""
+    b = await asyncio.to_thread(get_batch, DATA_DIR, batch_id)
+    if not b:
+        raise HTTPException(status_code=404, detail="Unknown batch_id")
+    return b
+
+
+@router.post("/batches/{batch_id}/cancel")
+async def cancel_batch_endpoint(batch_id: str):
+    """Request cancellation for every job in the batch that has not finished."""
+    cancelled = await asyncio.to_thread(cancel_batch, DATA_DIR, batch_id)
+    b = await asyncio.to_thread(get_batch, DATA_DIR, batch_id)
+    if not b:
+        raise HTTPException(status_code=404, detail="Unknown batch_id")
+    return {"ok": True, "batch_id": batch_id, "cancelling": cancelled, "counts": b["counts"]}
 
 
 @router.get("/jobs")
-async def list_jobs_endpoint(state: str | None = None, limit: int = 100):
-    """List orchestration jobs, optionally filtered by state (queued, running, failed, etc.)."""
+async def list_jobs_endpoint(
+    state: str | None = None,
+    limit: int = 100,
+    cursor: str | None = None,
+    fields: str | None = None,
+):
+    """List orchestration jobs, newest first, optionally filtered by state (queued, running, failed, etc.).
+
+    Pass ``next_cursor`` back as ``cursor`` for the next page. ``fields`` is a comma-separated
+    projection (``*`` for all); by default ``params_json`` and ``compiled_workflow`` are left
+    out — fetch a job's graph from ``/jobs/{job_id}/workflow``.
+    """
     limit = max(1, min(limit, 1000))
     if state is not None:
         try:
             JobState(state)
         except ValueError:
             raise HTTPException(status_code=400, detail=f"Invalid state. Must be one of: {[s.value for s in JobState]}")
-    jobs = list_jobs(DATA_DIR, state=state, limit=limit)
-    return {"jobs": [j.to_dict() for j in jobs], "count": len(jobs)}
+    if fields is None:
+        selected = JOB_LIST_DEFAULT_FIELDS
+    elif fields.strip() == "*":
+        selected = JOB_FIELDS
+    else:
+        selected = tuple(dict.fromkeys(["job_id", *(f.strip() for f in fields.split(",") if f.strip())]))
+    try:
+        jobs, next_cursor = await asyncio.to_thread(
+            list_jobs_page, DATA_DIR, state, limit, cursor=cursor, fields=selected,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = [{name: d[name] for name in selected} for d in (j.to_dict() for j in jobs)]
+    return {"jobs": rows, "count": len(rows), "next_cursor": next_cursor}
+
+
+def _sse(event: str, data: dict[str, Any], event_id: int | None = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+@router.get("/jobs/events")
+async def job_events_stream(
+    request: Request,
+    job_id: list[str] | None = Query(None),
+    state: list[str] | None = Query(None),
+    since: int | None = None,
+    until_terminal: bool = False,
+):
+    """Server-sent events for job state transitions (``event: job_state``, ``id`` = event seq).
+
+    Filter with repeated ``job_id`` / ``state`` params. Resume with ``since`` or the
+    ``Last-Event-ID`` header. When ``job_id`` is given, each job's current state is
+    sent first (``snapshot: true``) and terminal events carry the full ``job``;
+    ``until_terminal=true`` closes the stream once every listed job is terminal.
+    """
+    states: set[str] | None = None
+    if state:
+        try:
+            states = {JobState(s).value for s in state}
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid state. Must be one of: {[s.value for s in JobState]}")
+    if until_terminal and not job_id:
+        raise HTTPException(status_code=400, detail="until_terminal requires job_id")
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+
+    job_ids = set(job_id) if job_id else None
+    # Subscribe before reading snapshots so no transition falls between the two
+    # (one that does is sent twice, which is harmless).
+    sub = await _job_events.subscribe(job_ids, states, after_seq=since)
+    snapshots: list[dict[str, Any]] = []
+    for jid in sorted(job_ids or ()):
+        j = await asyncio.to_thread(get_job, DATA_DIR, jid)
+        if not j:
+            _job_events.unsubscribe(sub)
+            raise HTTPException(status_code=404, detail=f"Unknown job_id: {jid}")
+        snapshots.append(j.to_dict())
+
+    async def _event_frame(event: dict[str, Any]) -> str:
+        data = dict(event)
+        if job_ids and event["state"] in TERMINAL_STATES:
+            j = await asyncio.to_thread(get_job, DATA_DIR, event["job_id"])
+            data["job"] = j.to_dict() if j else None
+        return _sse("job_state", data, event["seq"])
+
+    async def _stream():
+        pending = set(job_ids or ())
+        try:
+            yield "retry: 3000\n\n"
+            if since is not None:
+                # Replayed backlog first; a job already terminal before ``since``
+                # then still gets its snapshot so until_terminal can finish.
+                while (event := sub.get_nowait()) is not None:
+                    yield await _event_frame(event)
+                    if event["state"] in TERMINAL_STATES:
+                        pending.discard(event["job_id"])
+            for job in snapshots:
+                if job["job_id"] not in pending:
+                    continue
+                terminal = job["state"] in TERMINAL_STATES
+                if since is None or terminal:
+                    yield _sse("job_state", {"job_id": job["job_id"], "state": job["state"],
+                                             "at": job["updated_at"], "snapshot": True, "job": job})
+                if terminal:
+                    pending.discard(job["job_id"])
+            if until_terminal and not pending:
+                return
+            while not await request.is_disconnected():
+                event = await sub.get(SSE_KEEPALIVE_SEC)
+                if sub.overflowed:
+                    yield _sse("resync", {"reason": "subscriber queue overflow", "seq": sub.last_seq})
+                    return
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield await _event_frame(event)
+                if event["state"] in TERMINAL_STATES:
+                    pending.discard(event["job_id"])
+                if until_terminal and not pending:
+                    return
+        finally:
+            _job_events.unsubscribe(sub)
+
+    return StreamingResponse(
+        _stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/jobs/{job_id}")
@@ -273,7 +514,16 @@ async def job_status(job_id: str):
     j = get_job(DATA_DIR, job_id)
     if not j:
         raise HTTPException(status_code=404, detail="Unknown job_id")
-    return j.to_dict()
+    return {**j.to_dict(), "phases": j.phase_durations()}
+
+
+@router.get("/jobs/{job_id}/workflow")
+async def job_compiled_workflow(job_id: str):
+    """The ComfyUI API graph the job was (or will be) submitted with, as stored."""
+    raw = await asyncio.to_thread(get_compiled_workflow, DATA_DIR, job_id)
+    if raw is None:
+        raise HTTPException(status_code=404, detail="Unknown job_id or workflow not compiled yet")
+    return Response(content=raw, media_type="application/json")
 
 
 @router.post("/jobs/{job_id}/cancel")
@@ -326,7 +576,7 @@ async def publish_enqueue(body: PublishEnqueueBody):
         "payload": body.payload,
     }
     idem_key = create_outbox_entry(DATA_DIR, body.job_id, url, envelope)
-    update_job(DATA_DIR, body.job_id, state=JobState.publish_enqueued,
+    update_job(DATA_DIR, body.job_id, returning=False, state=JobState.publish_enqueued,
                publish_webhook=url, publish_status="enqueued")
     return {"ok": True, "job_id": body.job_id, "state": JobState.publish_enqueued.value,
             "idempotency_key": idem_key}
@@ -348,12 +598,12 @@ async def publish_callback(body: PublishCallbackBody):
     if not j:
         raise HTTPException(status_code=404, detail="Unknown job_id")
     if body.status == "delivered":
-        update_job(DATA_DIR, body.job_id, state=JobState.published,
-                   publish_status="published")
+        update_job(DATA_DIR, body.job_id, returning=False, state=JobState.published,
+                   publish_status="published", published_at=time.time())
         if body.idempotency_key:
             mark_outbox_delivered(DATA_DIR, body.idempotency_key)
     else:
-        update_job(DATA_DIR, body.job_id, publish_status=f"failed: {body.error or 'unknown'}")
+        update_job(DATA_DIR, body.job_id, returning=False, publish_status=f"failed: {body.error or 'unknown'}")
     return {"ok": True, "job_id": body.job_id}
 
 
@@ -485,6 +735,7 @@ async def restart_comfyui(request: Request, body: RestartBody):
             r = await client.post(url, headers=_ops_headers(request), json={"confirm": True})
         if r.status_code >= 400:
             raise HTTPException(status_code=r.status_code, detail=r.text)
+        invalidate_readiness()
         return r.json()
     except HTTPException:
         raise
@@ -0,0 +1,164 @@
+"""Background persistence for throughput state, off the request path.
+
+Request handlers only mutate memory: ``mark_dirty()`` flags the small
+``throughput.json`` state (benchmarks, recent service usage) for saving and ``add_sample()`` queues a history row.
+One asyncio task does the disk work. It takes a state snapshot (the caller's
+``snapshot`` callable, run on the loop under the caller's lock) at most once per
+``state_interval`` and writes it in a worker thread. Queued samples go to
+``ThroughputHistory.record_many`` in one transaction per ``history_interval``,
+or sooner once ``max_pending`` build up. Bursts of records therefore coalesce
+into one JSON write and one SQLite transaction. ``stop()`` flushes both.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from dashboard.throughput_history import ThroughputHistory, ThroughputSample
+
+logger = logging.getLogger(__name__)
+
+
+class ThroughputFlusher:
+    def __init__(
+        self,
+        snapshot: Callable[[], dict[str, Any]],
+        write_state: Callable[[dict[str, Any]], None],
+        history: ThroughputHistory,
+        *,
+        state_interval: float = 5.0,
+        history_interval: float = 1.0,
+        max_pending: int = 1000,
+    ) -> None:
+        self._snapshot = snapshot
+        self._write_state = write_state
+        self.history = history
+        self.state_interval = state_interval
+        self.history_interval = history_interval
+        self.max_pending = max_pending
+        self._dirty = False
+        self._pending: list[ThroughputSample] = []
+        self._pending_lock = threading.Lock()
+        self._last_state_write = 0.0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._wake: asyncio.Event | None = None
+        self._io_lock: asyncio.Lock | None = None
+        self.stats = {"state_writes": 0, "history_batches": 0, "samples_written": 0}
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # New event loop (tests run one per TestClient request): old task/events are dead.
+            self._loop = loop
+            self._task = None
+            self._wake = asyncio.Event()
+            self._io_lock = asyncio.Lock()
+
+    def _ensure_running(self) -> None:
+        with contextlib.suppress(RuntimeError):  # no running loop: the next async caller starts it
+            self._bind_loop()
+            if self._task is None or self._task.done():
+                self._task = asyncio.get_running_loop().create_task(self._run(), name="throughput-flusher")
+
+    # ── Producers (request handlers) ──────────────────────────────────────────
+
+    def mark_dirty(self) -> None:
+        """Schedule a ``throughput.json`` save (coalesced to one per ``state_interval``)."""
+        self._dirty = True
+        self._ensure_running()
+
+    def add_sample(self, sample: ThroughputSample) -> None:
+        self.add_samples([sample])
+
+    def add_samples(self, samples: list[ThroughputSample]) -> None:
+        if not samples:
+            return
+        with self._pending_lock:
+            self._pending.extend(samples)
+            full = len(self._pending) >= self.max_pending
+        self._ensure_running()
+        if full and self._wake is not None:
+            self._wake.set()
+
+    def pending(self) -> int:
+        with self._pending_lock:
+            return len(self._pending)
+
+    # ── Writing ───────────────────────────────────────────────────────────────
+
+    async def flush_history(self) -> int:
+        """Write queued samples now; returns how many (readers call this for read-your-writes)."""
+        self._bind_loop()
+        assert self._io_lock is not None
+        async with self._io_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                await asyncio.to_thread(self.history.record_many, batch)
+            except Exception as exc:
+                logger.warning("Throughput history write failed (%d samples dropped): %s", len(batch), exc)
+                return 0
+            self.stats["history_batches"] += 1
+            self.stats["samples_written"] += len(batch)
+            return len(batch)
+
+    async def flush_state(self) -> bool:
+        """Snapshot and write throughput.json if anything changed; True if written."""
+        self._bind_loop()
+        assert self._io_lock is not None
+        if not self._dirty:
+            return False
+        async with self._io_lock:
+            self._dirty = False
+            snapshot = self._snapshot()
+            try:
+                await asyncio.to_thread(self._write_state, snapshot)
+            except Exception as exc:
+                self._dirty = True
+                logger.warning("Throughput state save failed: %s", exc)
+                return False
+            self._last_state_write = time.monotonic()
+            self.stats["state_writes"] += 1
+            return True
+
+    async def flush(self) -> None:
+        await self.flush_history()
+        await self.flush_state()
+
+    # ── Task ──────────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        self._bind_loop()
+        self._ensure_running()
+
+    async def stop(self) -> None:
+        """Cancel the task and write whatever is still pending."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        wake = self._wake
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(wake.wait(), self.history_interval)
+            wake.clear()
+            try:
+                await self.flush_history()
+                if self._dirty and time.monotonic() - self._last_state_write >= self.state_interval:
+                    await self.flush_state()
+            except Exception as exc:  # keep the task alive; next tick retries
+                logger.warning("Throughput flush failed: %s", exc)
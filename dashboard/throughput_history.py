@@ -0,0 +1,361 @@
+"""Append-only throughput / TTFT history with 1-minute and 1-hour rollups (SQLite).
+
+Every sample is appended to ``throughput_history.db`` under ``DASHBOARD_DATA_PATH`` and
+folded into per-(model, service) rollup rows at 1-minute and 1-hour resolution.
+A rollup row keeps count/sum/min/max and a serialized ``DDSketch`` for each
+metric, so percentiles over any range are a merge of bucket sketches rather
+than a scan of raw samples. Raw samples and each rollup level have their own
+retention; pruning runs from the write path at most every few minutes.
+The dashboard's live sample windows are rebuilt from the raw rows at startup
+(``recent_samples``), so ``throughput.json`` does not need to carry them.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from dashboard.metrics import timed_connection
+from dashboard.throughput_store import DDSketch
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILE_NAME = "throughput_history.db"
+
+# name -> bucket width in seconds
+RESOLUTIONS: dict[str, int] = {"1m": 60, "1h": 3600}
+
+_PRUNE_INTERVAL_SEC = 300.0
+_MAX_RAW_POINTS = 10_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS throughput_raw (
+    ts REAL NOT NULL,
+    model TEXT NOT NULL,
+    service TEXT NOT NULL,
+    tps REAL NOT NULL,
+    ttft_ms REAL
+);
+
+CREATE TABLE IF NOT EXISTS throughput_rollup (
+    resolution INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    model TEXT NOT NULL,
+    service TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    tps_sum REAL NOT NULL,
+    tps_min REAL NOT NULL,
+    tps_max REAL NOT NULL,
+    tps_sketch TEXT NOT NULL,
+    ttft_count INTEGER NOT NULL DEFAULT 0,
+    ttft_sum REAL NOT NULL DEFAULT 0,
+    ttft_min REAL,
+    ttft_max REAL,
+    ttft_sketch TEXT,
+    PRIMARY KEY (resolution, model, service, bucket)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_tp_raw_model_ts ON throughput_raw(model, ts);
+CREATE INDEX IF NOT EXISTS idx_tp_raw_ts ON throughput_raw(ts);
+CREATE INDEX IF NOT EXISTS idx_tp_rollup_bucket ON throughput_rollup(resolution, bucket);
+"""
+
+
+class ThroughputSample(NamedTuple):
+    ts: float
+    model: str
+    service: str
+    tps: float
+    ttft_ms: float = 0.0
+
+
+@dataclass
+class _Rollup:
+    count: int = 0
+    tps_sum: float = 0.0
+    tps_min: float = float("inf")
+    tps_max: float = float("-inf")
+    tps_sketch: DDSketch = field(default_factory=DDSketch)
+    ttft_count: int = 0
+    ttft_sum: float = 0.0
+    ttft_min: float = float("inf")
+    ttft_max: float = float("-inf")
+    ttft_sketch: DDSketch = field(default_factory=DDSketch)
+
+    def add(self, tps: float, ttft_ms: float) -> None:
+        self.count += 1
+        self.tps_sum += tps
+        self.tps_min = min(self.tps_min, tps)
+        self.tps_max = max(self.tps_max, tps)
+        self.tps_sketch.add(tps)
+        if ttft_ms > 0:
+            self.ttft_count += 1
+            self.ttft_sum += ttft_ms
+            self.ttft_min = min(self.ttft_min, ttft_ms)
+            self.ttft_max = max(self.ttft_max, ttft_ms)
+            self.ttft_sketch.add(ttft_ms)
+
+    def merge(self, other: _Rollup) -> None:
+        self.count += other.count
+        self.tps_sum += other.tps_sum
+        self.tps_min = min(self.tps_min, other.tps_min)
+        self.tps_max = max(self.tps_max, other.tps_max)
+        self.tps_sketch.merge(other.tps_sketch)
+        self.ttft_count += other.ttft_count
+        self.ttft_sum += other.ttft_sum
+        self.ttft_min = min(self.ttft_min, other.ttft_min)
+        self.ttft_max = max(self.ttft_max, other.ttft_max)
+        self.ttft_sketch.merge(other.ttft_sketch)
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> _Rollup:
+        r = cls(
+            count=row["count"],
+            tps_sum=row["tps_sum"],
+            tps_min=row["tps_min"],
+            tps_max=row["tps_max"],
+            tps_sketch=DDSketch.from_dict(json.loads(row["tps_sketch"])),
+            ttft_count=row["ttft_count"],
+            ttft_sum=row["ttft_sum"],
+        )
+        if row["ttft_count"]:
+            r.ttft_min = row["ttft_min"]
+            r.ttft_max = row["ttft_max"]
+            r.ttft_sketch = DDSketch.from_dict(json.loads(row["ttft_sketch"]))
+        return r
+
+    def to_params(self) -> tuple[Any, ...]:
+        has_ttft = self.ttft_count > 0
+        return (
+            self.count, self.tps_sum, self.tps_min, self.tps_max,
+            json.dumps(self.tps_sketch.to_dict(), separators=(",", ":")),
+            self.ttft_count, self.ttft_sum,
+            self.ttft_min if has_ttft else None,
+            self.ttft_max if has_ttft else None,
+            json.dumps(self.ttft_sketch.to_dict(), separators=(",", ":")) if has_ttft else None,
+        )
+
+    def point(self) -> dict[str, Any]:
+        has_ttft = self.ttft_count > 0
+        return {
+            "count": self.count,
+            "tps_avg": round(self.tps_sum / self.count, 2) if self.count else 0.0,
+            "tps_min": round(self.tps_min, 2) if self.count else 0.0,
+            "tps_max": round(self.tps_max, 2) if self.count else 0.0,
+            "tps_p50": round(self.tps_sketch.quantile(0.50), 2),
+            "tps_p95": round(self.tps_sketch.quantile(0.95), 2),
+            "ttft_count": self.ttft_count,
+            "ttft_avg_ms": round(self.ttft_sum / self.ttft_count, 1) if has_ttft else 0.0,
+            "ttft_p50_ms": round(self.ttft_sketch.quantile(0.50), 1) if has_ttft else 0.0,
+            "ttft_p95_ms": round(self.ttft_sketch.quantile(0.95), 1) if has_ttft else 0.0,
+        }
+
+
+def pick_resolution(start: float, end: float) -> str:
+    """Coarsest useful level for a range: raw up to 1h, 1m up to 2 days, then 1h."""
+    span = end - start
+    if span <= 3600:
+        return "raw"
+    if span <= 2 * 86400:
+        return "1m"
+    return "1h"
+
+
+class ThroughputHistory:
+    """One SQLite file with raw samples and rollups; safe to share across threads."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        raw_retention_sec: float = 2 * 86400,
+        minute_retention_sec: float = 14 * 86400,
+        hour_retention_sec: float = 400 * 86400,
+    ) -> None:
+        self.path = path
+        self.retention = {"raw": raw_retention_sec, "1m": minute_retention_sec, "1h": hour_retention_sec}
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                str(self.path), timeout=30, check_same_thread=False, factory=timed_connection("throughput_history")
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+
+    def record_many(self, samples: Iterable[ThroughputSample]) -> int:
+        """Append samples and fold them into the rollups in one transaction; returns how many."""
+        samples = [s for s in samples if s.model and s.tps >= 0]
+        if not samples:
+            return 0
+        pending: dict[tuple[int, int, str, str], _Rollup] = {}
+        for s in samples:
+            for width in RESOLUTIONS.values():
+                key = (width, int(s.ts // width) * width, s.model, s.service)
+                agg = pending.get(key)
+                if agg is None:
+                    agg = pending[key] = _Rollup()
+                agg.add(s.tps, s.ttft_ms)
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO throughput_raw (ts, model, service, tps, ttft_ms) VALUES (?,?,?,?,?)",
+                    [(s.ts, s.model, s.service, s.tps, s.ttft_ms if s.ttft_ms > 0 else None) for s in samples],
+                )
+                for (width, bucket, model, service), agg in pending.items():
+                    row = conn.execute(
+                        "SELECT * FROM throughput_rollup WHERE resolution=? AND model=? AND service=? AND bucket=?",
+                        (width, model, service, bucket),
+                    ).fetchone()
+                    if row is not None:
+                        agg.merge(_Rollup.from_row(row))
+                    conn.execute(
+                        "INSERT OR REPLACE INTO throughput_rollup "
+                        "(resolution, bucket, model, service, count, tps_sum, tps_min, tps_max, tps_sketch, "
+                        " ttft_count, ttft_sum, ttft_min, ttft_max, ttft_sketch) "
+                        "VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                        (width, bucket, model, service, *agg.to_params()),
+                    )
+            if time.monotonic() - self._last_prune >= _PRUNE_INTERVAL_SEC:
+                self._prune_locked(time.time())
+        return len(samples)
+
+    def record(self, model: str, service: str, tps: float, ttft_ms: float = 0.0, ts: float | None = None) -> None:
+        self.record_many([ThroughputSample(time.time() if ts is None else ts, model, service, tps, ttft_ms)])
+
+    def prune(self, now: float | None = None) -> dict[str, int]:
+        with self._lock:
+            return self._prune_locked(time.time() if now is None else now)
+
+    def _prune_locked(self, now: float) -> dict[str, int]:
+        self._last_prune = time.monotonic()
+        conn = self._db()
+        removed: dict[str, int] = {}
+        with conn:
+            removed["raw"] = conn.execute(
+                "DELETE FROM throughput_raw WHERE ts < ?", (now - self.retention["raw"],)
+            ).rowcount
+            for name, width in RESOLUTIONS.items():
+                removed[name] = conn.execute(
+                    "DELETE FROM throughput_rollup WHERE resolution=? AND bucket < ?",
+                    (width, now - self.retention[name]),
+                ).rowcount
+        return removed
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+
+    def recent_samples(self, per_model: int, max_models: int) -> dict[str, list[tuple[float, float]]]:
+        """Newest ``per_model`` raw ``(tps, ttft_ms)`` samples per model, oldest first.
+
+        Only the ``max_models`` most recently active models are returned.
+        """
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT model, tps, ttft_ms, MAX(ts) OVER (PARTITION BY model) AS last_ts FROM ("
+                " SELECT rowid AS id, ts, model, tps, ttft_ms,"
+                "  ROW_NUMBER() OVER (PARTITION BY model ORDER BY ts DESC, rowid DESC) AS rn"
+                " FROM throughput_raw"
+                ") WHERE rn <= ? ORDER BY model, ts, id",
+                (per_model,),
+            ).fetchall()
+        out: dict[str, list[tuple[float, float]]] = {}
+        last: dict[str, float] = {}
+        for r in rows:
+            out.setdefault(r["model"], []).append((r["tps"], r["ttft_ms"] or 0.0))
+            last[r["model"]] = r["last_ts"]
+        keep = sorted(out, key=last.__getitem__, reverse=True)[:max_models]
+        return {m: out[m] for m in keep}
+
+    def query(
+        self,
+        *,
+        start: float,
+        end: float,
+        model: str | None = None,
+        service: str | None = None,
+        resolution: str = "auto",
+    ) -> dict[str, Any]:
+        """Per-model series for [start, end), merged across services unless ``service`` is given.
+
+        Rollup points carry count / avg / min / max / p50 / p95 for tokens/sec and TTFT;
+        ``summary`` gives the same figures over the whole range. Raw points are
+        individual samples (capped at 10k, newest dropped).
+        """
+        if resolution == "auto":
+            resolution = pick_resolution(start, end)
+        if resolution != "raw" and resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution must be one of: auto, raw, {', '.join(RESOLUTIONS)}")
+        where = ["ts >= ?", "ts < ?"] if resolution == "raw" else ["resolution = ?", "bucket >= ?", "bucket < ?"]
+        params: list[Any] = [start, end] if resolution == "raw" else [
+            RESOLUTIONS[resolution], int(start // RESOLUTIONS[resolution]) * RESOLUTIONS[resolution], end,
+        ]
+        if model:
+            where.append("model = ?")
+            params.append(model)
+        if service:
+            where.append("service = ?")
+            params.append(service)
+        with self._lock:
+            conn = self._db()
+            if resolution == "raw":
+                rows = conn.execute(
+                    f"SELECT ts, model, service, tps, ttft_ms FROM throughput_raw WHERE {' AND '.join(where)} "
+                    f"ORDER BY ts LIMIT {_MAX_RAW_POINTS}",
+                    params,
+                ).fetchall()
+            else:
+                rows = conn.execute(
+                    f"SELECT * FROM throughput_rollup WHERE {' AND '.join(where)} ORDER BY bucket",
+                    params,
+                ).fetchall()
+
+        out: dict[str, Any] = {"resolution": resolution, "start": start, "end": end, "models": {}}
+        if resolution == "raw":
+            for r in rows:
+                series = out["models"].setdefault(r["model"], {"points": []})
+                series["points"].append(
+                    {"t": r["ts"], "service": r["service"], "tps": r["tps"], "ttft_ms": r["ttft_ms"] or 0.0}
+                )
+            out["truncated"] = len(rows) >= _MAX_RAW_POINTS
+            return out
+
+        buckets: dict[str, dict[int, _Rollup]] = {}
+        totals: dict[str, _Rollup] = {}
+        for r in rows:
+            agg = _Rollup.from_row(r)
+            totals.setdefault(r["model"], _Rollup()).merge(agg)
+            per_model = buckets.setdefault(r["model"], {})
+            if r["bucket"] in per_model:
+                per_model[r["bucket"]].merge(agg)
+            else:
+                per_model[r["bucket"]] = agg
+        for m, per_model in buckets.items():
+            out["models"][m] = {
+                "points": [{"t": b, **agg.point()} for b, agg in sorted(per_model.items())],
+                "summary": totals[m].point(),
+            }
+        return out
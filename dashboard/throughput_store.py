@@ -0,0 +1,269 @@
+"""Bounded per-model throughput / TTFT sample windows with O(1)-read quantiles.
+
+Each model keeps its last N samples in an ``array('d')`` ring buffer. Alongside
+the ring, a ``DDSketch`` (log-spaced buckets with a fixed relative accuracy)
+holds the same window: samples are added on append and removed when the ring
+evicts them, so quantiles never require sorting the window. Monotonic deques
+track the window's exact min and max. Model stats are cached until the next
+sample arrives, so a dashboard poll costs a dict lookup per model.
+
+Sketches are mergeable (bucket counts add), so aggregate quantiles across
+models or time buckets do not need the raw samples.
+"""
+
+from __future__ import annotations
+
+import math
+from array import array
+from collections import deque
+from collections.abc import Iterable
+from typing import Any
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+
+class DDSketch:
+    """Relative-error quantile sketch (Masson et al., 2019) that also supports removal.
+
+    A value ``x > 0`` lands in bucket ``ceil(log_gamma(x))``; any quantile estimate is
+    within ``relative_accuracy`` of a true sample value. Values ``<= 0`` share one
+    zero bucket. Memory is one counter per non-empty bucket — about 700 buckets
+    span 0.01 to 1e6 at 1% accuracy, whatever the sample count.
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> None:
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be in (0, 1)")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self._sorted_keys: list[int] | None = None
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def add(self, value: float, n: int = 1) -> None:
+        self.count += n
+        if value <= 0:
+            self.zero_count += n
+            return
+        key = self._key(value)
+        if key not in self.bins:
+            self._sorted_keys = None
+            self.bins[key] = n
+        else:
+            self.bins[key] += n
+
+    def remove(self, value: float) -> None:
+        """Undo one ``add(value)`` (the value must have been added)."""
+        self.count -= 1
+        if value <= 0:
+            self.zero_count -= 1
+            return
+        key = self._key(value)
+        left = self.bins[key] - 1
+        if left:
+            self.bins[key] = left
+        else:
+            del self.bins[key]
+            self._sorted_keys = None
+
+    def merge(self, other: DDSketch) -> None:
+        if not math.isclose(other.gamma, self.gamma):
+            raise ValueError("cannot merge sketches with different relative accuracy")
+        for key, n in other.bins.items():
+            if key not in self.bins:
+                self._sorted_keys = None
+            self.bins[key] = self.bins.get(key, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        """Estimated q-quantile (0 ≤ q ≤ 1); 0.0 when empty."""
+        if self.count <= 0:
+            return 0.0
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(self.bins)
+        for key in self._sorted_keys:
+            seen += self.bins[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(self._sorted_keys[-1])
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "zero_count": self.zero_count,
+            "bins": {str(k): n for k, n in self.bins.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> DDSketch:
+        sketch = cls(float(data.get("relative_accuracy", DEFAULT_RELATIVE_ACCURACY)))
+        sketch.zero_count = int(data.get("zero_count", 0))
+        sketch.bins = {int(k): int(n) for k, n in (data.get("bins") or {}).items()}
+        sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        return sketch
+
+
+class SampleWindow:
+    """The last ``capacity`` samples: ring buffer + sketch + exact sliding min/max."""
+
+    def __init__(self, capacity: int, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY) -> None:
+        self.capacity = max(1, capacity)
+        self._buf = array("d")  # grows to capacity, then wraps
+        self._start = 0
+        self._seq = 0  # samples ever appended; sequence number of the next one
+        self._max: deque[tuple[int, float]] = deque()
+        self._min: deque[tuple[int, float]] = deque()
+        self.sketch = DDSketch(relative_accuracy)
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def append(self, value: float) -> None:
+        seq = self._seq
+        self._seq += 1
+        if len(self._buf) < self.capacity:
+            self._buf.append(value)
+        else:
+            evicted = self._buf[self._start]
+            self._buf[self._start] = value
+            self._start = (self._start + 1) % self.capacity
+            self.sketch.remove(evicted)
+            oldest = seq - self.capacity + 1
+            while self._max and self._max[0][0] < oldest:
+                self._max.popleft()
+            while self._min and self._min[0][0] < oldest:
+                self._min.popleft()
+        self.sketch.add(value)
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((seq, value))
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((seq, value))
+
+    def extend(self, values: Iterable[float]) -> None:
+        for v in values:
+            self.append(v)
+
+    @property
+    def latest(self) -> float:
+        if not self._buf:
+            return 0.0
+        return self._buf[(self._start + len(self._buf) - 1) % len(self._buf)]
+
+    @property
+    def peak(self) -> float:
+        return self._max[0][1] if self._max else 0.0
+
+    @property
+    def low(self) -> float:
+        return self._min[0][1] if self._min else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Sketch estimate clamped to the window's exact min/max."""
+        if not self._buf:
+            return 0.0
+        return min(max(self.sketch.quantile(q), self.low), self.peak)
+
+    def values(self) -> list[float]:
+        """Samples oldest → newest."""
+        return list(self._buf[self._start:]) + list(self._buf[: self._start])
+
+
+class ModelSeries:
+    def __init__(self, capacity: int) -> None:
+        self.tps = SampleWindow(capacity)
+        self.ttft = SampleWindow(capacity)
+        self._stats: dict[str, Any] | None = None
+
+    def record(self, tps: float, ttft_ms: float = 0.0) -> None:
+        self.tps.append(tps)
+        if ttft_ms > 0:
+            self.ttft.append(ttft_ms)
+        self._stats = None
+
+    def stats(self) -> dict[str, Any]:
+        """Rounded summary; cached until the next sample."""
+        if self._stats is None:
+            tps, ttft = self.tps, self.ttft
+            self._stats = {
+                "latest": round(tps.latest, 1),
+                "peak": round(tps.peak, 1),
+                "p50": round(tps.quantile(0.50), 1),
+                "p95": round(tps.quantile(0.95), 1),
+                "p99": round(tps.quantile(0.99), 1),
+                "latest_ttft_ms": round(ttft.latest, 1),
+                "ttft_p50_ms": round(ttft.quantile(0.50), 1),
+                "ttft_p95_ms": round(ttft.quantile(0.95), 1),
+                "sample_count": len(tps),
+            }
+        return self._stats
+
+
+class ThroughputStore:
+    """Per-model sample windows, capped at ``max_models`` models (new models beyond it are dropped).
+
+    Not thread-safe on its own; app.py guards it with ``_state_lock``.
+    """
+
+    def __init__(self, max_samples: int = 4096, max_models: int = 256) -> None:
+        self.max_samples = max_samples
+        self.max_models = max_models
+        self._models: dict[str, ModelSeries] = {}
+
+    def __contains__(self, model: str) -> bool:
+        return model in self._models
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+    def clear(self) -> None:
+        self._models.clear()
+
+    def record(self, model: str, tps: float, ttft_ms: float = 0.0) -> bool:
+        """Add a sample; False if the model is new and the model cap is reached."""
+        series = self._models.get(model)
+        if series is None:
+            if len(self._models) >= self.max_models:
+                return False
+            series = self._models[model] = ModelSeries(self.max_samples)
+        series.record(tps, ttft_ms)
+        return True
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {m: s.stats() for m, s in self._models.items() if len(s.tps)}
+
+    def load_samples(self, samples: dict[str, list[tuple[float, float]]]) -> None:
+        """Replace the windows with ``(tps, ttft_ms)`` pairs per model, oldest first (``ttft_ms`` 0 = none)."""
+        self.clear()
+        for model, pairs in samples.items():
+            if len(self._models) >= self.max_models:
+                break
+            series = self._models[model] = ModelSeries(self.max_samples)
+            for tps, ttft_ms in pairs:
+                series.record(tps, ttft_ms)
+
+    def load_json(self, samples: dict[str, Any], ttft_samples: dict[str, Any]) -> None:
+        """Load the ``samples`` / ``ttft_samples`` layout older ``throughput.json`` files carried."""
+        self.clear()
+        for model, values in samples.items():
+            if not isinstance(values, list) or len(self._models) >= self.max_models:
+                continue
+            series = self._models[model] = ModelSeries(self.max_samples)
+            series.tps.extend(float(v) for v in values if isinstance(v, (int, float)))
+            ttfts = ttft_samples.get(model)
+            if isinstance(ttfts, list):
+                series.ttft.extend(float(v) for v in ttfts if isinstance(v, (int, float)))
@@ -1,18 +1,79 @@
-"""Typed workflow templates: JSON Schema validation + compile to API-format graph."""
+"""Typed workflow templates: JSON Schema validation + compile to API-format graph.
+
+Parsed templates, parsed + validated workflow files (with their PARAM_* binding
+lists) and compiled JSON-schema validators are cached per process. File entries
+are keyed by path and revalidated against ``(st_mtime_ns, st_size)`` on every
+lookup, so an edited workflow is picked up on the next job; validators are keyed
+by the schema's canonical JSON. Compiling a job is then one ``stat``, one copy
+of the graph and a direct write per binding.
+"""
 
 from __future__ import annotations
 
 import json
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
 from pathlib import Path
-from typing import Any
+from typing import Any, TypeVar
 
 from jsonschema import Draft202012Validator
 
-from .param_placeholders import apply_param_placeholders
+from .param_placeholders import (
+    PlaceholderBinding,
+    apply_placeholder_bindings,
+    copy_json,
+    find_placeholder_bindings,
+)
 from .workflow_boundary import assert_api_workflow
 
 TEMPLATES_SUBDIR = "builtin_templates"
 
+_CACHE_MAX_ENTRIES = 256
+
+_T = TypeVar("_T")
+
+
+class _FileCache:
+    """Path → parsed value, dropped when the file's mtime or size changes (LRU-bounded)."""
+
+    def __init__(self, max_entries: int = _CACHE_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Path, tuple[tuple[int, int], Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path, load: Callable[[str], _T]) -> _T:
+        st = path.stat()
+        key = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = load(path.read_text(encoding="utf-8"))
+        with self._lock:
+            self._entries[path] = (key, value)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+_templates = _FileCache()
+_workflows: dict[str, _FileCache] = {}
+_workflows_lock = threading.Lock()
+_validators: OrderedDict[str, Draft202012Validator] = OrderedDict()
+_validators_lock = threading.Lock()
+
 
 def _templates_dir() -> Path:
     return Path(__file__).resolve().parent / TEMPLATES_SUBDIR
@@ -34,11 +95,72 @@ def load_template(template_id: str) -> dict[str, Any]:
         raise ValueError(f"Invalid template_id: {template_id}") from e
     if not path.is_file():
         raise FileNotFoundError(f"Unknown template: {template_id}")
-    return json.loads(path.read_text(encoding="utf-8"))
+    # Callers may modify the template; hand out a copy of the cached parse.
+    return copy_json(_templates.get(path, json.loads))
+
+
+def load_api_workflow(
+    path: Path, *, context: str = "workflow"
+) -> tuple[dict[str, Any], list[PlaceholderBinding]]:
+    """Parsed, API-format-checked workflow file and its PARAM_* bindings (cached; do not mutate)."""
+    with _workflows_lock:
+        cache = _workflows.get(context)
+        if cache is None:
+            # Keyed by context too: the validation error message names it.
+            cache = _workflows[context] = _FileCache()
+
+    def _parse(text: str) -> tuple[dict[str, Any], list[PlaceholderBinding]]:
+        workflow = json.loads(text)
+        assert_api_workflow(workflow, context=context)
+        return workflow, find_placeholder_bindings(workflow)
+
+    return cache.get(path.resolve(), _parse)
+
+
+def compile_workflow_file(path: Path, params: dict[str, Any], *, context: str = "workflow") -> dict[str, Any]:
+    """Copy of the workflow at ``path`` with PARAM_* placeholders filled from params."""
+    workflow, bindings = load_api_workflow(path, context=context)
+    return apply_placeholder_bindings(workflow, bindings, params)
+
+
+def _validator_for(schema: dict[str, Any]) -> Draft202012Validator:
+    key = json.dumps(schema, sort_keys=True, separators=(",", ":"))
+    with _validators_lock:
+        validator = _validators.get(key)
+        if validator is not None:
+            _validators.move_to_end(key)
+            return validator
+    validator = Draft202012Validator(schema)
+    with _validators_lock:
+        _validators[key] = validator
+        while len(_validators) > _CACHE_MAX_ENTRIES:
+            _validators.popitem(last=False)
+    return validator
 
 
 def validate_params(params: dict[str, Any], schema: dict[str, Any]) -> None:
-    Draft202012Validator(schema).validate(params)
+    _validator_for(schema).validate(params)
+
+
+def workflow_cache_stats() -> dict[str, int]:
+    """Hit/miss counts for the template and workflow-file caches."""
+    with _workflows_lock:
+        caches = [_templates, *_workflows.values()]
+    return {
+        "hits": sum(c.hits for c in caches),
+        "misses": sum(c.misses for c in caches),
+        "validators": len(_validators),
+    }
+
+
+def clear_workflow_cache() -> None:
+    """Drop every cached template, workflow and validator (tests, manual reloads)."""
+    with _workflows_lock:
+        caches = [_templates, *_workflows.values()]
+    for c in caches:
+        c.clear()
+    with _validators_lock:
+        _validators.clear()
 
 
 def compile_template(
@@ -66,6 +188,4 @@ def compile_template(
     if not wf_path.is_file():
         raise FileNotFoundError(f"Workflow file not found: {wf_path}")
 
-    workflow = json.loads(wf_path.read_text(encoding="utf-8"))
-    assert_api_workflow(workflow, context="workflow_file")
-    return apply_param_placeholders(workflow, params)
+    return compile_workflow_file(wf_path, params, context="workflow_file")
@@ -6,5 +6,7 @@ CTX_SIZE="${LLAMACPP_CTX_SIZE:-262144}"
 
 sed -e "s|__MASTER_KEY__|${MASTER_KEY}|g" \
     -e "s|__CTX_SIZE__|${CTX_SIZE}|g" /app/config.template.yaml > /tmp/config.yaml
+# LiteLLM resolves custom callbacks relative to the config file directory
+cp /app/throughput_callback.py /tmp/throughput_callback.py
 
 exec litellm --config /tmp/config.yaml --host 0.0.0.0 --port 11435
@@ -0,0 +1,202 @@
+"""LiteLLM callback that reports per-call throughput to the dashboard in batches.
+
+Each successful completion becomes one sample (output tokens/sec, TTFT, calling
+service). Samples are buffered in memory and posted to
+``/api/throughput/record/batch`` once per ``flush_interval`` (or sooner when
+``max_batch`` build up), so the gateway never waits on the dashboard per call.
+Reporting is best effort: a failed post drops that batch, and the buffer is
+bounded so a dashboard outage cannot grow gateway memory.
+
+Enabled by ``THROUGHPUT_RECORD_URL``; ``THROUGHPUT_RECORD_TOKEN`` is sent as
+``X-Throughput-Token`` when set.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+PostFn = Callable[[list[dict[str, Any]]], Awaitable[None]]
+
+
+class ThroughputBuffer:
+    def __init__(
+        self,
+        url: str,
+        token: str = "",
+        *,
+        flush_interval: float = 1.0,
+        max_batch: int = 500,
+        max_buffer: int = 10_000,
+        post: PostFn | None = None,
+    ) -> None:
+        self.url = url
+        self.token = token
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._buf: deque[dict[str, Any]] = deque(maxlen=max_buffer)
+        self._post = post or self._http_post
+        self._client: Any = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._wake: asyncio.Event | None = None
+        self.stats = {"posted": 0, "batches": 0, "dropped": 0}
+
+    def add(self, sample: dict[str, Any]) -> None:
+        if len(self._buf) == self._buf.maxlen:
+            self.stats["dropped"] += 1  # deque evicts the oldest
+        self._buf.append(sample)
+        with contextlib.suppress(RuntimeError):  # no running loop: flushed by the next async caller
+            self._ensure_running()
+            if len(self._buf) >= self.max_batch and self._wake is not None:
+                self._wake.set()
+
+    def __len__(self) -> int:
+        return len(self._buf)
+
+    def _ensure_running(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._task = None
+            self._wake = asyncio.Event()
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._run(), name="throughput-buffer")
+
+    async def flush(self) -> int:
+        """Post everything buffered, in ``max_batch`` chunks; returns samples sent."""
+        sent = 0
+        while self._buf:
+            batch = [self._buf.popleft() for _ in range(min(self.max_batch, len(self._buf)))]
+            try:
+                await self._post(batch)
+            except Exception as exc:
+                self.stats["dropped"] += len(batch)
+                logger.debug("throughput report failed (%d samples dropped): %s", len(batch), exc)
+                break
+            self.stats["batches"] += 1
+            self.stats["posted"] += len(batch)
+            sent += len(batch)
+        return sent
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        await self.flush()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _run(self) -> None:
+        assert self._wake is not None
+        wake = self._wake
+        while True:
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(wake.wait(), self.flush_interval)
+            wake.clear()
+            await self.flush()
+
+    async def _http_post(self, batch: list[dict[str, Any]]) -> None:
+        import httpx
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=5.0)
+        headers = {"X-Throughput-Token": self.token} if self.token else {}
+        r = await self._client.post(self.url, json=batch, headers=headers)
+        r.raise_for_status()
+
+
+def _seconds(value: Any) -> float | None:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    return None
+
+
+def sample_from_call(kwargs: dict[str, Any], response: Any, start_time: Any, end_time: Any) -> dict[str, Any] | None:
+    """Build a record body from one LiteLLM success event; None when it has no output tokens."""
+    usage = getattr(response, "usage", None)
+    if usage is None and isinstance(response, dict):
+        usage = response.get("usage")
+    tokens = getattr(usage, "completion_tokens", None)
+    if tokens is None and isinstance(usage, dict):
+        tokens = usage.get("completion_tokens")
+    start, end = _seconds(start_time), _seconds(end_time)
+    if not tokens or start is None or end is None:
+        return None
+    first = _seconds(kwargs.get("completion_start_time"))
+    ttft_ms = 0.0
+    gen_start = start
+    if first is not None and start <= first <= end:
+        ttft_ms = (first - start) * 1000.0
+        gen_start = first  # decode rate, excluding prefill
+    elapsed = end - gen_start
+    if elapsed <= 0:
+        return None
+    litellm_params = kwargs.get("litellm_params") or {}
+    metadata = litellm_params.get("metadata") or {}
+    headers = metadata.get("headers") or {}
+    service = (
+        metadata.get("service")
+        or headers.get("x-service-name")
+        or metadata.get("user_api_key_alias")
+        or "model-gateway"
+    )
+    return {
+        "model": str(kwargs.get("model") or ""),
+        "output_tokens_per_sec": round(float(tokens) / elapsed, 3),
+        "ttft_ms": round(ttft_ms, 1),
+        "service": str(service)[:64],
+        "ts": end if end <= time.time() else time.time(),
+    }
+
+
+try:
+    from litellm.integrations.custom_logger import CustomLogger
+except ImportError:  # imported outside the gateway image (tests)
+    CustomLogger = object  # type: ignore[assignment,misc]
+
+
+class ThroughputReporter(CustomLogger):  # type: ignore[misc,valid-type]
+    def __init__(self, buffer: ThroughputBuffer | None) -> None:
+        super().__init__()
+        self.buffer = buffer
+
+    async def async_log_success_event(self, kwargs, response_obj, start_time, end_time):
+        if self.buffer is None:
+            return
+        try:
+            sample = sample_from_call(kwargs, response_obj, start_time, end_time)
+        except Exception as exc:  # never break the proxied call
+            logger.debug("throughput sample skipped: %s", exc)
+            return
+        if sample and sample["model"]:
+            self.buffer.add(sample)
+
+
+def _from_env() -> ThroughputBuffer | None:
+    url = os.environ.get("THROUGHPUT_RECORD_URL", "").strip()
+    if not url:
+        return None
+    return ThroughputBuffer(
+        url,
+        os.environ.get("THROUGHPUT_RECORD_TOKEN", "").strip(),
+        flush_interval=float(os.environ.get("THROUGHPUT_FLUSH_INTERVAL_SEC", "1") or 1),
+    )
+
+
+# Referenced from litellm_config.yaml: litellm_settings.callbacks
+proxy_handler_instance = ThroughputReporter(_from_env())
@@ -19,7 +19,8 @@ from urllib.parse import urlparse
 import docker
 import httpx
 from fastapi import Depends, FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest
 from pydantic import BaseModel, Field
 
 # ``audit`` lives next to this module. In production (uvicorn main:app) and
@@ -41,6 +42,19 @@ except ModuleNotFoundError:  # pragma: no cover — exercised via legacy tests
 app = FastAPI(title="Ops Controller", version="1.0.0")
 logger = logging.getLogger(__name__)
 
+# Own registry: tests load this file more than once, and a second Histogram on
+# the global registry would be a duplicate-name error.
+_metrics_registry = CollectorRegistry()
+_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route", "status"], registry=_metrics_registry,
+)
+_COMPOSE_SECONDS = Histogram(
+    "ops_controller_compose_duration_seconds", "docker-compose invocation time by verb and result",
+    ["verb", "result"], registry=_metrics_registry,
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+)
+
 COMPOSE_PROJECT = os.environ.get("COMPOSE_PROJECT", "ordo-ai-stack")
 OPS_CONTROLLER_TOKEN = os.environ.get("OPS_CONTROLLER_TOKEN", "")
 AUDIT_LOG_PATH = Path(os.environ.get("AUDIT_LOG_PATH", "/data/audit.log"))
@@ -61,6 +75,8 @@ ENV_ALLOWED_KEYS = {
     "LLAMACPP_ENABLE_KV_CACHE_QUANTIZATION",
     "LLAMACPP_KV_CACHE_TYPE_K",
     "LLAMACPP_KV_CACHE_TYPE_V",
+    "LLAMACPP_PARALLEL",
+    "LLAMACPP_NO_MMAP",
     "LLAMACPP_EXTRA_ARGS",
 }
 
@@ -332,6 +348,27 @@ def _nvml_vraam_by_pid() -> tuple[dict[int, int], dict]:
             pass
 
 
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    """Time every request into ``http_request_duration_seconds`` by route template."""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        template = getattr(route, "path", None) or "unmatched"
+        _REQUEST_SECONDS.labels(request.method, template, str(status)).observe(time.perf_counter() - started)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(_: None = Depends(verify_token)):
+    """Prometheus scrape endpoint. Bearer token required (``authorization`` in the scrape config)."""
+    return Response(content=generate_latest(_metrics_registry), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/health")
 async def health():
     """Controller health. No auth required. Verifies Docker daemon reachable."""
@@ -453,10 +490,13 @@ def _run_compose(verb: str, service: str | None) -> subprocess.CompletedProcess:
         cmd.append(service)
     elif verb == "up":
         cmd += ["-d"]
-    return subprocess.run(
+    started = time.perf_counter()
+    proc = subprocess.run(
         cmd, capture_output=True, text=True,
         cwd=os.environ.get("COMPOSE_PROJECT_DIR", "/workspace"),
     )
+    _COMPOSE_SECONDS.labels(verb, "ok" if proc.returncode == 0 else "fail").observe(time.perf_counter() - started)
+    return proc
 
 
 def _compose_endpoint(verb: str, body: ComposeOpRequest):
@@ -843,13 +883,16 @@ async def service_recreate(
         cmd += ["-f", f"/workspace/{cf}"]
     cmd += ["up", "-d", "--no-deps", service_id]
     env = {**os.environ, "BASE_PATH": BASE_PATH}
+    started = time.perf_counter()
     try:
         result = subprocess.run(cmd, capture_output=True, text=True, cwd="/workspace", env=env, timeout=120)
     except subprocess.TimeoutExpired:
+        _COMPOSE_SECONDS.labels("recreate", "timeout").observe(time.perf_counter() - started)
         _audit("recreate", service_id, "error", "timed out after 120s",
                correlation_id=_correlation_id(request))
         raise HTTPException(status_code=504, detail="Service recreate timed out after 120 seconds")
     ok = result.returncode == 0
+    _COMPOSE_SECONDS.labels("recreate", "ok" if ok else "fail").observe(time.perf_counter() - started)
     detail = (result.stderr or result.stdout)[:200] if not ok else ""
     _audit("recreate", service_id, "ok" if ok else "error", detail,
            correlation_id=_correlation_id(request))
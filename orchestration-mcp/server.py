@@ -6,6 +6,7 @@ from __future__ import annotations
 import json
 import os
 import re
+import time
 from typing import Any
 
 import httpx
@@ -42,47 +43,111 @@ def _headers() -> dict[str, str]:
     return h
 
 
+# One pooled client for every tool call (keep-alive to the dashboard) instead of a
+# new connection per request; timeouts are set per call.
+_client = httpx.Client(timeout=60.0)
+
+
+def _raise_for_detail(r: httpx.Response) -> None:
+    if r.status_code >= 400:
+        try:
+            detail = r.json()
+        except (ValueError, UnicodeDecodeError):
+            detail = {"detail": r.text}
+        raise RuntimeError(json.dumps(detail))
+
+
 def _get(path: str, params: dict | None = None) -> dict[str, Any]:
-    with httpx.Client(timeout=60.0) as client:
-        r = client.get(f"{BASE}{path}", headers=_headers(), params=params or {})
-        r.raise_for_status()
-        return r.json()
+    r = _client.get(f"{BASE}{path}", headers=_headers(), params=params or {}, timeout=60.0)
+    r.raise_for_status()
+    return r.json()
 
 
 def _post(path: str, body: dict[str, Any]) -> dict[str, Any]:
-    with httpx.Client(timeout=120.0) as client:
-        r = client.post(f"{BASE}{path}", headers=_headers(), json=body)
-        if r.status_code >= 400:
-            try:
-                detail = r.json()
-            except (ValueError, UnicodeDecodeError):
-                detail = {"detail": r.text}
-            raise RuntimeError(json.dumps(detail))
-        return r.json()
+    r = _client.post(f"{BASE}{path}", headers=_headers(), json=body, timeout=120.0)
+    _raise_for_detail(r)
+    return r.json()
 
 
 def _patch(path: str, body: dict[str, Any]) -> dict[str, Any]:
-    with httpx.Client(timeout=30.0) as client:
-        r = client.patch(f"{BASE}{path}", headers=_headers(), json=body)
-        if r.status_code >= 400:
-            try:
-                detail = r.json()
-            except (ValueError, UnicodeDecodeError):
-                detail = {"detail": r.text}
-            raise RuntimeError(json.dumps(detail))
-        return r.json()
+    r = _client.patch(f"{BASE}{path}", headers=_headers(), json=body, timeout=30.0)
+    _raise_for_detail(r)
+    return r.json()
 
 
 def _delete(path: str) -> dict[str, Any]:
-    with httpx.Client(timeout=30.0) as client:
-        r = client.delete(f"{BASE}{path}", headers=_headers())
-        if r.status_code >= 400:
-            try:
-                detail = r.json()
-            except (ValueError, UnicodeDecodeError):
-                detail = {"detail": r.text}
-            raise RuntimeError(json.dumps(detail))
-        return r.json()
+    r = _client.delete(f"{BASE}{path}", headers=_headers(), timeout=30.0)
+    _raise_for_detail(r)
+    return r.json()
+
+
+_TERMINAL_STATES = {"artifact_ready", "published", "failed", "cancelled"}
+
+
+def _iter_sse(lines):
+    """Yield (event, data) pairs from server-sent-event lines; comments (keepalives) yield ("comment", "")."""
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+        elif line.startswith(":"):
+            yield "comment", ""
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+
+
+def _stream_until_terminal(job_id: str, timeout_sec: float) -> dict[str, Any] | str | None:
+    """Block on /jobs/events until the job is terminal.
+
+    Returns the job, ``"resync"`` if the server dropped events for this stream, or
+    None on timeout or stream error.
+    """
+    deadline = time.monotonic() + timeout_sec
+    headers = {**_headers(), "Accept": "text/event-stream"}
+    params = {"job_id": job_id, "until_terminal": "true"}
+    try:
+        with _client.stream(
+            "GET",
+            f"{BASE}/api/orchestration/jobs/events",
+            headers=headers,
+            params=params,
+            # Read timeout above the server's 15 s keepalive, or the whole budget if shorter.
+            timeout=httpx.Timeout(10.0, read=min(30.0, timeout_sec)),
+        ) as r:
+            r.raise_for_status()
+            for event, data in _iter_sse(r.iter_lines()):
+                if event == "job_state":
+                    msg = json.loads(data)
+                    if msg.get("state") in _TERMINAL_STATES and msg.get("job"):
+                        return msg["job"]
+                elif event == "resync":
+                    return "resync"
+                if time.monotonic() >= deadline:
+                    return None
+    except (httpx.HTTPError, json.JSONDecodeError):
+        return None
+    return None
+
+
+def _wait_for_terminal(job_id: str, timeout_sec: float) -> dict[str, Any] | None:
+    """The job once terminal, or None when the budget runs out or the event stream is unavailable.
+
+    A resync only means events were dropped: check the job directly (it may have
+    finished meanwhile) and subscribe again with what is left of the budget.
+    """
+    deadline = time.monotonic() + timeout_sec
+    while (remaining := deadline - time.monotonic()) > 0:
+        outcome = _stream_until_terminal(job_id, remaining)
+        if outcome != "resync":
+            return outcome if isinstance(outcome, dict) else None
+        job = _get(f"/api/orchestration/jobs/{job_id}")
+        if job.get("state") in _TERMINAL_STATES:
+            return job
+    return None
 
 
 mcp = FastMCP("orchestration")
@@ -93,9 +158,8 @@ mcp = FastMCP("orchestration")
 @mcp.tool()
 def orchestration_readiness() -> dict:
     """Return capability readiness (model-gateway, MCP gateway, optional ComfyUI)."""
-    with httpx.Client(timeout=15.0) as client:
-        r = client.get(f"{BASE}/api/orchestration/readiness")
-        return r.json()
+    r = _client.get(f"{BASE}/api/orchestration/readiness", timeout=15.0)
+    return r.json()
 
 
 # ── Workflow lifecycle ────────────────────────────────────────────────────────
@@ -186,8 +250,9 @@ def run_workflow(
     template_id: str | None = None,
     workflow_id: str | None = None,
     params_json: str = "{}",
+    scheduled_at: str | None = None,
 ) -> dict:
-    """Queue a workflow run via the worker. Returns job_id immediately. Use this dedicated tool instead of generic gateway call tools. Only API-format workflows are supported; UI/Editor exports from the ComfyUI web interface are invalid. CRITICAL: Provide the raw ID only. Do NOT include the 'gateway__' prefix. MANDATORY SEQUENCE: After triggering a run, you MUST call await_run with the returned job_id to monitor state. Do not attempt to fetch outputs or assume completion until await_run returns a terminal state (completed/failed). DISCOVERY REQUIRED: Perform a fresh discovery via list_workflows or list_templates to verify the current ID before execution."""
+    """Queue a workflow run via the worker. Returns job_id immediately. Optional scheduled_at (ISO-8601, UTC if no offset) delays the run until that time. Use this dedicated tool instead of generic gateway call tools. Only API-format workflows are supported; UI/Editor exports from the ComfyUI web interface are invalid. CRITICAL: Provide the raw ID only. Do NOT include the 'gateway__' prefix. MANDATORY SEQUENCE: After triggering a run, you MUST call await_run with the returned job_id to monitor state. Do not attempt to fetch outputs or assume completion until await_run returns a terminal state (completed/failed). DISCOVERY REQUIRED: Perform a fresh discovery via list_workflows or list_templates to verify the current ID before execution."""
     try:
         params = json.loads(params_json) if params_json else {}
     except json.JSONDecodeError as e:
@@ -198,21 +263,77 @@ def run_workflow(
     workflow_id = _sanitize_workflow_id(workflow_id)
     if workflow_id:
         body["workflow_id"] = workflow_id
+    if scheduled_at:
+        body["scheduled_at"] = scheduled_at
     return _post("/api/orchestration/run", body)
 
 
 @mcp.tool()
-def await_run(job_id: str) -> dict:
-    """Get execution receipt and current state for a job. CRITICAL: Provide the raw ID only. Do NOT include the 'gateway__' prefix or any other namespace prefix. DISCOVERY REQUIRED: Always verify the job_id is current and valid."""
-    return _get(f"/api/orchestration/jobs/{job_id}")
+def run_workflow_batch(
+    params_list_json: str,
+    template_id: str | None = None,
+    workflow_id: str | None = None,
+    params_json: str = "{}",
+    scheduled_at: str | None = None,
+) -> dict:
+    """Queue many runs of one template or workflow at once (seed sweeps, prompt lists). Optional scheduled_at (ISO-8601, UTC if no offset) holds the batch until an off-peak time. params_list_json is a JSON array of parameter objects, one job each, merged over the shared params_json. Returns batch_id and job_ids; check progress with batch_status and stop the rest with cancel_batch. CRITICAL: Provide the raw ID only. Do NOT include the 'gateway__' prefix."""
+    try:
+        params = json.loads(params_json) if params_json else {}
+        params_list = json.loads(params_list_json)
+    except json.JSONDecodeError as e:
+        return {"error": f"Invalid JSON: {e}"}
+    if not isinstance(params_list, list) or not all(isinstance(p, dict) for p in params_list):
+        return {"error": "params_list_json must be a JSON array of objects"}
+    body: dict[str, Any] = {"params": params, "params_list": params_list}
+    if template_id:
+        body["template_id"] = template_id
+    workflow_id = _sanitize_workflow_id(workflow_id)
+    if workflow_id:
+        body["workflow_id"] = workflow_id
+    if scheduled_at:
+        body["scheduled_at"] = scheduled_at
+    return _post("/api/orchestration/run/batch", body)
+
+
+@mcp.tool()
+def batch_status(batch_id: str) -> dict:
+    """Per-state job counts and job states for a batch from run_workflow_batch; done=true once every job is terminal. CRITICAL: Provide the raw ID only."""
+    return _get(f"/api/orchestration/batches/{batch_id}")
+
+
+@mcp.tool()
+def cancel_batch(batch_id: str) -> dict:
+    """Request cancellation of every unfinished job in a batch. CRITICAL: Provide the raw ID only. Do NOT include the 'gateway__' prefix or any other namespace prefix inside the arguments of this tool."""
+    return _post(f"/api/orchestration/batches/{batch_id}/cancel", {})
+
+
+@mcp.tool()
+def await_run(job_id: str, wait: bool = False, timeout_sec: int = 600) -> dict:
+    """Get execution receipt and current state for a job. With wait=true, blocks (up to timeout_sec) until the job reaches a terminal state (artifact_ready, published, failed, cancelled) instead of returning immediately — prefer this over calling await_run in a loop. A non-terminal result carries timed_out=true when timeout_sec elapsed, or wait_interrupted=true if the event stream failed first (call again). CRITICAL: Provide the raw ID only. Do NOT include the 'gateway__' prefix or any other namespace prefix. DISCOVERY REQUIRED: Always verify the job_id is current and valid."""
+    budget = max(1, min(timeout_sec, 3600))
+    started = time.monotonic()
+    if wait:
+        job = _wait_for_terminal(job_id, budget)
+        if job is not None:
+            return job
+    result = _get(f"/api/orchestration/jobs/{job_id}")
+    if wait and result.get("state") not in _TERMINAL_STATES:
+        if time.monotonic() - started >= budget:
+            result["timed_out"] = True
+        else:
+            # The event stream failed before the budget ran out; the job is simply still running.
+            result["wait_interrupted"] = True
+    return result
 
 
 @mcp.tool()
-def list_jobs(state: str | None = None, limit: int = 20) -> dict:
-    """List recent jobs, optionally filtered by state. Use this dedicated tool instead of generic gateway call tools for this operation."""
+def list_jobs(state: str | None = None, limit: int = 20, cursor: str | None = None) -> dict:
+    """List recent jobs, newest first, optionally filtered by state. For the next page pass the returned next_cursor as cursor. Use this dedicated tool instead of generic gateway call tools for this operation."""
     params: dict[str, Any] = {"limit": limit}
     if state:
         params["state"] = state
+    if cursor:
+        params["cursor"] = cursor
     return _get("/api/orchestration/jobs", params=params)
 
 
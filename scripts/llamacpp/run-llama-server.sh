@@ -12,8 +12,12 @@ set -- \
   --yarn-orig-ctx "${LLAMACPP_YARN_ORIG_CTX:-0}" \
   --n-gpu-layers "${LLAMACPP_GPU_LAYERS:--1}" \
   --flash-attn "${LLAMACPP_FLASH_ATTN:-auto}" \
-  --jinja \
-  --no-mmap
+  --jinja
+
+# Load weights into RAM/VRAM up front (default); LLAMACPP_NO_MMAP=0 memory-maps the GGUF instead
+if [ "${LLAMACPP_NO_MMAP:-1}" = "1" ]; then
+  set -- "$@" --no-mmap
+fi
 
 if [ -n "${LLAMACPP_OVERRIDE_KV:-}" ]; then
   set -- "$@" --override-kv "${LLAMACPP_OVERRIDE_KV}"
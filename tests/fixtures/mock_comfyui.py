@@ -2,38 +2,64 @@
 
 from __future__ import annotations
 
+import asyncio
 import threading
 import time
 import uuid
 from typing import Any
 
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 
 _app = FastAPI()
 _prompts: dict[str, dict[str, Any]] = {}
+# clientId -> (websocket, loop) for pushing execution events like real ComfyUI
+_ws_clients: dict[str, tuple[WebSocket, asyncio.AbstractEventLoop]] = {}
+
+
+def _push_event(client_id: str, message: dict[str, Any]) -> None:
+    target = _ws_clients.get(client_id)
+    if not target:
+        return
+    ws, loop = target
+    asyncio.run_coroutine_threadsafe(ws.send_json(message), loop).result(timeout=5)
 
 
 @_app.post("/prompt")
 async def queue_prompt(body: dict = None):
     pid = str(uuid.uuid4())
+    client_id = str((body or {}).get("client_id") or "")
     _prompts[pid] = {"status": "pending", "outputs": {}}
     # Simulate async completion after a short delay
     def _complete():
         time.sleep(0.3)
-        _prompts[pid] = {
-            "status": "completed",
-            "outputs": {
-                "15": {
-                    "gifs": [{"filename": f"social-bot_{pid[:8]}.mp4", "type": "output"}]
-                }
-            },
+        outputs = {
+            "15": {
+                "gifs": [{"filename": f"social-bot_{pid[:8]}.mp4", "type": "output"}]
+            }
         }
+        _prompts[pid] = {"status": "completed", "outputs": outputs}
+        _push_event(client_id, {"type": "progress", "data": {"value": 1, "max": 1, "prompt_id": pid}})
+        _push_event(client_id, {"type": "executed", "data": {"node": "15", "output": outputs["15"], "prompt_id": pid}})
+        _push_event(client_id, {"type": "execution_success", "data": {"prompt_id": pid}})
     threading.Thread(target=_complete, daemon=True).start()
     return {"prompt_id": pid}
 
 
+@_app.websocket("/ws")
+async def events(websocket: WebSocket, clientId: str = ""):
+    await websocket.accept()
+    _ws_clients[clientId] = (websocket, asyncio.get_running_loop())
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        _ws_clients.pop(clientId, None)
+
+
 @_app.get("/history/{prompt_id}")
 async def get_history(prompt_id: str):
     entry = _prompts.get(prompt_id, {})
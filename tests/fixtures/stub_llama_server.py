@@ -0,0 +1,107 @@
+"""Stub llama-server for sweep tests: /health and streaming /v1/chat/completions. No GPU required.
+
+``configure(env)`` plays the part of a container recreate: it applies the
+``LLAMACPP_*`` values and makes ``/health`` answer 503 ("Loading model") for
+``load_sec``. Decode speed depends on the config so a sweep has a clear winner:
+flash attention on is fastest, and quantized KV cache is slightly slower than
+f16 but uses less VRAM (see ``vram_gb``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+from typing import Any
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_app = FastAPI()
+_state: dict[str, Any] = {"env": {}, "ready_at": 0.0, "configs_seen": []}
+
+# Seconds per generated token, keyed on LLAMACPP_FLASH_ATTN
+_TOKEN_GAP = {"on": 0.002, "auto": 0.003, "off": 0.005}
+# Extra seconds per token for a quantized KV cache (dequantization cost)
+_QUANT_GAP = 0.0002
+_KV_VRAM_GB = {"f16": 4.0, "q8_0": 2.1, "q4_0": 1.2}
+
+
+def configure(env: dict[str, str], load_sec: float = 0.2) -> None:
+    """Apply a config as if llamacpp had been recreated with it."""
+    _state["env"] = dict(env)
+    _state["ready_at"] = time.monotonic() + load_sec
+    _state["configs_seen"].append(dict(env))
+
+
+def kv_type(env: dict[str, str]) -> str:
+    if env.get("LLAMACPP_ENABLE_KV_CACHE_QUANTIZATION") != "1":
+        return "f16"
+    return env.get("LLAMACPP_KV_CACHE_TYPE_K") or "f16"
+
+
+def vram_gb(env: dict[str, str]) -> float:
+    """Weights plus KV cache (per slot) for the given config."""
+    parallel = int(env.get("LLAMACPP_PARALLEL") or 1)
+    return 10.0 + _KV_VRAM_GB.get(kv_type(env), 2.0) * parallel
+
+
+def state() -> dict[str, Any]:
+    return _state
+
+
+@_app.get("/health")
+async def health():
+    if time.monotonic() < _state["ready_at"]:
+        return JSONResponse({"error": {"code": 503, "message": "Loading model"}}, status_code=503)
+    return {"status": "ok"}
+
+
+@_app.post("/v1/chat/completions")
+async def chat_completions(body: dict):
+    if time.monotonic() < _state["ready_at"]:
+        return JSONResponse({"error": {"code": 503, "message": "Loading model"}}, status_code=503)
+    env = _state["env"]
+    gap = _TOKEN_GAP.get(env.get("LLAMACPP_FLASH_ATTN", "auto"), 0.003)
+    if kv_type(env) != "f16":
+        gap += _QUANT_GAP
+    n_out = int(body.get("max_tokens") or 16)
+    prompt = " ".join(m.get("content", "") for m in body.get("messages") or [])
+    n_prompt = max(1, len(prompt.split()))
+
+    async def stream():
+        started = time.monotonic()
+        await asyncio.sleep(gap * 2)  # prefill
+        prefill = time.monotonic() - started
+        yield b'data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n'
+        for i in range(n_out):
+            if i:
+                await asyncio.sleep(gap)
+            yield f"data: {json.dumps({'choices': [{'delta': {'content': f' t{i}'}}]})}\n\n".encode()
+        decode = max(time.monotonic() - started - prefill, 1e-6)
+        final = {
+            "choices": [{"delta": {}, "finish_reason": "length"}],
+            "usage": {"prompt_tokens": n_prompt, "completion_tokens": n_out},
+            "timings": {"prompt_per_second": n_prompt / prefill, "predicted_per_second": n_out / decode},
+        }
+        yield f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode()
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+def start_stub_llama_server(host: str = "127.0.0.1", port: int = 18089) -> threading.Thread:
+    """Start the stub in a background daemon thread. Returns the thread."""
+    config = uvicorn.Config(_app, host=host, port=port, log_level="error")
+    server = uvicorn.Server(config)
+    t = threading.Thread(target=server.run, daemon=True)
+    t.start()
+    import httpx
+    for _ in range(30):
+        try:
+            httpx.get(f"http://{host}:{port}/health", timeout=1)
+            break
+        except Exception:
+            time.sleep(0.1)
+    return t
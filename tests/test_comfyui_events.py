@@ -0,0 +1,186 @@
+"""Tests for the shared ComfyUI websocket event stream and the worker's use of it."""
+from __future__ import annotations
+
+import json
+import time
+
+import httpx
+import pytest
+
+from dashboard.comfyui_events import ComfyUIEventStream
+
+MOCK_PORT = 18189
+
+
+def _msg(kind: str, **data) -> str:
+    return json.dumps({"type": kind, "data": data})
+
+
+class TestHandleMessage:
+    def test_executed_outputs_then_success(self):
+        stream = ComfyUIEventStream("http://comfyui:8188")
+        waiter = stream.track("p1")
+        stream.handle_message(_msg("progress", value=3, max=20, prompt_id="p1"))
+        stream.handle_message(_msg("executed", node="9", output={"images": [{"filename": "a.png"}]}, prompt_id="p1"))
+        assert waiter.progress == (3, 20)
+        assert waiter.first_progress_at is not None
+        assert not waiter.done
+
+        stream.handle_message(_msg("execution_success", prompt_id="p1"))
+        assert waiter.wait(0)
+        assert waiter.error is None
+        assert waiter.history_entry()["outputs"] == {"9": {"images": [{"filename": "a.png"}]}}
+
+    def test_execution_start_marks_first_progress_in_history_entry(self):
+        from dashboard.comfyui_events import execution_started_at
+
+        stream = ComfyUIEventStream("http://comfyui:8188")
+        waiter = stream.track("p1")
+        stream.handle_message(_msg("execution_start", prompt_id="p1"))
+        started = waiter.first_progress_at
+        stream.handle_message(_msg("progress", value=1, max=2, prompt_id="p1"))
+        assert started is not None and waiter.first_progress_at == started
+        assert execution_started_at(waiter.history_entry()) == pytest.approx(started, abs=0.001)
+        history = {"status": {"messages": [["execution_start", {"prompt_id": "p1", "timestamp": 1700000000123}]]}}
+        assert execution_started_at(history) == 1700000000.123
+        assert execution_started_at({"outputs": {}}) is None
+
+    def test_legacy_executing_null_node_completes(self):
+        stream = ComfyUIEventStream("http://comfyui:8188")
+        waiter = stream.track("p1")
+        stream.handle_message(_msg("executing", node="3", prompt_id="p1"))
+        assert not waiter.done
+        stream.handle_message(_msg("executing", node=None, prompt_id="p1"))
+        assert waiter.done
+
+    def test_execution_error_sets_error(self):
+        stream = ComfyUIEventStream("http://comfyui:8188")
+        waiter = stream.track("p1")
+        stream.handle_message(_msg("execution_error", prompt_id="p1", exception_message="CUDA OOM"))
+        assert waiter.done
+        assert waiter.error == "CUDA OOM"
+
+    def test_events_before_track_are_kept(self):
+        stream = ComfyUIEventStream("http://comfyui:8188")
+        stream.handle_message(_msg("executed", node="1", output={"x": 1}, prompt_id="early"))
+        stream.handle_message(_msg("execution_success", prompt_id="early"))
+        waiter = stream.track("early")
+        assert waiter.done
+        assert waiter.outputs == {"1": {"x": 1}}
+
+    def test_prompts_are_multiplexed_independently(self):
+        stream = ComfyUIEventStream("http://comfyui:8188")
+        a, b = stream.track("a"), stream.track("b")
+        stream.handle_message(_msg("execution_success", prompt_id="b"))
+        assert b.done and not a.done
+
+    def test_untracked_backlog_is_bounded(self):
+        stream = ComfyUIEventStream("http://comfyui:8188", max_untracked=4)
+        stream.track("mine")
+        for i in range(20):
+            stream.handle_message(_msg("progress", value=1, max=2, prompt_id=f"other-{i}"))
+        assert len(stream._waiters) == 5
+        assert "mine" in stream._waiters
+
+    def test_ignores_binary_and_garbage(self):
+        stream = ComfyUIEventStream("http://comfyui:8188")
+        stream.handle_message(b"\x00\x01preview")
+        stream.handle_message("not json")
+        stream.handle_message(_msg("status", status={"exec_info": {"queue_remaining": 0}}))
+        assert not stream._waiters
+
+    def test_ws_url(self):
+        assert ComfyUIEventStream("http://comfyui:8188/", client_id="c").ws_url == "ws://comfyui:8188/ws?clientId=c"
+        assert ComfyUIEventStream("https://h/base", client_id="c").ws_url == "wss://h/base/ws?clientId=c"
+
+
+@pytest.fixture(scope="module")
+def mock_comfyui_url():
+    from tests.fixtures.mock_comfyui import start_mock_comfyui
+
+    start_mock_comfyui(host="127.0.0.1", port=MOCK_PORT)
+    return f"http://127.0.0.1:{MOCK_PORT}"
+
+
+def test_stream_receives_completion_from_comfyui(mock_comfyui_url: str):
+    pytest.importorskip("websockets")
+    stream = ComfyUIEventStream(mock_comfyui_url)
+    assert stream.start()
+    try:
+        assert stream.wait_connected(5)
+        r = httpx.post(f"{mock_comfyui_url}/prompt", json={"prompt": {}, "client_id": stream.client_id})
+        waiter = stream.track(r.json()["prompt_id"])
+        assert waiter.wait(5)
+        assert waiter.outputs["15"]["gifs"]
+    finally:
+        stream.stop()
+    assert not stream.connected
+
+
+class _FakeStream:
+    connected = True
+
+    def __init__(self, waiter):
+        self.waiter = waiter
+        self.untracked: list[str] = []
+
+    def track(self, prompt_id):
+        return self.waiter
+
+    def untrack(self, prompt_id):
+        self.untracked.append(prompt_id)
+
+
+def test_worker_wait_uses_stream_without_history_poll(tmp_path, monkeypatch):
+    import worker.worker as ww
+
+    from dashboard.comfyui_events import PromptWaiter
+    from dashboard.orchestration_db import create_job, init_db
+
+    init_db(tmp_path)
+    job = create_job(tmp_path, workflow_id="wf")
+    waiter = PromptWaiter("p1")
+    waiter.outputs = {"9": {"images": []}}
+    waiter._done.set()
+    stream = _FakeStream(waiter)
+    monkeypatch.setattr(ww, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(ww, "_comfyui_events", stream)
+    monkeypatch.setattr(ww, "_comfyui_history_entry", lambda pid: pytest.fail("history polled"))
+
+    started = time.monotonic()
+    entry = ww._comfyui_wait_outputs("p1", job.job_id)
+    assert time.monotonic() - started < 1
+    assert entry["outputs"] == {"9": {"images": []}}
+    assert stream.untracked == ["p1"]
+
+
+def test_worker_wait_raises_on_execution_error(tmp_path, monkeypatch):
+    import worker.worker as ww
+
+    from dashboard.comfyui_events import PromptWaiter
+    from dashboard.orchestration_db import create_job, init_db
+
+    init_db(tmp_path)
+    job = create_job(tmp_path, workflow_id="wf")
+    waiter = PromptWaiter("p1")
+    waiter.error = "CUDA OOM"
+    waiter._done.set()
+    monkeypatch.setattr(ww, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(ww, "_comfyui_events", _FakeStream(waiter))
+
+    with pytest.raises(RuntimeError, match="CUDA OOM"):
+        ww._comfyui_wait_outputs("p1", job.job_id)
+
+
+def test_prompt_waiter_wait_async():
+    import asyncio
+
+    stream = ComfyUIEventStream("http://comfyui:8188")
+    waiter = stream.track("p1")
+
+    async def _scenario() -> tuple[bool, bool]:
+        timed_out = await waiter.wait_async(0.01)
+        asyncio.get_running_loop().call_later(0.02, stream.handle_message, _msg("execution_success", prompt_id="p1"))
+        return timed_out, await waiter.wait_async(5)
+
+    assert asyncio.run(_scenario()) == (False, True)
@@ -17,8 +17,7 @@ def test_throughput_record_persists_ttft_in_summary():
     import dashboard.app as dashboard_app
 
     with dashboard_app._state_lock:
-        dashboard_app._throughput_samples.clear()
-        dashboard_app._ttft_samples.clear()
+        dashboard_app._throughput.clear()
         dashboard_app._service_usage.clear()
         dashboard_app._last_benchmark = None
 
@@ -44,3 +43,5 @@ def test_throughput_record_persists_ttft_in_summary():
     assert top["model"] == "qwen3-14b.gguf:chat"
     assert top["latest_ttft_ms"] == 180.0
     assert top["p95_ttft_ms"] == 180.0
+    pool = body["orchestration"]["db_connections"]
+    assert {"opened", "reused", "closed", "open"} <= set(pool)
@@ -0,0 +1,140 @@
+"""Bulk submission: create_job_batch and /api/orchestration/run/batch + /batches/{id}."""
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def db_dir(tmp_path: Path):
+    from dashboard.orchestration_db import init_db
+
+    d = tmp_path / "dashboard"
+    init_db(d)
+    return d
+
+
+@pytest.fixture
+def client(db_dir: Path, monkeypatch):
+    monkeypatch.setenv("DASHBOARD_DATA_PATH", str(db_dir))
+    import importlib
+
+    import dashboard.routes_orchestration as ro
+
+    importlib.reload(ro)
+    monkeypatch.setattr(ro, "compute_readiness", lambda: {"ok": True, "checks": []})
+
+    from dashboard.app import app
+
+    return TestClient(app)
+
+
+class TestBatchStore:
+    def test_batch_inserted_in_order_with_one_wakeup(self, db_dir: Path):
+        from dashboard.orchestration_db import create_job_batch, get_batch, get_job, list_jobs
+
+        with patch("dashboard.orchestration_db.notify_worker") as notify:
+            batch_id, job_ids = create_job_batch(db_dir, [{"seed": i} for i in range(5)], template_id="t")
+        notify.assert_called_once()
+        assert len(set(job_ids)) == 5
+        assert len(list_jobs(db_dir)) == 5
+        job = get_job(db_dir, job_ids[3])
+        assert job.batch_id == batch_id
+        assert json.loads(job.params_json) == {"seed": 3}
+
+        b = get_batch(db_dir, batch_id)
+        assert b["total"] == 5
+        assert b["counts"] == {"queued": 5}
+        assert b["done"] is False
+        assert [j["job_id"] for j in b["jobs"]] == job_ids
+
+    def test_cancel_batch_skips_finished_jobs(self, db_dir: Path):
+        from dashboard.orchestration_db import cancel_batch, create_job_batch, get_batch, update_job
+
+        batch_id, job_ids = create_job_batch(db_dir, [{}, {}, {}], workflow_id="wf")
+        update_job(db_dir, job_ids[0], state="failed", error="boom")
+        assert cancel_batch(db_dir, batch_id) == 2
+        assert get_batch(db_dir, batch_id)["counts"] == {"failed": 1, "cancelling": 2}
+        assert get_batch(db_dir, "missing") is None
+
+    def test_retry_stays_in_batch(self, db_dir: Path, monkeypatch):
+        import worker.worker as ww
+
+        from dashboard.orchestration_db import create_job_batch, get_batch, list_jobs
+
+        monkeypatch.setattr(ww, "DATA_DIR", db_dir)
+        monkeypatch.setattr(ww, "MAX_RETRIES", 2)
+        batch_id, job_ids = create_job_batch(db_dir, [{"seed": 1}], workflow_id="wf",
+                                             scheduled_at="2020-01-01T00:00:00Z")
+        (job,) = ww._claim_jobs(1)
+        ww._handle_job_failure(job, RuntimeError("boom"))
+
+        (retry,) = [j for j in list_jobs(db_dir) if j.job_id != job_ids[0]]
+        assert retry.state == "queued"
+        assert retry.batch_id == batch_id
+        assert retry.scheduled_at == job.scheduled_at
+        assert retry.source == job.source
+        b = get_batch(db_dir, batch_id)
+        assert b["total"] == 2
+        assert b["counts"] == {"failed": 1, "queued": 1}
+        assert b["done"] is False
+
+    def test_init_db_adds_batch_column_to_old_database(self, tmp_path: Path):
+        from dashboard.orchestration_db import close_connections, create_job, init_db
+
+        d = tmp_path / "legacy"
+        (d / "orchestration").mkdir(parents=True)
+        conn = sqlite3.connect(d / "orchestration" / "orchestration.db")
+        conn.execute(
+            "CREATE TABLE jobs (job_id TEXT PRIMARY KEY, state TEXT NOT NULL DEFAULT 'queued', "
+            "created_at TEXT NOT NULL, updated_at TEXT NOT NULL, template_id TEXT, workflow_id TEXT, "
+            "prompt_id TEXT, error TEXT, outputs_json TEXT, publish_webhook TEXT, publish_status TEXT, "
+            "params_json TEXT, compiled_workflow TEXT, retry_count INTEGER DEFAULT 0, scheduled_at TEXT, "
+            "extra_json TEXT DEFAULT '{}')"
+        )
+        conn.commit()
+        conn.close()
+        close_connections()
+
+        init_db(d)
+        init_db(d)  # idempotent
+        assert create_job(d, workflow_id="wf").batch_id is None
+
+
+class TestBatchEndpoints:
+    def test_run_batch_query_and_cancel(self, client: TestClient):
+        r = client.post(
+            "/api/orchestration/run/batch",
+            json={"workflow_id": "wf", "params": {"prompt": "cat"}, "params_list": [{"seed": 1}, {"seed": 2}]},
+        )
+        assert r.status_code == 200
+        data = r.json()
+        assert data["count"] == 2
+        batch_id = data["batch_id"]
+
+        job = client.get(f"/api/orchestration/jobs/{data['job_ids'][1]}").json()
+        assert json.loads(job["params_json"]) == {"prompt": "cat", "seed": 2}
+        assert job["batch_id"] == batch_id
+
+        status = client.get(f"/api/orchestration/batches/{batch_id}").json()
+        assert status["counts"] == {"queued": 2}
+
+        r = client.post(f"/api/orchestration/batches/{batch_id}/cancel")
+        assert r.json()["cancelling"] == 2
+        assert r.json()["counts"] == {"cancelling": 2}
+
+    def test_bad_batches(self, client: TestClient, monkeypatch):
+        import dashboard.routes_orchestration as ro
+
+        url = "/api/orchestration/run/batch"
+        assert client.post(url, json={"workflow_id": "wf", "params_list": []}).status_code == 400
+        assert client.post(url, json={"params_list": [{}]}).status_code == 400
+        monkeypatch.setattr(ro, "MAX_BATCH_JOBS", 2)
+        assert client.post(url, json={"workflow_id": "wf", "params_list": [{}] * 3}).status_code == 400
+        assert client.get("/api/orchestration/batches/missing").status_code == 404
+        assert client.post("/api/orchestration/batches/missing/cancel").status_code == 404
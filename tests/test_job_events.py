@@ -0,0 +1,181 @@
+"""Job state-change feed: job_events triggers and the /api/orchestration/jobs/events SSE stream."""
+from __future__ import annotations
+
+import json
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def db_dir(tmp_path: Path):
+    from dashboard.orchestration_db import init_db
+
+    d = tmp_path / "dashboard"
+    init_db(d)
+    return d
+
+
+@pytest.fixture
+def client(db_dir: Path, monkeypatch):
+    monkeypatch.setenv("DASHBOARD_DATA_PATH", str(db_dir))
+    with patch("dashboard.routes_orchestration.compute_readiness", return_value={"ok": True, "checks": []}):
+        import importlib
+
+        import dashboard.routes_orchestration as ro
+
+        importlib.reload(ro)
+        monkeypatch.setattr(ro._job_events, "poll_interval", 0.02)
+
+        from dashboard.app import app
+
+        yield TestClient(app)
+
+
+def _advance(db_dir: Path, job_id: str, *states: str, delay: float = 0.2) -> threading.Thread:
+    from dashboard.orchestration_db import update_job
+
+    def _run():
+        time.sleep(delay)
+        for s in states:
+            update_job(db_dir, job_id, state=s)
+
+    t = threading.Thread(target=_run)
+    t.start()
+    return t
+
+
+def _read_events(client: TestClient, params: dict, headers: dict | None = None) -> list[tuple[str, dict]]:
+    events: list[tuple[str, dict]] = []
+    event = None
+    with client.stream("GET", "/api/orchestration/jobs/events", params=params, headers=headers or {}) as r:
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("text/event-stream")
+        for line in r.iter_lines():
+            if line.startswith("event:"):
+                event = line[6:].strip()
+            elif line.startswith("data:") and event:
+                events.append((event, json.loads(line[5:])))
+    return events
+
+
+class TestJobEventsTable:
+    def test_triggers_record_every_state_change(self, db_dir: Path):
+        from dashboard.orchestration_db import cancel_job, claim_jobs, create_job, get_job_events
+
+        a = create_job(db_dir, workflow_id="wf")
+        b = create_job(db_dir, workflow_id="wf")
+        claim_jobs(db_dir, 1)
+        cancel_job(db_dir, b.job_id)
+
+        events = get_job_events(db_dir)
+        assert [(e["job_id"], e["state"]) for e in events] == [
+            (a.job_id, "queued"),
+            (b.job_id, "queued"),
+            (a.job_id, "validated"),
+            (b.job_id, "cancelling"),
+        ]
+        assert [e["seq"] for e in events] == sorted(e["seq"] for e in events)
+        assert get_job_events(db_dir, after_seq=events[1]["seq"]) == events[2:]
+
+    def test_non_state_updates_are_not_events(self, db_dir: Path):
+        from dashboard.orchestration_db import create_job, get_job_events, update_job
+
+        job = create_job(db_dir, workflow_id="wf")
+        update_job(db_dir, job.job_id, prompt_id="p-1")
+        assert len(get_job_events(db_dir)) == 1
+
+    def test_prune_keeps_newest(self, db_dir: Path):
+        from dashboard.orchestration_db import create_job, get_job_events, latest_job_event_seq, prune_job_events
+
+        for _ in range(10):
+            create_job(db_dir, workflow_id="wf")
+        assert prune_job_events(db_dir, keep=3) == 7
+        assert [e["seq"] for e in get_job_events(db_dir)] == [8, 9, 10]
+        assert latest_job_event_seq(db_dir) == 10
+
+
+
+class TestJobEventBroker:
+    def test_live_subscriber_after_idle_period_gets_no_stale_backlog(self, db_dir: Path):
+        import asyncio
+
+        from dashboard.job_events import JobEventBroker
+        from dashboard.orchestration_db import create_job
+
+        broker = JobEventBroker(db_dir, poll_interval=0.01)
+
+        async def scenario() -> list[str]:
+            first = await broker.subscribe()
+            broker.unsubscribe(first)
+            await asyncio.sleep(0.05)  # the poll task notices and exits
+            for _ in range(5):
+                create_job(db_dir, workflow_id="wf")
+            second = await broker.subscribe()
+            live = create_job(db_dir, workflow_id="wf")
+            event = await second.get(2.0)
+            broker.unsubscribe(second)
+            return [event["job_id"], live.job_id] if event else []
+
+        seen, expected = asyncio.run(scenario())
+        assert seen == expected
+
+
+class TestJobEventsStream:
+    def test_until_terminal_streams_transitions_then_closes(self, client: TestClient, db_dir: Path):
+        from dashboard.orchestration_db import create_job
+
+        job = create_job(db_dir, workflow_id="wf")
+        t = _advance(db_dir, job.job_id, "validated", "running", "artifact_ready")
+        events = _read_events(client, {"job_id": job.job_id, "until_terminal": "true"})
+        t.join()
+
+        states = [data["state"] for _, data in events]
+        assert states == ["queued", "validated", "running", "artifact_ready"]
+        assert events[0][1]["snapshot"] is True
+        assert events[-1][1]["job"]["job_id"] == job.job_id
+        assert events[-1][1]["job"]["state"] == "artifact_ready"
+
+    def test_already_terminal_job_returns_snapshot_only(self, client: TestClient, db_dir: Path):
+        from dashboard.orchestration_db import create_job, update_job
+
+        job = create_job(db_dir, workflow_id="wf")
+        update_job(db_dir, job.job_id, state="failed", error="boom")
+        events = _read_events(client, {"job_id": job.job_id, "until_terminal": "true"})
+        assert len(events) == 1
+        assert events[0][1]["job"]["error"] == "boom"
+
+    def test_resume_from_last_event_id_replays(self, client: TestClient, db_dir: Path):
+        from dashboard.orchestration_db import create_job, get_job_events, update_job
+
+        job = create_job(db_dir, workflow_id="wf")
+        first_seq = get_job_events(db_dir)[0]["seq"]
+        for s in ("validated", "running", "artifact_ready"):
+            update_job(db_dir, job.job_id, state=s)
+
+        events = _read_events(
+            client,
+            {"job_id": job.job_id, "until_terminal": "true"},
+            headers={"Last-Event-ID": str(first_seq)},
+        )
+        assert [data["state"] for _, data in events] == ["validated", "running", "artifact_ready"]
+
+    def test_state_filter_applies_to_live_events(self, client: TestClient, db_dir: Path):
+        from dashboard.orchestration_db import create_job
+
+        job = create_job(db_dir, workflow_id="wf")
+        t = _advance(db_dir, job.job_id, "validated", "running", "failed")
+        events = _read_events(
+            client, {"job_id": job.job_id, "state": ["failed"], "until_terminal": "true"}
+        )
+        t.join()
+        assert [data["state"] for _, data in events] == ["queued", "failed"]
+
+    def test_bad_requests(self, client: TestClient):
+        assert client.get("/api/orchestration/jobs/events", params={"state": "nope"}).status_code == 400
+        assert client.get("/api/orchestration/jobs/events", params={"until_terminal": "true"}).status_code == 400
+        assert client.get("/api/orchestration/jobs/events", params={"job_id": "missing"}).status_code == 404
@@ -0,0 +1,136 @@
+"""Job/outbox retention engine (dashboard/job_retention.py) and incremental vacuum."""
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def db_dir(tmp_path: Path):
+    from dashboard.orchestration_db import init_db
+
+    d = tmp_path / "dashboard"
+    init_db(d)
+    return d
+
+
+def _age(db_dir: Path, job_id: str, days: float) -> None:
+    from dashboard.orchestration_db import _connect
+
+    ts = (datetime.now(UTC) - timedelta(days=days)).isoformat().replace("+00:00", "Z")
+    with _connect(db_dir) as conn:
+        conn.execute("UPDATE jobs SET created_at=?, updated_at=? WHERE job_id=?", (ts, ts, job_id))
+        conn.execute("UPDATE publish_outbox SET delivered_at=? WHERE job_id=? AND delivered_at IS NOT NULL",
+                     (ts, job_id))
+        conn.commit()
+
+
+def _finished(db_dir: Path, state: str, days: float, **kwargs) -> str:
+    from dashboard.orchestration_db import JobState, _connect, create_job
+
+    job = create_job(db_dir, workflow_id="wf", **kwargs)
+    with _connect(db_dir) as conn:
+        conn.execute("UPDATE jobs SET state=? WHERE job_id=?", (JobState(state).value, job.job_id))
+        conn.commit()
+    _age(db_dir, job.job_id, days)
+    return job.job_id
+
+
+def test_parse_job_days():
+    from dashboard.job_retention import parse_job_days
+
+    assert parse_job_days("published=30, failed=1.5") == {"published": 30.0, "failed": 1.5}
+    assert parse_job_days("off") == {}
+    with pytest.raises(ValueError):
+        parse_job_days("queued=1")  # never archive live jobs
+    with pytest.raises(ValueError):
+        parse_job_days("published")
+
+
+def test_expired_jobs_archived_by_state_and_deleted_in_batches(db_dir: Path, tmp_path: Path):
+    from dashboard.job_retention import RetentionPolicy, iter_archive, run_retention
+    from dashboard.orchestration_db import (
+        _connect,
+        create_outbox_entry,
+        get_job,
+        get_job_counts,
+        mark_outbox_delivered,
+    )
+
+    old = [_finished(db_dir, "published", 40, compiled_workflow={"1": {"class_type": "X", "inputs": {}}})
+           for _ in range(5)]
+    key = create_outbox_entry(db_dir, old[0], "http://hook", {"n": 1})
+    mark_outbox_delivered(db_dir, key)
+    recent = _finished(db_dir, "published", 5)
+    late = _finished(db_dir, "published", 40)
+    with _connect(db_dir) as conn:  # queued 40 days ago but only just published
+        conn.execute("UPDATE jobs SET updated_at=? WHERE job_id=?",
+                     (datetime.now(UTC).isoformat().replace("+00:00", "Z"), late))
+        conn.commit()
+    failed = _finished(db_dir, "failed", 40)  # failed is kept 90 days
+    pending = _finished(db_dir, "cancelled", 40)
+    create_outbox_entry(db_dir, pending, "http://hook", {})  # undelivered: job stays
+
+    archive = tmp_path / "archive"
+    policy = RetentionPolicy(job_days={"published": 30, "failed": 90, "cancelled": 14}, outbox_days=None,
+                             batch_size=2)
+    stats = run_retention(db_dir, policy, archive)
+
+    assert stats["jobs"] == 5 and stats["blobs"] >= 2
+    assert all(get_job(db_dir, jid) is None for jid in old)
+    assert get_job(db_dir, recent) and get_job(db_dir, late) and get_job(db_dir, failed) and get_job(db_dir, pending)
+    assert get_job_counts(db_dir)["published"] == 2  # counters follow the deletes
+    (segment,) = archive.glob("jobs-*.jsonl.gz")
+    records = list(iter_archive(segment))
+    assert sorted(r["job_id"] for r in records) == sorted(old)
+    first = next(r for r in records if r["job_id"] == old[0])
+    assert first["compiled_workflow"] and first["outbox"][0]["idempotency_key"] == key
+    with _connect(db_dir) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM publish_outbox").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM job_blobs").fetchone()[0] == 0
+
+    assert run_retention(db_dir, policy, archive)["jobs"] == 0
+
+
+def test_delivered_outbox_rows_archived(db_dir: Path, tmp_path: Path):
+    from dashboard.job_retention import RetentionPolicy, iter_archive, run_retention
+    from dashboard.orchestration_db import create_job, create_outbox_entry, get_outbox_stats, mark_outbox_delivered
+
+    job = create_job(db_dir, workflow_id="wf")
+    for hook in ("http://a", "http://b"):
+        mark_outbox_delivered(db_dir, create_outbox_entry(db_dir, job.job_id, hook, {}))
+    create_outbox_entry(db_dir, job.job_id, "http://c", {})
+    _age(db_dir, job.job_id, 10)
+
+    stats = run_retention(db_dir, RetentionPolicy(job_days={}, outbox_days=7), tmp_path / "archive")
+    assert stats["outbox"] == 2
+    assert get_outbox_stats(db_dir) == {"pending": 1, "delivered": 0}
+    (segment,) = (tmp_path / "archive").glob("outbox-*.jsonl.gz")
+    assert {r["webhook_url"] for r in iter_archive(segment)} == {"http://a", "http://b"}
+
+
+def test_new_databases_use_incremental_vacuum(db_dir: Path, tmp_path: Path):
+    import sqlite3
+
+    from dashboard.orchestration_db import _connect, create_job, gc_job_blobs, incremental_vacuum, init_db, vacuum_db
+
+    with _connect(db_dir) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        for i in range(200):
+            create_job(db_dir, workflow_id="wf", params={"pad": f"{i:04d}" * 1000})
+        conn.execute("DELETE FROM jobs")
+        conn.commit()
+    gc_job_blobs(db_dir)
+    assert incremental_vacuum(db_dir, 10) == 10
+    assert incremental_vacuum(db_dir) > 100
+
+    legacy = tmp_path / "legacy"
+    (legacy / "orchestration").mkdir(parents=True)
+    sqlite3.connect(legacy / "orchestration" / "orchestration.db").execute("CREATE TABLE t (x)").connection.close()
+    init_db(legacy)
+    vacuum_db(legacy)  # one-time VACUUM switches an older database over
+    conn = sqlite3.connect(legacy / "orchestration" / "orchestration.db")
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+    conn.close()
@@ -0,0 +1,174 @@
+"""llama.cpp config sweep (dashboard/llamacpp_sweep.py) against the stub llama-server."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from tests.fixtures import stub_llama_server as stub
+
+STUB_PORT = 18089
+STUB_URL = f"http://127.0.0.1:{STUB_PORT}"
+
+
+@pytest.fixture(scope="module")
+def llama_url():
+    stub.start_stub_llama_server(port=STUB_PORT)
+    return STUB_URL
+
+
+class FakeOps:
+    """ops-controller double: /env/*, recreate (reconfigures the stub) and /stats/services."""
+
+    def __init__(self, env: dict[str, str], load_sec: float = 0.1) -> None:
+        self.env = dict(env)
+        self.load_sec = load_sec
+        self.recreates = 0
+
+    async def request(self, method: str, path: str, request=None, *, timeout: float = 30.0, json=None, **kwargs):
+        if method == "GET" and path.startswith("/env/"):
+            return 200, {"key": path[5:], "value": self.env.get(path[5:], "")}
+        if path == "/env/set":
+            if not json.get("confirm"):
+                return 400, {"detail": "confirm required"}
+            self.env[json["key"]] = json["value"]
+            return 200, {"ok": True}
+        if path == "/services/llamacpp/recreate":
+            self.recreates += 1
+            stub.configure(self.env, load_sec=self.load_sec)
+            return 200, {"ok": True}
+        if path == "/stats/services":
+            vram = stub.vram_gb(self.env)
+            return 200, {"gpu": {"name": "Stub GPU", "total_gb": 24.0},
+                         "services": {"llamacpp": {"vram_gb": vram, "vram_pct": round(vram / 24 * 100, 1)}}}
+        return 404, {"detail": "not found"}
+
+
+ORIGINAL_ENV = {
+    "LLAMACPP_FLASH_ATTN": "auto",
+    "LLAMACPP_ENABLE_KV_CACHE_QUANTIZATION": "0",
+    "LLAMACPP_KV_CACHE_TYPE_K": "",
+    "LLAMACPP_KV_CACHE_TYPE_V": "",
+    "LLAMACPP_PARALLEL": "1",
+    "LLAMACPP_NO_MMAP": "1",
+}
+
+
+def test_build_matrix_skips_turboquant_without_flash_attn():
+    from dashboard.llamacpp_sweep import build_matrix
+
+    configs = build_matrix(["on", "off"], ["f16", "tbqp3_0"], [1], [True])
+    assert [c.label for c in configs] == [
+        "fa=on kv=f16 parallel=1 no-mmap",
+        "fa=on kv=tbqp3_0 parallel=1 no-mmap",
+        "fa=off kv=f16 parallel=1 no-mmap",
+    ]
+    assert configs[0].env()["LLAMACPP_ENABLE_KV_CACHE_QUANTIZATION"] == "0"
+    assert configs[1].env()["LLAMACPP_KV_CACHE_TYPE_V"] == "tbqp3_0"
+    for bad in ((["fast"], ["f16"], [1], [True]), (["on"], ["q3_k"], [1], [True]),
+                (["on"], ["f16"], [0], [True]), (["off"], ["tbq4_0"], [1], [True])):
+        with pytest.raises(ValueError):
+            build_matrix(*bad)
+
+
+def _row(label: str, tps: float, vram_pct: float, vram_gb: float, errors: int = 0) -> dict:
+    return {"label": label, "config": {}, "env": {"L": label}, "status": "ok", "errors": errors,
+            "aggregate_tps": tps, "ttft_ms": 50.0, "vram_gb": vram_gb, "vram_pct": vram_pct}
+
+
+def test_recommend_prefers_lower_vram_within_tolerance_and_headroom():
+    from dashboard.llamacpp_sweep import recommend
+
+    rows = [_row("f16", 100.0, 80.0, 19.0), _row("q8_0", 98.0, 60.0, 14.0), _row("q4_0", 80.0, 50.0, 12.0)]
+    best = recommend(rows)
+    assert best["label"] == "q8_0" and "within 3%" in best["reason"]
+    # Fastest config would leave no headroom; errors disqualify
+    rows = [_row("big", 200.0, 99.0, 23.8), _row("flaky", 150.0, 60.0, 14.0, errors=2), _row("ok", 90.0, 60.0, 14.0)]
+    assert recommend(rows)["label"] == "ok"
+    assert recommend([{"label": "x", "status": "failed"}]) is None
+
+
+def test_sweep_ranks_configs_and_restores_env(llama_url):
+    from dashboard.llamacpp_sweep import LlamacppSweep, OpsControllerClient, SweepBenchmark, SweepRunner, build_matrix
+
+    ops = FakeOps(ORIGINAL_ENV)
+    sweep = LlamacppSweep(
+        ops=OpsControllerClient(ops.request),
+        llamacpp_url=llama_url,
+        configs=build_matrix(["on", "off"], ["f16", "q4_0"], [1], [True]),
+        benchmark=SweepBenchmark(prompt_tokens=16, output_tokens=12, requests_per_level=2, timeout_sec=10),
+        poll_interval=0.05,
+        ready_timeout=10,
+    )
+    saved: list[dict] = []
+    runner = SweepRunner(on_complete=saved.append)
+
+    async def main():
+        report = runner.start(sweep)
+        with pytest.raises(RuntimeError):
+            runner.start(sweep)
+        await runner.wait()
+        return report
+
+    report = asyncio.run(main())
+    assert report["status"] == "completed", report.get("error")
+    assert report["progress"]["done"] == 4
+    rows = {r["label"]: r for r in report["results"]}
+    assert all(r["status"] == "ok" and r["errors"] == 0 for r in rows.values())
+    on, off = rows["fa=on kv=f16 parallel=1 no-mmap"], rows["fa=off kv=f16 parallel=1 no-mmap"]
+    assert on["decode_tps"] > off["decode_tps"]
+    assert rows["fa=on kv=q4_0 parallel=1 no-mmap"]["vram_gb"] < on["vram_gb"]
+    assert on["ttft_ms"] > 0 and on["startup_sec"] >= 0
+    assert report["recommendation"]["config"]["flash_attn"] == "on"
+    assert "Stub GPU" in report["recommendation"]["reason"]
+    # Original config back in .env and on the running server
+    assert ops.env == ORIGINAL_ENV and report["final_env"] == ORIGINAL_ENV
+    assert stub.state()["env"] == ORIGINAL_ENV
+    assert ops.recreates == 5
+    assert saved and saved[0]["id"] == report["id"]
+
+
+@pytest.fixture
+def client(monkeypatch, llama_url):
+    import dashboard.app as dashboard_app
+    from dashboard.llamacpp_sweep import SweepRunner
+
+    ops = FakeOps(ORIGINAL_ENV, load_sec=0)
+    monkeypatch.setattr(dashboard_app, "_AUTH_REQUIRED", False)
+    monkeypatch.setattr(dashboard_app, "OPS_CONTROLLER_TOKEN", "test-token")
+    monkeypatch.setattr(dashboard_app, "start_readiness_monitor", lambda: None)
+    monkeypatch.setattr(dashboard_app, "_ops_request", ops.request)
+    monkeypatch.setattr(dashboard_app, "LLAMACPP_URL", llama_url)
+    monkeypatch.setattr(dashboard_app, "_sweep_reports", [])
+    monkeypatch.setattr(dashboard_app, "_sweep_runner", SweepRunner(on_complete=dashboard_app._save_sweep_report))
+    with TestClient(dashboard_app.app) as c:
+        c.ops = ops
+        yield c
+
+
+def test_sweep_endpoints_apply_best(client):
+    import dashboard.app as dashboard_app
+
+    body = {"flash_attn": ["on", "off"], "kv_cache_types": ["f16"], "prompt_tokens": 16, "output_tokens": 8,
+            "requests_per_level": 1, "apply_best": True}
+    assert client.post("/api/throughput/sweep", json=body).status_code == 400  # confirm required
+    assert client.post("/api/throughput/sweep", json={**body, "kv_cache_types": ["q9"], "confirm": True}).status_code == 400
+
+    r = client.post("/api/throughput/sweep", json={**body, "confirm": True})
+    assert r.status_code == 202
+    sweep_id = r.json()["sweep_id"]
+    deadline = time.time() + 30
+    while True:
+        data = client.get(f"/api/throughput/sweep/{sweep_id}").json()
+        if data["status"] != "running" or time.time() > deadline:
+            break
+        time.sleep(0.05)
+    assert data["status"] == "completed", data.get("error")
+    assert data["recommendation"]["label"] == "fa=on kv=f16 parallel=1 no-mmap"
+    assert client.ops.env["LLAMACPP_FLASH_ATTN"] == "on"  # apply_best left the winner in place
+
+    listing = client.get("/api/throughput/sweep").json()
+    assert listing["running"] is None and listing["saved"][-1]["id"] == sweep_id
+    assert dashboard_app._throughput_snapshot()["sweep_reports"][-1]["id"] == sweep_id
+    assert client.get("/api/throughput/sweep/nope").status_code == 404
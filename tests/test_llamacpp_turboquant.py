@@ -172,3 +172,9 @@ def test_quantization_disabled_emits_no_cache_type_args() -> None:
     assert args.count("--flash-attn") == 1, args
     flash_value = args.split("--flash-attn", 1)[1].strip().split()[0]
     assert flash_value == "auto", args
+
+
+def test_no_mmap_is_default_and_can_be_disabled() -> None:
+    """--no-mmap stays the default; LLAMACPP_NO_MMAP=0 (set by config sweeps) drops it."""
+    assert "--no-mmap" in _final_args(_run_wrapper(_base_env(LLAMACPP_NO_MMAP="1")))
+    assert "--no-mmap" not in _final_args(_run_wrapper(_base_env(LLAMACPP_NO_MMAP="0")))
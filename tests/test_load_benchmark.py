@@ -0,0 +1,262 @@
+"""Load-testing benchmark engine (dashboard/load_benchmark.py) and /api/throughput/benchmark/load."""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+
+class FakeSender:
+    """Records peak concurrency; fails every ``fail_every``-th request."""
+
+    def __init__(self, delay: float = 0.01, fail_every: int = 0) -> None:
+        self.delay = delay
+        self.fail_every = fail_every
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+        self.salts: list[str] = []
+        self.closed = False
+
+    async def send(self, level, salt):
+        from dashboard.load_benchmark import RequestResult
+
+        self.calls += 1
+        n = self.calls
+        self.salts.append(salt)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if self.fail_every and n % self.fail_every == 0:
+            return RequestResult(ok=False, duration_s=self.delay, error="HTTP 503")
+        return RequestResult(ok=True, duration_s=self.delay, ttft_s=0.1, itl_s=[0.02] * 9,
+                             output_tokens=level.max_tokens, prompt_tokens=level.prompt_tokens, decode_tps=50.0)
+
+    async def aclose(self):
+        self.closed = True
+
+
+def test_levels_clamp_to_slot_context_and_add_near_ctx():
+    from dashboard.load_benchmark import LoadBenchmarkSpec
+
+    spec = LoadBenchmarkSpec(model="m", concurrency=[2, 1], prompt_tokens=[100, 50_000], output_tokens=[256],
+                             near_ctx=True, ctx_size=65536, parallel=2)
+    levels = spec.levels()
+    assert spec.slot_ctx == 32768
+    room = 32768 - 256 - 64
+    assert [(lv.concurrency, lv.prompt_tokens, lv.clamped) for lv in levels] == [
+        (1, 100, False), (1, int(32768 * 0.9) - 256, False), (1, room, True),
+        (2, 100, False), (2, int(32768 * 0.9) - 256, False), (2, room, True),
+    ]
+
+
+def test_run_level_respects_concurrency_and_summarizes():
+    from dashboard.load_benchmark import LoadLevel, run_level
+
+    sender = FakeSender(fail_every=4)
+    summary = asyncio.run(run_level(LoadLevel(3, 100, 10), 12, sender, run_id="r"))
+    assert sender.peak == 3
+    assert len(set(sender.salts)) == 12  # unique prompts defeat the prompt cache
+    assert summary["requests"] == 12 and summary["errors"] == 3
+    assert summary["error_rate"] == 0.25
+    assert summary["error_samples"] == {"HTTP 503": 3}
+    assert summary["output_tokens"] == 90
+    assert summary["ttft_ms_p95"] == 100.0
+    assert summary["itl_ms_p50"] == pytest.approx(20.0, rel=0.01)
+    assert summary["aggregate_output_tps"] == pytest.approx(90 / summary["wall_sec"], rel=0.05)  # wall_sec is rounded to ms
+
+
+def test_runner_progress_completion_and_single_run():
+    from dashboard.load_benchmark import LoadBenchmarkRunner, LoadBenchmarkSpec
+
+    saved: list[dict] = []
+    runner = LoadBenchmarkRunner(on_complete=saved.append)
+    spec = LoadBenchmarkSpec(model="m", concurrency=[1, 2], prompt_tokens=[10], output_tokens=[5],
+                             requests_per_level=4)
+    sender = FakeSender()
+
+    async def main():
+        run = runner.start(spec, lambda _spec: sender)
+        with pytest.raises(RuntimeError):
+            runner.start(spec, lambda _spec: FakeSender())
+        await runner.wait(run["id"])
+        return run
+
+    run = asyncio.run(main())
+    assert run["status"] == "completed"
+    assert run["progress"]["requests_done"] == run["progress"]["requests_total"] == 8
+    assert [lv["concurrency"] for lv in run["levels"]] == [1, 2]
+    assert sender.closed
+    assert saved and saved[0]["id"] == run["id"] and "progress" not in saved[0]
+
+
+def test_runner_cancel_keeps_partial_results():
+    from dashboard.load_benchmark import LoadBenchmarkRunner, LoadBenchmarkSpec
+
+    saved: list[dict] = []
+    runner = LoadBenchmarkRunner(on_complete=saved.append)
+    spec = LoadBenchmarkSpec(model="m", concurrency=[1, 2, 4], prompt_tokens=[10], output_tokens=[5],
+                             requests_per_level=2)
+
+    async def main():
+        run = runner.start(spec, lambda _spec: FakeSender(delay=0.05))
+        while not run["levels"]:
+            await asyncio.sleep(0.01)
+        assert runner.cancel(run["id"])
+        await runner.wait(run["id"])
+        return run
+
+    run = asyncio.run(main())
+    assert run["status"] == "cancelled"
+    assert 1 <= len(run["levels"]) < 3
+    assert saved[0]["status"] == "cancelled"
+
+
+def test_gateway_sender_parses_sse_stream():
+    from dashboard.load_benchmark import GatewaySender, LoadBenchmarkSpec, LoadLevel
+
+    seen: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(json.loads(request.content))
+        chunks = [{"choices": [{"delta": {"role": "assistant"}}]}]
+        chunks += [{"choices": [{"delta": {"content": f"t{i}"}}]} for i in range(5)]
+        chunks.append({"choices": [], "usage": {"prompt_tokens": 120, "completion_tokens": 5}})
+        body = "".join(f"data: {json.dumps(c)}\n\n" for c in chunks) + "data: [DONE]\n\n"
+        return httpx.Response(200, content=body.encode(), headers={"content-type": "text/event-stream"})
+
+    spec = LoadBenchmarkSpec(model="local-chat", ignore_eos=True)
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    sender = GatewaySender("http://gw", {}, spec, client=client)
+
+    async def main():
+        try:
+            return await sender.send(LoadLevel(1, 100, 5), "salt-1")
+        finally:
+            await sender.aclose()
+
+    res = asyncio.run(main())
+    assert res.ok and res.output_tokens == 5 and res.prompt_tokens == 120
+    assert res.ttft_s is not None and len(res.itl_s) == 4
+    body = seen[0]
+    assert body["stream"] is True and body["ignore_eos"] is True and body["max_tokens"] == 5
+    assert body["messages"][0]["content"].startswith("[salt-1]")
+
+
+def test_gateway_sender_reports_http_errors():
+    from dashboard.load_benchmark import GatewaySender, LoadBenchmarkSpec, LoadLevel
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda _r: httpx.Response(503, text="busy")))
+    sender = GatewaySender("http://gw", {}, LoadBenchmarkSpec(model="m", stream=False), client=client)
+    res = asyncio.run(sender.send(LoadLevel(1, 10, 5), "s"))
+    assert not res.ok and res.error == "HTTP 503: busy"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    import dashboard.app as dashboard_app
+    from dashboard.load_benchmark import LoadBenchmarkRunner
+
+    monkeypatch.setattr(dashboard_app, "_AUTH_REQUIRED", False)
+    monkeypatch.setattr(dashboard_app, "start_readiness_monitor", lambda: None)
+    monkeypatch.setattr(dashboard_app, "_load_benchmarks", [])
+    monkeypatch.setattr(dashboard_app, "_load_benchmark_runner",
+                        LoadBenchmarkRunner(on_complete=dashboard_app._save_load_benchmark))
+    monkeypatch.setattr(dashboard_app, "_load_benchmark_sender", lambda _spec: FakeSender())
+    with TestClient(dashboard_app.app) as c:
+        yield c
+
+
+def test_load_benchmark_endpoints(client):
+    import dashboard.app as dashboard_app
+
+    r = client.post("/api/throughput/benchmark/load", json={"model": "local-chat", "concurrency": [1, 2],
+                                                            "prompt_tokens": [64], "output_tokens": [8]})
+    assert r.status_code == 202
+    run_id = r.json()["run_id"]
+    deadline = time.time() + 5
+    while True:
+        data = client.get(f"/api/throughput/benchmark/load/{run_id}").json()
+        if data["status"] not in ("queued", "running") or time.time() > deadline:
+            break
+        time.sleep(0.02)
+    assert data["status"] == "completed"
+    assert data["progress"]["requests_done"] == 8  # default: 2 × max concurrency, min 4
+    assert len(data["levels"]) == 2
+
+    listing = client.get("/api/throughput/benchmark/load").json()
+    assert listing["running"] is None
+    assert listing["saved"][-1]["id"] == run_id
+    assert dashboard_app._throughput_snapshot()["load_benchmarks"][-1]["id"] == run_id
+
+    assert client.get("/api/throughput/benchmark/load/nope").status_code == 404
+    bad = client.post("/api/throughput/benchmark/load", json={"model": "nomic-embed-text"})
+    assert bad.status_code == 400
+    assert client.post("/api/throughput/benchmark/load", json={"concurrency": [0]}).status_code == 400
+
+
+# ── Streaming TTFT / inter-token measurement ────────────────────────────────
+
+def _sse_handler(n_tokens: int, *, gap: float = 0.01, timings: dict | None = None):
+    async def stream():
+        yield b'data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n'
+        for i in range(n_tokens):
+            await asyncio.sleep(gap)
+            yield f"data: {json.dumps({'choices': [{'delta': {'content': f' {i}'}}]})}\n\n".encode()
+        final = {"choices": [], "usage": {"prompt_tokens": 40, "completion_tokens": n_tokens}}
+        if timings:
+            final["timings"] = timings
+        yield f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode()
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=stream(), headers={"content-type": "text/event-stream"})
+
+    return handler
+
+
+def test_stream_measures_ttft_gaps_and_split_rates():
+    from dashboard.load_benchmark import stream_chat_completion
+
+    async def main(handler):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as c:
+            return await stream_chat_completion(c, "http://gw/v1/chat/completions", {}, {"model": "m"})
+
+    res = asyncio.run(main(_sse_handler(6, gap=0.02)))
+    assert res.ok and res.output_tokens == 6 and len(res.itl_s) == 5
+    assert res.ttft_s >= 0.02
+    assert all(g >= 0.015 for g in res.itl_s)
+    assert res.prefill_tps == pytest.approx(40 / res.ttft_s)
+    assert res.decode_tps == pytest.approx(5 / sum(res.itl_s), rel=0.05)
+
+    # llama.cpp timings (no network/proxy time) win over client-side maths
+    res = asyncio.run(main(_sse_handler(3, timings={"prompt_per_second": 900.0, "predicted_per_second": 42.0})))
+    assert (res.prefill_tps, res.decode_tps) == (900.0, 42.0)
+
+
+def test_quick_benchmark_streams_and_feeds_ttft_store(monkeypatch, tmp_path):
+    import dashboard.app as dashboard_app
+    from dashboard.throughput_history import ThroughputHistory
+
+    monkeypatch.setattr(dashboard_app, "_AUTH_REQUIRED", False)
+    h = ThroughputHistory(tmp_path / "h.db")
+    monkeypatch.setattr(dashboard_app, "_throughput_history", h)
+    monkeypatch.setattr(dashboard_app._throughput_flusher, "history", h)
+    monkeypatch.setattr(dashboard_app, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(_sse_handler(8))))
+    client = TestClient(dashboard_app.app)
+
+    data = client.post("/api/throughput/benchmark", json={"model": "stream-bench"}).json()
+    assert data["stream"] is True and data["output_tokens"] == 8
+    assert data["ttft_ms"] > 0 and data["itl_ms_p50"] > 0
+    assert data["prefill_tokens_per_sec"] > 0 and data["decode_tokens_per_sec"] > 0
+    assert data["output_tokens_per_sec"] == data["decode_tokens_per_sec"]
+    stats = client.get("/api/throughput/stats").json()["models"]["stream-bench"]
+    assert stats["ttft_p50_ms"] == pytest.approx(data["ttft_ms"], rel=0.011)
+    assert stats["sample_count"] == 1
+    h.close()
@@ -0,0 +1,109 @@
+"""Prometheus /metrics on the dashboard, worker and ops-controller (dashboard/metrics.py)."""
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+
+def _value(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_dashboard_metrics_route_templates_and_model_samples(monkeypatch, tmp_path):
+    import dashboard.app as dashboard_app
+    from dashboard.throughput_history import ThroughputHistory
+
+    monkeypatch.setattr(dashboard_app, "_AUTH_REQUIRED", False)
+    h = ThroughputHistory(tmp_path / "h.db")
+    monkeypatch.setattr(dashboard_app, "_throughput_history", h)
+    monkeypatch.setattr(dashboard_app._throughput_flusher, "history", h)
+    client = TestClient(dashboard_app.app)
+
+    route = "/api/throughput/benchmark/load/{run_id}"
+    before = _value("http_request_duration_seconds_count", method="GET", route=route, status="404")
+    assert client.get("/api/throughput/benchmark/load/abc").status_code == 404
+    assert client.get("/api/throughput/benchmark/load/def").status_code == 404
+    client.post("/api/throughput/record", json={"model": "metrics-m", "output_tokens_per_sec": 42.0, "ttft_ms": 300})
+
+    r = client.get("/metrics")
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain")
+    assert _value("http_request_duration_seconds_count", method="GET", route=route, status="404") == before + 2
+    assert 'route="/api/throughput/benchmark/load/abc"' not in r.text  # raw paths never become labels
+    assert _value("model_output_tokens_per_second_bucket", model="metrics-m", le="50.0") >= 1
+    assert _value("model_time_to_first_token_seconds_bucket", model="metrics-m", le="0.5") >= 1
+    assert "sqlite_query_duration_seconds_bucket" in r.text
+    h.close()
+
+
+def test_dashboard_metrics_require_token_when_auth_is_on(monkeypatch):
+    import dashboard.app as dashboard_app
+
+    monkeypatch.setattr(dashboard_app, "_AUTH_REQUIRED", True)
+    monkeypatch.setattr(dashboard_app, "DASHBOARD_AUTH_TOKEN", "tok")
+    client = TestClient(dashboard_app.app)
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer tok"}).status_code == 200
+
+
+def test_timed_connection_labels_statements(tmp_path):
+    import sqlite3
+
+    from dashboard.metrics import timed_connection
+
+    conn = sqlite3.connect(str(tmp_path / "t.db"), factory=timed_connection("unit"))
+    conn.execute("CREATE TABLE t (x)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(1,), (2,)])
+    assert conn.execute("  select count(*) from t").fetchone()[0] == 2
+    conn.close()
+    assert _value("sqlite_query_duration_seconds_count", db="unit", statement="INSERT") == 1
+    assert _value("sqlite_query_duration_seconds_count", db="unit", statement="SELECT") == 1
+    assert _value("sqlite_query_duration_seconds_count", db="unit", statement="CREATE") == 1
+
+
+def test_worker_records_queue_wait_and_execution(monkeypatch, tmp_path):
+    import worker.worker as ww
+
+    from dashboard.orchestration_db import create_job, load_store
+
+    load_store(tmp_path)
+    monkeypatch.setattr(ww, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(ww, "MAX_RETRIES", 0)
+    create_job(tmp_path, workflow_id=None, params={})
+
+    waits = _value("orchestration_job_queue_wait_seconds_count")
+    failed = _value("orchestration_job_execution_seconds_count", outcome="failed")
+    (job,) = ww._claim_jobs(1)
+    assert _value("orchestration_job_queue_wait_seconds_count") == waits + 1
+    ww.execute_job(job)  # neither template nor workflow → failed without reaching ComfyUI
+    assert _value("orchestration_job_execution_seconds_count", outcome="failed") == failed + 1
+    assert _value("sqlite_query_duration_seconds_count", db="orchestration", statement="UPDATE") > 0
+
+
+def test_outbox_attempts_observed():
+    from dashboard.outbox_delivery import DeliveryMetrics
+
+    before = _value("orchestration_outbox_delivery_seconds_count", outcome="failed")
+    DeliveryMetrics().record(120.0, ok=False)
+    assert _value("orchestration_outbox_delivery_seconds_count", outcome="failed") == before + 1
+
+
+def test_ops_controller_metrics_require_token(monkeypatch):
+    sys.modules.setdefault("docker", MagicMock())
+    path = Path(__file__).resolve().parent.parent / "ops-controller" / "main.py"
+    spec = importlib.util.spec_from_file_location("ops_controller_metrics", path)
+    oc = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(oc)
+    monkeypatch.setattr(oc, "OPS_CONTROLLER_TOKEN", "tok")
+    client = TestClient(oc.app, raise_server_exceptions=False)
+
+    assert client.get("/metrics").status_code == 401
+    client.get("/audit", headers={"Authorization": "Bearer tok"})
+    r = client.get("/metrics", headers={"Authorization": "Bearer tok"})
+    assert r.status_code == 200
+    assert 'http_request_duration_seconds_count{method="GET",route="/audit",status="200"} 1.0' in r.text
@@ -15,7 +15,12 @@ from dashboard.workflow_boundary import assert_api_workflow, is_ui_workflow_expo
 
 
 @pytest.fixture
-def client():
+def client(monkeypatch):
+    # Readiness is served from a cached snapshot; start each test with an empty one.
+    import dashboard.routes_orchestration as ro
+    from dashboard.readiness_monitor import ReadinessMonitor
+
+    monkeypatch.setattr(ro, "_readiness", ReadinessMonitor(lambda: ro.compute_readiness()))
     return TestClient(app)
 
 
@@ -100,6 +105,64 @@ def test_template_compile_minimal(tmp_path: Path, monkeypatch):
     assert out["9"]["inputs"]["text"] == "hello"
 
 
+def test_compiled_workflow_cache_reuses_parse_and_tracks_edits(tmp_path: Path):
+    import os
+
+    from dashboard.workflow_templates import (
+        clear_workflow_cache,
+        compile_workflow_file,
+        validate_params,
+        workflow_cache_stats,
+    )
+
+    clear_workflow_cache()
+    wf_file = tmp_path / "wf.json"
+    wf_file.write_text(
+        json.dumps({"3": {"class_type": "KSampler", "inputs": {"seed": "PARAM_INT_seed", "steps": "PARAM_INT_steps"}}}),
+        encoding="utf-8",
+    )
+    a = compile_workflow_file(wf_file, {"seed": "7"})
+    a["3"]["inputs"]["seed"] = -1  # compiled graphs are independent copies
+    b = compile_workflow_file(wf_file, {"seed": 8, "steps": 4})
+    assert b["3"]["inputs"] == {"seed": 8, "steps": 4}
+    assert a["3"]["inputs"]["steps"] == 20
+    assert workflow_cache_stats()["hits"] == 1
+
+    wf_file.write_text(json.dumps({"3": {"class_type": "KSampler", "inputs": {"text": "PARAM_prompt"}}}), encoding="utf-8")
+    st = wf_file.stat()
+    os.utime(wf_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    with pytest.raises(ValueError, match="prompt"):
+        compile_workflow_file(wf_file, {})
+    assert workflow_cache_stats()["misses"] == 2
+
+    schema = {"type": "object", "required": ["prompt"]}
+    validate_params({"prompt": "x"}, schema)
+    validate_params({"prompt": "y"}, dict(schema))
+    assert workflow_cache_stats()["validators"] == 1
+
+
+def test_apply_param_placeholders_matches_bindings():
+    from dashboard.param_placeholders import apply_param_placeholders, find_placeholder_bindings
+
+    wf = {
+        "__meta": {"inputs": {"x": "PARAM_x"}},
+        "1": {"class_type": "A", "inputs": {"w": "PARAM_INT_width", "name": "PARAM_label", "n": 3}},
+        "2": {"class_type": "B", "inputs": {"flag": "PARAM_BOOL_enabled"}},
+    }
+    assert [(b.node_id, b.input_name, b.param_name) for b in find_placeholder_bindings(wf)] == [
+        ("1", "w", "width"),
+        ("1", "name", "label"),
+        ("2", "flag", "enabled"),
+    ]
+    out = apply_param_placeholders(wf, {"label": "hi", "enabled": "yes"})
+    assert out["1"]["inputs"] == {"w": 512, "name": "hi", "n": 3}
+    assert out["2"]["inputs"]["flag"] is True
+    assert out["__meta"] == wf["__meta"]
+    assert wf["1"]["inputs"]["w"] == "PARAM_INT_width"
+    with pytest.raises(ValueError, match="label"):
+        apply_param_placeholders(wf, {})
+
+
 def test_load_template_rejects_path_traversal(tmp_path: Path, monkeypatch):
     """Regression: template_id containing ../ must not escape templates directory."""
     from dashboard.workflow_templates import load_template
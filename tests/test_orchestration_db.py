@@ -0,0 +1,499 @@
+"""Direct tests for orchestration_db internals (connection pool, claiming, maintenance)."""
+
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def db_dir(tmp_path: Path):
+    from dashboard.orchestration_db import init_db
+
+    d = tmp_path / "dashboard"
+    init_db(d)
+    return d
+
+
+# ── Connection pool ───────────────────────────────────────────────────────────
+
+
+class TestConnectionPool:
+    def test_connection_reused_within_thread(self, db_dir: Path):
+        from dashboard.orchestration_db import _connect, connection_stats, create_job, get_job
+
+        first = _connect(db_dir)
+        before = connection_stats()
+        job = create_job(db_dir, workflow_id="wf")
+        assert get_job(db_dir, job.job_id) is not None
+        after = connection_stats()
+
+        assert _connect(db_dir) is first
+        assert after["opened"] == before["opened"]
+        assert after["reused"] >= before["reused"] + 2
+
+    def test_threads_get_separate_connections(self, db_dir: Path):
+        from dashboard.orchestration_db import _connect
+
+        main_conn = _connect(db_dir)
+        seen: list[object] = []
+        t = threading.Thread(target=lambda: seen.append(_connect(db_dir)))
+        t.start()
+        t.join()
+        assert seen and seen[0] is not main_conn
+
+    def test_close_connections_reopens_lazily(self, db_dir: Path):
+        from dashboard.orchestration_db import (
+            _connect,
+            close_connections,
+            connection_stats,
+            create_job,
+            get_job,
+        )
+
+        old = _connect(db_dir)
+        assert close_connections() >= 1
+        assert connection_stats()["open"] == 0
+
+        job = create_job(db_dir, workflow_id="wf")
+        assert _connect(db_dir) is not old
+        assert get_job(db_dir, job.job_id).job_id == job.job_id
+
+    def test_recreated_database_file_gets_fresh_connection(self, db_dir: Path):
+        from dashboard.orchestration_db import _connect, create_job, get_job, init_db
+
+        create_job(db_dir, workflow_id="wf")
+        old = _connect(db_dir)
+        for p in (db_dir / "orchestration").iterdir():
+            p.unlink()
+        init_db(db_dir)
+        assert _connect(db_dir) is not old
+        job = create_job(db_dir, workflow_id="wf")
+        assert get_job(db_dir, job.job_id) is not None
+
+    def test_failed_transaction_rolls_back_and_keeps_connection(self, db_dir: Path):
+        import sqlite3
+
+        from dashboard.orchestration_db import _connect, list_jobs
+
+        conn = _connect(db_dir)
+        with pytest.raises(sqlite3.IntegrityError):
+            with _connect(db_dir) as c:
+                c.execute(
+                    "INSERT INTO jobs (job_id, state, created_at, updated_at) VALUES ('x','queued','t','t')"
+                )
+                c.execute(
+                    "INSERT INTO jobs (job_id, state, created_at, updated_at) VALUES ('x','queued','t','t')"
+                )
+        assert _connect(db_dir) is conn
+        assert list_jobs(db_dir) == []
+
+
+# ── Claiming ──────────────────────────────────────────────────────────────────
+
+
+class TestClaimJobs:
+    def test_claim_jobs_takes_oldest_first(self, db_dir: Path):
+        from dashboard.orchestration_db import JobState, claim_jobs, create_job, get_job
+
+        ids = [create_job(db_dir, workflow_id=f"wf-{i}").job_id for i in range(5)]
+        claimed = claim_jobs(db_dir, 3)
+
+        assert [j.job_id for j in claimed] == ids[:3]
+        assert all(j.state == JobState.validated for j in claimed)
+        assert get_job(db_dir, ids[3]).state == JobState.queued
+
+    def test_claim_jobs_empty_queue_and_zero(self, db_dir: Path):
+        from dashboard.orchestration_db import claim_jobs, claim_next_job, create_job
+
+        assert claim_jobs(db_dir, 4) == []
+        assert claim_next_job(db_dir) is None
+        create_job(db_dir, workflow_id="wf")
+        assert claim_jobs(db_dir, 0) == []
+        assert claim_next_job(db_dir) is not None
+
+    def test_concurrent_claims_never_overlap(self, db_dir: Path):
+        from dashboard.orchestration_db import claim_jobs, create_job
+
+        for i in range(40):
+            create_job(db_dir, workflow_id=f"wf-{i}")
+        claimed: list[str] = []
+        lock = threading.Lock()
+
+        def _claimer():
+            while True:
+                batch = claim_jobs(db_dir, 3)
+                if not batch:
+                    return
+                with lock:
+                    claimed.extend(j.job_id for j in batch)
+
+        threads = [threading.Thread(target=_claimer) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(claimed) == 40
+        assert len(set(claimed)) == 40
+
+    def test_interactive_jobs_claimed_before_bulk(self, db_dir: Path):
+        from dashboard.orchestration_db import PRIORITY_BULK, claim_jobs, create_job, create_job_batch
+
+        _, bulk = create_job_batch(db_dir, [{"seed": i} for i in range(5)], workflow_id="sweep")
+        interactive = create_job(db_dir, workflow_id="chat-image")
+        claimed = claim_jobs(db_dir, 2)
+
+        assert claimed[0].job_id == interactive.job_id and claimed[1].job_id in bulk
+        assert claimed[1].priority == PRIORITY_BULK and claimed[1].source.startswith("batch:")
+
+    def test_sources_share_the_queue_round_robin(self, db_dir: Path):
+        from dashboard.orchestration_db import claim_jobs, create_job_batch
+
+        create_job_batch(db_dir, [{"seed": i} for i in range(6)], workflow_id="wf", source="schedule:nightly")
+        create_job_batch(db_dir, [{"seed": i} for i in range(2)], workflow_id="wf", source="caller:a@example.com")
+
+        def sources(n: int) -> list[str]:
+            return sorted(j.source for j in claim_jobs(db_dir, n, aging_sec=0))
+
+        # FIFO would hand all three to the schedule that queued first.
+        assert sources(3) == ["caller:a@example.com", "schedule:nightly", "schedule:nightly"]
+        assert sources(3) == ["caller:a@example.com", "schedule:nightly", "schedule:nightly"]
+        assert sources(3) == ["schedule:nightly", "schedule:nightly"]
+
+    def test_new_source_gets_a_turn_next_to_an_aged_batch(self, db_dir: Path):
+        from datetime import UTC, datetime, timedelta
+
+        from dashboard.orchestration_db import _connect, claim_jobs, create_job_batch
+
+        batch_id, _ = create_job_batch(db_dir, [{"seed": i} for i in range(20)], workflow_id="sweep")
+        with _connect(db_dir) as conn:
+            ts = (datetime.now(UTC) - timedelta(minutes=5)).isoformat().replace("+00:00", "Z")
+            conn.execute("UPDATE jobs SET created_at=? WHERE batch_id=?", (ts, batch_id))
+            conn.commit()
+        create_job_batch(db_dir, [{}], workflow_id="sweep", source="schedule:x")
+
+        claimed = claim_jobs(db_dir, 10)
+        assert [j.source for j in claimed].count("schedule:x") == 1
+        assert claimed[1].source == "schedule:x"  # second job of the first round
+
+    def test_sustained_interactive_load_does_not_starve_bulk(self, db_dir: Path):
+        from datetime import UTC, datetime, timedelta
+
+        from dashboard.orchestration_db import _connect, claim_jobs, create_job, create_job_batch
+
+        _, (waiting,) = create_job_batch(db_dir, [{}], workflow_id="sweep")
+        with _connect(db_dir) as conn:
+            ts = (datetime.now(UTC) - timedelta(minutes=11)).isoformat().replace("+00:00", "Z")
+            conn.execute("UPDATE jobs SET created_at=? WHERE job_id=?", (ts, waiting))
+            conn.commit()
+        for _ in range(5):
+            create_job(db_dir, workflow_id="chat-image")
+
+        assert waiting not in [j.job_id for j in claim_jobs(db_dir, 2, aging_sec=0)]
+        # Past 10 × aging_sec it is promoted and takes its turn beside the interactive source.
+        assert [j.job_id for j in claim_jobs(db_dir, 2)][1] == waiting
+
+    def test_aged_batch_never_overtakes_interactive_job_on_same_template(self, db_dir: Path):
+        from datetime import UTC, datetime, timedelta
+
+        from dashboard.orchestration_db import _connect, claim_jobs, create_job, create_job_batch
+
+        batch_id, _ = create_job_batch(db_dir, [{"seed": i} for i in range(50)], template_id="t")
+        with _connect(db_dir) as conn:
+            ts = (datetime.now(UTC) - timedelta(minutes=20)).isoformat().replace("+00:00", "Z")
+            conn.execute("UPDATE jobs SET created_at=? WHERE batch_id=?", (ts, batch_id))
+            conn.commit()
+        interactive = create_job(db_dir, template_id="t")
+
+        assert [j.job_id for j in claim_jobs(db_dir, 1)] == [interactive.job_id]
+
+    def test_delayed_jobs_wait_until_due(self, db_dir: Path):
+        from datetime import UTC, datetime, timedelta
+
+        from dashboard.orchestration_db import claim_jobs, create_job, create_job_batch, next_due_job_at
+
+        soon = datetime.now(UTC) + timedelta(hours=1)
+        later = create_job(db_dir, workflow_id="wf", scheduled_at=soon)
+        create_job_batch(db_dir, [{}, {}], workflow_id="wf", scheduled_at=(soon + timedelta(hours=1)).isoformat())
+        now = create_job(db_dir, workflow_id="wf")
+        past = create_job(db_dir, workflow_id="wf", scheduled_at="2020-01-01T00:00:00")  # naive = UTC
+
+        assert later.scheduled_at == soon.isoformat(timespec="microseconds").replace("+00:00", "Z")
+        assert {j.job_id for j in claim_jobs(db_dir, 10)} == {now.job_id, past.job_id}
+        assert next_due_job_at(db_dir) == pytest.approx(soon.timestamp(), abs=1e-3)
+        with pytest.raises(ValueError):
+            create_job(db_dir, workflow_id="wf", scheduled_at="tonight")
+
+
+# ── Job lifecycle phases ──────────────────────────────────────────────────────
+
+
+class TestJobPhases:
+    def test_claim_and_updates_record_phase_timestamps(self, db_dir: Path):
+        from dashboard.orchestration_db import JobState, claim_jobs, create_job, get_job, update_job
+
+        job = create_job(db_dir, workflow_id="wf")
+        assert job.claimed_at is None and job.phase_durations()["queue_wait"] is None
+        (claimed,) = claim_jobs(db_dir, 1)
+        assert claimed.claimed_at is not None
+        t0 = _epoch(claimed.claimed_at)
+        update_job(db_dir, job.job_id, state=JobState.running, compiled_at=t0 + 0.5)
+        update_job(db_dir, job.job_id, prompt_id="p", submitted_at=t0 + 0.75)
+        update_job(db_dir, job.job_id, state=JobState.artifact_ready, outputs={},
+                   first_progress_at=t0 + 2.75, outputs_at=t0 + 10.75)
+        update_job(db_dir, job.job_id, state=JobState.published, published_at=t0 + 11.75)
+
+        phases = get_job(db_dir, job.job_id).phase_durations()
+        assert phases["compile"] == 0.5
+        assert phases["submit"] == 0.25
+        assert phases["comfyui_queue"] == 2.0
+        assert phases["execution"] == 8.0
+        assert phases["comfyui"] == 10.0
+        assert phases["publish"] == 1.0
+        assert phases["total"] == pytest.approx(phases["queue_wait"] + 10.75, abs=0.002)
+
+    def test_phase_stats_percentiles(self, db_dir: Path):
+        from dashboard.orchestration_db import JobState, claim_jobs, create_job, get_job_phase_stats, update_job
+
+        for _ in range(5):
+            create_job(db_dir, workflow_id="wf")
+        create_job(db_dir, workflow_id="unclaimed")
+        for i, job in enumerate(claim_jobs(db_dir, 5)):
+            t0 = _epoch(job.claimed_at)
+            update_job(db_dir, job.job_id, state=JobState.running, compiled_at=t0 + i + 1)
+
+        stats = get_job_phase_stats(db_dir)
+        assert stats["jobs"] == 5
+        assert stats["phases"]["compile"] == {"count": 5, "p50": 3.0, "p95": 4.8, "max": 5.0}
+        assert stats["phases"]["execution"] == {"count": 0, "p50": None, "p95": None, "max": None}
+
+
+class TestCounters:
+    def test_counters_follow_job_and_outbox_writes(self, db_dir: Path):
+        from dashboard.orchestration_db import (
+            JobState,
+            _connect,
+            cancel_batch,
+            claim_jobs,
+            create_job,
+            create_job_batch,
+            create_outbox_entry,
+            get_job_counts,
+            get_outbox_stats,
+            mark_outbox_delivered,
+            update_job,
+        )
+
+        batch_id, _ = create_job_batch(db_dir, [{}, {}], workflow_id="wf")
+        create_job(db_dir, workflow_id="wf")
+        claimed = next(j for j in claim_jobs(db_dir, 3) if j.batch_id is None)
+        update_job(db_dir, claimed.job_id, state=JobState.running)
+        update_job(db_dir, claimed.job_id, state=JobState.running)  # no state change, no double count
+        assert cancel_batch(db_dir, batch_id) == 2
+        key = create_outbox_entry(db_dir, claimed.job_id, "http://hook", {})
+        create_outbox_entry(db_dir, claimed.job_id, "http://hook", {})  # ignored duplicate
+        create_outbox_entry(db_dir, claimed.job_id, "http://other", {})
+        mark_outbox_delivered(db_dir, key)
+
+        counts = get_job_counts(db_dir)
+        assert counts["running"] == 1 and counts["cancelling"] == 2 and counts["queued"] == 0
+        assert set(counts) >= {s.value for s in JobState}
+        assert get_outbox_stats(db_dir) == {"pending": 1, "delivered": 1}
+
+        with _connect(db_dir) as conn:
+            conn.execute("DELETE FROM jobs WHERE state = 'cancelling'")
+            conn.execute("DELETE FROM publish_outbox WHERE delivered_at IS NULL")
+            conn.commit()
+        assert get_job_counts(db_dir)["cancelling"] == 0
+        assert get_outbox_stats(db_dir) == {"pending": 0, "delivered": 1}
+
+    def test_existing_database_is_backfilled_once(self, db_dir: Path):
+        from dashboard.orchestration_db import _connect, create_job, get_job_counts, init_db, rebuild_counters
+
+        for _ in range(2):
+            create_job(db_dir, workflow_id="wf")
+        with _connect(db_dir) as conn:  # simulate a database from before the counters table
+            conn.execute("DELETE FROM counters")
+            conn.commit()
+        assert get_job_counts(db_dir)["queued"] == 0
+        init_db(db_dir)
+        assert get_job_counts(db_dir)["queued"] == 2
+        init_db(db_dir)  # marker present: no recount, no double count
+        create_job(db_dir, workflow_id="wf")
+        assert get_job_counts(db_dir)["queued"] == 3
+
+        with _connect(db_dir) as conn:
+            conn.execute("UPDATE counters SET value = 99 WHERE name = 'jobs:queued'")
+            conn.commit()
+        assert rebuild_counters(db_dir)["jobs:queued"] == 3
+
+
+class TestJobListing:
+    def test_keyset_pages_cover_every_job_once(self, db_dir: Path):
+        from dashboard.orchestration_db import _connect, create_job, list_jobs_page
+
+        ids = [create_job(db_dir, workflow_id="wf").job_id for _ in range(7)]
+        with _connect(db_dir) as conn:  # identical created_at: job_id breaks the tie
+            conn.execute("UPDATE jobs SET created_at = '2026-01-01T00:00:00+00:00' WHERE job_id IN (?, ?, ?)", ids[:3])
+            conn.commit()
+        seen: list[str] = []
+        cursor = None
+        while True:
+            page, cursor = list_jobs_page(db_dir, limit=3, cursor=cursor)
+            seen += [j.job_id for j in page]
+            if cursor is None:
+                break
+        assert len(page) == 1
+        assert sorted(seen) == sorted(ids) and len(seen) == len(set(seen))
+        assert seen[-3:] == sorted(ids[:3], reverse=True)
+
+    def test_projection_skips_large_columns(self, db_dir: Path):
+        from dashboard.orchestration_db import JOB_LIST_DEFAULT_FIELDS, create_job, list_jobs_page
+
+        create_job(db_dir, workflow_id="wf", params={"seed": 1}, compiled_workflow={"1": {"class_type": "X"}})
+        (job,), _ = list_jobs_page(db_dir, fields=JOB_LIST_DEFAULT_FIELDS)
+        assert job.compiled_workflow is None and job.params_json is None and job.workflow_id == "wf"
+        (job,), _ = list_jobs_page(db_dir, fields=["error"])
+        assert job.workflow_id is None and job.state.value == "queued"
+        (job,), _ = list_jobs_page(db_dir)
+        assert job.compiled_workflow and job.params_json
+
+        with pytest.raises(ValueError):
+            list_jobs_page(db_dir, fields=["nope"])
+        with pytest.raises(ValueError):
+            list_jobs_page(db_dir, cursor="%%%")
+
+
+class TestJobBlobs:
+    def test_graphs_share_unchanged_nodes(self, db_dir: Path):
+        import json
+
+        from dashboard.orchestration_db import _connect, create_job, get_compiled_workflow, get_job
+
+        def graph(seed: int) -> dict:
+            return {"3": {"class_type": "KSampler", "inputs": {"seed": seed}},
+                    "4": {"class_type": "CheckpointLoaderSimple", "inputs": {"ckpt_name": "x" * 2000}},
+                    "6": {"class_type": "CLIPTextEncode", "inputs": {"text": "a cat"}}}
+
+        a = create_job(db_dir, workflow_id="wf", compiled_workflow=graph(1), params={"seed": 1})
+        b = create_job(db_dir, workflow_id="wf", compiled_workflow=graph(2), params={"seed": 1})
+        assert json.loads(get_job(db_dir, a.job_id).compiled_workflow) == graph(1)
+        assert json.loads(get_compiled_workflow(db_dir, b.job_id)) == graph(2)
+        assert get_job(db_dir, b.job_id).params_json == '{"seed": 1}'
+        with _connect(db_dir) as conn:
+            kinds = dict(conn.execute("SELECT kind, COUNT(*) FROM job_blobs GROUP BY kind").fetchall())
+            row = conn.execute("SELECT params_json, compiled_workflow, params_hash FROM jobs WHERE job_id=?",
+                               (a.job_id,)).fetchone()
+        assert kinds == {"graph": 2, "raw": 5}  # 4 distinct nodes + one shared params blob
+        assert row["params_json"] is None and row["compiled_workflow"] is None and row["params_hash"]
+
+    def test_inline_payloads_from_older_databases_are_moved(self, db_dir: Path):
+        from dashboard.orchestration_db import _connect, get_job, init_db
+
+        with _connect(db_dir) as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, state, created_at, updated_at, params_json, outputs_json, compiled_workflow) "
+                "VALUES ('old', 'published', '2025-01-01T00:00:00+00:00', '2025-01-01T00:00:00+00:00', ?, ?, ?)",
+                ('{"a": 1}', '{"9": {"images": []}}', '{"1": {"class_type": "X", "inputs": {}}}'),
+            )
+            conn.commit()
+        init_db(db_dir)
+        job = get_job(db_dir, "old")
+        assert job.params_json == '{"a": 1}' and job.outputs == {"9": {"images": []}}
+        assert job.compiled_workflow == '{"1":{"class_type":"X","inputs":{}}}'
+        with _connect(db_dir) as conn:
+            row = conn.execute("SELECT params_json, outputs_json, compiled_workflow FROM jobs WHERE job_id='old'").fetchone()
+        assert tuple(row) == (None, None, None)
+
+    def test_update_without_returning_and_gc(self, db_dir: Path):
+        from dashboard.orchestration_db import create_job, gc_job_blobs, get_job, update_job
+
+        job = create_job(db_dir, workflow_id="wf")
+        assert update_job(db_dir, job.job_id, returning=False, outputs={"1": "first"}) is None
+        updated = update_job(db_dir, job.job_id, outputs={"1": "second"})
+        assert updated.outputs == {"1": "second"}
+        assert gc_job_blobs(db_dir) == 1  # the replaced outputs blob
+        assert gc_job_blobs(db_dir) == 0
+        assert get_job(db_dir, job.job_id).outputs == {"1": "second"}
+
+
+def _epoch(iso: str) -> float:
+    from datetime import datetime
+
+    return datetime.fromisoformat(iso).timestamp()
+
+
+# ── Worker wakeup channel ─────────────────────────────────────────────────────
+
+
+@pytest.mark.skipif(not hasattr(__import__("socket"), "AF_UNIX"), reason="Unix sockets unavailable")
+class TestWorkerWakeup:
+    def test_create_job_wakes_listener(self, db_dir: Path):
+        from dashboard.orchestration_db import create_job
+        from dashboard.orchestration_wakeup import WakeupListener
+
+        listener = WakeupListener(db_dir)
+        assert listener.open()
+        try:
+            assert listener.wait(0) is False
+            create_job(db_dir, workflow_id="wf")
+            create_job(db_dir, workflow_id="wf")
+            assert listener.wait(1.0) is True
+            # Multiple notifications coalesce into a single wakeup.
+            assert listener.wait(0) is False
+        finally:
+            listener.close()
+        assert not listener.path.exists()
+
+    def test_wake_from_other_thread_interrupts_wait(self, db_dir: Path):
+        import time
+
+        from dashboard.orchestration_wakeup import WakeupListener
+
+        listener = WakeupListener(db_dir)
+        assert listener.open()
+        try:
+            threading.Timer(0.05, listener.wake).start()
+            started = time.monotonic()
+            assert listener.wait(None) is True
+            assert time.monotonic() - started < 5
+        finally:
+            listener.close()
+
+    def test_every_replica_is_notified(self, db_dir: Path):
+        from dashboard.orchestration_wakeup import WakeupListener, notify_worker
+
+        first, second = WakeupListener(db_dir), WakeupListener(db_dir)
+        assert first.open() and second.open()
+        try:
+            assert first.path != second.path
+            assert notify_worker(db_dir) is True
+            assert first.wait(1.0) is True
+            assert second.wait(1.0) is True
+            # wake() only interrupts its own worker.
+            first.wake()
+            assert first.wait(1.0) is True
+            assert second.wait(0) is False
+        finally:
+            first.close()
+            second.close()
+
+    def test_stale_socket_is_removed(self, db_dir: Path):
+        import socket
+
+        from dashboard.orchestration_wakeup import notify_worker, wake_dir
+
+        stale = wake_dir(db_dir) / "deadbeef.sock"
+        stale.parent.mkdir(parents=True, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.bind(str(stale))
+        sock.close()  # a crashed worker leaves its socket file behind
+        assert notify_worker(db_dir) is False
+        assert not stale.exists()
+
+    def test_notify_without_listener_is_harmless(self, db_dir: Path):
+        from dashboard.orchestration_wakeup import notify_worker
+
+        assert notify_worker(db_dir) is False
@@ -14,6 +14,7 @@ import time
 from pathlib import Path
 from unittest.mock import patch
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
@@ -117,6 +118,7 @@ def test_full_pipeline_compile_run_artifact_publish_callback(
         import worker.worker as ww
         ww.DATA_DIR = db_dir
         ww.COMFYUI_URL = mock_comfyui_url
+        ww._comfyui_client = httpx.Client(base_url=mock_comfyui_url, timeout=30)
         ww.WORKFLOWS_DIR = wf_dir
         _execute_job(job)
 
@@ -125,6 +127,8 @@ def test_full_pipeline_compile_run_artifact_publish_callback(
         assert j is not None
         assert j.state.value == "artifact_ready", f"Expected artifact_ready, got {j.state}"
         assert j.outputs is not None
+        assert j.claimed_at and j.compiled_at and j.submitted_at and j.outputs_at
+        assert j.phase_durations()["comfyui"] is not None
 
         # Step 5: publish enqueue → writes to outbox (no live HTTP)
         r2 = client.post("/api/orchestration/publish/enqueue", json={
@@ -190,6 +194,7 @@ def test_run_workflow_sanitizes_gemma_wrapped_workflow_id(
         import worker.worker as ww
         ww.DATA_DIR = db_dir
         ww.COMFYUI_URL = mock_comfyui_url
+        ww._comfyui_client = httpx.Client(base_url=mock_comfyui_url, timeout=30)
         ww.WORKFLOWS_DIR = wf_dir
         _execute_job(job)
 
@@ -215,6 +220,50 @@ def test_cancel_queued_job(client: TestClient, db_dir: Path):
         assert j.state.value == "cancelling"
 
 
+def test_run_priority_source_and_scheduled_at(client: TestClient, db_dir: Path):
+    from dashboard.orchestration_db import PRIORITY_BULK, PRIORITY_INTERACTIVE, get_job
+
+    with patch("dashboard.routes_orchestration.compute_readiness", return_value={"ok": True}):
+        job = get_job(db_dir, client.post("/api/orchestration/run", json={"workflow_id": "wf"}).json()["job_id"])
+        assert (job.priority, job.source) == (PRIORITY_INTERACTIVE, "workflow:wf")
+        r = client.post("/api/orchestration/run/batch", json={"template_id": "t", "params_list": [{}],
+                                                              "source": "hermes"})
+        job = get_job(db_dir, r.json()["job_ids"][0])
+        assert (job.priority, job.source) == (PRIORITY_BULK, "client:hermes")
+        r = client.post("/api/orchestration/run", json={"workflow_id": "wf", "priority": 11})
+        assert r.status_code == 422
+        r = client.post("/api/orchestration/run", json={"workflow_id": "wf", "scheduled_at": "2031-01-01T09:00:00+01:00"})
+        assert r.json()["scheduled_at"] == "2031-01-01T08:00:00.000000Z"
+        r = client.post("/api/orchestration/run/batch", json={"workflow_id": "wf", "params_list": [{}],
+                                                              "scheduled_at": "2031-01-01T02:00:00"})
+        assert get_job(db_dir, r.json()["job_ids"][0]).scheduled_at == "2031-01-01T02:00:00.000000Z"
+
+
+def test_list_jobs_pagination_projection_and_workflow(client: TestClient, db_dir: Path):
+    from dashboard.orchestration_db import create_job
+
+    graph = {"1": {"class_type": "KSampler", "inputs": {"seed": 7}}}
+    first = create_job(db_dir, workflow_id="wf", compiled_workflow=graph)
+    create_job(db_dir, workflow_id="wf", params={"seed": 1})
+
+    r = client.get("/api/orchestration/jobs", params={"limit": 1})
+    data = r.json()
+    assert data["count"] == 1 and data["next_cursor"]
+    assert "compiled_workflow" not in data["jobs"][0] and "params_json" not in data["jobs"][0]
+    r = client.get("/api/orchestration/jobs", params={"limit": 1, "cursor": data["next_cursor"],
+                                                     "fields": "state,compiled_workflow"})
+    data = r.json()
+    assert data["next_cursor"] is None
+    assert data["jobs"] == [{"job_id": first.job_id, "state": "queued",
+                             "compiled_workflow": first.compiled_workflow}]
+    assert set(client.get("/api/orchestration/jobs", params={"fields": "*"}).json()["jobs"][0]) >= {"params_json"}
+    assert client.get("/api/orchestration/jobs", params={"fields": "bogus"}).status_code == 400
+    assert client.get("/api/orchestration/jobs", params={"cursor": "!!"}).status_code == 400
+
+    assert client.get(f"/api/orchestration/jobs/{first.job_id}/workflow").json() == graph
+    assert client.get("/api/orchestration/jobs/unknown/workflow").status_code == 404
+
+
 def test_stale_running_job_recovery(db_dir: Path):
     """Jobs stuck in 'running' at startup must be re-queued."""
     from dashboard.orchestration_db import (
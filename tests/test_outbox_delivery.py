@@ -0,0 +1,199 @@
+"""Concurrent outbox delivery: per-host caps, circuit breaker, metrics (dashboard/outbox_delivery.py)."""
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+
+@pytest.fixture
+def db_dir(tmp_path: Path):
+    from dashboard.orchestration_db import init_db
+
+    d = tmp_path / "dashboard"
+    init_db(d)
+    return d
+
+
+def _enqueue(db_dir: Path, url: str, n: int) -> None:
+    from dashboard.orchestration_db import create_job, create_outbox_entry
+
+    for i in range(n):
+        job = create_job(db_dir, workflow_id="wf")
+        create_outbox_entry(db_dir, job.job_id, url, {"i": i})
+
+
+async def _dispatch_until_idle(dispatcher, handler) -> None:
+    """Run dispatch passes back to back until a pass starts nothing and nothing is in flight."""
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        while await dispatcher.dispatch_pending(client) or dispatcher._inflight:
+            if dispatcher._inflight:
+                await asyncio.wait(set(dispatcher._inflight.values()), return_when=asyncio.FIRST_COMPLETED)
+        await dispatcher.drain(10)
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold_then_half_open_trial(self):
+        from dashboard.outbox_delivery import CircuitBreaker
+
+        breaker = CircuitBreaker(failure_threshold=2, reset_after=0.05)
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+        time.sleep(0.06)
+        assert breaker.state == "half_open"
+        assert breaker.allow()
+        assert not breaker.allow()  # only one trial at a time
+        breaker.record_failure()
+        assert breaker.state == "open"
+
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
+        assert breaker.failures == 0
+
+
+def test_per_host_cap_does_not_block_other_hosts(db_dir: Path):
+    from dashboard.outbox_delivery import OutboxDispatcher
+
+    _enqueue(db_dir, "http://slow.example/hook", 6)
+    _enqueue(db_dir, "http://fast.example/hook", 3)
+    active: dict[str, int] = {"slow.example": 0, "fast.example": 0}
+    peak: dict[str, int] = dict(active)
+    finished: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        await asyncio.sleep(0.1 if host == "slow.example" else 0.01)
+        active[host] -= 1
+        finished.append(host)
+        return httpx.Response(200)
+
+    dispatcher = OutboxDispatcher(db_dir, per_host_limit=2, max_concurrency=16)
+    asyncio.run(_dispatch_until_idle(dispatcher, handler))
+
+    assert peak["slow.example"] == 2
+    assert finished[:3] == ["fast.example"] * 3
+    assert dispatcher.metrics.delivered == 9
+
+
+def test_delivery_publishes_job_and_writes_metrics(db_dir: Path):
+    from dashboard.orchestration_db import (
+        JobState,
+        create_job,
+        create_outbox_entry,
+        get_job,
+        get_outbox_stats,
+        update_job,
+    )
+    from dashboard.outbox_delivery import OutboxDispatcher, read_outbox_metrics
+
+    job = create_job(db_dir, workflow_id="wf")
+    for state in (JobState.validated, JobState.running, JobState.artifact_ready, JobState.publish_enqueued):
+        update_job(db_dir, job.job_id, state=state)
+    create_outbox_entry(db_dir, job.job_id, "http://n8n:5678/webhook/x", {"ok": True})
+    seen_keys: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen_keys.append(request.headers["X-Idempotency-Key"])
+        return httpx.Response(200)
+
+    assert read_outbox_metrics(db_dir) is None
+    asyncio.run(_dispatch_until_idle(OutboxDispatcher(db_dir), handler))
+
+    assert seen_keys and seen_keys[0]
+    assert get_job(db_dir, job.job_id).state == JobState.published
+    assert get_outbox_stats(db_dir) == {"pending": 0, "delivered": 1}
+    metrics = read_outbox_metrics(db_dir)
+    assert metrics["delivered"] == 1
+    assert metrics["in_flight"] == 0
+    assert metrics["deliveries_per_sec"] > 0
+    assert set(metrics["latency_ms"]) == {"p50", "p95", "max"}
+
+
+def test_open_circuit_defers_without_burning_attempts(db_dir: Path):
+    from dashboard.orchestration_db import _connect
+    from dashboard.outbox_delivery import OutboxDispatcher
+
+    _enqueue(db_dir, "http://down.example/hook", 6)
+    calls = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(503)
+
+    dispatcher = OutboxDispatcher(db_dir, per_host_limit=1, failure_threshold=3, reset_after=60)
+    asyncio.run(_dispatch_until_idle(dispatcher, handler))
+
+    assert calls == 3
+    assert dispatcher.breakers["down.example"].state == "open"
+    with _connect(db_dir) as conn:
+        attempts = [r[0] for r in conn.execute("SELECT attempts FROM publish_outbox ORDER BY id")]
+    assert sorted(attempts) == [0, 0, 0, 1, 1, 1]
+    snapshot = dispatcher.snapshot()
+    assert snapshot["failed"] == 3
+    assert snapshot["breakers"]["down.example"]["state"] == "open"
+
+    async def one_more_pass() -> int:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await dispatcher.dispatch_pending(client)
+
+    assert asyncio.run(one_more_pass()) == 0
+    assert calls == 3
+
+
+def test_backed_up_host_does_not_crowd_out_batch(db_dir: Path):
+    from dashboard.outbox_delivery import OutboxDispatcher
+
+    _enqueue(db_dir, "http://slow.example/hook", 8)
+    _enqueue(db_dir, "http://fast.example/hook", 2)
+    release = asyncio.Event()
+    posted: list[str] = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        posted.append(request.url.host)
+        if request.url.host == "slow.example":
+            await release.wait()
+        return httpx.Response(200)
+
+    async def scenario() -> tuple[int, int]:
+        dispatcher = OutboxDispatcher(db_dir, per_host_limit=2, batch_size=4)
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            first = await dispatcher.dispatch_pending(client)
+            await asyncio.sleep(0.05)
+            second = await dispatcher.dispatch_pending(client)
+            release.set()
+            await dispatcher.drain(10)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    # Oldest-first batch of 4 would be all slow.example; the per-host cap leaves room for fast.example.
+    assert first == 4
+    assert sorted(posted[:4]) == ["fast.example"] * 2 + ["slow.example"] * 2
+    # slow.example's slots are still held and its in-flight rows are skipped, so nothing more starts.
+    assert second == 0
+
+
+def test_threaded_dispatcher_starts_and_stops(db_dir: Path):
+    from dashboard.outbox_delivery import OutboxDispatcher, read_outbox_metrics
+
+    dispatcher = OutboxDispatcher(db_dir, interval=0.05)
+    dispatcher.start()
+    try:
+        deadline = time.monotonic() + 5
+        while read_outbox_metrics(db_dir) is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        dispatcher.stop(timeout=5)
+    assert read_outbox_metrics(db_dir) is not None
+    assert dispatcher._thread is None
@@ -0,0 +1,195 @@
+"""Cached readiness: ReadinessMonitor TTL/coalescing and the /readiness and /run gates."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+class _Probe:
+    def __init__(self, ok: bool = True, delay: float = 0.0) -> None:
+        self.ok = ok
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self) -> dict:
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return {"ok": self.ok, "checks": []}
+
+
+class TestReadinessMonitor:
+    def test_concurrent_gets_share_one_probe(self):
+        from dashboard.readiness_monitor import ReadinessMonitor
+
+        probe = _Probe(delay=0.1)
+        monitor = ReadinessMonitor(probe, ttl=10)
+
+        async def main():
+            return await asyncio.gather(*(monitor.get() for _ in range(20)))
+
+        results = asyncio.run(main())
+        assert probe.calls == 1
+        assert all(r["ok"] for r in results)
+
+    def test_fresh_snapshot_is_served_from_cache(self):
+        from dashboard.readiness_monitor import ReadinessMonitor
+
+        probe = _Probe()
+        monitor = ReadinessMonitor(probe, ttl=10)
+
+        async def main():
+            await monitor.get()
+            return await monitor.get()
+
+        snap = asyncio.run(main())
+        assert probe.calls == 1
+        assert snap["stale"] is False
+        assert snap["ttl_sec"] == 10
+        assert snap["checked_at"].endswith("Z")
+
+    def test_stale_snapshot_returned_while_refreshing_in_background(self):
+        from dashboard.readiness_monitor import ReadinessMonitor
+
+        probe = _Probe()
+        monitor = ReadinessMonitor(probe, ttl=0.05, max_stale=10)
+
+        async def main():
+            await monitor.get()
+            probe.ok = False
+            await asyncio.sleep(0.1)
+            stale = await monitor.get()
+            await asyncio.sleep(0.05)
+            return stale, monitor.snapshot()
+
+        stale, after = asyncio.run(main())
+        assert stale["ok"] is True and stale["stale"] is True
+        assert after["ok"] is False
+        assert probe.calls == 2
+
+    def test_caller_waits_when_older_than_max_stale(self):
+        from dashboard.readiness_monitor import ReadinessMonitor
+
+        probe = _Probe()
+        monitor = ReadinessMonitor(probe, ttl=0.01, max_stale=0.05)
+
+        async def main():
+            await monitor.get()
+            probe.ok = False
+            await asyncio.sleep(0.1)
+            return await monitor.get()
+
+        assert asyncio.run(main())["ok"] is False
+
+    def test_invalidate_wakes_background_loop(self):
+        from dashboard.readiness_monitor import ReadinessMonitor
+
+        probe = _Probe()
+        monitor = ReadinessMonitor(probe, ttl=60)
+
+        async def main():
+            monitor.start()
+            await asyncio.sleep(0.05)
+            assert probe.calls == 1
+            assert (await monitor.get())["stale"] is False
+            monitor.invalidate()
+            assert monitor.snapshot()["stale"] is True
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+
+        asyncio.run(main())
+        assert probe.calls == 2
+        assert monitor.snapshot()["stale"] is False
+
+    def test_unhealthy_result_rechecked_sooner(self):
+        from dashboard.readiness_monitor import ReadinessMonitor
+
+        monitor = ReadinessMonitor(_Probe(ok=False), ttl=60, unhealthy_ttl=0.01)
+
+        async def main():
+            await monitor.get()
+            await asyncio.sleep(0.03)
+            return monitor.snapshot()
+
+        assert asyncio.run(main())["stale"] is True
+
+    def test_unhealthy_recheck_backs_off_to_ttl(self):
+        from dashboard.readiness_monitor import ReadinessMonitor
+
+        probe = _Probe(ok=False)
+        monitor = ReadinessMonitor(probe, ttl=0.4, unhealthy_ttl=0.05)
+
+        async def main():
+            monitor.start()
+            await asyncio.sleep(0.5)  # probes at ~0, .05, .15, .35: 50ms doubling, capped at ttl
+            calls_down = probe.calls
+            probe.ok = True
+            monitor.invalidate()
+            await asyncio.sleep(0.05)
+            await monitor.stop()
+            return calls_down
+
+        assert asyncio.run(main()) == 4  # a fixed 50ms recheck would have probed ~10 times
+        assert monitor.snapshot()["ok"] is True and monitor._fresh_for() == 0.4
+
+    def test_probe_exception_becomes_not_ready(self):
+        from dashboard.readiness_monitor import ReadinessMonitor
+
+        def boom() -> dict:
+            raise RuntimeError("gateway down")
+
+        snap = asyncio.run(ReadinessMonitor(boom).get())
+        assert snap["ok"] is False
+        assert "gateway down" in snap["checks"][0]["error"]
+
+
+@pytest.fixture
+def ro(tmp_path: Path, monkeypatch):
+    from dashboard.orchestration_db import init_db
+    from dashboard.readiness_monitor import ReadinessMonitor
+
+    d = tmp_path / "dashboard"
+    init_db(d)
+    monkeypatch.setenv("DASHBOARD_DATA_PATH", str(d))
+    import importlib
+
+    import dashboard.routes_orchestration as ro
+
+    importlib.reload(ro)
+    monkeypatch.setattr(ro, "_readiness", ReadinessMonitor(lambda: ro.compute_readiness(), ttl=60))
+    return ro
+
+
+def test_readiness_endpoint_reports_age(ro):
+    from dashboard.app import app
+
+    probe = _Probe()
+    with patch("dashboard.routes_orchestration.compute_readiness", probe):
+        client = TestClient(app)
+        first = client.get("/api/orchestration/readiness").json()
+        second = client.get("/api/orchestration/readiness").json()
+        client.get("/api/orchestration/readiness", params={"refresh": "true"})
+    assert probe.calls == 2
+    assert first["ok"] is True
+    assert second["stale"] is False
+    assert second["age_sec"] >= first["age_sec"]
+    assert "checked_at" in second
+
+
+def test_run_burst_probes_once(ro):
+    from dashboard.app import app
+
+    probe = _Probe()
+    with patch("dashboard.routes_orchestration.compute_readiness", probe):
+        client = TestClient(app)
+        for _ in range(5):
+            r = client.post("/api/orchestration/run", json={"workflow_id": "missing-template"})
+            assert r.status_code != 503
+    assert probe.calls == 1
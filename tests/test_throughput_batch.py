@@ -0,0 +1,149 @@
+"""Batched throughput ingest: /api/throughput/record/batch and the model-gateway buffer."""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import json
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def client(tmp_path: Path, monkeypatch):
+    import dashboard.app as dashboard_app
+    from dashboard.throughput_history import ThroughputHistory
+
+    monkeypatch.setattr(dashboard_app, "_AUTH_REQUIRED", False)
+    monkeypatch.delenv("THROUGHPUT_RECORD_TOKEN", raising=False)
+    h = ThroughputHistory(tmp_path / "h.db")
+    monkeypatch.setattr(dashboard_app, "_throughput_history", h)
+    monkeypatch.setattr(dashboard_app._throughput_flusher, "history", h)
+    yield TestClient(dashboard_app.app)
+    h.close()
+
+
+def _history_points(client: TestClient, model: str) -> list[dict]:
+    data = client.get("/api/throughput/history", params={"model": model, "resolution": "raw"}).json()
+    return data["models"].get(model, {}).get("points", [])
+
+
+def test_batch_json_array(client):
+    now = time.time()
+    body = [
+        {"model": "batch-a", "output_tokens_per_sec": 10.0, "service": "svc", "ts": now - 5},
+        {"model": "batch-a", "output_tokens_per_sec": 20.0, "service": "svc", "ttft_ms": 120.0},
+        {"model": "", "output_tokens_per_sec": 5.0},
+        {"model": "batch-a", "output_tokens_per_sec": 0},
+    ]
+    r = client.post("/api/throughput/record/batch", json=body)
+    assert r.status_code == 200
+    assert r.json() == {"ok": True, "accepted": 2, "received": 4}
+
+    stats = client.get("/api/throughput/stats").json()["models"]["batch-a"]
+    assert stats["sample_count"] == 2 and stats["peak"] == 20.0
+    points = _history_points(client, "batch-a")
+    assert [p["tps"] for p in points] == [10.0, 20.0]
+    assert points[0]["t"] == pytest.approx(now - 5, abs=0.01)  # client timestamp kept
+
+
+def test_batch_ndjson_and_wrapped_object(client):
+    lines = "\n".join(json.dumps({"model": "batch-nd", "output_tokens_per_sec": float(i)}) for i in range(1, 4))
+    r = client.post("/api/throughput/record/batch", content=lines + "\n",
+                    headers={"Content-Type": "application/x-ndjson"})
+    assert r.json()["accepted"] == 3
+    r = client.post("/api/throughput/record/batch",
+                    json={"samples": [{"model": "batch-nd", "output_tokens_per_sec": 4.0}]})
+    assert r.json()["accepted"] == 1
+    assert len(_history_points(client, "batch-nd")) == 4
+
+
+def test_batch_rejects_bad_input(client):
+    bad_item = [{"model": "x", "output_tokens_per_sec": -1}]
+    assert client.post("/api/throughput/record/batch", json=bad_item).status_code == 422
+    assert client.post("/api/throughput/record/batch", content=b"[{",
+                       headers={"Content-Type": "application/json"}).status_code == 400
+    assert client.post("/api/throughput/record/batch", json={"samples": 3}).status_code == 400
+
+
+def test_batch_future_and_stale_timestamps_clamped(client):
+    before = time.time()
+    body = [{"model": "batch-ts", "output_tokens_per_sec": 1.0, "ts": before + 86400},
+            {"model": "batch-ts", "output_tokens_per_sec": 2.0, "ts": before - 86400}]
+    assert client.post("/api/throughput/record/batch", json=body).json()["accepted"] == 2
+    assert all(p["t"] >= before for p in _history_points(client, "batch-ts"))
+
+
+def test_batch_requires_record_token_when_set(client, monkeypatch):
+    monkeypatch.setenv("THROUGHPUT_RECORD_TOKEN", "tok")
+    body = [{"model": "batch-auth", "output_tokens_per_sec": 1.0}]
+    assert client.post("/api/throughput/record/batch", json=body).status_code == 401
+    r = client.post("/api/throughput/record/batch", json=body, headers={"X-Throughput-Token": "tok"})
+    assert r.status_code == 200
+
+
+# ── model-gateway/throughput_callback.py ────────────────────────────────────
+
+def _load_callback():
+    spec = importlib.util.spec_from_file_location("throughput_callback", REPO_ROOT / "model-gateway" /
+                                                  "throughput_callback.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_buffer_posts_one_batch_per_interval():
+    cb = _load_callback()
+    posted: list[list[dict]] = []
+
+    async def post(batch):
+        posted.append(batch)
+
+    buf = cb.ThroughputBuffer("http://dashboard/x", flush_interval=0.05, max_batch=100, post=post)
+
+    async def main():
+        for i in range(250):
+            buf.add({"model": "m", "output_tokens_per_sec": float(i)})
+        await asyncio.sleep(0.15)
+        await buf.close()
+
+    asyncio.run(main())
+    assert [len(b) for b in posted] == [100, 100, 50]
+    assert buf.stats == {"posted": 250, "batches": 3, "dropped": 0}
+
+
+def test_buffer_drops_on_failure_and_is_bounded():
+    cb = _load_callback()
+
+    async def fail(batch):
+        raise OSError("dashboard down")
+
+    buf = cb.ThroughputBuffer("http://dashboard/x", max_buffer=3, post=fail)
+    for i in range(5):
+        buf.add({"i": i})  # no running loop: buffered only
+    assert len(buf) == 3
+    assert asyncio.run(buf.flush()) == 0
+    assert len(buf) == 0 and buf.stats["dropped"] == 5
+
+
+def test_sample_from_litellm_event():
+    cb = _load_callback()
+    start = datetime(2026, 1, 1, 12, 0, 0)
+    first = start + timedelta(milliseconds=250)
+    end = first + timedelta(seconds=2)
+    kwargs = {
+        "model": "local-chat",
+        "completion_start_time": first,
+        "litellm_params": {"metadata": {"headers": {"x-service-name": "open-webui"}}},
+    }
+    sample = cb.sample_from_call(kwargs, {"usage": {"completion_tokens": 100}}, start, end)
+    assert sample["model"] == "local-chat"
+    assert sample["output_tokens_per_sec"] == 50.0
+    assert sample["ttft_ms"] == 250.0
+    assert sample["service"] == "open-webui"
+    assert cb.sample_from_call(kwargs, {"usage": {"completion_tokens": 0}}, start, end) is None
@@ -0,0 +1,111 @@
+"""Background throughput persistence: coalesced state writes and batched history rows."""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def history(tmp_path: Path):
+    from dashboard.throughput_history import ThroughputHistory
+
+    h = ThroughputHistory(tmp_path / "h.db")
+    yield h
+    h.close()
+
+
+def _sample(i: int):
+    from dashboard.throughput_history import ThroughputSample
+
+    return ThroughputSample(time.time(), "m", "svc", 10.0 + i)
+
+
+def test_burst_coalesces_into_one_state_write_and_one_batch(history):
+    from dashboard.throughput_flusher import ThroughputFlusher
+
+    writes: list[tuple[dict, str]] = []
+    loop_thread = threading.get_ident()
+
+    def write_state(snapshot: dict) -> None:
+        writes.append((snapshot, "off-loop" if threading.get_ident() != loop_thread else "loop"))
+
+    flusher = ThroughputFlusher(lambda: {"n": 1}, write_state, history, state_interval=0.05, history_interval=0.05)
+
+    async def main():
+        flusher.start()
+        for i in range(200):
+            flusher.add_sample(_sample(i))
+            flusher.mark_dirty()
+        await asyncio.sleep(0.2)
+        await flusher.stop()
+
+    asyncio.run(main())
+    assert writes == [({"n": 1}, "off-loop")]
+    assert flusher.stats["history_batches"] == 1
+    assert flusher.stats["samples_written"] == 200
+    assert history.query(start=time.time() - 60, end=time.time() + 60, resolution="raw")["models"]["m"]["points"]
+
+
+def test_stop_flushes_pending_work(history):
+    from dashboard.throughput_flusher import ThroughputFlusher
+
+    writes: list[dict] = []
+    flusher = ThroughputFlusher(lambda: {"saved": True}, writes.append, history,
+                                state_interval=3600, history_interval=3600)
+
+    async def main():
+        flusher.start()
+        flusher.add_sample(_sample(0))
+        flusher.mark_dirty()
+        await asyncio.sleep(0)
+        assert flusher.pending() == 1
+        await flusher.stop()
+
+    asyncio.run(main())
+    assert writes == [{"saved": True}]
+    assert flusher.pending() == 0
+    assert flusher.stats["samples_written"] == 1
+
+
+def test_max_pending_wakes_flusher_early(history):
+    from dashboard.throughput_flusher import ThroughputFlusher
+
+    flusher = ThroughputFlusher(dict, lambda _s: None, history, history_interval=3600, max_pending=10)
+
+    async def main():
+        flusher.start()
+        for i in range(10):
+            flusher.add_sample(_sample(i))
+        await asyncio.sleep(0.1)
+        written = flusher.stats["samples_written"]
+        await flusher.stop()
+        return written
+
+    assert asyncio.run(main()) == 10
+
+
+def test_failed_state_write_is_retried(history):
+    from dashboard.throughput_flusher import ThroughputFlusher
+
+    calls = 0
+
+    def flaky(_snapshot: dict) -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise OSError("disk full")
+
+    flusher = ThroughputFlusher(dict, flaky, history)
+
+    async def main():
+        flusher.mark_dirty()
+        assert await flusher.flush_state() is False
+        assert await flusher.flush_state() is True
+        assert await flusher.flush_state() is False  # nothing new
+
+    asyncio.run(main())
+    assert calls == 2
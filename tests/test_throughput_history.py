@@ -0,0 +1,135 @@
+"""Throughput history: raw samples, 1m/1h rollups, retention, and /api/throughput/history."""
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Hour-aligned and recent: writes prune anything older than the retention windows.
+T0 = float(int(time.time()) // 3600 * 3600 - 3 * 3600)
+
+
+@pytest.fixture
+def history(tmp_path: Path):
+    from dashboard.throughput_history import ThroughputHistory
+
+    h = ThroughputHistory(tmp_path / "history.db")
+    yield h
+    h.close()
+
+
+def _samples(model: str, service: str, start: float, n: int, step: float, tps: float, ttft: float = 0.0):
+    from dashboard.throughput_history import ThroughputSample
+
+    return [ThroughputSample(start + i * step, model, service, tps + i, ttft) for i in range(n)]
+
+
+def test_rollups_aggregate_per_bucket_and_merge_services(history):
+    # 120 samples, one per second, over two minutes; two services
+    history.record_many(_samples("m", "open-webui", T0, 120, 1.0, 10.0, ttft=200.0))
+    history.record_many(_samples("m", "n8n", T0, 60, 1.0, 100.0))
+
+    out = history.query(start=T0, end=T0 + 3600 * 2, resolution="1m", model="m")
+    points = out["models"]["m"]["points"]
+    assert [p["t"] for p in points] == [T0, T0 + 60]
+    assert points[0]["count"] == 120
+    assert points[1]["count"] == 60
+    assert points[0]["tps_min"] == 10.0 and points[0]["tps_max"] == 159.0
+    assert points[0]["ttft_count"] == 60
+    assert points[0]["ttft_p95_ms"] == pytest.approx(200.0, rel=0.01)
+
+    only_webui = history.query(start=T0, end=T0 + 7200, resolution="1m", service="open-webui")
+    assert only_webui["models"]["m"]["points"][0]["count"] == 60
+
+    hourly = history.query(start=T0, end=T0 + 7200, resolution="1h")
+    assert len(hourly["models"]["m"]["points"]) == 1
+    summary = hourly["models"]["m"]["summary"]
+    assert summary["count"] == 180
+    assert summary["tps_p50"] == pytest.approx(sorted([10.0 + i for i in range(120)] + [100.0 + i for i in range(60)])[89], rel=0.011)
+
+
+def test_incremental_writes_fold_into_existing_bucket(history):
+    for i in range(5):
+        history.record("m", "svc", 20.0 + i, ts=T0 + i)
+    p = history.query(start=T0, end=T0 + 7200, resolution="1m")["models"]["m"]["points"][0]
+    assert p["count"] == 5
+    assert p["tps_avg"] == 22.0
+
+
+def test_raw_resolution_and_auto_pick(history):
+    history.record_many(_samples("m", "svc", T0, 3, 10.0, 5.0, ttft=50.0))
+    out = history.query(start=T0, end=T0 + 600)
+    assert out["resolution"] == "raw"
+    assert [p["tps"] for p in out["models"]["m"]["points"]] == [5.0, 6.0, 7.0]
+    assert history.query(start=T0, end=T0 + 86400)["resolution"] == "1m"
+    assert history.query(start=T0, end=T0 + 7 * 86400)["resolution"] == "1h"
+    with pytest.raises(ValueError):
+        history.query(start=T0, end=T0 + 1, resolution="5m")
+
+
+def test_prune_applies_per_level_retention(tmp_path: Path):
+    from dashboard.throughput_history import ThroughputHistory
+
+    h = ThroughputHistory(tmp_path / "h.db")
+    h.record_many(_samples("m", "svc", T0, 1, 1.0, 5.0))
+    h.retention.update({"raw": 3600, "1m": 86400, "1h": 10 * 86400})
+    removed = h.prune(now=T0 + 2 * 86400)
+    assert removed == {"raw": 1, "1m": 1, "1h": 0}
+    assert h.query(start=T0, end=T0 + 3 * 86400, resolution="1h")["models"]["m"]["points"][0]["count"] == 1
+    h.close()
+
+
+def test_recent_samples_rebuild_live_windows(history):
+    from dashboard.throughput_store import ThroughputStore
+
+    history.record_many(_samples("old", "svc", T0, 3, 1.0, 1.0))
+    history.record_many(_samples("m", "a", T0 + 10, 5, 1.0, 10.0, ttft=100.0))
+    history.record_many(_samples("m", "b", T0 + 20, 1, 1.0, 50.0))
+    recent = history.recent_samples(per_model=3, max_models=1)
+    assert recent == {"m": [(13.0, 100.0), (14.0, 100.0), (50.0, 0.0)]}
+
+    store = ThroughputStore(max_samples=3)
+    store.load_samples(recent)
+    assert store.stats()["m"]["latest"] == 50.0 and store.stats()["m"]["latest_ttft_ms"] == 100.0
+
+
+def test_snapshot_leaves_samples_to_history(tmp_path: Path, monkeypatch):
+    import dashboard.app as dashboard_app
+    from dashboard.throughput_history import ThroughputHistory
+    from dashboard.throughput_store import ThroughputStore
+
+    h = ThroughputHistory(tmp_path / "h.db")
+    h.record_many(_samples("m", "svc", T0, 4, 1.0, 10.0))
+    monkeypatch.setattr(dashboard_app, "_throughput_history", h)
+    monkeypatch.setattr(dashboard_app, "_throughput", ThroughputStore(max_samples=16))
+    monkeypatch.setattr(dashboard_app, "_THROUGHPUT_FILE", tmp_path / "throughput.json")
+
+    dashboard_app._load_throughput_state()
+    assert dashboard_app._throughput.stats()["m"]["sample_count"] == 4
+    assert "samples" not in dashboard_app._throughput_snapshot()
+    h.close()
+
+
+def test_history_endpoint(tmp_path: Path, monkeypatch):
+    import dashboard.app as dashboard_app
+    from dashboard.throughput_history import ThroughputHistory
+
+    monkeypatch.setattr(dashboard_app, "_AUTH_REQUIRED", False)
+    h = ThroughputHistory(tmp_path / "h.db")
+    monkeypatch.setattr(dashboard_app, "_throughput_history", h)
+    monkeypatch.setattr(dashboard_app._throughput_flusher, "history", h)
+    client = TestClient(dashboard_app.app)
+
+    r = client.post("/api/throughput/record", json={"model": "hist-model", "output_tokens_per_sec": 42.0,
+                                                    "service": "svc", "ttft_ms": 150.0})
+    assert r.status_code == 200
+    data = client.get("/api/throughput/history", params={"model": "hist-model", "resolution": "1m"}).json()
+    assert data["ok"] is True
+    point = data["models"]["hist-model"]["points"][0]
+    assert point["count"] == 1 and point["tps_avg"] == 42.0
+
+    assert client.get("/api/throughput/history", params={"resolution": "bogus"}).status_code == 400
+    assert client.get("/api/throughput/history", params={"start": 10, "end": 5}).status_code == 400
+    h.close()
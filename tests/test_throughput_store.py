@@ -0,0 +1,106 @@
+"""Ring-buffer throughput windows and DDSketch quantiles (dashboard/throughput_store.py)."""
+from __future__ import annotations
+
+import random
+
+import pytest
+
+
+def _exact(values: list[float], q: float) -> float:
+    s = sorted(values)
+    return s[int(q * (len(s) - 1))]
+
+
+class TestDDSketch:
+    def test_quantiles_within_relative_accuracy(self):
+        from dashboard.throughput_store import DDSketch
+
+        rng = random.Random(7)
+        values = [rng.lognormvariate(3, 1) for _ in range(20_000)]
+        sketch = DDSketch(0.01)
+        for v in values:
+            sketch.add(v)
+        for q in (0.5, 0.95, 0.99):
+            assert sketch.quantile(q) == pytest.approx(_exact(values, q), rel=0.011)
+        assert len(sketch.bins) < 1000
+
+    def test_remove_and_merge(self):
+        from dashboard.throughput_store import DDSketch
+
+        a, b = DDSketch(), DDSketch()
+        for v in (1.0, 2.0, 3.0):
+            a.add(v)
+        for v in (100.0, 200.0):
+            b.add(v)
+        a.merge(b)
+        assert a.count == 5
+        assert a.quantile(1.0) == pytest.approx(200.0, rel=0.01)
+        a.remove(200.0)
+        a.remove(100.0)
+        assert a.quantile(1.0) == pytest.approx(3.0, rel=0.01)
+        assert DDSketch.from_dict(a.to_dict()).bins == a.bins
+        with pytest.raises(ValueError):
+            a.merge(DDSketch(0.05))
+
+
+class TestSampleWindow:
+    def test_window_evicts_oldest_and_tracks_exact_extremes(self):
+        from dashboard.throughput_store import SampleWindow
+
+        w = SampleWindow(capacity=4)
+        for v in (50.0, 10.0, 20.0, 30.0, 40.0, 5.0):
+            w.append(v)
+        assert w.values() == [20.0, 30.0, 40.0, 5.0]
+        assert len(w) == 4
+        assert w.latest == 5.0
+        assert w.peak == 40.0  # 50 was evicted
+        assert w.low == 5.0
+        assert w.sketch.count == 4
+        assert w.quantile(0.5) == pytest.approx(20.0, rel=0.01)
+
+    def test_sliding_max_matches_brute_force(self):
+        from dashboard.throughput_store import SampleWindow
+
+        rng = random.Random(1)
+        w = SampleWindow(capacity=50)
+        seen: list[float] = []
+        for _ in range(1000):
+            v = rng.uniform(1, 100)
+            w.append(v)
+            seen.append(v)
+            assert w.peak == max(seen[-50:])
+            assert w.low == min(seen[-50:])
+
+    def test_single_sample_quantiles_are_exact(self):
+        from dashboard.throughput_store import SampleWindow
+
+        w = SampleWindow(capacity=8)
+        w.append(180.0)
+        assert w.quantile(0.95) == 180.0
+
+
+class TestThroughputStore:
+    def test_model_cap_and_cached_stats(self):
+        from dashboard.throughput_store import ThroughputStore
+
+        store = ThroughputStore(max_samples=100, max_models=2)
+        assert store.record("a", 10.0, ttft_ms=200.0)
+        assert store.record("b", 20.0)
+        assert not store.record("c", 30.0)
+        first = store.stats()
+        assert set(first) == {"a", "b"}
+        assert store.stats()["a"] is first["a"]  # cached until the next sample
+        store.record("a", 30.0)
+        a = store.stats()["a"]
+        assert a["latest"] == 30.0 and a["peak"] == 30.0 and a["sample_count"] == 2
+        assert a["ttft_p95_ms"] == 200.0
+        assert store.stats()["b"]["ttft_p50_ms"] == 0.0
+
+    def test_load_legacy_json(self):
+        from dashboard.throughput_store import ThroughputStore
+
+        store = ThroughputStore(max_samples=2)
+        store.load_json({"m": [1.0, 2.0, 4.0], "bad": "x"}, {"m": [10.0, 20.0, 40.0]})
+        m = store.stats()["m"]
+        assert m["sample_count"] == 2 and m["latest"] == 4.0 and m["peak"] == 4.0
+        assert set(store.stats()) == {"m"}
@@ -6,13 +6,16 @@ Runs as a separate container. Shares /data/dashboard volume with dashboard (SQLi
 
 from __future__ import annotations
 
+import asyncio
 import concurrent.futures
+import contextlib
 import json
 import logging
 import os
 import signal
 import sys
 import time
+from collections.abc import Awaitable, Callable
 from pathlib import Path
 from typing import Any
 
@@ -21,28 +24,39 @@ import httpx
 # ── Bootstrap path so we can import dashboard modules ─────────────────────────
 sys.path.insert(0, "/app")
 
+from dashboard.comfyui_api_client import AsyncComfyUIClient
+from dashboard.comfyui_events import AsyncComfyUIEventStream, ComfyUIEventStream, execution_started_at
+from dashboard.job_retention import RetentionPolicy, run_retention
+from dashboard.metrics import (
+    COMFYUI_PROMPT_SECONDS,
+    JOB_EXECUTION_SECONDS,
+    JOB_QUEUE_WAIT_SECONDS,
+    seconds_since_iso,
+    start_metrics_server,
+    timed_outcome,
+)
 from dashboard.orchestration_db import (
+    PRIORITY_BULK,
     JobState,
     OrchestrationJob,
     checkpoint_wal,
-    claim_next_job,
+    claim_jobs,
+    close_connections,
     create_job,
     get_due_schedules,
     get_job,
-    get_pending_outbox,
     load_store,
-    mark_outbox_delivered,
-    mark_outbox_delivered_by_id,
-    record_outbox_attempt,
+    next_due_job_at,
+    prune_job_events,
     recover_stale_running_jobs,
     tick_schedule,
     update_job,
     vacuum_db,
 )
-from dashboard.param_placeholders import apply_param_placeholders
+from dashboard.orchestration_wakeup import WakeupListener
+from dashboard.outbox_delivery import OutboxDispatcher
 from dashboard.text_sanitizers import sanitize_workflow_id
-from dashboard.workflow_boundary import assert_api_workflow
-from dashboard.workflow_templates import compile_template, load_template
+from dashboard.workflow_templates import compile_template, compile_workflow_file, load_template
 
 logging.basicConfig(
     level=logging.INFO,
@@ -55,20 +69,52 @@ DATA_DIR = Path(os.environ.get("DASHBOARD_DATA_PATH", "/data/dashboard")).resolv
 COMFYUI_URL = os.environ.get("COMFYUI_URL", "http://comfyui:8188").rstrip("/")
 WORKFLOWS_DIR = Path(os.environ.get("COMFYUI_WORKFLOWS_DIR", "/comfyui-workflows")).resolve()
 WORKER_POLL_SEC = float(os.environ.get("WORKER_POLL_INTERVAL_SEC", "0.5"))
+# With the wakeup socket active the worker blocks until notified or a timer is due;
+# a positive value adds a safety-net queue re-check (0 = block indefinitely) for
+# producers that cannot reach the socket, e.g. a dashboard on another host.
+WORKER_IDLE_POLL_SEC = float(os.environ.get("WORKER_IDLE_POLL_SEC", "30"))
 WORKER_CONCURRENCY = max(1, int(os.environ.get("WORKER_CONCURRENCY", "1")))
 SCHEDULE_CHECK_SEC = float(os.environ.get("WORKER_SCHEDULE_CHECK_SEC", "30"))
 OUTBOX_CHECK_SEC = float(os.environ.get("WORKER_OUTBOX_CHECK_SEC", "5"))
 WAL_CHECKPOINT_SEC = float(os.environ.get("WORKER_WAL_CHECKPOINT_SEC", "300"))
 VACUUM_SEC = float(os.environ.get("WORKER_VACUUM_SEC", "86400"))
+JOB_EVENTS_KEEP = int(os.environ.get("WORKER_JOB_EVENTS_KEEP", "50000"))
+# Archive + delete expired jobs / delivered outbox rows this often (0 = never); policy in job_retention.
+RETENTION_SEC = float(os.environ.get("WORKER_RETENTION_SEC", "3600"))
+RETENTION_POLICY = RetentionPolicy.from_env()
 MAX_RETRIES = int(os.environ.get("WORKER_MAX_JOB_RETRIES", "2"))
+# Seconds of queueing per +1 effective priority for bulk jobs (0 = bulk never catches up); see claim_jobs.
+PRIORITY_AGING_SEC = float(os.environ.get("WORKER_PRIORITY_AGING_SEC", "60"))
 PUBLISH_MAX_ATTEMPTS = int(os.environ.get("WORKER_PUBLISH_MAX_ATTEMPTS", "5"))
+# Outbox delivery: total and per-webhook-host concurrent POSTs, and the circuit
+# breaker that parks a host's entries after consecutive failures.
+OUTBOX_CONCURRENCY = max(1, int(os.environ.get("WORKER_OUTBOX_CONCURRENCY", "32")))
+OUTBOX_PER_HOST = max(1, int(os.environ.get("WORKER_OUTBOX_PER_HOST", "4")))
+OUTBOX_BREAKER_FAILURES = max(1, int(os.environ.get("WORKER_OUTBOX_BREAKER_FAILURES", "5")))
+OUTBOX_BREAKER_RESET_SEC = float(os.environ.get("WORKER_OUTBOX_BREAKER_RESET_SEC", "60"))
+OUTBOX_TIMEOUT_SEC = float(os.environ.get("WORKER_OUTBOX_TIMEOUT_SEC", "30"))
+COMFYUI_WS_ENABLED = os.environ.get("WORKER_COMFYUI_WS", "1").strip().lower() in ("1", "true", "yes")
+# While the websocket is connected, /history is only re-checked (and cancellation
+# polled) at this interval in case a completion event was missed.
+COMFYUI_WS_FALLBACK_SEC = float(os.environ.get("WORKER_COMFYUI_WS_FALLBACK_SEC", "10"))
+# "thread" (ThreadPoolExecutor, WORKER_CONCURRENCY jobs) or "async" (one event loop).
+WORKER_ENGINE = os.environ.get("WORKER_ENGINE", "thread").strip().lower()
+# Async engine: how many jobs may have a prompt queued in ComfyUI at the same time
+# (jobs are only claimed when one of these slots is free).
+WORKER_COMFYUI_MAX_SUBMITTED = max(
+    1, int(os.environ.get("WORKER_COMFYUI_MAX_SUBMITTED", str(WORKER_CONCURRENCY)))
+)
+# Prometheus /metrics listener (0 = disabled)
+WORKER_METRICS_PORT = int(os.environ.get("WORKER_METRICS_PORT", "9102"))
 HEARTBEAT_PATH = Path("/tmp/worker.heartbeat")
+HEARTBEAT_SEC = 30.0
 
 
 # ── ComfyUI HTTP (inline; no async needed in worker) ─────────────────────────
 
 _comfyui_client = httpx.Client(base_url=COMFYUI_URL, timeout=30)
-_outbox_client = httpx.Client(timeout=30)
+# Started in main() when WORKER_COMFYUI_WS is enabled; None means history polling only.
+_comfyui_events: ComfyUIEventStream | None = None
 
 
 def _comfyui_post_prompt(workflow: dict[str, Any], client_id: str) -> str:
@@ -82,30 +128,54 @@ def _comfyui_post_prompt(workflow: dict[str, Any], client_id: str) -> str:
     return str(pid)
 
 
+def _comfyui_history_entry(prompt_id: str) -> dict[str, Any] | None:
+    """One /history/{prompt_id} lookup; returns the entry once it has outputs."""
+    try:
+        r = _comfyui_client.get(f"/history/{prompt_id}", timeout=15)
+        r.raise_for_status()
+        history = r.json()
+    except (httpx.RequestError, httpx.HTTPStatusError, json.JSONDecodeError) as exc:
+        logger.debug("ComfyUI history poll for %s: %s", prompt_id, exc)
+        return None
+    entry = history.get(prompt_id, {})
+    if not isinstance(entry, dict):
+        logger.warning("Unexpected history format for %s: %s", prompt_id, type(entry).__name__)
+        return None
+    return entry if entry.get("outputs") else None
+
+
 def _comfyui_wait_outputs(prompt_id: str, job_id: str, timeout: int = 600) -> dict[str, Any]:
+    """Wait for a prompt's outputs: websocket events when connected, /history polling otherwise."""
     deadline = time.time() + timeout
     poll_interval = 3.0
-    while time.time() < deadline:
-        # Check for cancellation between polls
-        fresh = get_job(DATA_DIR, job_id)
-        if fresh and fresh.state == JobState.cancelling:
-            raise RuntimeError(f"Job {job_id} cancelled during execution")
-        try:
-            r = _comfyui_client.get(f"/history/{prompt_id}", timeout=15)
-            r.raise_for_status()
-            history = r.json()
-            entry = history.get(prompt_id, {})
-            if not isinstance(entry, dict):
-                logger.warning("Unexpected history format for %s: %s", prompt_id, type(entry).__name__)
-                time.sleep(poll_interval)
-                poll_interval = min(poll_interval * 1.5, 15.0)
+    stream = _comfyui_events
+    waiter = stream.track(prompt_id) if stream is not None else None
+    try:
+        while time.time() < deadline:
+            # Check for cancellation between polls
+            fresh = get_job(DATA_DIR, job_id)
+            if fresh and fresh.state == JobState.cancelling:
+                raise RuntimeError(f"Job {job_id} cancelled during execution")
+            if waiter is not None and stream is not None and stream.connected:
+                finished = waiter.wait(min(COMFYUI_WS_FALLBACK_SEC, max(0.0, deadline - time.time())))
+                if finished:
+                    if waiter.error:
+                        raise RuntimeError(f"ComfyUI prompt {prompt_id} failed: {waiter.error}")
+                    if waiter.outputs:
+                        return waiter.history_entry()
+                    waiter = None  # finished without output events — let /history decide
+                entry = _comfyui_history_entry(prompt_id)
+                if entry:
+                    return entry
                 continue
-            if entry.get("outputs"):
+            entry = _comfyui_history_entry(prompt_id)
+            if entry:
                 return entry
-        except (httpx.RequestError, httpx.HTTPStatusError, json.JSONDecodeError) as exc:
-            logger.debug("ComfyUI history poll for %s: %s", prompt_id, exc)
-        time.sleep(poll_interval)
-        poll_interval = min(poll_interval * 1.5, 15.0)
+            time.sleep(poll_interval)
+            poll_interval = min(poll_interval * 1.5, 15.0)
+    finally:
+        if stream is not None:
+            stream.untrack(prompt_id)
     raise TimeoutError(f"ComfyUI did not finish prompt {prompt_id} within {timeout}s")
 
 
@@ -134,110 +204,138 @@ def _resolve_workflow_path(workflow_id: str) -> Path | None:
     return p if p.is_file() else None
 
 
+def _compile_job_workflow(job: OrchestrationJob) -> dict[str, Any]:
+    """Resolve a claimed job to the API-format graph to submit (shared by both engines)."""
+    if job.compiled_workflow:
+        # Pre-compiled (e.g. retry or scheduled)
+        return json.loads(job.compiled_workflow) if isinstance(job.compiled_workflow, str) else job.compiled_workflow
+    if job.template_id:
+        tpl = load_template(job.template_id)
+        params = json.loads(job.params_json) if job.params_json else {}
+        return compile_template(tpl, params, workflows_dir=WORKFLOWS_DIR)
+    if job.workflow_id:
+        path = _resolve_workflow_path(job.workflow_id)
+        if not path:
+            raise ValueError(f"Invalid workflow_id: {job.workflow_id!r}")
+        params = json.loads(job.params_json) if job.params_json else {}
+        return compile_workflow_file(path, params)
+    raise ValueError("Job has neither template_id, workflow_id, nor compiled_workflow")
+
+
+def _cancel_if_requested(job: OrchestrationJob) -> bool:
+    """Finish a job that was cancelled while queued; True if it was."""
+    fresh = get_job(DATA_DIR, job.job_id)
+    if fresh and fresh.state == JobState.cancelling:
+        update_job(DATA_DIR, job.job_id, returning=False, state=JobState.cancelled)
+        logger.info("Job %s cancelled before execution", job.job_id)
+        return True
+    return False
+
+
+def _handle_job_failure(job: OrchestrationJob, exc: Exception) -> None:
+    """Mark a job failed and requeue a copy while retries remain."""
+    jid = job.job_id
+    retry_count = (job.retry_count or 0) + 1
+    if retry_count <= MAX_RETRIES:
+        try:
+            update_job(DATA_DIR, jid, returning=False, state=JobState.failed,
+                       error=f"attempt {retry_count - 1} failed: {exc}"[:4096])
+            params = json.loads(job.params_json) if job.params_json else {}
+            compiled = (json.loads(job.compiled_workflow)
+                        if isinstance(job.compiled_workflow, str) and job.compiled_workflow
+                        else job.compiled_workflow if isinstance(job.compiled_workflow, dict)
+                        else None)
+            new_job = create_job(
+                DATA_DIR,
+                template_id=job.template_id,
+                workflow_id=job.workflow_id,
+                params=params,
+                compiled_workflow=compiled,
+                extra={"retried_from": jid, "retry_count": retry_count},
+                priority=job.priority,
+                source=job.source,
+                batch_id=job.batch_id,
+                scheduled_at=job.scheduled_at,
+            )
+            update_job(DATA_DIR, new_job.job_id, returning=False, retry_count=retry_count)
+            logger.info("Job %s failed; requeued (attempt %d/%d)", jid, retry_count, MAX_RETRIES + 1)
+        except Exception as retry_exc:
+            logger.error("Job %s retry failed: %s", jid, retry_exc)
+            update_job(DATA_DIR, jid, returning=False, state=JobState.failed,
+                       error=f"retry failed: {retry_exc}"[:4096])
+    else:
+        update_job(DATA_DIR, jid, returning=False, state=JobState.failed, error=str(exc)[:4096])
+        logger.error("Job %s permanently failed after %d attempts", jid, retry_count)
+
+
+def _claim_jobs(n: int) -> list[OrchestrationJob]:
+    """``claim_jobs`` for this worker's DATA_DIR, recording how long each job sat queued."""
+    jobs = claim_jobs(DATA_DIR, n, aging_sec=PRIORITY_AGING_SEC)
+    now = time.time()
+    for job in jobs:
+        waited = seconds_since_iso(job.created_at, now)
+        if waited is not None:
+            JOB_QUEUE_WAIT_SECONDS.observe(waited)
+    return jobs
+
+
 def execute_job(job: OrchestrationJob) -> None:
+    started = time.perf_counter()
+    outcome = _execute_job(job)
+    JOB_EXECUTION_SECONDS.labels(outcome).observe(time.perf_counter() - started)
+
+
+def _execute_job(job: OrchestrationJob) -> str:
+    """Run one claimed job; returns its outcome (completed, failed or cancelled)."""
     import uuid as _uuid
 
     jid = job.job_id
     logger.info("Executing job %s (template=%s workflow=%s)", jid, job.template_id, job.workflow_id)
 
     # Check for cancellation before starting
-    fresh = get_job(DATA_DIR, jid)
-    if fresh and fresh.state == JobState.cancelling:
-        update_job(DATA_DIR, jid, state=JobState.cancelled)
-        logger.info("Job %s cancelled before execution", jid)
-        return
+    if _cancel_if_requested(job):
+        return "cancelled"
 
     try:
-        # Compile workflow (state is already validated from claim_next_job)
-        if job.compiled_workflow:
-            # Pre-compiled (e.g. retry or scheduled)
-            wf = json.loads(job.compiled_workflow) if isinstance(job.compiled_workflow, str) else job.compiled_workflow
-        elif job.template_id:
-            tpl = load_template(job.template_id)
-            params = json.loads(job.params_json) if job.params_json else {}
-            wf = compile_template(tpl, params, workflows_dir=WORKFLOWS_DIR)
-        elif job.workflow_id:
-            path = _resolve_workflow_path(job.workflow_id)
-            if not path:
-                raise ValueError(f"Invalid workflow_id: {job.workflow_id!r}")
-            wf = json.loads(path.read_text(encoding="utf-8"))
-            assert_api_workflow(wf)
-            params = json.loads(job.params_json) if job.params_json else {}
-            wf = apply_param_placeholders(wf, params)
-        else:
-            raise ValueError("Job has neither template_id, workflow_id, nor compiled_workflow")
+        # Compile workflow (state is already validated from claim_jobs)
+        wf = _compile_job_workflow(job)
 
         # Store compiled workflow for retry durability
-        update_job(DATA_DIR, jid, state=JobState.running,
+        update_job(DATA_DIR, jid, returning=False, state=JobState.running, compiled_at=time.time(),
                    compiled_workflow=json.dumps(wf) if isinstance(wf, dict) else wf)
 
-        client_id = str(_uuid.uuid4())
-        pid = _comfyui_post_prompt(wf, client_id)
-        update_job(DATA_DIR, jid, prompt_id=pid)
-
-        entry = _comfyui_wait_outputs(pid, jid)
-        update_job(DATA_DIR, jid, state=JobState.artifact_ready, outputs=entry.get("outputs", {}))
+        # Prompts must be queued under the event stream's client_id for its
+        # websocket to receive their progress/executed events.
+        client_id = _comfyui_events.client_id if _comfyui_events is not None else str(_uuid.uuid4())
+        with timed_outcome(COMFYUI_PROMPT_SECONDS):
+            pid = _comfyui_post_prompt(wf, client_id)
+            update_job(DATA_DIR, jid, returning=False, prompt_id=pid, submitted_at=time.time())
+            entry = _comfyui_wait_outputs(pid, jid)
+        update_job(DATA_DIR, jid, returning=False, state=JobState.artifact_ready, outputs=entry.get("outputs", {}),
+                   first_progress_at=execution_started_at(entry), outputs_at=time.time())
         logger.info("Job %s completed successfully (prompt_id=%s)", jid, pid)
+        return "completed"
 
     except Exception as exc:
         logger.exception("Job %s failed", jid)
-        retry_count = (job.retry_count or 0) + 1
-        if retry_count <= MAX_RETRIES:
-            try:
-                update_job(DATA_DIR, jid, state=JobState.failed,
-                           error=f"attempt {retry_count - 1} failed: {exc}"[:4096])
-                params = json.loads(job.params_json) if job.params_json else {}
-                compiled = (json.loads(job.compiled_workflow)
-                            if isinstance(job.compiled_workflow, str) and job.compiled_workflow
-                            else job.compiled_workflow if isinstance(job.compiled_workflow, dict)
-                            else None)
-                new_job = create_job(
-                    DATA_DIR,
-                    template_id=job.template_id,
-                    workflow_id=job.workflow_id,
-                    params=params,
-                    compiled_workflow=compiled,
-                    extra={"retried_from": jid, "retry_count": retry_count},
-                )
-                update_job(DATA_DIR, new_job.job_id, retry_count=retry_count)
-                logger.info("Job %s failed; requeued (attempt %d/%d)", jid, retry_count, MAX_RETRIES + 1)
-            except Exception as retry_exc:
-                logger.error("Job %s retry failed: %s", jid, retry_exc)
-                update_job(DATA_DIR, jid, state=JobState.failed,
-                           error=f"retry failed: {retry_exc}"[:4096])
-        else:
-            update_job(DATA_DIR, jid, state=JobState.failed, error=str(exc)[:4096])
-            logger.error("Job %s permanently failed after %d attempts", jid, retry_count)
+        _handle_job_failure(job, exc)
+        return "failed"
 
 
 # ── Outbox delivery ───────────────────────────────────────────────────────────
+# Runs apart from job dispatch (own thread / own task); see dashboard/outbox_delivery.py.
 
-def process_outbox() -> None:
-    entries = get_pending_outbox(DATA_DIR, max_attempts=PUBLISH_MAX_ATTEMPTS)
-    for entry in entries:
-        key = entry.get("idempotency_key")
-        row_id = entry["id"]
-        try:
-            r = _outbox_client.post(
-                entry["webhook_url"],
-                json=json.loads(entry["payload_json"]),
-                headers={"X-Idempotency-Key": key or ""},
-            )
-            r.raise_for_status()
-            if key:
-                mark_outbox_delivered(DATA_DIR, key)
-            else:
-                # No idempotency_key — mark by row_id directly
-                mark_outbox_delivered_by_id(DATA_DIR, row_id)
-            # Transition job to published
-            job = get_job(DATA_DIR, entry["job_id"])
-            if job and job.state == JobState.publish_enqueued:
-                update_job(DATA_DIR, entry["job_id"], state=JobState.published,
-                           publish_status="published")
-            logger.info("Outbox entry %d delivered for job %s", row_id, entry["job_id"])
-        except Exception as exc:
-            record_outbox_attempt(DATA_DIR, row_id, error=str(exc))
-            logger.warning("Outbox entry %d delivery failed: %s", row_id, exc)
+def _make_outbox_dispatcher() -> OutboxDispatcher:
+    return OutboxDispatcher(
+        DATA_DIR,
+        max_attempts=PUBLISH_MAX_ATTEMPTS,
+        interval=OUTBOX_CHECK_SEC,
+        max_concurrency=OUTBOX_CONCURRENCY,
+        per_host_limit=OUTBOX_PER_HOST,
+        failure_threshold=OUTBOX_BREAKER_FAILURES,
+        reset_after=OUTBOX_BREAKER_RESET_SEC,
+        timeout=OUTBOX_TIMEOUT_SEC,
+    )
 
 
 # ── Schedule firing ───────────────────────────────────────────────────────────
@@ -254,6 +352,8 @@ def fire_due_schedules() -> None:
                 workflow_id=sched.get("workflow_id"),
                 params=params,
                 extra={"fired_by_schedule": sid},
+                priority=PRIORITY_BULK,
+                source=f"schedule:{sid}",
             )
             tick_schedule(DATA_DIR, sid, sched["cron_expr"])
             logger.info("Fired schedule %s", sid)
@@ -261,19 +361,296 @@ def fire_due_schedules() -> None:
             logger.error("Failed to fire schedule %s: %s", sid, exc)
 
 
+# ── Async engine (WORKER_ENGINE=async) ────────────────────────────────────────
+# Every claimed job is a task on one event loop rather than a blocked thread. A
+# job is only claimed once one of the WORKER_COMFYUI_MAX_SUBMITTED ComfyUI slots
+# is free, so everything still waiting stays in the queue in claim_jobs order
+# (priority, fair share). SQLite
+# calls run via asyncio.to_thread on the default executor (each thread keeps a
+# pooled connection).
+
+async def _comfyui_history_entry_async(client: AsyncComfyUIClient, prompt_id: str) -> dict[str, Any] | None:
+    try:
+        return await client.history_entry(prompt_id)
+    except (httpx.RequestError, httpx.HTTPStatusError, json.JSONDecodeError) as exc:
+        logger.debug("ComfyUI history poll for %s: %s", prompt_id, exc)
+        return None
+
+
+async def _comfyui_wait_outputs_async(
+    client: AsyncComfyUIClient,
+    stream: AsyncComfyUIEventStream | None,
+    prompt_id: str,
+    job_id: str,
+    timeout: int = 600,
+) -> dict[str, Any]:
+    """Async counterpart of ``_comfyui_wait_outputs``."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    poll_interval = 3.0
+    waiter = stream.track(prompt_id) if stream is not None else None
+    try:
+        while loop.time() < deadline:
+            fresh = await asyncio.to_thread(get_job, DATA_DIR, job_id)
+            if fresh and fresh.state == JobState.cancelling:
+                raise RuntimeError(f"Job {job_id} cancelled during execution")
+            if waiter is not None and stream is not None and stream.connected:
+                finished = await waiter.wait_async(min(COMFYUI_WS_FALLBACK_SEC, max(0.0, deadline - loop.time())))
+                if finished:
+                    if waiter.error:
+                        raise RuntimeError(f"ComfyUI prompt {prompt_id} failed: {waiter.error}")
+                    if waiter.outputs:
+                        return waiter.history_entry()
+                    waiter = None  # finished without output events — let /history decide
+                entry = await _comfyui_history_entry_async(client, prompt_id)
+                if entry:
+                    return entry
+                continue
+            entry = await _comfyui_history_entry_async(client, prompt_id)
+            if entry:
+                return entry
+            await asyncio.sleep(poll_interval)
+            poll_interval = min(poll_interval * 1.5, 15.0)
+    finally:
+        if stream is not None:
+            stream.untrack(prompt_id)
+    raise TimeoutError(f"ComfyUI did not finish prompt {prompt_id} within {timeout}s")
+
+
+async def execute_job_async(
+    job: OrchestrationJob,
+    client: AsyncComfyUIClient,
+    stream: AsyncComfyUIEventStream | None,
+    submit_limit: asyncio.Semaphore,
+) -> None:
+    started = time.perf_counter()
+    outcome = await _execute_job_async(job, client, stream, submit_limit)
+    JOB_EXECUTION_SECONDS.labels(outcome).observe(time.perf_counter() - started)
+
+
+async def _execute_job_async(
+    job: OrchestrationJob,
+    client: AsyncComfyUIClient,
+    stream: AsyncComfyUIEventStream | None,
+    submit_limit: asyncio.Semaphore,
+) -> str:
+    """Run one claimed job; the engine acquired a ``submit_limit`` slot for it when claiming.
+
+    The slot is released as soon as ComfyUI is done with the job (or it never got there).
+    """
+    import uuid as _uuid
+
+    jid = job.job_id
+    logger.info("Executing job %s (template=%s workflow=%s)", jid, job.template_id, job.workflow_id)
+    try:
+        try:
+            if await asyncio.to_thread(_cancel_if_requested, job):
+                return "cancelled"
+            wf = await asyncio.to_thread(_compile_job_workflow, job)
+            compiled_at = time.time()
+            await asyncio.to_thread(
+                update_job, DATA_DIR, jid, returning=False, state=JobState.running, compiled_workflow=json.dumps(wf),
+                compiled_at=compiled_at,
+            )
+            client_id = stream.client_id if stream is not None else str(_uuid.uuid4())
+            with timed_outcome(COMFYUI_PROMPT_SECONDS):
+                pid = await client.queue_prompt(wf, client_id)
+                await asyncio.to_thread(update_job, DATA_DIR, jid, returning=False, prompt_id=pid, submitted_at=time.time())
+                entry = await _comfyui_wait_outputs_async(client, stream, pid, jid)
+        finally:
+            submit_limit.release()
+        await asyncio.to_thread(
+            update_job, DATA_DIR, jid, returning=False, state=JobState.artifact_ready, outputs=entry.get("outputs", {}),
+            first_progress_at=execution_started_at(entry), outputs_at=time.time(),
+        )
+        logger.info("Job %s completed successfully (prompt_id=%s)", jid, pid)
+        return "completed"
+
+    except Exception as exc:
+        logger.exception("Job %s failed", jid)
+        await asyncio.to_thread(_handle_job_failure, job, exc)
+        return "failed"
+
+
+async def _run_periodic(
+    name: str,
+    interval: float,
+    fn: Callable[[], Awaitable[None]],
+    shutdown: asyncio.Event,
+    *,
+    run_first: bool = True,
+) -> None:
+    if not run_first:
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(shutdown.wait(), interval)
+    while not shutdown.is_set():
+        try:
+            await fn()
+        except Exception as exc:
+            logger.error("%s error: %s", name, exc)
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(shutdown.wait(), interval)
+
+
+async def run_async_engine(shutdown: asyncio.Event) -> None:
+    """Claim and run jobs as tasks until ``shutdown`` is set, then drain in-flight jobs."""
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+    wake.set()
+
+    async def _relay_shutdown() -> None:
+        await shutdown.wait()
+        wake.set()
+
+    if _wakeup.active:
+        def _on_wakeup() -> None:
+            _wakeup.drain()
+            wake.set()
+        loop.add_reader(_wakeup.fileno(), _on_wakeup)
+
+    stream: AsyncComfyUIEventStream | None = None
+    if COMFYUI_WS_ENABLED:
+        candidate = AsyncComfyUIEventStream(COMFYUI_URL)
+        if candidate.start():
+            stream = candidate
+    client = AsyncComfyUIClient(COMFYUI_URL, max_connections=min(WORKER_COMFYUI_MAX_SUBMITTED * 2, 100))
+    outbox = _make_outbox_dispatcher()
+    submit_limit = asyncio.Semaphore(WORKER_COMFYUI_MAX_SUBMITTED)
+    inflight: set[asyncio.Task[None]] = set()
+
+    def _on_job_done(task: asyncio.Task[None]) -> None:
+        inflight.discard(task)
+        wake.set()  # a finished job frees a slot
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Job task %s crashed: %s", task.get_name(), task.exception())
+
+    async def _vacuum() -> None:
+        if not inflight:
+            await asyncio.to_thread(vacuum_db, DATA_DIR)
+
+    async def _heartbeat() -> None:
+        HEARTBEAT_PATH.write_text(str(int(time.time())), encoding="utf-8")
+
+    # Outbox delivery is its own task so a slow webhook never delays claiming.
+    outbox_task = loop.create_task(outbox.serve(shutdown), name="outbox-delivery")
+    background = [
+        loop.create_task(_relay_shutdown()),
+        loop.create_task(_run_periodic("Schedule check", SCHEDULE_CHECK_SEC,
+                                       lambda: asyncio.to_thread(fire_due_schedules), shutdown)),
+        loop.create_task(_run_periodic("WAL checkpoint", WAL_CHECKPOINT_SEC,
+                                       lambda: asyncio.to_thread(_db_maintenance), shutdown)),
+        loop.create_task(_run_periodic("Vacuum", VACUUM_SEC, _vacuum, shutdown, run_first=False)),
+        loop.create_task(_run_periodic("Heartbeat", HEARTBEAT_SEC, _heartbeat, shutdown)),
+    ]
+    if RETENTION_SEC > 0:
+        background.append(loop.create_task(_run_periodic("Retention", RETENTION_SEC,
+                                                         lambda: asyncio.to_thread(_retention), shutdown)))
+    if _wakeup.active:
+        idle_timeout = WORKER_IDLE_POLL_SEC if WORKER_IDLE_POLL_SEC > 0 else None
+    else:
+        idle_timeout = WORKER_POLL_SEC
+
+    try:
+        while not shutdown.is_set():
+            # Cleared before claiming so a wakeup that lands mid-claim is not lost.
+            wake.clear()
+            # Reserve ComfyUI submit slots first and claim only that many jobs: the rest
+            # keep their queue position (and claimed_at stays honest) until a slot frees.
+            reserved = 0
+            while not submit_limit.locked():
+                await submit_limit.acquire()
+                reserved += 1
+            if reserved:
+                jobs = await asyncio.to_thread(_claim_jobs, reserved)
+                for _ in range(reserved - len(jobs)):
+                    submit_limit.release()
+                for job in jobs:
+                    task = loop.create_task(
+                        execute_job_async(job, client, stream, submit_limit), name=f"job-{job.job_id}"
+                    )
+                    inflight.add(task)
+                    task.add_done_callback(_on_job_done)
+            timeout = idle_timeout
+            if _wakeup.active:
+                # Delayed jobs send no wakeup when they fall due; sleep until the next one.
+                due_at = await asyncio.to_thread(next_due_job_at, DATA_DIR)
+                if due_at is not None:
+                    until_due = _idle_timeout(time.time(), [due_at])
+                    timeout = until_due if timeout is None else min(timeout, until_due)
+            with contextlib.suppress(TimeoutError):
+                await asyncio.wait_for(wake.wait(), timeout)
+    finally:
+        if inflight:
+            logger.info("Waiting for %d in-flight job(s) to finish...", len(inflight))
+            _, pending = await asyncio.wait(set(inflight), timeout=120)
+            for task in pending:
+                task.cancel()
+            logger.info("All in-flight jobs drained.")
+        shutdown.set()  # also when leaving on an error, so serve() drains and returns
+        _, pending = await asyncio.wait({outbox_task}, timeout=OUTBOX_TIMEOUT_SEC + 10)
+        for task in pending:
+            task.cancel()
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        if _wakeup.active:
+            loop.remove_reader(_wakeup.fileno())
+        if stream is not None:
+            await stream.stop_async()
+        await client.aclose()
+
+
+async def _amain() -> None:
+    loop = asyncio.get_running_loop()
+    shutdown = asyncio.Event()
+
+    def _on_signal(signum: int) -> None:
+        logger.info("Received signal %s — draining in-flight jobs before exit", signal.Signals(signum).name)
+        shutdown.set()
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, _on_signal, signum)
+    await run_async_engine(shutdown)
+
+
+# ── Maintenance ───────────────────────────────────────────────────────────────
+
+def _retention() -> None:
+    """Move expired jobs and delivered outbox rows to the archive (see dashboard/job_retention.py)."""
+    stats = run_retention(DATA_DIR, RETENTION_POLICY)
+    if stats["jobs"] or stats["outbox"]:
+        logger.info("Archived %d job(s) and %d outbox row(s); freed %d blob(s), %d page(s)",
+                    stats["jobs"], stats["outbox"], stats["blobs"], stats["pages_freed"])
+
+
+def _db_maintenance() -> None:
+    """Periodic WAL checkpoint; also trims the job_events feed behind /jobs/events."""
+    checkpoint_wal(DATA_DIR)
+    pruned = prune_job_events(DATA_DIR, keep=JOB_EVENTS_KEEP)
+    if pruned:
+        logger.info("Pruned %d old job events", pruned)
+
+
 # ── Main loop ─────────────────────────────────────────────────────────────────
 
 _shutdown_requested = False
+_wakeup = WakeupListener(DATA_DIR)
 
 
 def _handle_shutdown(signum: int, _frame: Any) -> None:
     global _shutdown_requested  # noqa: PLW0603
     logger.info("Received signal %s — draining in-flight jobs before exit", signal.Signals(signum).name)
     _shutdown_requested = True
+    _wakeup.wake()
+
+
+def _idle_timeout(now: float, deadlines: list[float]) -> float:
+    """Seconds to block on the wakeup socket before the next periodic task is due."""
+    return max(0.0, min(deadlines) - now)
 
 
 def main() -> None:
-    global _shutdown_requested  # noqa: PLW0603
+    global _shutdown_requested, _comfyui_events  # noqa: PLW0603
     logger.info(
         "Worker starting. DATA_DIR=%s COMFYUI_URL=%s CONCURRENCY=%s",
         DATA_DIR,
@@ -289,13 +666,40 @@ def main() -> None:
     if recovered:
         logger.warning("Recovered %d stale running/validated jobs → requeued", recovered)
 
+    if _wakeup.open():
+        logger.info("Listening for queue wakeups on %s", _wakeup.path)
+
+    try:
+        if start_metrics_server(WORKER_METRICS_PORT):
+            logger.info("Serving Prometheus metrics on :%d/metrics", WORKER_METRICS_PORT)
+    except OSError as exc:
+        logger.warning("Metrics listener on port %d not started: %s", WORKER_METRICS_PORT, exc)
+
+    if WORKER_ENGINE == "async":
+        logger.info("Async engine: COMFYUI_MAX_SUBMITTED=%s", WORKER_COMFYUI_MAX_SUBMITTED)
+        asyncio.run(_amain())
+        _shutdown_worker()
+        return
+    if WORKER_ENGINE != "thread":
+        logger.warning("Unknown WORKER_ENGINE=%r — using the thread engine", WORKER_ENGINE)
+
+    if COMFYUI_WS_ENABLED:
+        stream = ComfyUIEventStream(COMFYUI_URL)
+        if stream.start():
+            _comfyui_events = stream
+
+    outbox = _make_outbox_dispatcher()
+    outbox.start()
+
     last_schedule_check = 0.0
-    last_outbox_check = 0.0
     last_wal_checkpoint = 0.0
+    last_retention = 0.0
     last_vacuum = time.time()
     with concurrent.futures.ThreadPoolExecutor(max_workers=WORKER_CONCURRENCY) as pool:
         inflight: dict[concurrent.futures.Future[None], str] = {}
 
+        check_queue = True
+        last_queue_check = 0.0
         while not _shutdown_requested:
             done = [future for future in inflight if future.done()]
             for future in done:
@@ -305,19 +709,14 @@ def main() -> None:
                 except Exception:
                     logger.exception("Worker thread crashed while processing job %s", jid)
 
-            while len(inflight) < WORKER_CONCURRENCY:
-                job = claim_next_job(DATA_DIR)
-                if not job:
-                    break
-                future = pool.submit(execute_job, job)
-                inflight[future] = job.job_id
-
-            if time.time() - last_outbox_check >= OUTBOX_CHECK_SEC:
-                try:
-                    process_outbox()
-                except Exception as exc:
-                    logger.error("Outbox processing error: %s", exc)
-                last_outbox_check = time.time()
+            free_slots = WORKER_CONCURRENCY - len(inflight)
+            if check_queue and free_slots > 0:
+                last_queue_check = time.time()
+                for job in _claim_jobs(free_slots):
+                    future = pool.submit(execute_job, job)
+                    # A finished job frees a slot — wake the loop to refill it.
+                    future.add_done_callback(lambda _f: _wakeup.wake())
+                    inflight[future] = job.job_id
 
             if time.time() - last_schedule_check >= SCHEDULE_CHECK_SEC:
                 try:
@@ -328,11 +727,18 @@ def main() -> None:
 
             if time.time() - last_wal_checkpoint >= WAL_CHECKPOINT_SEC:
                 try:
-                    checkpoint_wal(DATA_DIR)
+                    _db_maintenance()
                 except Exception as exc:
                     logger.error("WAL checkpoint error: %s", exc)
                 last_wal_checkpoint = time.time()
 
+            if RETENTION_SEC > 0 and time.time() - last_retention >= RETENTION_SEC:
+                try:
+                    _retention()
+                except Exception as exc:
+                    logger.error("Retention error: %s", exc)
+                last_retention = time.time()
+
             if time.time() - last_vacuum >= VACUUM_SEC and not inflight:
                 def _on_vacuum_done(f):
                     exc = f.exception()
@@ -343,7 +749,29 @@ def main() -> None:
                 last_vacuum = time.time()
 
             HEARTBEAT_PATH.write_text(str(int(time.time())), encoding="utf-8")
-            time.sleep(WORKER_POLL_SEC)
+            if _wakeup.active:
+                # Only touch the queue when notified (new job, finished job) or
+                # when the optional safety-net interval has elapsed.
+                now = time.time()
+                deadlines = [
+                    last_schedule_check + SCHEDULE_CHECK_SEC,
+                    last_wal_checkpoint + WAL_CHECKPOINT_SEC,
+                    now + HEARTBEAT_SEC,
+                ]
+                if RETENTION_SEC > 0:
+                    deadlines.append(last_retention + RETENTION_SEC)
+                if WORKER_IDLE_POLL_SEC > 0:
+                    deadlines.append(last_queue_check + WORKER_IDLE_POLL_SEC)
+                # Delayed jobs send no wakeup when they fall due; sleep until the next one.
+                due_at = next_due_job_at(DATA_DIR)
+                if due_at is not None:
+                    deadlines.append(due_at)
+                woken = _wakeup.wait(_idle_timeout(now, deadlines))
+                check_queue = woken or (
+                    WORKER_IDLE_POLL_SEC > 0 and time.time() - last_queue_check >= WORKER_IDLE_POLL_SEC
+                ) or (due_at is not None and time.time() >= due_at)
+            else:
+                time.sleep(WORKER_POLL_SEC)
 
         # Drain in-flight jobs before exiting
         if inflight:
@@ -356,12 +784,21 @@ def main() -> None:
                     logger.exception("Job %s failed during shutdown drain", jid)
             logger.info("All in-flight jobs drained.")
 
-        # Final WAL checkpoint — ensure all writes are flushed to the main DB file
-        try:
-            checkpoint_wal(DATA_DIR)
-        except Exception as exc:
-            logger.error("Final WAL checkpoint failed: %s", exc)
+    outbox.stop()
+    if _comfyui_events is not None:
+        _comfyui_events.stop()
+        _comfyui_events = None
+    _shutdown_worker()
 
+
+def _shutdown_worker() -> None:
+    # Final WAL checkpoint — ensure all writes are flushed to the main DB file
+    try:
+        checkpoint_wal(DATA_DIR)
+    except Exception as exc:
+        logger.error("Final WAL checkpoint failed: %s", exc)
+    _wakeup.close()
+    close_connections()
     logger.info("Worker shut down gracefully.")
 
 